@@ -0,0 +1,27 @@
+"""
+Skill instructions (skills/<name>/SKILL.md) for the ADK sub-agents.
+
+Kept free of ADK imports so offline jobs (services/cache_warmer.py) can give
+a plain Gemini model the same instructions as the live sub-agent.
+"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Base path for skills folder
+SKILLS_DIR = os.path.join(os.path.dirname(__file__), "..", "skills")
+
+
+def load_skill_instructions(skill_name: str) -> str:
+    """Load the instruction text from a SKILL.md file."""
+    skill_path = os.path.join(SKILLS_DIR, skill_name, "SKILL.md")
+    if not os.path.exists(skill_path):
+        logger.warning(f"Skill not found: {skill_path}")
+        return f"You are the {skill_name} agent."
+    with open(skill_path, "r") as f:
+        content = f.read()
+    # Strip YAML frontmatter (--- ... ---)
+    parts = content.split("---")
+    return parts[-1].strip() if len(parts) > 2 else content
@@ -7,24 +7,9 @@ from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
 from google.adk.tools import google_search
 from mcp import StdioServerParameters
 
-logger = logging.getLogger(__name__)
-
-
-# Base path for skills folder
-SKILLS_DIR = os.path.join(os.path.dirname(__file__), "..", "skills")
+from agents.skills import SKILLS_DIR, load_skill_instructions
 
-
-def load_skill_instructions(skill_name: str) -> str:
-    """Load the instruction text from a SKILL.md file."""
-    skill_path = os.path.join(SKILLS_DIR, skill_name, "SKILL.md")
-    if not os.path.exists(skill_path):
-        logger.warning(f"Skill not found: {skill_path}")
-        return f"You are the {skill_name} agent."
-    with open(skill_path, "r") as f:
-        content = f.read()
-    # Strip YAML frontmatter (--- ... ---)
-    parts = content.split("---")
-    return parts[-1].strip() if len(parts) > 2 else content
+logger = logging.getLogger(__name__)
 
 
 def _web_search_tools() -> list:
@@ -0,0 +1,71 @@
+"""
+Admin API — scheduled job run history for dashboards and alerting.
+
+GET /admin/jobs/runs lists recent rows of job_runs (migration 024): every
+scheduled job records one per run (services/job_metrics.py), and the
+resumable jobs one per period with their checkpoint. Grafana (JSON/Infinity
+datasource) or an uptime checker can poll it; live duration/staleness
+metrics are on /metrics (scheduler_job_*).
+
+Requests need `X-Admin-Token: <ADMIN_API_TOKEN>`; with no token configured
+the endpoints return 503.
+"""
+import asyncio
+import secrets
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from core.config import settings
+from db.supabase_client import get_supabase
+
+router = APIRouter()
+
+_RUN_COLUMNS = (
+    "run_id, job, period, status, cursor, done, failed, retries, outcomes, last_error, "
+    "started_at, updated_at, finished_at"
+)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin API disabled (ADMIN_API_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def _ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _run_view(row: dict, now: datetime) -> dict:
+    """A job_runs row plus duration and a stalled flag (running with no progress for too long)."""
+    started, updated, finished = _ts(row.get("started_at")), _ts(row.get("updated_at")), _ts(row.get("finished_at"))
+    end = finished or now
+    idle = (now - updated).total_seconds() if updated else 0.0
+    return {
+        **row,
+        "seconds": round((end - started).total_seconds(), 1) if started else None,
+        "stalled": row.get("status") == "running" and idle > settings.JOB_STALLED_AFTER_SECS,
+    }
+
+
+@router.get("/jobs/runs", dependencies=[Depends(require_admin)])
+async def list_job_runs(
+    job: Optional[str] = None,
+    status: Optional[Literal["running", "completed", "failed"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Most recent scheduled job runs, newest first, optionally for one job / status."""
+    def _fetch():
+        query = get_supabase().table("job_runs").select(_RUN_COLUMNS)
+        if job:
+            query = query.eq("job", job)
+        if status:
+            query = query.eq("status", status)
+        return query.order("started_at", desc=True).limit(limit).execute()
+
+    res = await asyncio.to_thread(_fetch)
+    now = datetime.now(timezone.utc)
+    return {"runs": [_run_view(row, now) for row in res.data or []]}
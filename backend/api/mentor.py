@@ -13,19 +13,24 @@ SARGVISION AI — Mentor Chat Endpoint (v2)
   6. Background memory storage (asyncio.create_task, fire-and-forget)
 """
 import asyncio
+import json
 import logging
+from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from agents.lead_mentor import get_orchestratorResponse
 from api.auth import get_current_user
 from db.supabase_client import get_supabase_anon
 from guardrails import check_input_fast, filter_output_fast
-from memory import add_turn, delete_memories, delete_memory, get_all_memories, search_memories
+from memory import add_turn, delete_memories, delete_memory, iter_memories, list_memories, search_memories
+from memory.write_queue import get_write_queue
 from services.gamification import add_xp_and_update_streak
 from services.persona_engine import get_profile
-from services.semantic_cache import cache
+from services.semantic_cache import get_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -75,8 +80,11 @@ async def mentor_chat(req: ChatRequest, user: dict = Depends(get_current_user)):
             "memory": None,
         }
 
-    # ── 1.5 SEMANTIC CACHE CHECK ──────────────────────────────────────────────
-    cached_reply = await asyncio.to_thread(cache.get_cached_response, req.message)
+    # ── 1.5 SEMANTIC CACHE CHECK (skipped until the background warm-up finishes)
+    cache = get_cache()
+    cached_reply = (
+        await asyncio.to_thread(cache.get_cached_response, req.message, namespace="mentor") if cache else None
+    )
     if cached_reply:
         return {
             "reply": cached_reply,
@@ -146,19 +154,32 @@ async def mentor_chat(req: ChatRequest, user: dict = Depends(get_current_user)):
     # ── 5. OUTPUT GUARDRAIL ──────────────────────────────────────────────────
     reply = filter_output_fast(reply)
 
-    # ── 6. BACKGROUND MEMORY STORAGE (fire-and-forget) ───────────────────────
-    # Student gets reply immediately; memory indexing happens in the background.
-    # AsyncMemory.add() is awaitable — schedule it as a task.
-    async def _store():
-        await add_turn(
+    # ── 6. BACKGROUND MEMORY STORAGE (write-behind queue) ────────────────────
+    # Student gets reply immediately; memory extraction + the semantic cache
+    # write are done by the durable queue workers (memory/write_queue.py).
+    queue = get_write_queue()
+    queued = "unavailable"
+    if queue is not None:
+        queued = await queue.enqueue(
             user_id=user_id,
             user_message=req.message,
             assistant_message=reply,
+            cache_namespace="mentor",
         )
-        # ── 6.5 UPDATE SEMANTIC CACHE (background) ──────────────────────────
-        await asyncio.to_thread(cache.update_cache, req.message, reply)
-
-    asyncio.create_task(_store())
+    if queued == "unavailable":
+        # No Redis stream: fall back to an in-process task (not durable)
+        async def _store():
+            await add_turn(
+                user_id=user_id,
+                user_message=req.message,
+                assistant_message=reply,
+            )
+            # ── 6.5 UPDATE SEMANTIC CACHE (background) ──────────────────────
+            cache = get_cache()
+            if cache:
+                await asyncio.to_thread(cache.update_cache, req.message, reply, namespace="mentor")
+
+        asyncio.create_task(_store())
 
     # ── 7. GAMIFICATION XP ───────────────────────────────────────────────────
     try:
@@ -181,15 +202,51 @@ async def mentor_chat(req: ChatRequest, user: dict = Depends(get_current_user)):
 
 # ── Memory management endpoints ───────────────────────────────────────────────
 
+def _fact_view(row: dict) -> dict:
+    """Listing row → the shape the Memory Dashboard reads (category under metadata, as Mem0 returns it)."""
+    return {
+        "id": row["id"],
+        "memory": row["memory"],
+        "metadata": {"category": row.get("category"), "valid_until": row.get("valid_until")},
+        "created_at": row.get("created_at"),
+        "updated_at": row.get("updated_at"),
+    }
+
+
 @router.get("/memories")
-async def get_my_memories(user: dict = Depends(get_current_user)):
+async def get_my_memories(
+    request: Request,
+    limit: int = Query(150, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[list[str]] = Query(None),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    user: dict = Depends(get_current_user),
+):
     """
-    Returns all stored career facts for this student.
+    Stored career facts for this student, newest first.
     Powers the Memory Dashboard page (Phase 9).
+
+    Paginated: pass `next_cursor` back as `cursor` for the next page.
+    With `Accept: application/x-ndjson` every matching fact is streamed
+    instead, one JSON object per line, fetched page by page.
     """
     user_id: str = user["user_id"]
-    memories = await get_all_memories(user_id=user_id)
-    return {"memories": memories, "count": len(memories)}
+    filters = {"categories": category, "created_after": created_after, "created_before": created_before}
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        async def _lines():
+            async for row in iter_memories(user_id=user_id, page_size=limit, **filters):
+                yield json.dumps(_fact_view(row), default=str) + "\n"
+
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+    try:
+        page = await list_memories(user_id=user_id, limit=limit, cursor=cursor, **filters)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    memories = [_fact_view(row) for row in page.memories]
+    return {"memories": memories, "count": len(memories), "next_cursor": page.next_cursor}
 
 
 @router.delete("/memories")
@@ -208,5 +265,5 @@ async def delete_single_memory(memory_id: str, user: dict = Depends(get_current_
     """
     # Note: Single deletion doesn't strictly verify ownership yet as Mem0 
     # v1 abstraction is lean, but the ID is a global UUID from the student_memories table.
-    await delete_memory(memory_id=memory_id)
+    await delete_memory(memory_id=memory_id, user_id=user["user_id"])
     return {"message": "Memory fact deleted.", "memory_id": memory_id}
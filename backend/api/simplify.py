@@ -9,6 +9,7 @@ from agents.lead_mentor import get_orchestratorResponse
 from core.config import settings
 
 from core.metrics import record_gemini_usage, AGENT_LATENCY
+from services.simplify_prompts import build_notes_prompt, build_roadmap_prompt, build_simplify_prompt
 import time
 
 logger = logging.getLogger(__name__)
@@ -27,17 +28,15 @@ async def simplify_text(req: SimplifyRequest, user: dict = Depends(get_current_u
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-    from services.semantic_cache import cache
-    cached = cache.get_cached_response(req.text, req.level, req.language)
-    if cached:
-        return {"original": req.text, "simplified": cached, "cached": True}
+    from services.cache_derivation import get_or_derive
+    from services.semantic_cache import get_cache
+    cache = get_cache()
+    if cache:
+        cached, tier = await get_or_derive(cache, req.text, req.level, req.language)
+        if cached:
+            return {"original": req.text, "simplified": cached, "cached": True, "derived": tier == "derived"}
 
-    prompt = (
-        f"I need you to simplify the following text at a '{req.level}' level "
-        f"and provide the output primarily in {req.language}. "
-        f"Please extract key concepts and give an intuitive analogy.\n\n"
-        f"TEXT TO SIMPLIFY:\n{req.text}"
-    )
+    prompt = build_simplify_prompt(req.text, req.level, req.language)
     
     start_time = time.time()
     try:
@@ -45,7 +44,8 @@ async def simplify_text(req: SimplifyRequest, user: dict = Depends(get_current_u
         duration = time.time() - start_time
         AGENT_LATENCY.labels(agent_name="SimplificationExpert").observe(duration)
         
-        cache.update_cache(req.text, response, req.level, req.language)
+        if cache:
+            cache.update_cache(req.text, response, req.level, req.language)
         return {"original": req.text, "simplified": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -72,11 +72,12 @@ async def simplify_upload(
             raise HTTPException(status_code=400, detail="Only image and PDF files are supported.")
 
         # Try cache using content hash
-        from services.semantic_cache import cache
+        from services.semantic_cache import get_cache
+        cache = get_cache()
         import hashlib
         content_hash = hashlib.md5(contents).hexdigest()
         cache_key = f"document:{content_hash}"
-        cached = cache.get_cached_response(cache_key, level, language)
+        cached = cache and cache.get_cached_response(cache_key, level, language)
         if cached:
             return {"status": "success", "simplified": cached, "cached": True}
 
@@ -108,7 +109,8 @@ async def simplify_upload(
         AGENT_LATENCY.labels(agent_name="OCR_Simplifier").observe(duration)
         
         simplified_text = response.text.strip()
-        cache.update_cache(cache_key, simplified_text, level, language)
+        if cache:
+            cache.update_cache(cache_key, simplified_text, level, language)
         
         return {
             "status": "success",
@@ -127,21 +129,18 @@ async def simplify_notes(req: SimplifyRequest, user: dict = Depends(get_current_
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-    from services.semantic_cache import cache
-    cached = cache.get_cached_response(f"notes:{req.text}", req.level, req.language)
+    from services.semantic_cache import get_cache
+    cache = get_cache()
+    cached = cache and cache.get_cached_response(f"notes:{req.text}", req.level, req.language, record_miss=True)
     if cached:
         return {"original": req.text, "notes": cached, "cached": True}
 
-    prompt = (
-        f"Please generate structured study notes for the following text. "
-        f"I need the output in {req.language} at a '{req.level}' level. "
-        f"Follow the 'Structured Notes Generation' format from your skill definition.\n\n"
-        f"TEXT FOR NOTES:\n{req.text}"
-    )
+    prompt = build_notes_prompt(req.text, req.level, req.language)
     
     try:
         response = get_orchestratorResponse(user, prompt)
-        cache.update_cache(f"notes:{req.text}", response, req.level, req.language)
+        if cache:
+            cache.update_cache(f"notes:{req.text}", response, req.level, req.language)
         return {"original": req.text, "notes": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -167,11 +166,12 @@ async def simplify_notes_upload(
             raise HTTPException(status_code=400, detail="Only image and PDF files are supported.")
 
         # Try cache
-        from services.semantic_cache import cache
+        from services.semantic_cache import get_cache
+        cache = get_cache()
         import hashlib
         content_hash = hashlib.md5(contents).hexdigest()
         cache_key = f"notes:document:{content_hash}"
-        cached = cache.get_cached_response(cache_key, level, language)
+        cached = cache and cache.get_cached_response(cache_key, level, language)
         if cached:
             return {"status": "success", "notes": cached, "cached": True}
 
@@ -194,7 +194,8 @@ async def simplify_notes_upload(
         )
         
         notes_text = response.text.strip()
-        cache.update_cache(cache_key, notes_text, level, language)
+        if cache:
+            cache.update_cache(cache_key, notes_text, level, language)
         
         return {
             "status": "success",
@@ -213,21 +214,19 @@ async def simplify_roadmap(req: SimplifyRequest, user: dict = Depends(get_curren
     if not req.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-    from services.semantic_cache import cache
-    cached = cache.get_cached_response(f"roadmap:{req.text}", req.level, req.language)
+    from services.semantic_cache import get_cache
+    cache = get_cache()
+    cached = cache and cache.get_cached_response(f"roadmap:{req.text}", req.level, req.language, record_miss=True)
     if cached:
         return {"original": req.text, "roadmap": cached, "cached": True}
 
-    prompt = (
-        f"Please generate a Career Roadmap for the following topic: '{req.text}'. "
-        f"Show how this academic concept connects to real-world roles in {req.language}. "
-        f"Incorporate industry-specific skills and growth trajectories."
-    )
+    prompt = build_roadmap_prompt(req.text, req.level, req.language)
     
     try:
         # We'll use the orchestrator to trigger the CareerPathExpert
         response = get_orchestratorResponse(user, prompt)
-        cache.update_cache(f"roadmap:{req.text}", response, req.level, req.language)
+        if cache:
+            cache.update_cache(f"roadmap:{req.text}", response, req.level, req.language)
         return {"original": req.text, "roadmap": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -250,11 +249,12 @@ async def simplify_roadmap_upload(
         mime_type = file.content_type
         
         # Try cache
-        from services.semantic_cache import cache
+        from services.semantic_cache import get_cache
+        cache = get_cache()
         import hashlib
         content_hash = hashlib.md5(contents).hexdigest()
         cache_key = f"roadmap:document:{content_hash}"
-        cached = cache.get_cached_response(cache_key, level, language)
+        cached = cache and cache.get_cached_response(cache_key, level, language)
         if cached:
             return {"status": "success", "roadmap": cached, "cached": True}
 
@@ -277,7 +277,8 @@ async def simplify_roadmap_upload(
         )
         
         roadmap_text = response.text.strip()
-        cache.update_cache(cache_key, roadmap_text, level, language)
+        if cache:
+            cache.update_cache(cache_key, roadmap_text, level, language)
         
         return {
             "status": "success",
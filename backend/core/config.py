@@ -43,6 +43,59 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
 
+    # Semantic cache vector index (see services/cache_vectors.py)
+    SEMANTIC_CACHE_VECTOR_TYPE: str = "FLOAT32"      # FLOAT32, FLOAT16, INT8 (rescored)
+    SEMANTIC_CACHE_INDEX_ALGORITHM: str = "HNSW"     # HNSW, FLAT
+    SEMANTIC_CACHE_HNSW_M: int = 16
+    SEMANTIC_CACHE_HNSW_EF_CONSTRUCTION: int = 200
+    SEMANTIC_CACHE_HNSW_EF_RUNTIME: int = 10
+    SEMANTIC_CACHE_RESCORE_CANDIDATES: int = 5
+    SEMANTIC_CACHE_EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
+    SEMANTIC_CACHE_EMBEDDING_DIM: int = 384
+    SEMANTIC_CACHE_VECTOR_FIELD: str = "embedding"   # hash field per model (services/cache_reembed.py)
+
+    # Memory write-behind queue (see memory/write_queue.py)
+    MEMORY_WRITE_QUEUE_CONCURRENCY: int = 4          # concurrent Mem0 add calls per instance
+    MEMORY_WRITE_QUEUE_MAX_BACKLOG: int = 5000       # shed new turns above this many queued
+    MEMORY_PREFILTER_ENABLED: bool = True            # skip extraction for turns without facts (memory/prefilter.py)
+    MEMORY_SEARCH_RANKING_ENABLED: bool = True       # category/recency/dedup ranking in match_vectors (memory/ranking.py)
+
+    # Memory embeddings (see memory/embedder.py) — switching requires scripts/reembed_memories.py
+    MEMORY_EMBEDDER: str = "google"                  # google (text-embedding-004), local (fastembed, CPU)
+    MEMORY_LOCAL_EMBEDDING_MODEL: str = "BAAI/bge-base-en-v1.5"
+    MEMORY_EMBEDDING_DIMS: int = 768                 # student_memories vector column (memory/reembed.py to change)
+    MEMORY_EMBED_BATCH_SIZE: int = 32
+    MEMORY_EMBED_BATCH_WAIT_MS: float = 5.0          # max wait for concurrent embeds to join a batch
+
+    # Process roles (see worker.py): `python -m worker` runs jobs + queue consumers
+    PROCESS_ROLE: str = "all"                        # API: all (also runs the worker side, single instance), web (enqueue only)
+    WORKER_CONCURRENCY: int = 2                      # queued tasks (whole jobs) run at once per worker
+    WORKER_PORT: int = 8090                          # worker /health + /metrics
+
+    # Scheduler leader election across replicas (see services/leader.py)
+    SCHEDULER_LEADER_ELECTION: bool = True           # false: this process always runs jobs (single instance)
+    SCHEDULER_LEASE_SECS: float = 30.0
+    SCHEDULER_LEASE_RENEW_SECS: float = 10.0
+
+    # Scheduler per-user jobs (see services/job_runner.py)
+    DB_PAGE_SIZE: int = 1000                         # keyset page for table scans (db/keyset.py); <= PostgREST max-rows
+    JOB_CONCURRENCY: int = 16                        # students processed in parallel per job
+    JOB_ITEM_TIMEOUT_SECS: float = 120.0             # per student, per attempt
+    JOB_ITEM_RETRIES: int = 2                        # extra attempts after a failure or timeout
+    JOB_NUDGE_BATCH_SIZE: int = 50                   # students per batched nudge request (services/llm_batch.py)
+    JOB_REPORT_BATCH_SIZE: int = 12                  # students per batched monthly report request
+    JOB_LLM_BATCH_WAIT_SECS: float = 2.0             # max wait for a batch to fill
+
+    # Job observability (see services/job_metrics.py, api/admin.py)
+    ADMIN_API_TOKEN: str = ""                        # X-Admin-Token for /admin; empty disables it
+    JOB_STALLED_AFTER_SECS: float = 3600.0           # running run with no progress this long → stalled
+
+    # Deadline alerts + bulk WhatsApp (see services/alert_planner.py, services/whatsapp_bulk.py)
+    ALERT_TOP_N: int = 3                             # closing opportunities per student, merged into one message
+    ALERT_MIN_SCORE: float = 0.35                    # min planner fit (0..1) for untracked opportunities
+    WHATSAPP_SEND_RATE_PER_SEC: float = 10.0         # Twilio sender throughput (messages/second)
+    WHATSAPP_SEND_CONCURRENCY: int = 8               # Twilio requests in flight
+
     class Config:
         env_file = ".env"
         case_sensitive = True
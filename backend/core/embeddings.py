@@ -0,0 +1,40 @@
+"""
+Shared local text encoders (fastembed, ONNX on CPU).
+
+Each model is loaded once per process and shared by every user of it:
+the semantic cache, the memory pre-filter and the local memory embedder.
+The first call for a model may download it, so never call this at import
+time or on the event loop.
+"""
+import threading
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"   # 384-dim
+
+_encoders: dict[str, "TextEmbedding"] = {}
+_load_seconds: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def get_text_embedding(model_name: str = DEFAULT_MODEL) -> "TextEmbedding":
+    """Load (once) and return the fastembed encoder for `model_name`. Thread-safe."""
+    encoder = _encoders.get(model_name)
+    if encoder is not None:
+        return encoder
+    with _lock:
+        if model_name not in _encoders:
+            from fastembed import TextEmbedding
+
+            started = time.perf_counter()
+            _encoders[model_name] = TextEmbedding(model_name=model_name)
+            _load_seconds[model_name] = time.perf_counter() - started
+    return _encoders[model_name]
+
+
+def load_seconds(model_name: str = DEFAULT_MODEL) -> float:
+    """How long the first get_text_embedding(model_name) took (0.0 if not loaded)."""
+    return _load_seconds.get(model_name, 0.0)
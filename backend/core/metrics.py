@@ -1,4 +1,7 @@
-from prometheus_client import Counter, Histogram
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Gauge, Histogram
 
 # AI Token Usage
 AI_TOKEN_USAGE = Counter(
@@ -23,14 +26,211 @@ AI_COST_ESTIMATED = Counter(
     ["model"]
 )
 
+# Semantic cache start-up (built lazily in the background, see services/semantic_cache.py)
+SEMANTIC_CACHE_MODEL_LOAD_SECONDS = Gauge(
+    "semantic_cache_model_load_seconds",
+    "Time taken to load the fastembed model for the semantic cache",
+)
+
+SEMANTIC_CACHE_READY = Gauge(
+    "semantic_cache_ready",
+    "1 once the semantic cache is initialised; requests bypass it while 0",
+)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "semantic_cache_lookups_total",
+    "Semantic cache lookups by outcome",
+    ["result"],  # exact, semantic, derived (from a cached sibling variant), miss
+)
+
+# Per-user memory context cache in front of Mem0 search (memory/context_cache.py)
+MEMORY_CONTEXT_CACHE_LOOKUPS = Counter(
+    "memory_context_cache_lookups_total",
+    "Memory context cache lookups",
+    ["result"],  # hit, miss
+)
+
+MEMORY_SEARCH_SECONDS_SAVED = Counter(
+    "memory_search_seconds_saved_total",
+    "Memory search latency avoided by context cache hits (sum of the original search times)",
+)
+
+# Memory write-behind queue (memory/write_queue.py)
+MEMORY_QUEUE_ENQUEUED = Counter(
+    "memory_write_queue_enqueued_total",
+    "Chat turns offered to the memory write queue",
+    ["result"],  # queued, shed (backlog full), unavailable (Redis error)
+)
+
+MEMORY_QUEUE_TURNS = Counter(
+    "memory_write_queue_turns_total",
+    "Chat turns processed by memory queue workers",
+    ["result"],  # stored, retried, dead
+)
+
+MEMORY_QUEUE_BATCH_TURNS = Histogram(
+    "memory_write_queue_coalesced_turns",
+    "Turns stored per Mem0 add call after per-user coalescing",
+    buckets=(1, 2, 3, 5, 8, 13, 21),
+)
+
+MEMORY_QUEUE_LAG_SECONDS = Gauge(
+    "memory_write_queue_lag_seconds",
+    "Age of the oldest turn in the batch most recently processed",
+)
+
+MEMORY_QUEUE_DEPTH = Gauge(
+    "memory_write_queue_depth",
+    "Turns waiting in the memory write queue (undelivered + pending)",
+)
+
+# Local pre-filter in front of Mem0 fact extraction (memory/prefilter.py)
+MEMORY_PREFILTER_DECISIONS = Counter(
+    "memory_prefilter_decisions_total",
+    "Chat turns checked by the memory extraction pre-filter",
+    ["decision", "reason"],  # extract/skip × smalltalk, too_short, question, classifier_*
+)
+
+MEMORY_EXTRACTION_TOKENS_SAVED = Counter(
+    "memory_extraction_tokens_saved_total",
+    "Estimated Gemini input tokens not sent to Mem0 extraction because of the pre-filter",
+)
+
+# Local memory embedder (memory/embedder.py)
+MEMORY_EMBED_BATCH_TEXTS = Histogram(
+    "memory_embed_batch_texts",
+    "Texts per local embedding run after coalescing concurrent Mem0 calls",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+# Multi-student batched prompts for scheduled jobs (services/llm_batch.py)
+LLM_BATCH_REQUESTS = Counter(
+    "llm_batch_requests_total",
+    "Gemini requests made by scheduled jobs",
+    ["prompt", "kind"],  # kind: batch (many students) / single (fallback)
+)
+
+LLM_BATCH_ENTRIES = Counter(
+    "llm_batch_entries_total",
+    "Per-student results from batched job prompts",
+    ["prompt", "result"],  # batched / fallback (missing or invalid entry)
+)
+
+# Scheduler leader election across replicas (services/leader.py)
+SCHEDULER_IS_LEADER = Gauge(
+    "scheduler_is_leader",
+    "1 while this instance holds the scheduler lease",
+)
+
+SCHEDULER_LEADER_FENCE = Gauge(
+    "scheduler_leader_fence",
+    "Fencing token of the most recent lease acquired by this instance",
+)
+
+SCHEDULER_LEADER_TRANSITIONS = Counter(
+    "scheduler_leader_transitions_total",
+    "Scheduler lease changes seen by this instance",
+    ["event"],  # acquired / lost / released
+)
+
+SCHEDULER_JOB_TRIGGERS = Counter(
+    "scheduler_job_triggers_total",
+    "Cron triggers per job and what this instance did with them",
+    ["job", "result"],  # run / not_leader / locked
+)
+
+# Shared task queue / worker tier (services/task_queue.py, worker.py)
+WORKER_TASKS = Counter(
+    "worker_tasks_total",
+    "Queued tasks by name and outcome",
+    ["task", "result"],  # enqueued / done / failed / retried / dead
+)
+
+WORKER_TASK_SECONDS = Histogram(
+    "worker_task_seconds",
+    "Wall time of one task attempt on a worker",
+    ["task"],
+    buckets=(1, 5, 30, 60, 300, 900, 1800, 3600, 7200),
+)
+
+WORKER_TASKS_IN_FLIGHT = Gauge(
+    "worker_tasks_in_flight",
+    "Tasks currently running on this worker",
+)
+
+WORKER_TASK_QUEUE_DEPTH = Gauge(
+    "worker_task_queue_depth",
+    "Tasks waiting or running (undelivered + pending) in jobs:tasks",
+)
+
+# Deadline alerts + bulk WhatsApp (services/alert_planner.py, services/whatsapp_bulk.py)
+DEADLINE_ALERTS_PLANNED = Counter(
+    "deadline_alerts_planned_total",
+    "Opportunity alerts chosen by the planner",
+    ["kind"],  # tracked / matched
+)
+
+WHATSAPP_SENDS = Counter(
+    "whatsapp_sends_total",
+    "Bulk WhatsApp send attempts",
+    ["type", "result"],  # result: sent / failed / rate_limited
+)
+
+# Per-job instrumentation for scheduled jobs (services/job_metrics.py)
+current_job: ContextVar[Optional[str]] = ContextVar("scheduler_job", default=None)   # set while a job runs
+
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Wall time of one scheduled job run",
+    ["job", "status"],  # completed / failed
+    buckets=(10, 30, 60, 300, 900, 1800, 3600, 7200, 14400),
+)
+
+SCHEDULER_JOB_ITEM_SECONDS = Histogram(
+    "scheduler_job_item_seconds",
+    "Per-student latency inside a scheduled job, including retries",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+
+SCHEDULER_JOB_ITEMS = Counter(
+    "scheduler_job_items_total",
+    "Students handled by scheduled jobs",
+    ["job", "outcome"],  # work outcome (ok, nudged, skipped, ...) / already_done / failed
+)
+
+SCHEDULER_JOB_LLM_TOKENS = Counter(
+    "scheduler_job_llm_tokens_total",
+    "Gemini tokens spent inside scheduled jobs",
+    ["job", "type"],  # prompt / candidate
+)
+
+SCHEDULER_JOB_RUNNING = Gauge(
+    "scheduler_job_running",
+    "1 while the job runs in this process",
+    ["job"],
+)
+
+SCHEDULER_JOB_LAST_SUCCESS = Gauge(
+    "scheduler_job_last_success_timestamp_seconds",
+    "Unix time the job last completed in this process",
+    ["job"],
+)
+
+def estimate_gemini_cost(prompt_tokens: int, candidate_tokens: int) -> float:
+    """Estimated USD cost of one Gemini 2.0 Flash call."""
+    input_cost = (prompt_tokens / 1_000_000) * 0.10
+    output_cost = (candidate_tokens / 1_000_000) * 0.40
+    return input_cost + output_cost
+
 def record_gemini_usage(model: str, prompt_tokens: int, candidate_tokens: int):
     """
     Records token usage and estimates cost for Gemini 2.0 Flash.
     """
     AI_TOKEN_USAGE.labels(model=model, type="prompt").inc(prompt_tokens)
     AI_TOKEN_USAGE.labels(model=model, type="candidate").inc(candidate_tokens)
-    
-    # Simple cost estimation logic
-    input_cost = (prompt_tokens / 1_000_000) * 0.10
-    output_cost = (candidate_tokens / 1_000_000) * 0.40
-    AI_COST_ESTIMATED.labels(model=model).inc(input_cost + output_cost)
+    AI_COST_ESTIMATED.labels(model=model).inc(estimate_gemini_cost(prompt_tokens, candidate_tokens))
+    job = current_job.get()
+    if job is not None:
+        SCHEDULER_JOB_LLM_TOKENS.labels(job=job, type="prompt").inc(prompt_tokens)
+        SCHEDULER_JOB_LLM_TOKENS.labels(job=job, type="candidate").inc(candidate_tokens)
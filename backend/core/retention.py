@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime, timedelta, timezone
+from db.keyset import iter_rows
 from db.supabase_client import get_supabase
 
 logger = logging.getLogger(__name__)
@@ -123,16 +124,14 @@ async def check_user_retention():
     Daily job to identify at-risk users and trigger nudges.
     Threshold: score < 40
     """
-    supabase = get_supabase()
-    res = supabase.table("profiles").select("user_id").execute()
-    users = res.data or []
-    
-    logger.info(f"[Retention] Checking retention for {len(users)} users")
-    
-    for user in users:
+    checked = 0
+    async for user in iter_rows("profiles", columns="user_id"):
+        checked += 1
         user_id = user["user_id"]
         score = await calculate_engagement_score(user_id)
         logger.info(f"[Retention] User {user_id[:8]} score: {score}")
         
         if score < 40:
             await trigger_retention_nudge(user_id)
+
+    logger.info(f"[Retention] Checked retention for {checked} users")
@@ -0,0 +1,93 @@
+"""
+Keyset-paginated scans over large Supabase tables (profiles, ...).
+
+`table(...).select(...).execute()` with no limit asks for the whole table in
+one response, and PostgREST's max-rows setting (1000 on Supabase) silently
+truncates it, so scheduler jobs never reached students past the first page.
+iter_rows() walks the table by keyset instead:
+
+    select <columns> where <filters> and <key> > :last order by <key> limit :page_size
+
+Memory stays at one page, and every page is an index range scan however far
+the scan has got. Projections and filters are pushed down to PostgREST.
+A page shorter than page_size does not end the scan (max-rows may have capped
+it); only an empty page does, at the cost of one extra request.
+
+Filters are (builder method, column, value) tuples, e.g.
+("eq", "whatsapp_enabled", True) or ("in_", "user_id", ids).
+"""
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Optional
+
+from core.config import settings
+from db.supabase_client import get_supabase
+
+Filter = tuple[str, str, Any]
+
+
+def _query(client, table: str, columns: str, filters: Sequence[Filter], **select_kwargs):
+    query = client.table(table).select(columns, **select_kwargs)
+    for method, column, value in filters:
+        query = getattr(query, method)(column, value)
+    return query
+
+
+async def iter_pages(
+    table: str,
+    *,
+    columns: str,
+    key: str = "user_id",
+    filters: Sequence[Filter] = (),
+    page_size: Optional[int] = None,
+    after: Optional[str] = None,
+    client=None,
+) -> AsyncIterator[list[dict]]:
+    """
+    Pages of rows ordered by `key` (unique, indexed), starting after `after`
+    (a checkpointed cursor). `key` is added to `columns` if missing.
+    """
+    client = client or get_supabase()
+    page_size = page_size or settings.DB_PAGE_SIZE
+    if key not in {c.strip() for c in columns.split(",")}:
+        columns = f"{columns}, {key}"
+
+    last = after
+    while True:
+        def _fetch(cursor=last):
+            query = _query(client, table, columns, filters)
+            if cursor is not None:
+                query = query.gt(key, cursor)
+            return query.order(key).limit(page_size).execute()
+
+        rows = (await asyncio.to_thread(_fetch)).data or []
+        if not rows:
+            return
+        last = rows[-1][key]
+        yield rows
+
+
+async def iter_rows(
+    table: str,
+    *,
+    columns: str,
+    key: str = "user_id",
+    filters: Sequence[Filter] = (),
+    page_size: Optional[int] = None,
+    after: Optional[str] = None,
+    client=None,
+) -> AsyncIterator[dict]:
+    """Every matching row, one page in memory at a time (see iter_pages)."""
+    async for page in iter_pages(table, columns=columns, key=key, filters=filters,
+                                 page_size=page_size, after=after, client=client):
+        for row in page:
+            yield row
+
+
+async def count_rows(table: str, *, filters: Sequence[Filter] = (), key: str = "user_id", client=None) -> int:
+    """Exact count of matching rows (for progress / ETA), without fetching them."""
+    client = client or get_supabase()
+    res = await asyncio.to_thread(
+        lambda: _query(client, table, key, filters, count="exact").limit(1).execute()
+    )
+    return res.count or 0
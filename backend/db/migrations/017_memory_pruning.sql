@@ -0,0 +1,108 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 017: Set-based memory pruning
+--
+-- Replaces the per-user get_all + one-DELETE-per-fact loop in
+-- memory.prune_stale_memories() for the weekly job. One call prunes
+-- every student in two statements:
+--   1. TTL expiry   — range scan on student_memories_valid_until_idx
+--                     (text comparison; valid_until is ISO-8601 UTC)
+--   2. 150-fact cap — row_number() per user, only for users over the cap,
+--                     lowest-value categories (shortest TTL) and oldest go first
+--
+-- Category comes from metadata->>'category' when stamped, else from the
+-- "CATEGORY: ..." prefix of the fact text (metadata->>'data', as Mem0 stores it).
+--
+-- Called by: memory.prune_all_memories() ← scheduler.job_prune_memories()
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+create or replace function prune_student_memories(
+    max_facts_per_user  int,
+    category_priority   text[],            -- prune-first order, e.g. {BLOCKERS,CAREER_PREF,...}
+    now_iso             text default null  -- override for tests; defaults to now() in UTC
+)
+returns table (
+    category  text,
+    reason    text,       -- 'expired' | 'cap'
+    deleted   bigint
+)
+language plpgsql
+security definer
+as $$
+#variable_conflict use_column
+declare
+    cutoff text := coalesce(
+        now_iso,
+        to_char(now() at time zone 'utc', 'YYYY-MM-DD"T"HH24:MI:SS') || '+00:00'
+    );
+begin
+    -- Pass 1: TTL-expired facts (index range scan, no casts on the column)
+    return query
+    with removed as (
+        delete from student_memories m
+        where m.metadata->>'valid_until' < cutoff
+        returning m.metadata
+    )
+    select
+        case
+            when r.metadata ? 'category' then r.metadata->>'category'
+            when upper(split_part(r.metadata->>'data', ':', 1)) = any(category_priority)
+                then upper(split_part(r.metadata->>'data', ':', 1))
+            else 'UNKNOWN'
+        end as category,
+        'expired'::text,
+        count(*)
+    from removed r
+    group by 1;
+
+    -- Pass 2: per-user cap over what is left (separate statement so the
+    -- rows deleted above no longer count towards the cap)
+    return query
+    with heavy_users as (
+        select m.metadata->>'user_id' as user_id
+        from student_memories m
+        group by 1
+        having count(*) > max_facts_per_user
+    ),
+    categorised as (
+        select
+            m.id,
+            m.created_at,
+            m.metadata->>'user_id' as user_id,
+            case
+                when m.metadata ? 'category' then m.metadata->>'category'
+                when upper(split_part(m.metadata->>'data', ':', 1)) = any(category_priority)
+                    then upper(split_part(m.metadata->>'data', ':', 1))
+                else 'UNKNOWN'
+            end as category
+        from student_memories m
+        join heavy_users h on h.user_id = m.metadata->>'user_id'
+    ),
+    ranked as (
+        select
+            c.id,
+            c.category,
+            row_number() over (
+                partition by c.user_id
+                -- keep the most valuable (latest in category_priority), newest first
+                order by coalesce(array_position(category_priority, c.category), 0) desc,
+                         c.created_at desc
+            ) as keep_rank
+        from categorised c
+    ),
+    removed as (
+        delete from student_memories m
+        using ranked r
+        where m.id = r.id
+          and r.keep_rank > max_facts_per_user
+        returning r.category
+    )
+    select r.category, 'cap'::text, count(*)
+    from removed r
+    group by 1;
+end;
+$$;
+
+comment on function prune_student_memories(int, text[], text) is
+    'Weekly memory cleanup: deletes TTL-expired facts, then enforces the per-user '
+    'fact cap by category priority. Returns rows deleted per (category, reason).';
@@ -0,0 +1,125 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 018: Stamp category + valid_until on memory facts
+--
+-- Mem0 only writes the metadata passed to add() (source, ingested_at), so
+-- valid_until was never set and neither the TTL filter in match_vectors
+-- nor student_memories_valid_until_idx had any effect.
+--
+--   stamp_memory_ttl(facts)   — called by memory.add_turns() right after
+--                               Mem0 returns the facts it added/updated
+--   backfill_memory_ttl(...)  — one-off, batched, for rows written before
+--                               (scripts/backfill_memory_ttl.py)
+--   match_vectors             — TTL filter rewritten as a text comparison
+--
+-- valid_until format is fixed: 'YYYY-MM-DDTHH:MM:SS+00:00' (UTC, seconds),
+-- i.e. Python datetime.isoformat(timespec="seconds") on an aware UTC value,
+-- so lexical order == chronological order and the btree index applies.
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+-- Step 1: post-extraction stamping — one UPDATE for all facts of a turn
+create or replace function stamp_memory_ttl(facts jsonb)   -- [{"id", "category", "valid_until"}]
+returns int
+language plpgsql
+security definer
+as $$
+declare
+    stamped int;
+begin
+    update student_memories m
+    set metadata = m.metadata || jsonb_build_object(
+            'category',    f.category,
+            'valid_until', f.valid_until
+        )
+    from jsonb_to_recordset(facts) as f(id text, category text, valid_until text)
+    where m.id = f.id;
+    get diagnostics stamped = row_count;
+    return stamped;
+end;
+$$;
+
+-- Step 2: backfill — category from the "CATEGORY: ..." fact prefix,
+-- valid_until = created_at + that category's TTL. Call repeatedly until 0.
+create or replace function backfill_memory_ttl(
+    category_ttl_days jsonb,           -- {"ACADEMIC": 180, ..., "UNKNOWN": 90}
+    batch_size        int default 5000
+)
+returns int
+language plpgsql
+security definer
+as $$
+declare
+    stamped int;
+begin
+    with batch as (
+        select
+            m.id,
+            case
+                when m.metadata ? 'category' then m.metadata->>'category'
+                when category_ttl_days ? upper(split_part(m.metadata->>'data', ':', 1))
+                    then upper(split_part(m.metadata->>'data', ':', 1))
+                else 'UNKNOWN'
+            end as category
+        from student_memories m
+        where m.metadata->>'valid_until' is null      -- served by student_memories_valid_until_idx
+        limit batch_size
+        for update skip locked
+    )
+    update student_memories m
+    set metadata = m.metadata || jsonb_build_object(
+            'category',    b.category,
+            'valid_until', to_char(
+                (m.created_at + make_interval(days => coalesce(
+                    (category_ttl_days->>b.category)::int,
+                    (category_ttl_days->>'UNKNOWN')::int
+                ))) at time zone 'utc',
+                'YYYY-MM-DD"T"HH24:MI:SS'
+            ) || '+00:00'
+        )
+    from batch b
+    where m.id = b.id;
+    get diagnostics stamped = row_count;
+    return stamped;
+end;
+$$;
+
+-- Step 3: match_vectors — same contract, TTL check without a per-row cast
+create or replace function match_vectors(
+    query_embedding vector(768),
+    match_count     int,
+    filter          jsonb default '{}'::jsonb
+)
+returns table (
+    id          text,
+    similarity  float,
+    metadata    jsonb
+)
+language plpgsql
+security definer
+as $$
+declare
+    cutoff text := to_char(now() at time zone 'utc', 'YYYY-MM-DD"T"HH24:MI:SS') || '+00:00';
+begin
+    return query
+    select
+        m.id::text,
+        1 - (m.embedding <=> query_embedding) as similarity,
+        m.metadata
+    from student_memories m
+    where
+        -- TTL filter: skip expired memories
+        (
+            m.metadata->>'valid_until' is null
+            or m.metadata->>'valid_until' > cutoff
+        )
+        and (
+            case
+                when filter::text = '{}'::text then true
+                else m.metadata @> filter
+            end
+        )
+    order by m.embedding <=> query_embedding
+    limit match_count;
+end;
+$$;
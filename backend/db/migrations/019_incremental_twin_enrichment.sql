@@ -0,0 +1,49 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 019: Incremental Digital Twin enrichment
+--
+-- job_enrich_digital_twin used to re-summarise every profile each week.
+-- It now only visits students with facts written/updated after their
+-- profiles.memory_enriched_at, and folds just those facts into the
+-- existing memory_summary (memory.refresh_twin_summary).
+--
+--   student_memories_user_updated_idx  — per-user "changed since" probe,
+--                                        also serves the delta-fact fetch
+--   twin_enrichment_candidates(...)    — keyset-paged list of students
+--                                        whose memory changed
+--
+-- Called by: memory.twin_enrichment_candidates() ← scheduler.job_enrich_digital_twin()
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+create index if not exists student_memories_user_updated_idx
+    on student_memories ((metadata->>'user_id'), updated_at);
+
+create or replace function twin_enrichment_candidates(
+    after_user  uuid default null,    -- keyset cursor: last user_id of the previous page
+    batch_size  int  default 500
+)
+returns table (
+    user_id             uuid,
+    memory_summary      text,
+    memory_enriched_at  timestamptz
+)
+language sql
+stable
+security definer
+as $$
+    select p.user_id, p.memory_summary, p.memory_enriched_at
+    from profiles p
+    where (after_user is null or p.user_id > after_user)
+      and exists (
+          select 1
+          from student_memories m
+          where m.metadata->>'user_id' = p.user_id::text
+            and m.updated_at > coalesce(p.memory_enriched_at, '-infinity'::timestamptz)
+      )
+    order by p.user_id
+    limit batch_size;
+$$;
+
+comment on function twin_enrichment_candidates(uuid, int) is
+    'Students whose memory facts changed after profiles.memory_enriched_at, '
+    'ordered by user_id for keyset paging. Used by job_enrich_digital_twin().';
@@ -0,0 +1,34 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 020: Re-embedding student_memories
+--
+-- MEMORY_EMBEDDER=local (memory/embedder.py) swaps Google
+-- text-embedding-004 for a local 768-dim fastembed model. The column stays
+-- vector(768), but vectors from different models are not comparable, so
+-- every existing row is re-embedded by scripts/reembed_memories.py (into a
+-- shadow column, see migration 021):
+--
+--   student_memories_updated_at     — updated_at now tracks fact changes
+--                                     only, so a re-embed does not mark every
+--                                     student as changed for the incremental
+--                                     twin enrichment (migration 019)
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+-- Only content (metadata) changes bump updated_at
+create or replace function _set_student_memory_updated_at()
+returns trigger language plpgsql as $$
+begin
+    if new.metadata is distinct from old.metadata then
+        new.updated_at = timezone('utc', now());
+    else
+        new.updated_at = old.updated_at;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists student_memories_updated_at on student_memories;
+create trigger student_memories_updated_at
+    before update on student_memories
+    for each row execute procedure _set_student_memory_updated_at();
@@ -0,0 +1,37 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 021: Checkpoints for resumable re-embedding of student_memories
+--
+-- One row per re-embedding run (memory/reembed.py, driven by
+-- scripts/reembed_memories.py). fill() writes each page of shadow vectors
+-- and advances last_id/rows_done in the same transaction, so an interrupted
+-- run resumes exactly after the last committed page.
+--
+-- The shadow column (embedding_next), its clearing trigger and index are
+-- created by the tool itself: their vector dims depend on the target model.
+-- Supersedes the in-place reembed_student_memories() that migration 020
+-- used to create, which left search mixing two models until the run
+-- finished; it is dropped below so nothing can overwrite `embedding` in place.
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+create table if not exists memory_reembed_runs (
+    run_id      text        primary key,                  -- e.g. 'bge-base-2026-10'
+    model       text        not null,
+    dims        int         not null,
+    last_id     text        not null default '',          -- keyset cursor over student_memories.id
+    rows_done   bigint      not null default 0,
+    status      text        not null default 'filling'    -- filling → indexed → switched
+                check (status in ('filling', 'indexed', 'switched')),
+    started_at  timestamptz not null default timezone('utc', now()),
+    updated_at  timestamptz not null default timezone('utc', now())
+);
+
+alter table memory_reembed_runs enable row level security;
+
+create policy "Service role full access"
+    on memory_reembed_runs for all
+    using (auth.role() = 'service_role');
+
+-- In-place write-back from earlier deployments of migration 020
+drop function if exists reembed_student_memories(jsonb);
@@ -0,0 +1,65 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 022: Cursor-paginated listing of a student's memory facts
+--
+-- Replaces Mem0 get_all (every fact, one response) for the Memory
+-- Dashboard (/mentor/memories, NDJSON streaming) and the scheduler jobs.
+-- Filters run in SQL: category (stamped metadata->>'category', else the
+-- "CATEGORY:" prefix of the fact) and a created_at range.
+--
+-- Order is newest first; the cursor is the (created_at, id) of the last row
+-- of the previous page, compared as a row value so the index is range-scanned.
+--
+-- Called by: memory.list_memories() / memory.iter_memories()
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+create index if not exists student_memories_user_created_idx
+    on student_memories ((metadata->>'user_id'), created_at desc, id desc);
+
+create or replace function list_student_memories(
+    p_user_id           text,
+    p_limit             int         default 50,
+    p_categories        text[]      default null,   -- null = all categories
+    p_created_after     timestamptz default null,   -- inclusive
+    p_created_before    timestamptz default null,   -- exclusive
+    p_cursor_created_at timestamptz default null,   -- keyset cursor (previous page's last row)
+    p_cursor_id         text        default null
+)
+returns table (
+    id          text,
+    memory      text,
+    category    text,
+    valid_until text,
+    created_at  timestamptz,
+    updated_at  timestamptz
+)
+language sql
+stable
+security definer
+as $$
+    select
+        m.id,
+        m.metadata->>'data',
+        c.category,
+        m.metadata->>'valid_until',
+        m.created_at,
+        m.updated_at
+    from student_memories m
+    cross join lateral (
+        select coalesce(
+            m.metadata->>'category',
+            upper(split_part(m.metadata->>'data', ':', 1))
+        ) as category
+    ) c
+    where m.metadata->>'user_id' = p_user_id
+      and (p_categories is null or c.category = any(p_categories))
+      and (p_created_after is null or m.created_at >= p_created_after)
+      and (p_created_before is null or m.created_at < p_created_before)
+      and (p_cursor_created_at is null or (m.created_at, m.id) < (p_cursor_created_at, p_cursor_id))
+    order by m.created_at desc, m.id desc
+    limit p_limit;
+$$;
+
+comment on function list_student_memories(text, int, text[], timestamptz, timestamptz, timestamptz, text) is
+    'One keyset page of a student''s memory facts, newest first, with category and '
+    'created_at filters. Used by memory.list_memories().';
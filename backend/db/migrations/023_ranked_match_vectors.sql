@@ -0,0 +1,124 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 023: Category-, recency- and duplicate-aware match_vectors
+--
+-- match_vectors returned the top match_count rows by cosine distance, so a
+-- stale BLOCKERS fact or three paraphrases of one goal could fill the
+-- student memory block. It now re-ranks a cosine candidate set in Postgres:
+--
+--   score = similarity
+--         × category_weights[category]            (missing category → 1.0)
+--         × 0.5 ^ (age_days / recency_half_life_days)   (age from updated_at)
+--
+-- then walks the candidates by score and skips any whose cosine similarity
+-- to an already-returned fact is >= dedup_threshold (near-duplicate
+-- collapse), stopping at match_count.
+--
+-- Every ranking argument defaults to null = off, and the candidate set is
+-- then exactly match_count rows: a 3-argument call behaves as before.
+-- Category comes from metadata->>'category' when stamped, else from the
+-- "CATEGORY:" prefix of the fact (as in migrations 017 / 022).
+--
+-- Called by: memory.search_memories() (ranking from memory/ranking.py)
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+drop function if exists match_vectors(vector, int, jsonb);
+
+create or replace function match_vectors(
+    query_embedding        vector(768),
+    match_count            int,
+    filter                 jsonb default '{}'::jsonb,
+    category_weights       jsonb default null,   -- {"GOALS": 1.15, "BLOCKERS": 0.8, ...}
+    recency_half_life_days float default null,   -- score halves every N days since updated_at
+    dedup_threshold        float default null,   -- cosine similarity that counts as a duplicate
+    candidate_count        int   default null    -- rows re-ranked (default 4 × match_count)
+)
+returns table (
+    id          text,
+    similarity  float,
+    metadata    jsonb,
+    score       float
+)
+language plpgsql
+security definer
+as $$
+#variable_conflict use_column
+declare
+    cutoff   text := to_char(now() at time zone 'utc', 'YYYY-MM-DD"T"HH24:MI:SS') || '+00:00';
+    ranked   boolean := category_weights is not null
+                        or recency_half_life_days is not null
+                        or dedup_threshold is not null;
+    pool     int := case when ranked then greatest(coalesce(candidate_count, match_count * 4), match_count)
+                         else match_count end;
+    kept     vector[] := '{}';
+    returned int := 0;
+    c        record;
+begin
+    for c in
+        with candidates as (
+            select
+                m.id::text as id,
+                m.embedding,
+                m.metadata,
+                m.updated_at,
+                1 - (m.embedding <=> query_embedding) as similarity
+            from student_memories m
+            where
+                (
+                    m.metadata->>'valid_until' is null
+                    or m.metadata->>'valid_until' > cutoff
+                )
+                and (
+                    case
+                        when filter::text = '{}'::text then true
+                        else m.metadata @> filter
+                    end
+                )
+            order by m.embedding <=> query_embedding
+            limit pool
+        )
+        select
+            cand.id,
+            cand.embedding,
+            cand.metadata,
+            cand.similarity,
+            cand.similarity
+                * coalesce(
+                    (category_weights->>coalesce(
+                        cand.metadata->>'category',
+                        upper(split_part(cand.metadata->>'data', ':', 1))
+                    ))::float,
+                    1.0
+                  )
+                * case
+                    when recency_half_life_days is null or cand.updated_at is null then 1.0
+                    else power(0.5, greatest(extract(epoch from now() - cand.updated_at), 0)
+                                    / 86400.0 / recency_half_life_days)
+                  end as score
+        from candidates cand
+        order by score desc
+    loop
+        if dedup_threshold is not null and exists (
+            select 1 from unnest(kept) k where 1 - (k <=> c.embedding) >= dedup_threshold
+        ) then
+            continue;
+        end if;
+        if dedup_threshold is not null then
+            kept := kept || c.embedding;
+        end if;
+
+        id := c.id;
+        similarity := c.similarity;
+        metadata := c.metadata;
+        score := c.score;
+        return next;
+
+        returned := returned + 1;
+        exit when returned >= match_count;
+    end loop;
+end;
+$$;
+
+comment on function match_vectors(vector, int, jsonb, jsonb, float, float, int) is
+    'Top match_count memory facts for a query embedding, re-ranked by category weight and '
+    'recency with near-duplicates collapsed. Used by memory.search_memories().';
@@ -0,0 +1,46 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 024: Job-run ledger for resumable scheduler jobs
+--
+-- One row per (job, period) — e.g. 'monthly_reports:2026-09',
+-- 'memory_insights:2026-W42'. services/job_ledger.py checkpoints the keyset
+-- cursor (last user_id of a fully processed page) and the running counts
+-- after every page, so a restarted or re-triggered run resumes after the
+-- last checkpoint instead of from the first student. A completed run is not
+-- repeated for the same period unless forced.
+--
+-- Per-student work is idempotent on top of that:
+--   monthly_reports           upsert on the existing (user_id, report_month)
+--                             key; students who already have the month's
+--                             report are skipped before any Gemini call
+--   profiles.pending_nudges_at  set with each generated nudge; students
+--                             nudged this week are skipped
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+create table if not exists job_runs (
+    run_id       text        primary key,                 -- '<job>:<period>'
+    job          text        not null,
+    period       text        not null,
+    status       text        not null default 'running'
+                 check (status in ('running', 'completed', 'failed')),
+    cursor       text,                                    -- keyset position; null = from the start
+    done         int         not null default 0,
+    failed       int         not null default 0,
+    retries      int         not null default 0,
+    outcomes     jsonb       not null default '{}'::jsonb,
+    last_error   text,
+    started_at   timestamptz not null default timezone('utc', now()),
+    updated_at   timestamptz not null default timezone('utc', now()),
+    finished_at  timestamptz
+);
+
+create index if not exists job_runs_job_started_idx on job_runs (job, started_at desc);
+
+alter table job_runs enable row level security;
+
+create policy "Service role full access"
+    on job_runs for all
+    using (auth.role() = 'service_role');
+
+alter table profiles add column if not exists pending_nudges_at timestamptz;
@@ -0,0 +1,14 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 025: Fencing token on job_runs
+--
+-- Scheduled jobs run only on the replica holding the Redis scheduler lease
+-- (services/leader.py). Each lease acquisition gets a larger fencing token;
+-- the job ledger stores the token of the run's current owner and only
+-- accepts checkpoints carrying that token. An ex-leader that stalled past
+-- its lease and resumes mid-job fails its next checkpoint (LeaseLostError)
+-- instead of overwriting the new leader's progress.
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+alter table job_runs add column if not exists fence bigint;   -- null = unguarded (single instance)
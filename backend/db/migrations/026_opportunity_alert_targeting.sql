@@ -0,0 +1,24 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 026: Targeting columns for deadline alerts
+--
+-- job_deadline_alerts no longer sends every closing opportunity to every
+-- WhatsApp-enabled student. services/alert_planner.py scores students
+-- against the day's closing opportunities by domain, persona segment, tags
+-- and tracked opportunities (opportunity_applications), keeps the top few
+-- per student and sends one merged message each.
+--
+--   tags      free-form labels ('open source', 'stipend', 'remote'); matched
+--             against the tags of opportunities a student tracks
+--   segments  persona segments the opportunity targets (IT, GOVT, RESEARCH,
+--             ACADEMIA, CREATIVE, MANAGEMENT, SALES); empty = everyone
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+alter table opportunities
+    add column if not exists tags     text[] not null default '{}',
+    add column if not exists segments text[] not null default '{}';
+
+-- The job looks up the active opportunities closing on one date
+create index if not exists idx_opportunities_deadline_active
+    on opportunities (deadline) where is_active;
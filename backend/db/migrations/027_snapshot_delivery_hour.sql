@@ -0,0 +1,58 @@
+-- ═══════════════════════════════════════════════════════════════════
+-- Migration 027: Hour-bucketed weekly snapshot recipients
+--
+-- job_weekly_snapshots runs every hour on Sunday. Each run used to page
+-- through every opted-in profile, fetch every page's personas and keep the
+-- ~1/24 whose nudge_hour_ist matched — 24 full scans to send one message
+-- per student.
+--
+-- The delivery hour is now copied onto profiles (kept in sync from
+-- user_persona_profiles by trigger; 19:00 when a student has no persona,
+-- the persona default), and a partial index over opted-in students makes
+-- each hourly run a range scan over just that hour's recipients:
+--
+--   where nudge_hour_ist = :hour and whatsapp_enabled and whatsapp_snapshots
+--     and user_id > :cursor order by user_id limit :page
+--
+-- pending_nudges is then cleared with one update per page of sent students.
+--
+-- Apply in Supabase SQL editor (service role).
+-- ═══════════════════════════════════════════════════════════════════
+
+alter table profiles
+    add column if not exists nudge_hour_ist smallint not null default 19
+        check (nudge_hour_ist between 0 and 23);
+
+update profiles p
+set nudge_hour_ist = u.nudge_hour_ist
+from user_persona_profiles u
+where u.user_id = p.user_id
+  and u.nudge_hour_ist is not null
+  and p.nudge_hour_ist is distinct from u.nudge_hour_ist;
+
+create or replace function sync_profile_nudge_hour()
+returns trigger
+language plpgsql
+security definer
+as $$
+begin
+    if tg_op = 'DELETE' then
+        update profiles set nudge_hour_ist = 19 where user_id = old.user_id;
+        return old;
+    end if;
+    update profiles
+    set nudge_hour_ist = coalesce(new.nudge_hour_ist, 19)
+    where user_id = new.user_id
+      and nudge_hour_ist is distinct from coalesce(new.nudge_hour_ist, 19);
+    return new;
+end;
+$$;
+
+drop trigger if exists persona_nudge_hour_sync on user_persona_profiles;
+create trigger persona_nudge_hour_sync
+    after insert or update of nudge_hour_ist or delete on user_persona_profiles
+    for each row execute function sync_profile_nudge_hour();
+
+create index if not exists idx_profiles_snapshot_hour
+    on profiles (nudge_hour_ist, user_id)
+    where whatsapp_enabled and whatsapp_snapshots;
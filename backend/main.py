@@ -1,6 +1,9 @@
 """
 SARGVISION AI — FastAPI Backend
 Entry point: uvicorn main:app --reload
+
+PROCESS_ROLE=all (default) also runs the worker side in this process; in
+production set PROCESS_ROLE=web and run `python -m worker` (worker.py).
 """
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -10,10 +13,14 @@ from api import (
     users, activities, opportunities, auth, 
     gamification, dashboard, domains, parent,
     learning, achievements, reports, library,
-    simplify, mentor, readiness, whatsapp, persona, portfolio, resume, exams, scholarships, teacher, classroom
+    simplify, mentor, readiness, whatsapp, persona, portfolio, resume, exams, scholarships, teacher, classroom,
+    admin,
 )
 from core.config import settings
-from scheduler import start_scheduler, stop_scheduler
+from scheduler import JOB_MAX_ATTEMPTS, JOBS, start_scheduler, stop_scheduler
+from services.semantic_cache import start_cache_warmup
+from memory.write_queue import start_write_queue, stop_write_queue
+from services.task_queue import start_task_queue, stop_task_queue
 from prometheus_fastapi_instrumentator import Instrumentator
 
 
@@ -22,12 +29,25 @@ async def lifespan(app: FastAPI):
     # Startup
     import logging
     logger = logging.getLogger(__name__)
-    logger.info(f"🚀 SARGVISION AI starting in {settings.ENV.upper()} mode")
+    logger.info(f"🚀 SARGVISION AI starting in {settings.ENV.upper()} mode (role: {settings.PROCESS_ROLE})")
     
-    start_scheduler()
+    # web: only enqueue jobs / memory turns; the worker tier consumes them
+    runs_worker = settings.PROCESS_ROLE != "web"
+    await start_task_queue(JOBS if runs_worker else {}, consume=runs_worker, max_attempts=JOB_MAX_ATTEMPTS)
+    if runs_worker:
+        await start_scheduler()
+    # Semantic cache loads its embedding model + connects to Redis in the
+    # background; requests bypass the cache until it is ready.
+    cache_warmup = start_cache_warmup()
+    # Durable memory write-behind queue; mentor chat falls back to inline tasks without it
+    await start_write_queue(consume=runs_worker)
     yield
     # Shutdown
-    stop_scheduler()
+    if runs_worker:
+        await stop_scheduler()
+    await stop_write_queue()
+    await stop_task_queue()
+    cache_warmup.cancel()
 
 
 app = FastAPI(
@@ -74,6 +94,7 @@ app.include_router(exams.router, prefix="/exams", tags=["Exams"])
 app.include_router(scholarships.router, prefix="/scholarships", tags=["Scholarships"])
 app.include_router(teacher.router, prefix="/teacher", tags=["Teacher"])
 app.include_router(classroom.router, prefix="/classroom", tags=["Classroom"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 
 @app.get("/health")
@@ -4,28 +4,53 @@ Powered by Mem0 AsyncMemory + Supabase pgvector + Google text-embedding-004
 
 Changes from v1:
   - AsyncMemory (native async, no asyncio.to_thread wrappers)
-  - Google text-embedding-004 (768-dim) — no OpenAI dependency
+  - Google text-embedding-004 (768-dim) — no OpenAI dependency; or a local
+    fastembed model on CPU with MEMORY_EMBEDDER=local (memory/embedder.py)
   - 3-second timeout on search; graceful degradation
   - Per-category TTL tagging on add_turn (ACADEMIC=180d, BLOCKERS=60d, etc.)
   - Max 150 facts cap enforced via prune_stale_memories()
   - All data in YOUR Supabase — zero external data egress
+  - Short-TTL per-user context cache in front of search (memory/context_cache.py)
+  - Local pre-filter skips extraction for turns with no student facts (memory/prefilter.py)
+  - Search re-ranks by category, recency and near-duplicates inside match_vectors (memory/ranking.py)
 
 Public API (all async):
-  search_memories(user_id, query)     → str (context block for agent instruction)
+  search_memories(user_id, query, ranking) → str (context block for agent instruction)
   add_turn(user_id, user_msg, reply)  → None (background storage with TTL)
+  add_turns(user_id, turns)           → int  (coalesced storage; raises on failure)
   get_all_memories(user_id)           → list[dict]
+  list_memories(user_id, cursor, ...) → MemoryPage (cursor-paginated, category/date filters in SQL)
+  iter_memories(user_id, ...)         → async iterator of facts, one page at a time
   delete_memories(user_id)            → None  (GDPR erasure)
-  delete_memory(memory_id)            → None  (Single fact deletion)
+  delete_memory(memory_id, user_id)   → None  (Single fact deletion)
   prune_stale_memories(user_id)       → int   (returns count of deleted facts)
+  prune_all_memories()                → dict  (set-based SQL prune of every user, per category)
   enrich_twin_summary(user_id, facts) → str   (Gemini narrative, for profiles.memory_summary)
+  twin_enrichment_candidates()        → list  (students whose facts changed since last enrichment)
+  refresh_twin_summary(user_id, ...)  → (str, str) (delta update of the summary, periodic full rebuild)
 """
 
 import asyncio
 import logging
 import os
+import time
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from core.config import settings
+from core.metrics import (
+    MEMORY_CONTEXT_CACHE_LOOKUPS,
+    MEMORY_EXTRACTION_TOKENS_SAVED,
+    MEMORY_PREFILTER_DECISIONS,
+    MEMORY_SEARCH_SECONDS_SAVED,
+    record_gemini_usage,
+)
+from memory import prefilter
+from memory.context_cache import MemoryContextCache, SharedGenerations
+from memory.listing import MemoryPage, decode_cursor, encode_cursor
+from memory.ranking import DEFAULT_RANKING, SearchRanking
+
 logger = logging.getLogger(__name__)
 
 # ── Career fact extraction prompt ─────────────────────────────────────────────
@@ -117,22 +142,76 @@ _CATEGORY_TTL_DAYS: dict[str, int] = {
 # Max number of facts stored per user (enforce at prune time)
 _MAX_FACTS_PER_USER: int = 150
 
+# Cap enforcement drops the shortest-lived (lowest-value) categories first
+_PRUNE_PRIORITY: tuple[str, ...] = tuple(sorted(_CATEGORY_TTL_DAYS, key=_CATEGORY_TTL_DAYS.__getitem__))
+
 # Seconds to wait for memory search before degrading to no-context
 _SEARCH_TIMEOUT_SECS: float = 3.0
 
 # Top-K memories to inject per turn
 _TOP_K: int = 8
 
+# Retrieved context blocks, reused across a student's consecutive turns
+_CONTEXT_CACHE_TTL_SECS: float = 120.0
+_context_cache = MemoryContextCache(ttl_secs=_CONTEXT_CACHE_TTL_SECS)
+
+
+def _shared_generations() -> Optional[SharedGenerations]:
+    """Cross-process invalidation over the write queue's Redis connection (None without Redis)."""
+    from memory.write_queue import get_write_queue
+
+    queue = get_write_queue()
+    return SharedGenerations(queue.r) if queue is not None else None
+
+
+async def _invalidate_context(user_id: Optional[str] = None) -> None:
+    """Drop cached context blocks here and, through Redis, in every other process."""
+    _context_cache.invalidate(user_id)
+    shared = _shared_generations()
+    if shared is not None:
+        await shared.bump(user_id)
+
+# Digital Twin summary: facts per Gemini prompt, candidate page size, and how
+# often a summary is regenerated from all facts instead of updated from deltas
+_TWIN_MODEL: str = "gemini-2.0-flash-001"
+_TWIN_MAX_FACTS: int = 80
+_TWIN_CANDIDATE_BATCH: int = 500
+_TWIN_FULL_REBUILD_DAYS: int = 56
+
+# Facts per list_memories page (the dashboard's first page holds a full student)
+_LIST_PAGE_SIZE: int = _MAX_FACTS_PER_USER
+
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 
+def _embedder_config() -> dict:
+    """Embedder section of the Mem0 config; dims must match the student_memories column."""
+    if settings.MEMORY_EMBEDDER == "local":
+        from memory.embedder import MEM0_PROVIDER
+        return {
+            "provider": MEM0_PROVIDER,
+            "config": {
+                "model": settings.MEMORY_LOCAL_EMBEDDING_MODEL,
+                "embedding_dims": settings.MEMORY_EMBEDDING_DIMS,
+            },
+        }
+    return {
+        "provider": "google",
+        "config": {
+            "model": "models/text-embedding-004",
+            "embedding_dims": settings.MEMORY_EMBEDDING_DIMS,
+        },
+    }
+
+
 def _build_config() -> dict:
     """
     Build Mem0 AsyncMemory config.
 
     Stack (100% self-hosted, all data in Supabase):
       LLM:       Gemini 2.0 Flash  — fact extraction + deduplication
-      Embedder:  Google text-embedding-004 (768-dim) — NO OpenAI needed
+      Embedder:  Google text-embedding-004 (768-dim) — NO OpenAI needed,
+                 or a local fastembed model with MEMORY_EMBEDDER=local (memory/embedder.py)
       VectorDB:  Supabase pgvector — YOUR data, YOUR server
     """
     return {
@@ -145,13 +224,7 @@ def _build_config() -> dict:
                 "top_p": 1.0,
             },
         },
-        "embedder": {
-            "provider": "google",
-            "config": {
-                "model": "models/text-embedding-004",
-                "embedding_dims": 768,
-            },
-        },
+        "embedder": _embedder_config(),
         "vector_store": {
             "provider": "supabase",
             "config": {
@@ -159,7 +232,7 @@ def _build_config() -> dict:
                 "collection_name": "student_memories",
                 "index_method": "hnsw",
                 "index_measure": "cosine_distance",
-                "embedding_model_dims": 768,
+                "embedding_model_dims": settings.MEMORY_EMBEDDING_DIMS,
             },
         },
         "custom_fact_extraction_prompt": _CAREER_FACT_EXTRACTION_PROMPT,
@@ -192,10 +265,15 @@ async def _get_client() -> Optional["AsyncMemory"]:
 
     try:
         from mem0 import AsyncMemory
-        _client = AsyncMemory(config=_build_config())
+        if settings.MEMORY_EMBEDDER == "local":
+            from memory.embedder import register
+            register()
+        # Off the event loop: a local embedder loads (maybe downloads) its model here
+        _client = await asyncio.to_thread(AsyncMemory, config=_build_config())
         logger.info(
             "[Memory] AsyncMemory initialised "
-            "(Gemini LLM + Google embeddings + Supabase pgvector 768-dim)"
+            "(Gemini LLM + %s embeddings + Supabase pgvector 768-dim)",
+            settings.MEMORY_EMBEDDER,
         )
     except Exception:
         logger.exception("[Memory] Failed to initialise AsyncMemory client")
@@ -205,29 +283,94 @@ async def _get_client() -> Optional["AsyncMemory"]:
 
 # ── TTL helper ────────────────────────────────────────────────────────────────
 
+def _fact_category(fact_text: str) -> str:
+    """Category from the "CATEGORY: ..." prefix the extraction prompt adds."""
+    upper = fact_text.upper()
+    for cat in _CATEGORY_TTL_DAYS:
+        if upper.startswith(cat + ":"):
+            return cat
+    return "UNKNOWN"
+
+
 def _fact_valid_until(fact_text: str) -> str:
     """
     Derive valid_until ISO timestamp based on the category prefix in the fact.
-    Returns UTC ISO string: "2026-08-22T00:00:00+00:00"
+    Returns UTC ISO string at second precision: "2026-08-22T00:00:00+00:00".
+    The fixed format keeps lexical order == chronological order, so SQL can
+    compare it as text against student_memories_valid_until_idx.
     """
     utcnow = datetime.now(timezone.utc)
-    category = "UNKNOWN"
-    for cat in _CATEGORY_TTL_DAYS:
-        if fact_text.upper().startswith(cat + ":"):
-            category = cat
-            break
-    days = _CATEGORY_TTL_DAYS[category]
+    days = _CATEGORY_TTL_DAYS[_fact_category(fact_text)]
     expiry = utcnow + timedelta(days=days)
-    return expiry.isoformat()
+    return expiry.isoformat(timespec="seconds")
+
+
+# Mem0 add() events that leave a (new or rewritten) fact row behind
+_STAMPED_EVENTS: frozenset[str] = frozenset({"ADD", "UPDATE"})
+
+
+async def _stamp_fact_ttls(add_result) -> int:
+    """
+    Post-extraction hook: write category + valid_until onto every fact Mem0
+    just added or updated, in one RPC (stamp_memory_ttl, migration 018).
+    Failures are logged, not raised — the facts are stored either way and
+    scripts/backfill_memory_ttl.py stamps anything missed.
+    """
+    results = add_result.get("results", []) if isinstance(add_result, dict) else []
+    facts = [
+        {
+            "id": r["id"],
+            "category": _fact_category(r["memory"]),
+            "valid_until": _fact_valid_until(r["memory"]),
+        }
+        for r in results
+        if r.get("id") and r.get("memory") and r.get("event", "ADD") in _STAMPED_EVENTS
+    ]
+    if not facts:
+        return 0
+
+    from db.supabase_client import get_supabase
+    try:
+        res = await asyncio.to_thread(
+            lambda: get_supabase().rpc("stamp_memory_ttl", {"facts": facts}).execute()
+        )
+    except Exception:
+        logger.warning("[Memory] Could not stamp TTL on %d facts", len(facts), exc_info=True)
+        return 0
+    return int(res.data or 0)
 
 
 # ── Public async API ──────────────────────────────────────────────────────────
 
+async def _ranked_search(client, *, user_id: str, query: str, top_k: int, ranking: SearchRanking) -> dict:
+    """
+    Mem0-shaped search results from match_vectors with ranking arguments (migration 023).
+    The query is embedded by Mem0's own embedder so vectors match the stored ones.
+    """
+    from db.supabase_client import get_supabase
+
+    vector = await asyncio.to_thread(client.embedding_model.embed, query, "search")
+    params = {
+        "query_embedding": vector,
+        "match_count": top_k,
+        "filter": {"user_id": user_id},
+        **ranking.rpc_params(top_k),
+    }
+    res = await asyncio.to_thread(lambda: get_supabase().rpc("match_vectors", params).execute())
+    return {
+        "results": [
+            {"id": row["id"], "memory": (row.get("metadata") or {}).get("data", ""), "score": row.get("score")}
+            for row in res.data or []
+        ]
+    }
+
+
 async def search_memories(
     *,
     user_id: str,
     query: str,
     top_k: int = _TOP_K,
+    ranking: Optional[SearchRanking] = None,
 ) -> str:
     """
     Search the student's career memory for facts relevant to the current query.
@@ -239,16 +382,37 @@ async def search_memories(
         user_id: Supabase user UUID
         query:   Student's current message (semantic search anchor)
         top_k:   Max facts to retrieve
+        ranking: match_vectors ranking (memory/ranking.py); None → DEFAULT_RANKING,
+                 or Mem0's plain cosine search when MEMORY_SEARCH_RANKING_ENABLED is off
     """
     client = await _get_client()
     if client is None:
         return ""
 
+    if ranking is None and settings.MEMORY_SEARCH_RANKING_ENABLED:
+        ranking = DEFAULT_RANKING
+    # Cached blocks were built with the default ranking; custom rankings always search
+    cacheable = ranking is None or ranking == DEFAULT_RANKING
+
+    shared_generations = _shared_generations() if cacheable else None
+    shared = await shared_generations.read(user_id) if shared_generations else None
+    cached = _context_cache.get(user_id, query, shared=shared) if cacheable else None
+    if cached is not None:
+        context, search_secs = cached
+        MEMORY_CONTEXT_CACHE_LOOKUPS.labels(result="hit").inc()
+        MEMORY_SEARCH_SECONDS_SAVED.inc(search_secs)
+        return context
+    if cacheable:
+        MEMORY_CONTEXT_CACHE_LOOKUPS.labels(result="miss").inc()
+
+    generation = _context_cache.generation(user_id)
+    search_started = time.perf_counter()
     try:
-        results = await asyncio.wait_for(
-            client.search(query=query, user_id=user_id, limit=top_k),
-            timeout=_SEARCH_TIMEOUT_SECS,
+        search = (
+            client.search(query=query, user_id=user_id, limit=top_k) if ranking is None
+            else _ranked_search(client, user_id=user_id, query=query, top_k=top_k, ranking=ranking)
         )
+        results = await asyncio.wait_for(search, timeout=_SEARCH_TIMEOUT_SECS)
     except asyncio.TimeoutError:
         logger.warning(
             "[Memory] search timed out (>%.1fs) for user %s… — no context injected",
@@ -259,16 +423,17 @@ async def search_memories(
         logger.exception("[Memory] search_memories failed for user %s…", user_id[:8])
         return ""
 
-    memories = results.get("results", []) if isinstance(results, dict) else (results or [])
-    if not memories:
-        return ""
+    search_secs = time.perf_counter() - search_started
 
+    memories = results.get("results", []) if isinstance(results, dict) else (results or [])
     facts = [
         f"  • {m.get('memory', m.get('text', ''))}"
         for m in memories
         if m.get("memory") or m.get("text")
     ]
     if not facts:
+        if cacheable:
+            _context_cache.put(user_id, query, "", generation=generation, search_secs=search_secs, shared=shared)
         return ""
 
     context = (
@@ -276,6 +441,9 @@ async def search_memories(
         + "\n".join(facts)
         + "\n═══════════════════════════════════════════════\n"
     )
+    if cacheable:
+        _context_cache.put(user_id, query, context, generation=generation, search_secs=search_secs,
+                          shared=shared)
     logger.info(
         "[Memory] Retrieved %d memories for user %s…", len(facts), user_id[:8]
     )
@@ -301,14 +469,68 @@ async def add_turn(
         assistant_message: Mentor's response
         metadata:          Optional extra tags merged into fact metadata
     """
+    try:
+        await add_turns(user_id=user_id, turns=[(user_message, assistant_message)], metadata=metadata)
+    except Exception:
+        logger.exception("[Memory] add_turn failed for user %s…", user_id[:8])
+        # Don't re-raise — student already got their reply
+
+
+async def _prefilter_turns(turns: Sequence[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Keep only turns whose student message may carry a fact (see memory/prefilter.py)."""
+    if not settings.MEMORY_PREFILTER_ENABLED:
+        return list(turns)
+
+    decisions = await asyncio.to_thread(
+        lambda: [prefilter.should_extract(user_message) for user_message, _ in turns]
+    )
+    kept: list[tuple[str, str]] = []
+    saved_tokens = 0
+    for turn, decision in zip(turns, decisions):
+        MEMORY_PREFILTER_DECISIONS.labels(
+            decision="extract" if decision.extract else "skip", reason=decision.reason
+        ).inc()
+        if decision.extract:
+            kept.append(turn)
+        else:
+            saved_tokens += sum(prefilter.estimate_tokens(text) for text in turn)
+    if not kept:
+        # The whole extraction call is avoided, prompt included
+        saved_tokens += prefilter.estimate_tokens(_CAREER_FACT_EXTRACTION_PROMPT)
+    if saved_tokens:
+        MEMORY_EXTRACTION_TOKENS_SAVED.inc(saved_tokens)
+        logger.debug("[Memory] Pre-filter skipped %d/%d turn(s)", len(turns) - len(kept), len(turns))
+    return kept
+
+
+async def add_turns(
+    *,
+    user_id: str,
+    turns: Sequence[tuple[str, str]],
+    metadata: Optional[dict] = None,
+) -> int:
+    """
+    Extract and store facts from several (user_message, assistant_message) turns
+    of one student in a single Mem0 `add` call (one extraction + one dedupe pass).
+    Used by the write-behind queue (memory/write_queue.py) to coalesce turns.
+
+    Turns the pre-filter rules out (acknowledgements, generic questions…) are
+    dropped first; if none remain, Mem0 is not called at all.
+
+    Unlike add_turn, failures propagate so the caller can retry.
+    Returns the number of facts Mem0 reported as added/updated.
+    """
     client = await _get_client()
-    if client is None:
-        return
+    if client is None or not turns:
+        return 0
 
-    # Pre-compute valid_until for the overall turn
-    # Mem0 stores this in metadata for all facts extracted from this turn.
-    # Individual fact TTL is overridden in a post-processing hook via the
-    # custom_fact_extraction_prompt which prefixes each fact with its category.
+    turns = await _prefilter_turns(turns)
+    if not turns:
+        return 0
+
+    # Mem0 stores this metadata on every fact extracted from these turns.
+    # Per-fact category + valid_until are stamped afterwards by _stamp_fact_ttls,
+    # using the category prefix the custom extraction prompt puts on each fact.
     base_meta = {
         "source": "mentor_chat",
         "platform": "sargvision",
@@ -317,21 +539,20 @@ async def add_turn(
     if metadata:
         base_meta.update(metadata)
 
-    messages = [
-        {"role": "user",      "content": user_message},
-        {"role": "assistant", "content": assistant_message},
-    ]
+    messages = []
+    for user_message, assistant_message in turns:
+        messages.append({"role": "user",      "content": user_message})
+        messages.append({"role": "assistant", "content": assistant_message})
 
-    try:
-        result = await client.add(messages, user_id=user_id, metadata=base_meta)
-        added = len(result.get("results", [])) if isinstance(result, dict) else 0
-        logger.info(
-            "[Memory] Stored %d facts for user %s… (deduplicated)",
-            added, user_id[:8],
-        )
-    except Exception:
-        logger.exception("[Memory] add_turn failed for user %s…", user_id[:8])
-        # Don't re-raise — student already got their reply
+    result = await client.add(messages, user_id=user_id, metadata=base_meta)
+    await _invalidate_context(user_id)
+    await _stamp_fact_ttls(result)
+    added = len(result.get("results", [])) if isinstance(result, dict) else 0
+    logger.info(
+        "[Memory] Stored %d facts from %d turn(s) for user %s… (deduplicated)",
+        added, len(turns), user_id[:8],
+    )
+    return added
 
 
 async def get_all_memories(*, user_id: str) -> list[dict]:
@@ -354,6 +575,62 @@ async def get_all_memories(*, user_id: str) -> list[dict]:
         return []
 
 
+async def list_memories(
+    *,
+    user_id: str,
+    limit: int = _LIST_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    categories: Optional[Sequence[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> MemoryPage:
+    """
+    One page of a student's facts, newest first (list_student_memories, migration 022).
+    Filters run in SQL. Pass the returned next_cursor back to get the next page.
+    Raises ValueError for a malformed cursor; database errors propagate.
+    """
+    from db.supabase_client import get_supabase
+
+    cursor_created_at, cursor_id = decode_cursor(cursor) if cursor else (None, None)
+    params = {
+        "p_user_id": user_id,
+        "p_limit": limit,
+        "p_categories": [c.upper() for c in categories] if categories else None,
+        "p_created_after": created_after.isoformat() if created_after else None,
+        "p_created_before": created_before.isoformat() if created_before else None,
+        "p_cursor_created_at": cursor_created_at,
+        "p_cursor_id": cursor_id,
+    }
+    res = await asyncio.to_thread(
+        lambda: get_supabase().rpc("list_student_memories", params).execute()
+    )
+    rows = res.data or []
+    next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+    return MemoryPage(memories=rows, next_cursor=next_cursor)
+
+
+async def iter_memories(
+    *,
+    user_id: str,
+    page_size: int = _LIST_PAGE_SIZE,
+    categories: Optional[Sequence[str]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> AsyncIterator[dict]:
+    """Every matching fact, newest first, fetched one page at a time."""
+    cursor = None
+    while True:
+        page = await list_memories(
+            user_id=user_id, limit=page_size, cursor=cursor, categories=categories,
+            created_after=created_after, created_before=created_before,
+        )
+        for memory in page.memories:
+            yield memory
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+
 async def delete_memories(*, user_id: str) -> None:
     """
     GDPR right-to-erasure: delete ALL memories for a user.
@@ -364,21 +641,25 @@ async def delete_memories(*, user_id: str) -> None:
         return
     try:
         await client.delete_all(user_id=user_id)
+        await _invalidate_context(user_id)
         logger.info("[Memory] Deleted ALL memories for user %s…", user_id[:8])
     except Exception:
         logger.exception("[Memory] delete_memories failed for user %s…", user_id[:8])
 
 
-async def delete_memory(*, memory_id: str) -> None:
+async def delete_memory(*, memory_id: str, user_id: Optional[str] = None) -> None:
     """
     Delete a single career fact by its ID.
     Used for granular user management of their career history.
+    Pass the owner's user_id so only their cached context is dropped;
+    without it the whole context cache is invalidated.
     """
     client = await _get_client()
     if client is None:
         return
     try:
         await client.delete(memory_id=memory_id)
+        await _invalidate_context(user_id)
         logger.info("[Memory] Deleted single memory: %s", memory_id)
     except Exception:
         logger.exception("[Memory] delete_memory failed for ID %s", memory_id)
@@ -436,13 +717,9 @@ async def prune_stale_memories(*, user_id: str) -> int:
     if len(live_memories) > _MAX_FACTS_PER_USER:
         overflow = len(live_memories) - _MAX_FACTS_PER_USER
         # Sort by created_at ascending; BLOCKERS pruned first (lowest value retention)
-        priority_order = list(_CATEGORY_TTL_DAYS.keys())
+        priority_order = list(_PRUNE_PRIORITY)
         def _priority(m: dict) -> tuple:
-            text = m.get("memory", "")
-            cat = next(
-                (c for c in priority_order if text.upper().startswith(c + ":")),
-                "UNKNOWN",
-            )
+            cat = _fact_category(m.get("memory", ""))
             # lower TTL category = prune first
             return (priority_order.index(cat), m.get("created_at", ""))
         live_memories.sort(key=_priority)
@@ -458,6 +735,7 @@ async def prune_stale_memories(*, user_id: str) -> int:
             logger.warning("[Memory] Could not delete memory %s", mem_id)
 
     if deleted:
+        await _invalidate_context(user_id)
         logger.info(
             "[Memory] Pruned %d stale/excess memories for user %s…",
             deleted, user_id[:8],
@@ -465,13 +743,139 @@ async def prune_stale_memories(*, user_id: str) -> int:
     return deleted
 
 
-async def enrich_twin_summary(*, user_id: str, memories: list[dict]) -> str:
+async def prune_all_memories() -> dict[str, dict[str, int]]:
     """
-    Generate a compact Gemini narrative from all stored career facts.
-    Stored in profiles.memory_summary for fast context injection.
+    Prune every student's memories in one set-based SQL call
+    (prune_student_memories, migration 017): TTL-expired facts first, then
+    the _MAX_FACTS_PER_USER cap in _PRUNE_PRIORITY order.
+    Called by the weekly scheduler job.
+
+    Returns:
+        Rows deleted per reason and category,
+        e.g. {"expired": {"BLOCKERS": 12}, "cap": {"ACADEMIC": 3}}.
+    """
+    from db.supabase_client import get_supabase
+
+    params = {
+        "max_facts_per_user": _MAX_FACTS_PER_USER,
+        "category_priority": list(_PRUNE_PRIORITY),
+    }
+    try:
+        res = await asyncio.to_thread(
+            lambda: get_supabase().rpc("prune_student_memories", params).execute()
+        )
+    except Exception:
+        logger.exception("[Memory] prune_all_memories failed")
+        return {}
+
+    report: dict[str, dict[str, int]] = {"expired": {}, "cap": {}}
+    for row in res.data or []:
+        # Unknown reasons are reported too: the rows are already deleted
+        by_category = report.setdefault(row["reason"], {})
+        by_category[row["category"]] = by_category.get(row["category"], 0) + int(row["deleted"])
+    if any(report.values()):
+        await _invalidate_context()  # affected users are not returned
+    logger.info("[Memory] Pruned memories across all users: %s", report)
+    return report
+
+
+async def twin_enrichment_candidates(
+    *, after_user: Optional[str] = None, batch_size: int = _TWIN_CANDIDATE_BATCH
+) -> list[dict]:
+    """
+    One keyset page of students whose facts changed after their last enrichment
+    (twin_enrichment_candidates, migration 019), ordered by user_id.
+    Each row: {"user_id", "memory_summary", "memory_enriched_at"}.
+    Failures propagate — the weekly job logs them and retries next run.
+    """
+    from db.supabase_client import get_supabase
+
+    params = {"after_user": after_user, "batch_size": batch_size}
+    res = await asyncio.to_thread(
+        lambda: get_supabase().rpc("twin_enrichment_candidates", params).execute()
+    )
+    return res.data or []
+
+
+async def get_memories_changed_since(
+    *, user_id: str, since: datetime, limit: int = _TWIN_MAX_FACTS
+) -> list[dict]:
+    """
+    Facts of one student added/updated after `since`, newest first, in the
+    {"id", "memory", "updated_at"} shape of get_all_memories.
+    Reads student_memories directly (student_memories_user_updated_idx).
+    """
+    from db.supabase_client import get_supabase
+
+    res = await asyncio.to_thread(
+        lambda: get_supabase()
+        .table("student_memories")
+        .select("id, metadata, updated_at")
+        .eq("metadata->>user_id", user_id)
+        .gt("updated_at", since.isoformat())
+        .order("updated_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return [
+        {"id": row["id"], "memory": (row.get("metadata") or {}).get("data", ""), "updated_at": row["updated_at"]}
+        for row in res.data or []
+    ]
+
+
+def _twin_rebuild_due(previous_summary: Optional[str], enriched_at: Optional[datetime], now: datetime) -> bool:
+    """Regenerate from all facts when there is nothing to update, or periodically so deleted facts drop out."""
+    if not previous_summary or enriched_at is None:
+        return True
+    return now - enriched_at > timedelta(days=_TWIN_FULL_REBUILD_DAYS)
+
+
+async def refresh_twin_summary(
+    *,
+    user_id: str,
+    previous_summary: Optional[str],
+    enriched_at: Optional[str],
+    now: Optional[datetime] = None,
+) -> tuple[str, str]:
+    """
+    Bring one student's profiles.memory_summary up to date.
+
+    Normally only the facts changed since `enriched_at` go to Gemini, together
+    with the existing summary. The summary is regenerated from all facts when
+    there is none yet or it is older than _TWIN_FULL_REBUILD_DAYS — deletions
+    (pruning, user edits) only reach the summary through a full rebuild.
 
     Called by scheduler.py → job_enrich_digital_twin().
 
+    Returns:
+        (summary, mode) — summary is "" when nothing was generated;
+        mode is "delta", "full" or "unchanged" (no changed facts found).
+    """
+    now = now or datetime.now(timezone.utc)
+    last = datetime.fromisoformat(enriched_at) if enriched_at else None
+    if _twin_rebuild_due(previous_summary, last, now):
+        page = await list_memories(user_id=user_id, limit=_TWIN_MAX_FACTS)
+        return await enrich_twin_summary(user_id=user_id, memories=page.memories), "full"
+
+    changed = await get_memories_changed_since(user_id=user_id, since=last)
+    if not changed:
+        return "", "unchanged"
+    summary = await enrich_twin_summary(
+        user_id=user_id, memories=changed, previous_summary=previous_summary
+    )
+    return summary, "delta"
+
+
+async def enrich_twin_summary(
+    *, user_id: str, memories: list[dict], previous_summary: Optional[str] = None
+) -> str:
+    """
+    Generate a compact Gemini narrative from stored career facts.
+    Stored in profiles.memory_summary for fast context injection.
+
+    With `previous_summary`, `memories` are only the new/changed facts and the
+    existing summary is revised with them instead of rewritten from scratch.
+
     Returns:
         A concise paragraph summary (≈200 words) of the student's career story.
     """
@@ -480,26 +884,44 @@ async def enrich_twin_summary(*, user_id: str, memories: list[dict]) -> str:
 
     facts_text = "\n".join(
         f"- {m.get('memory', m.get('text', ''))}"
-        for m in memories[:80]  # cap at 80 facts for prompt size
+        for m in memories[:_TWIN_MAX_FACTS]  # cap for prompt size
         if m.get("memory") or m.get("text")
     )
     if not facts_text:
         return ""
 
-    prompt = (
-        "You are summarising the career profile of an Indian student for a persistent memory store.\n"
-        "Based on the following extracted career facts, write a concise 150-200 word narrative "
-        "summary in third person. Cover: academic background, career goals, skill set, experience, "
-        "key blockers, and learning persona. Do not invent anything not in the facts.\n\n"
-        f"Facts:\n{facts_text}\n\nNarrative summary:"
-    )
+    if previous_summary:
+        prompt = (
+            "You maintain the career profile summary of an Indian student for a persistent memory store.\n"
+            "Revise the current summary with the new or updated career facts below. Keep what is still "
+            "valid; where a new fact contradicts the summary, the new fact wins. Output a concise "
+            "150-200 word narrative in third person covering academic background, career goals, skill "
+            "set, experience, key blockers, and learning persona. Do not invent anything not in the "
+            "summary or the facts.\n\n"
+            f"Current summary:\n{previous_summary}\n\n"
+            f"New or updated facts:\n{facts_text}\n\nRevised narrative summary:"
+        )
+    else:
+        prompt = (
+            "You are summarising the career profile of an Indian student for a persistent memory store.\n"
+            "Based on the following extracted career facts, write a concise 150-200 word narrative "
+            "summary in third person. Cover: academic background, career goals, skill set, experience, "
+            "key blockers, and learning persona. Do not invent anything not in the facts.\n\n"
+            f"Facts:\n{facts_text}\n\nNarrative summary:"
+        )
 
     try:
         import google.generativeai as genai
-        model = genai.GenerativeModel("gemini-2.0-flash-001")
-        response = model.generate_content(prompt)
+        model = genai.GenerativeModel(_TWIN_MODEL)
+        # Async client: job_enrich_digital_twin runs many of these concurrently on the loop
+        response = await model.generate_content_async(prompt)
         summary = response.text.strip()
-        logger.info("[Memory] Generated %d-char twin summary for user %s…", len(summary), user_id[:8])
+        usage = response.usage_metadata
+        record_gemini_usage(_TWIN_MODEL, usage.prompt_token_count, usage.candidates_token_count)
+        logger.info(
+            "[Memory] Generated %d-char twin summary for user %s… (%s)",
+            len(summary), user_id[:8], "delta" if previous_summary else "full",
+        )
         return summary
     except Exception:
         logger.exception("[Memory] enrich_twin_summary failed for user %s…", user_id[:8])
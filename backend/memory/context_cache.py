@@ -0,0 +1,166 @@
+"""
+Short-lived, per-process cache of retrieved memory context blocks.
+
+Consecutive chat turns from one student mostly retrieve the same facts, yet
+each turn pays a remote embedding call plus a pgvector query. This cache keeps
+the formatted context block per (user, coarse query signature) for a short TTL.
+
+Invalidation: add_turn / delete_memory / delete_memories / prune_stale_memories
+drop the user's entries. Each invalidation also bumps a per-user generation, so a
+search that started before the change cannot write its stale result back.
+
+The cache is per process, but writes usually land in another one (the
+memory write queue stores turns in whichever worker claims them; with
+PROCESS_ROLE=web never in the API that serves the chat). Invalidations are
+therefore also counted in Redis (SharedGenerations): every lookup reads the
+user's shared generation (one MGET) and entries cached under an older one are
+dropped. Without Redis a block may be up to `ttl_secs` old after a write this
+process did not see — that bound is why the TTL stays short.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TTL_SECS: float = 120.0
+_SHARED_TIMEOUT_SECS: float = 0.25   # a slow Redis must not stall the chat turn
+_SHARED_KEY_TTL_SECS: int = 24 * 60 * 60   # far above any entry's TTL
+_DEFAULT_MAX_USERS: int = 5_000
+_MAX_SIGNATURES_PER_USER: int = 16
+_SIGNATURE_TERMS: int = 8
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS: frozenset[str] = frozenset({
+    "a", "an", "and", "are", "about", "can", "could", "do", "does", "for", "from", "have",
+    "hello", "help", "hey", "hi", "how", "i", "in", "is", "it", "me", "my", "of", "ok", "okay",
+    "on", "or", "please", "should", "so", "tell", "thanks", "that", "the", "this", "to",
+    "what", "which", "with", "would", "you", "your",
+    # Hinglish fillers
+    "hai", "hain", "kya", "kaise", "ke", "ki", "ko", "main", "mujhe", "se",
+})
+
+
+def query_signature(query: str) -> str:
+    """
+    Coarse signature: the sorted set of distinct content words (first few only).
+    'How do I prepare for GATE?' and 'gate prepare tips' share most terms;
+    exact wording, order and filler words do not matter.
+    """
+    terms = sorted({w for w in _WORD_RE.findall(query.lower()) if w not in _STOPWORDS and len(w) > 1})
+    return " ".join(terms[:_SIGNATURE_TERMS])
+
+
+@dataclass(frozen=True)
+class _Entry:
+    context: str
+    expires_at: float
+    search_secs: float   # latency of the search that produced it (saved on each hit)
+    shared: Optional[tuple[int, int]] = None   # SharedGenerations.read() when searched
+
+
+class MemoryContextCache:
+    def __init__(self, *, ttl_secs: float = _DEFAULT_TTL_SECS, max_users: int = _DEFAULT_MAX_USERS):
+        self.ttl_secs = ttl_secs
+        self.max_users = max_users
+        self._entries: OrderedDict[str, dict[str, _Entry]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._epoch = 0   # bumped by a full invalidation
+
+    def generation(self, user_id: str) -> tuple[int, int]:
+        """Read before searching and pass to put() so stale results are discarded."""
+        return self._epoch, self._generations.get(user_id, 0)
+
+    def get(
+        self, user_id: str, query: str, *, shared: Optional[tuple[int, int]] = None,
+    ) -> Optional[tuple[str, float]]:
+        """(context, seconds the original search took) or None. `shared`: current SharedGenerations.read()."""
+        entries = self._entries.get(user_id)
+        if not entries:
+            return None
+        signature = query_signature(query)
+        entry = entries.get(signature)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic() or (shared is not None and entry.shared != shared):
+            del entries[signature]   # expired, or facts changed in another process
+            return None
+        self._entries.move_to_end(user_id)
+        return entry.context, entry.search_secs
+
+    def put(
+        self,
+        user_id: str,
+        query: str,
+        context: str,
+        *,
+        generation: tuple[int, int],
+        search_secs: float,
+        shared: Optional[tuple[int, int]] = None,
+    ) -> None:
+        if generation != self.generation(user_id):
+            return  # facts changed while the search was in flight
+        entries = self._entries.setdefault(user_id, {})
+        self._entries.move_to_end(user_id)
+        if len(entries) >= _MAX_SIGNATURES_PER_USER:
+            entries.pop(next(iter(entries)))
+        entries[query_signature(query)] = _Entry(context, time.monotonic() + self.ttl_secs, search_secs, shared)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's entries, or everything when the owner is unknown."""
+        if user_id is None:
+            self._entries.clear()
+            self._epoch += 1
+            return
+        self._entries.pop(user_id, None)
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        self._epoch = 0
+
+
+class SharedGenerations:
+    """
+    Invalidation counters in Redis, shared by every process: a global epoch and
+    one generation per user. Read before each lookup; bumped on every write.
+    """
+
+    EPOCH_KEY = "memory:ctx:epoch"
+    USER_KEY_PREFIX = "memory:ctx:gen:"
+
+    def __init__(self, r, *, timeout_secs: float = _SHARED_TIMEOUT_SECS):
+        self.r = r
+        self.timeout_secs = timeout_secs
+
+    async def read(self, user_id: str) -> Optional[tuple[int, int]]:
+        """(epoch, user generation), or None if Redis is unavailable (the TTL is then the only bound)."""
+        try:
+            epoch, generation = await asyncio.wait_for(
+                self.r.mget([self.EPOCH_KEY, f"{self.USER_KEY_PREFIX}{user_id}"]), timeout=self.timeout_secs,
+            )
+        except (RedisError, asyncio.TimeoutError, OSError):
+            logger.warning("[Memory] shared context generation unavailable", exc_info=True)
+            return None
+        return int(epoch or 0), int(generation or 0)
+
+    async def bump(self, user_id: Optional[str] = None) -> None:
+        """Invalidate one user's entries everywhere, or everyone's when the owner is unknown."""
+        try:
+            if user_id is None:
+                await asyncio.wait_for(self.r.incr(self.EPOCH_KEY), timeout=self.timeout_secs)
+                return
+            key = f"{self.USER_KEY_PREFIX}{user_id}"
+            await asyncio.wait_for(self.r.incr(key), timeout=self.timeout_secs)
+            await asyncio.wait_for(self.r.expire(key, _SHARED_KEY_TTL_SECS), timeout=self.timeout_secs)
+        except (RedisError, asyncio.TimeoutError, OSError):
+            logger.warning("[Memory] could not publish context invalidation for %s", user_id, exc_info=True)
@@ -0,0 +1,138 @@
+"""
+Local (in-process, CPU) embedder for the Mem0 memory layer.
+
+Selected with MEMORY_EMBEDDER=local. Replaces the remote Google
+text-embedding-004 call on every search/add with a fastembed ONNX model of
+the same width (BAAI/bge-base-en-v1.5, 768-dim), so student_memories keeps
+its vector(768) column. Vectors from the two models are NOT comparable:
+switching embedders requires re-embedding existing rows
+(scripts/reembed_memories.py, which also handles a change of dims).
+
+AsyncMemory calls embed() from worker threads (asyncio.to_thread), one text
+at a time. _MicroBatcher coalesces those concurrent calls into one ONNX run
+of up to MEMORY_EMBED_BATCH_SIZE texts, waiting at most
+MEMORY_EMBED_BATCH_WAIT_MS for a batch to fill.
+
+Mem0 only accepts embedder provider names from a fixed list, so register()
+points the "fastembed" slot of its EmbedderFactory at LocalEmbedding.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Literal, Optional
+
+from mem0.configs.embeddings.base import BaseEmbedderConfig
+from mem0.embeddings.base import EmbeddingBase
+
+from core.config import settings
+from core.embeddings import get_text_embedding
+from core.metrics import MEMORY_EMBED_BATCH_TEXTS
+
+logger = logging.getLogger(__name__)
+
+MEM0_PROVIDER = "fastembed"
+DEFAULT_MODEL = "BAAI/bge-base-en-v1.5"   # 768-dim, same width as text-embedding-004
+
+
+class _MicroBatcher:
+    """Single worker thread turning concurrent embed calls into batched ONNX runs."""
+
+    def __init__(self, encoder, *, max_batch: int, max_wait_secs: float):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_wait_secs = max_wait_secs
+        self._pending: "queue.Queue[tuple[str, bool, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def embed(self, text: str, *, is_query: bool = False) -> list[float]:
+        """Blocking; called from AsyncMemory's worker threads."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._pending.put((text, is_query, future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="memory-embedder", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list[tuple[str, bool, Future]]:
+        batch = [self._pending.get()]
+        deadline = time.monotonic() + self.max_wait_secs
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            MEMORY_EMBED_BATCH_TEXTS.observe(len(batch))
+            for is_query in (True, False):
+                items = [(text, future) for text, q, future in batch if q is is_query]
+                if items:
+                    self._embed_group(items, is_query=is_query)
+
+    def _embed_group(self, items: list[tuple[str, Future]], *, is_query: bool) -> None:
+        texts = [text for text, _ in items]
+        try:
+            # query_embed adds the model's retrieval instruction (bge) for searches
+            vectors = list(
+                self.encoder.query_embed(texts) if is_query
+                else self.encoder.embed(texts, batch_size=self.max_batch)
+            )
+        except Exception as exc:
+            for _, future in items:
+                future.set_exception(exc)
+            return
+        for (_, future), vector in zip(items, vectors):
+            future.set_result(vector.tolist())
+
+
+class LocalEmbedding(EmbeddingBase):
+    """Mem0 embedder backed by the process-wide fastembed encoder (core/embeddings.py)."""
+
+    def __init__(self, config: Optional[BaseEmbedderConfig] = None):
+        super().__init__(config)
+        self.config.model = self.config.model or DEFAULT_MODEL
+        encoder = get_text_embedding(self.config.model)
+        dims = len(next(iter(encoder.embed(["dimension probe"]))))
+        if self.config.embedding_dims and dims != self.config.embedding_dims:
+            raise ValueError(
+                f"{self.config.model} produces {dims}-dim vectors, "
+                f"student_memories expects {self.config.embedding_dims}"
+            )
+        self.config.embedding_dims = dims
+        self._batcher = _MicroBatcher(
+            encoder,
+            max_batch=settings.MEMORY_EMBED_BATCH_SIZE,
+            max_wait_secs=settings.MEMORY_EMBED_BATCH_WAIT_MS / 1000,
+        )
+        logger.info("[Memory] Local embedder ready: %s (%d-dim)", self.config.model, dims)
+
+    def embed(self, text, memory_action: Optional[Literal["add", "search", "update"]] = None):
+        return self._batcher.embed(text.replace("\n", " "), is_query=memory_action == "search")
+
+    def embed_batch(self, texts, memory_action="add"):
+        encoder = self._batcher.encoder
+        cleaned = [t.replace("\n", " ") for t in texts]
+        vectors = encoder.query_embed(cleaned) if memory_action == "search" else encoder.embed(cleaned)
+        return [v.tolist() for v in vectors]
+
+
+def register() -> None:
+    """Route Mem0's "fastembed" embedder provider to LocalEmbedding. Idempotent."""
+    from mem0.utils.factory import EmbedderFactory
+
+    EmbedderFactory.provider_to_class[MEM0_PROVIDER] = f"{__name__}.LocalEmbedding"
@@ -0,0 +1,35 @@
+"""
+Cursor pagination for listing a student's memory facts (migration 022).
+
+Pages are newest first. The cursor handed to clients is an opaque, URL-safe
+token of the last row's (created_at, id); the SQL side compares it as a row
+value, so a page costs one index range scan however deep the client pages.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class MemoryPage:
+    memories: list[dict]          # {"id", "memory", "category", "valid_until", "created_at", "updated_at"}
+    next_cursor: Optional[str]    # None on the last page
+
+    def __repr__(self) -> str:
+        return f"MemoryPage({len(self.memories)} facts, more={self.next_cursor is not None})"
+
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """(created_at, id) of the last row of the previous page. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as exc:
+        raise ValueError("invalid memory cursor") from exc
+    return str(created_at), str(row_id)
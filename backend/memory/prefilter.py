@@ -0,0 +1,162 @@
+"""
+Local pre-filter deciding whether a chat turn can contain a student fact.
+
+Every stored turn used to go through Mem0's Gemini extraction, although most
+turns ("thanks!", "ok", "what is dynamic programming?") yield {"facts": []}.
+Only the student's message is inspected — facts are about the student, and the
+extraction prompt ignores mentor advice.
+
+Decision order (cheapest first):
+  1. Rules — acknowledgements / greetings and very short messages are skipped;
+     questions with no first-person reference ("I", "my", "mujhe"…) are skipped.
+  2. Classifier — the message is embedded locally (bge-small via
+     core/embeddings.py) and compared with example statements for the seven
+     extraction categories; it is kept if the best cosine ≥ _CLASSIFIER_THRESHOLD.
+If the encoder cannot be loaded the filter fails open (the turn is extracted).
+"""
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# bge-small cosine: unrelated chit-chat lands around 0.45–0.6 against these examples
+_CLASSIFIER_THRESHOLD: float = 0.68
+_MIN_CONTENT_WORDS: int = 3
+
+_SMALLTALK_RE = re.compile(
+    r"^\W*(?:(?:ok(?:ay)?|k|thanks?|thank\s+you|thx|ty|cool|great|nice|sure|yes|yeah|yep|no|nope|"
+    r"hi|hii+|hello|hey|bye|good\s+(?:morning|night|evening)|got\s+it|done|acha|accha|theek\s+hai|"
+    r"haan|ji|shukriya|dhanyavad|hmm+)\W*)+$",
+    re.IGNORECASE,
+)
+_FIRST_PERSON_RE = re.compile(
+    r"\b(?:i|i'm|im|i've|i'd|me|my|mine|myself|we|our|mera|meri|mere|mujhe|main|hum|humara)\b",
+    re.IGNORECASE,
+)
+_WORD_RE = re.compile(r"\w+")
+
+# Example student statements per extraction category (see _CAREER_FACT_EXTRACTION_PROMPT)
+CATEGORY_EXAMPLES: dict[str, tuple[str, ...]] = {
+    "ACADEMIC": (
+        "I'm in 3rd year B.Tech CSE at NIT Trichy",
+        "My CGPA is 7.8 and I scored 92% in 12th boards",
+        "I study BCom at Delhi University",
+    ),
+    "CAREER_PREF": (
+        "I want to work in data science at a product startup",
+        "I prefer remote jobs in Bangalore",
+        "I'm more interested in PSU jobs than private companies",
+    ),
+    "SKILLS": (
+        "I know Python and have built two ML projects",
+        "I'm learning React and AWS right now",
+        "I have a Google Data Analytics certificate",
+    ),
+    "GOALS": (
+        "I want to crack GATE next year",
+        "My goal is an MS in the US by 2027",
+        "I'm targeting an SDE internship at Amazon this summer",
+    ),
+    "EXPERIENCE": (
+        "I did a two month internship at Infosys as a backend developer",
+        "Our team won the Smart India Hackathon",
+        "I contribute to open source projects on GitHub",
+    ),
+    "BLOCKERS": (
+        "I applied to 20 companies but got no callbacks",
+        "I failed my last three interviews",
+        "I get very anxious before exams and can't focus",
+    ),
+    "PERSONA": (
+        "I learn better from videos than from books",
+        "Please explain in Hinglish, it's easier for me",
+        "I lose motivation quickly when studying alone",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class PrefilterDecision:
+    extract: bool
+    reason: str                 # smalltalk, too_short, question, classifier_match, classifier_miss, classifier_unavailable
+    score: Optional[float] = None
+
+    def __repr__(self) -> str:
+        score = f", {self.score:.2f}" if self.score is not None else ""
+        return f"PrefilterDecision({'extract' if self.extract else 'skip'}, {self.reason}{score})"
+
+
+def rule_decision(user_message: str) -> Optional[PrefilterDecision]:
+    """Cheap rule verdict, or None when the classifier has to decide."""
+    text = user_message.strip()
+    if not text or _SMALLTALK_RE.match(text):
+        return PrefilterDecision(False, "smalltalk")
+    if len(_WORD_RE.findall(text)) < _MIN_CONTENT_WORDS:
+        return PrefilterDecision(False, "too_short")
+    if text.endswith("?") and not _FIRST_PERSON_RE.search(text):
+        return PrefilterDecision(False, "question")
+    return None
+
+
+class CategoryClassifier:
+    """Nearest-example cosine classifier over CATEGORY_EXAMPLES."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self.labels: list[str] = [c for c, examples in CATEGORY_EXAMPLES.items() for _ in examples]
+        texts = [e for examples in CATEGORY_EXAMPLES.values() for e in examples]
+        self.matrix = self._embed(texts)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.asarray(list(self.encoder.embed(texts)), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def best_match(self, text: str) -> tuple[str, float]:
+        scores = self.matrix @ self._embed([text])[0]
+        best = int(np.argmax(scores))
+        return self.labels[best], float(scores[best])
+
+
+_classifier: Optional[CategoryClassifier] = None
+_classifier_failed = False
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> Optional[CategoryClassifier]:
+    """Build the classifier once; None (fail open) if the encoder cannot be loaded."""
+    global _classifier, _classifier_failed
+    if _classifier is not None or _classifier_failed:
+        return _classifier
+    with _classifier_lock:
+        if _classifier is None and not _classifier_failed:
+            try:
+                from core.embeddings import get_text_embedding
+                _classifier = CategoryClassifier(get_text_embedding())
+            except Exception:
+                _classifier_failed = True
+                logger.exception("[Memory] Pre-filter classifier unavailable — extracting every turn")
+    return _classifier
+
+
+def should_extract(user_message: str) -> PrefilterDecision:
+    """Blocking (may embed on CPU) — call via asyncio.to_thread from async code."""
+    decision = rule_decision(user_message)
+    if decision is not None:
+        return decision
+    classifier = get_classifier()
+    if classifier is None:
+        return PrefilterDecision(True, "classifier_unavailable")
+    _, score = classifier.best_match(user_message)
+    if score >= _CLASSIFIER_THRESHOLD:
+        return PrefilterDecision(True, "classifier_match", score)
+    return PrefilterDecision(False, "classifier_miss", score)
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token — good enough for a savings estimate."""
+    return max(len(text) // 4, 1)
@@ -0,0 +1,51 @@
+"""
+Ranking knobs for memory search, applied inside match_vectors (migration 023).
+
+Plain cosine top-K fills the memory block with whatever is closest to the
+query: expired-in-spirit BLOCKERS, and the same goal phrased three ways.
+match_vectors re-ranks a larger cosine candidate set by category weight and
+recency, then collapses near-duplicates, so the K facts injected per turn are
+K distinct, current facts.
+
+SearchRanking() with no arguments turns every knob off (cosine order, as
+before migration 023).
+"""
+from dataclasses import dataclass, field
+from typing import Mapping, Optional
+
+
+@dataclass(frozen=True)
+class SearchRanking:
+    category_weights: Mapping[str, float] = field(default_factory=dict)   # missing category → 1.0
+    recency_half_life_days: Optional[float] = None    # score halves every N days since updated_at
+    dedup_threshold: Optional[float] = None           # cosine similarity that counts as a duplicate
+    candidate_multiplier: int = 4                      # candidates re-ranked per returned fact
+
+    def __repr__(self) -> str:
+        return (f"SearchRanking(weights={dict(self.category_weights)}, "
+                f"half_life={self.recency_half_life_days}d, dedup>={self.dedup_threshold})")
+
+    def rpc_params(self, top_k: int) -> dict:
+        """The ranking arguments of match_vectors for a top_k search."""
+        return {
+            "category_weights": dict(self.category_weights) or None,
+            "recency_half_life_days": self.recency_half_life_days,
+            "dedup_threshold": self.dedup_threshold,
+            "candidate_count": top_k * self.candidate_multiplier,
+        }
+
+
+DEFAULT_RANKING = SearchRanking(
+    category_weights={
+        "GOALS":       1.15,   # what the student is working towards anchors most advice
+        "EXPERIENCE":  1.10,
+        "SKILLS":      1.05,
+        "ACADEMIC":    1.0,
+        "CAREER_PREF": 1.0,
+        "PERSONA":     0.95,
+        "BLOCKERS":    0.80,   # worries go stale fast; only surface them when clearly relevant
+        "UNKNOWN":     0.85,
+    },
+    recency_half_life_days=365.0,
+    dedup_threshold=0.92,
+)
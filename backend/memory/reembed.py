@@ -0,0 +1,269 @@
+"""
+Resumable re-embedding of student_memories into a shadow vector column.
+
+Changing the memory embedder (model, provider or dims) used to mean dropping
+the table (migration 002). MemoryReembedder streams the table instead:
+
+  prepare()      add `embedding_next vector(<dims>)` + a trigger that clears it
+                 whenever Mem0 rewrites a row's live embedding; register the
+                 run in memory_reembed_runs (migration 021)
+  fill()         keyset pages (id > last_id), one embed call per page, write
+                 the page AND its checkpoint in one transaction — an interrupted
+                 run resumes after the last committed page
+  build_index()  CREATE INDEX CONCURRENTLY (HNSW) on the shadow column
+  switch()       one transaction under a table lock: embed the stragglers
+                 (rows written during the run), swap the columns and indexes,
+                 redefine match_vectors for the new dims
+  drop_previous() drop `embedding_prev` once the new model is confirmed good
+
+Memory use is bounded by one page. Only one run can be active at a time
+(Postgres advisory lock). Writes are not blocked except during switch();
+pause the memory write queue around the switch + MEMORY_EMBEDDER deploy so no
+fact is embedded with the old model after it.
+
+Runs over a direct Postgres connection (SUPABASE_DB_URL, psycopg2), because
+it needs DDL and CREATE INDEX CONCURRENTLY. Driven by scripts/reembed_memories.py.
+"""
+import json
+import logging
+import re
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SHADOW_COLUMN = "embedding_next"
+PREVIOUS_COLUMN = "embedding_prev"
+RUNS_TABLE = "memory_reembed_runs"
+_ADVISORY_LOCK_KEY = 0x6D656D72   # "memr"
+_GOOGLE_EMBED_BATCH_LIMIT: int = 100   # Gemini batch embedding: max inputs per request
+
+EmbedFn = Callable[[Sequence[str]], list[list[float]]]
+
+# match_vectors is defined by the latest migration that touches it; switch()
+# re-applies it with the new dims so ranking stays identical across models
+_MATCH_VECTORS_MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "023_ranked_match_vectors.sql"
+
+
+def _match_vectors_sql(dims: int) -> str:
+    return re.sub(r"(query_embedding\s+)vector\(\d+\)", rf"\g<1>vector({int(dims)})",
+                  _MATCH_VECTORS_MIGRATION.read_text())
+
+
+@dataclass(frozen=True)
+class ReembedCheckpoint:
+    run_id: str
+    model: str
+    dims: int
+    last_id: str
+    rows_done: int
+    status: str          # filling, indexed, switched
+
+    def __repr__(self) -> str:
+        return f"ReembedCheckpoint({self.run_id}: {self.status}, {self.rows_done} rows, last id {self.last_id!r})"
+
+
+def _vector_literal(vector: Sequence[float]) -> str:
+    return "[" + ",".join(f"{x:.7g}" for x in vector) + "]"
+
+
+class MemoryReembedder:
+    def __init__(self, conn, embed: EmbedFn, *, run_id: str, model: str, dims: int, batch_size: int = 1000):
+        self.conn = conn
+        self.embed = embed
+        self.run_id = run_id
+        self.model = model
+        self.dims = dims
+        self.batch_size = batch_size
+
+    # ── Checkpoint ───────────────────────────────────────────────────────────
+
+    def checkpoint(self) -> ReembedCheckpoint | None:
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"select model, dims, last_id, rows_done, status from {RUNS_TABLE} where run_id = %s",
+                (self.run_id,),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        model, dims, last_id, rows_done, status = row
+        return ReembedCheckpoint(self.run_id, model, dims, last_id, rows_done, status)
+
+    def _set_status(self, cur, status: str) -> None:
+        cur.execute(
+            f"update {RUNS_TABLE} set status = %s, updated_at = now() where run_id = %s",
+            (status, self.run_id),
+        )
+
+    # ── Phases ───────────────────────────────────────────────────────────────
+
+    def prepare(self) -> ReembedCheckpoint:
+        """Idempotent: shadow column, clearing trigger, run row. Holds the single-run lock."""
+        with self.conn.cursor() as cur:
+            cur.execute("select pg_try_advisory_lock(%s)", (_ADVISORY_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                raise RuntimeError("another re-embedding run holds the lock")
+            cur.execute(
+                f"alter table student_memories add column if not exists {SHADOW_COLUMN} vector({int(self.dims)})"
+            )
+            cur.execute(f"""
+                create or replace function _clear_{SHADOW_COLUMN}()
+                returns trigger language plpgsql as $$
+                begin
+                    if tg_op = 'INSERT' or new.embedding is distinct from old.embedding then
+                        new.{SHADOW_COLUMN} = null;
+                    end if;
+                    return new;
+                end;
+                $$
+            """)
+            cur.execute(f"drop trigger if exists student_memories_clear_{SHADOW_COLUMN} on student_memories")
+            cur.execute(f"""
+                create trigger student_memories_clear_{SHADOW_COLUMN}
+                    before insert or update on student_memories
+                    for each row execute procedure _clear_{SHADOW_COLUMN}()
+            """)
+            cur.execute(
+                f"insert into {RUNS_TABLE} (run_id, model, dims) values (%s, %s, %s) "
+                "on conflict (run_id) do nothing",
+                (self.run_id, self.model, self.dims),
+            )
+        self.conn.commit()
+        checkpoint = self.checkpoint()
+        if (checkpoint.model, checkpoint.dims) != (self.model, self.dims):
+            raise ValueError(f"run {self.run_id} was started with {checkpoint.model}/{checkpoint.dims}")
+        return checkpoint
+
+    def _write_page(self, cur, rows: list[tuple[str, str]]) -> None:
+        vectors = self.embed([(text or "").replace("\n", " ") for _, text in rows])
+        payload = json.dumps([
+            {"id": row_id, "embedding": _vector_literal(vector)}
+            for (row_id, _), vector in zip(rows, vectors)
+        ])
+        cur.execute(
+            f"update student_memories m set {SHADOW_COLUMN} = r.embedding::vector "
+            "from jsonb_to_recordset(%s::jsonb) as r(id text, embedding text) where m.id = r.id",
+            (payload,),
+        )
+
+    def fill(self, progress: Callable[[ReembedCheckpoint], None] | None = None) -> ReembedCheckpoint:
+        """Embed every row after the checkpoint, one committed page at a time."""
+        checkpoint = self.checkpoint()
+        last_id, done = checkpoint.last_id, checkpoint.rows_done
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    "select id, metadata->>'data' from student_memories "
+                    "where id > %s order by id limit %s",
+                    (last_id, self.batch_size),
+                )
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                self._write_page(cur, rows)
+                last_id, done = rows[-1][0], done + len(rows)
+                cur.execute(
+                    f"update {RUNS_TABLE} set last_id = %s, rows_done = %s, updated_at = now() "
+                    "where run_id = %s",
+                    (last_id, done, self.run_id),
+                )
+            self.conn.commit()
+            if progress:
+                progress(ReembedCheckpoint(self.run_id, self.model, self.dims, last_id, done, checkpoint.status))
+        return self.checkpoint()
+
+    def catch_up(self, cur) -> int:
+        """Embed rows inserted/rewritten since fill() passed them (shadow column cleared)."""
+        caught, last_id = 0, ""
+        while True:
+            cur.execute(
+                f"select id, metadata->>'data' from student_memories "
+                f"where {SHADOW_COLUMN} is null and id > %s order by id limit %s",
+                (last_id, self.batch_size),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return caught
+            self._write_page(cur, rows)
+            caught += len(rows)
+            last_id = rows[-1][0]
+
+    def build_index(self) -> None:
+        """HNSW on the shadow column without blocking writes (needs autocommit)."""
+        autocommit = self.conn.autocommit
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    f"create index concurrently if not exists student_memories_{SHADOW_COLUMN}_idx "
+                    f"on student_memories using hnsw ({SHADOW_COLUMN} vector_cosine_ops) "
+                    "with (m = 16, ef_construction = 64)"
+                )
+                self._set_status(cur, "indexed")
+        finally:
+            self.conn.autocommit = autocommit
+
+    def switch(self) -> int:
+        """Atomically make the shadow column the live one. Returns rows caught up under the lock."""
+        started = time.monotonic()
+        with self.conn.cursor() as cur:
+            # Blocks concurrent writes (not reads) until commit
+            cur.execute("lock table student_memories in share row exclusive mode")
+            caught = self.catch_up(cur)
+            cur.execute(f"drop trigger if exists student_memories_clear_{SHADOW_COLUMN} on student_memories")
+            cur.execute(f"alter table student_memories drop column if exists {PREVIOUS_COLUMN}")
+            cur.execute(f"alter table student_memories rename column embedding to {PREVIOUS_COLUMN}")
+            cur.execute(f"alter table student_memories rename column {SHADOW_COLUMN} to embedding")
+            cur.execute("drop index if exists student_memories_embedding_prev_idx")
+            cur.execute("alter index if exists student_memories_embedding_idx rename to student_memories_embedding_prev_idx")
+            cur.execute(f"alter index student_memories_{SHADOW_COLUMN}_idx rename to student_memories_embedding_idx")
+            cur.execute("drop function if exists match_vectors(vector, int, jsonb, jsonb, float, float, int)")
+            cur.execute(_match_vectors_sql(self.dims))
+            self._set_status(cur, "switched")
+        self.conn.commit()
+        logger.info("[Memory] Re-embed %s switched (%d rows caught up, %.1fs locked)",
+                    self.run_id, caught, time.monotonic() - started)
+        return caught
+
+    def drop_previous(self) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(f"alter table student_memories drop column if exists {PREVIOUS_COLUMN}")
+        self.conn.commit()
+
+
+def connect():
+    """Direct Postgres connection for DDL (the Supabase REST client cannot run it)."""
+    import psycopg2
+
+    from core.config import settings
+
+    return psycopg2.connect(settings.SUPABASE_DB_URL)
+
+
+def embed_fn(embedder: str, model: str) -> EmbedFn:
+    """Batch passage-embedding function for `embedder` (local | google)."""
+    if embedder == "local":
+        from core.embeddings import get_text_embedding
+
+        encoder = get_text_embedding(model)
+        return lambda texts: [v.tolist() for v in encoder.embed(list(texts))]
+
+    import google.generativeai as genai
+
+    from core.config import settings
+
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
+
+    def embed(texts: Sequence[str]) -> list[list[float]]:
+        # One page (--batch-size, default 1000) spans several requests
+        vectors: list[list[float]] = []
+        for i in range(0, len(texts), _GOOGLE_EMBED_BATCH_LIMIT):
+            chunk = list(texts[i:i + _GOOGLE_EMBED_BATCH_LIMIT])
+            res = genai.embed_content(model=model, content=chunk, task_type="retrieval_document")
+            vectors.extend(res["embedding"])
+        return vectors
+
+    return embed
@@ -0,0 +1,352 @@
+"""
+Durable write-behind queue for memory extraction (Redis stream + consumer group).
+
+/mentor/chat used to fire `add_turn` + semantic-cache writes as bare asyncio
+tasks: unbounded under load, competing with live requests, and lost on
+shutdown or scale-in. Turns are now appended to the `memory:turns` stream and
+stored by a small worker pool in each API instance:
+
+  • Coalescing — each read takes up to `_BATCH_SIZE` turns; turns of the same
+    student become ONE Mem0 `add` (one extraction + one dedupe pass).
+  • Backpressure — when the backlog (undelivered + pending) exceeds
+    MEMORY_WRITE_QUEUE_MAX_BACKLOG, new turns are shed (memory is best-effort).
+  • Retry — failed turns stay pending in the group; the reclaimer re-claims
+    them with exponential backoff (XPENDING idle ≥ delay(attempt)) and moves
+    them to `memory:turns:dead` after `_MAX_ATTEMPTS`.
+  • Durability — nothing is acked until stored, so turns in flight during a
+    shutdown or crash are picked up by any instance after `_RETRY_BASE_SECS`.
+  • Roles — PROCESS_ROLE=web instances only enqueue (and keep the backlog
+    figure fresh for shedding); the workers in `python -m worker` store.
+
+Metrics: memory_write_queue_{enqueued,turns}_total, _coalesced_turns,
+_lag_seconds and _depth (see core/metrics.py).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from core.config import settings
+from core.metrics import (
+    MEMORY_QUEUE_BATCH_TURNS,
+    MEMORY_QUEUE_DEPTH,
+    MEMORY_QUEUE_ENQUEUED,
+    MEMORY_QUEUE_LAG_SECONDS,
+    MEMORY_QUEUE_TURNS,
+)
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "memory:turns"
+DEAD_LETTER_KEY = "memory:turns:dead"
+GROUP = "memory-writers"
+
+_BATCH_SIZE: int = 64
+_READ_BLOCK_MS: int = 2_000
+_COALESCE_WAIT_SECS: float = 0.5     # after a small read, wait briefly for follow-up turns
+_ADD_TIMEOUT_SECS: float = 25.0      # must stay below _RETRY_BASE_SECS (no double-claims)
+_RETRY_BASE_SECS: float = 30.0
+_RETRY_MAX_SECS: float = 15 * 60.0
+_MAX_ATTEMPTS: int = 6
+_RECLAIM_INTERVAL_SECS: float = 10.0
+_DEAD_LETTER_MAXLEN: int = 10_000
+
+
+@dataclass(frozen=True)
+class QueuedTurn:
+    message_id: str
+    user_id: str
+    user_message: str
+    assistant_message: str
+    cache_namespace: str   # "" → no semantic-cache write
+
+    @property
+    def enqueued_at(self) -> float:
+        """Stream IDs start with the append time in ms."""
+        return int(self.message_id.split("-", 1)[0]) / 1000
+
+    @classmethod
+    def from_entry(cls, message_id: str, fields: dict) -> "QueuedTurn":
+        return cls(
+            message_id=message_id,
+            user_id=fields["user_id"],
+            user_message=fields["user_message"],
+            assistant_message=fields["assistant_message"],
+            cache_namespace=fields.get("cache_namespace", ""),
+        )
+
+    def __repr__(self) -> str:
+        return f"QueuedTurn({self.message_id}, user={self.user_id[:8]}…)"
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds a turn delivered `attempt` times waits before it is re-claimed."""
+    return min(_RETRY_BASE_SECS * 2 ** (attempt - 1), _RETRY_MAX_SECS)
+
+
+def coalesce(turns: Sequence[QueuedTurn]) -> dict[str, list[QueuedTurn]]:
+    """Group turns by student, keeping conversation order within each group."""
+    by_user: dict[str, list[QueuedTurn]] = {}
+    for turn in sorted(turns, key=lambda t: t.enqueued_at):
+        by_user.setdefault(turn.user_id, []).append(turn)
+    return by_user
+
+
+class MemoryWriteQueue:
+    def __init__(
+        self,
+        r: aioredis.Redis,
+        *,
+        concurrency: int,
+        max_backlog: int,
+        consumer: Optional[str] = None,
+    ):
+        self.r = r
+        self.max_backlog = max_backlog
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._sem = asyncio.Semaphore(concurrency)
+        self.consuming = False
+        self._backlog = 0           # refreshed by the reclaimer; avoids a round-trip per enqueue
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    # ── Producer ──────────────────────────────────────────────────────────────
+
+    async def enqueue(
+        self,
+        *,
+        user_id: str,
+        user_message: str,
+        assistant_message: str,
+        cache_namespace: str = "",
+    ) -> str:
+        """Returns "queued", "shed" (backlog full) or "unavailable" (Redis error)."""
+        if self._backlog >= self.max_backlog:
+            MEMORY_QUEUE_ENQUEUED.labels(result="shed").inc()
+            logger.warning("[MemoryQueue] Backlog %d ≥ %d — shedding turn for user %s…",
+                           self._backlog, self.max_backlog, user_id[:8])
+            return "shed"
+        try:
+            await self.r.xadd(STREAM_KEY, {
+                "user_id": user_id,
+                "user_message": user_message,
+                "assistant_message": assistant_message,
+                "cache_namespace": cache_namespace,
+            })
+        except RedisError:
+            MEMORY_QUEUE_ENQUEUED.labels(result="unavailable").inc()
+            logger.exception("[MemoryQueue] enqueue failed for user %s…", user_id[:8])
+            return "unavailable"
+        self._backlog += 1
+        MEMORY_QUEUE_ENQUEUED.labels(result="queued").inc()
+        return "queued"
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self, *, consume: bool = True) -> None:
+        try:
+            await self.r.xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        await self.refresh_stats()
+        self.consuming = consume
+        self._tasks = [asyncio.create_task(self._reclaim_loop(), name="memory-queue-reclaimer")]
+        if consume:
+            self._tasks.append(asyncio.create_task(self._read_loop(), name="memory-queue-reader"))
+        logger.info("[MemoryQueue] Started %s %s (backlog=%d)",
+                    "consumer" if consume else "producer", self.consumer, self._backlog)
+
+    async def stop(self, timeout_secs: float = 10.0) -> None:
+        """Stop reading; let the batch in flight finish. Unacked turns stay pending for retry."""
+        self._stopping.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout_secs)
+            for task in pending:
+                task.cancel()
+        await self.r.aclose()
+        logger.info("[MemoryQueue] Stopped consumer %s", self.consumer)
+
+    # ── Consumer ──────────────────────────────────────────────────────────────
+
+    async def _read(self, block_ms: Optional[int]) -> list[QueuedTurn]:
+        response = await self.r.xreadgroup(
+            GROUP, self.consumer, {STREAM_KEY: ">"}, count=_BATCH_SIZE, block=block_ms,
+        )
+        return [QueuedTurn.from_entry(mid, fields) for _, entries in response or [] for mid, fields in entries]
+
+    async def _read_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                turns = await self._read(_READ_BLOCK_MS)
+                if turns and len(turns) < _BATCH_SIZE:
+                    await asyncio.sleep(_COALESCE_WAIT_SECS)
+                    turns += await self._read(None)
+                if turns:
+                    await self.process(turns)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[MemoryQueue] read loop error; backing off")
+                await asyncio.sleep(_RECLAIM_INTERVAL_SECS)
+
+    async def _reclaim_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=_RECLAIM_INTERVAL_SECS)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping.is_set():
+                return
+            try:
+                if self.consuming:
+                    await self.reclaim()
+                await self.refresh_stats()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[MemoryQueue] reclaim failed")
+
+    async def process(self, turns: Sequence[QueuedTurn]) -> None:
+        """Store each student's turns with one add_turns call; ack what was stored."""
+        from memory import add_turns
+
+        MEMORY_QUEUE_LAG_SECONDS.set(time.time() - min(t.enqueued_at for t in turns))
+
+        async def _store(user_id: str, user_turns: list[QueuedTurn]) -> bool:
+            async with self._sem:
+                try:
+                    await asyncio.wait_for(
+                        add_turns(
+                            user_id=user_id,
+                            turns=[(t.user_message, t.assistant_message) for t in user_turns],
+                        ),
+                        timeout=_ADD_TIMEOUT_SECS,
+                    )
+                except Exception:
+                    logger.warning("[MemoryQueue] add_turns failed for user %s… (%d turns); will retry",
+                                   user_id[:8], len(user_turns), exc_info=True)
+                    return False
+            MEMORY_QUEUE_BATCH_TURNS.observe(len(user_turns))
+            await self._update_semantic_cache(user_turns)
+            return True
+
+        groups = coalesce(turns)
+        results = await asyncio.gather(*(_store(uid, ts) for uid, ts in groups.items()))
+
+        stored = [t.message_id for ok, ts in zip(results, groups.values()) if ok for t in ts]
+        failed = len(turns) - len(stored)
+        if stored:
+            await self.r.xack(STREAM_KEY, GROUP, *stored)
+            self._backlog = max(self._backlog - len(stored), 0)
+            MEMORY_QUEUE_TURNS.labels(result="stored").inc(len(stored))
+        if failed:
+            MEMORY_QUEUE_TURNS.labels(result="retried").inc(failed)
+
+    async def _update_semantic_cache(self, turns: Sequence[QueuedTurn]) -> None:
+        from services.semantic_cache import get_cache
+
+        cache = get_cache()
+        if cache is None:
+            return
+        for turn in turns:
+            if turn.cache_namespace:
+                await asyncio.to_thread(
+                    cache.update_cache, turn.user_message, turn.assistant_message,
+                    namespace=turn.cache_namespace,
+                )
+
+    async def reclaim(self) -> int:
+        """
+        Re-claim failed or orphaned turns whose backoff has elapsed and process
+        them; dead-letter those out of attempts. Returns turns re-processed.
+        """
+        pending = await self.r.xpending_range(
+            STREAM_KEY, GROUP, min="-", max="+", count=_BATCH_SIZE,
+            idle=int(_RETRY_BASE_SECS * 1000),
+        )
+        due = [p for p in pending if p["time_since_delivered"] >= retry_delay(p["times_delivered"]) * 1000]
+        if not due:
+            return 0
+
+        exhausted = {p["message_id"] for p in due if p["times_delivered"] >= _MAX_ATTEMPTS}
+        claimed = await self.r.xclaim(
+            STREAM_KEY, GROUP, self.consumer,
+            min_idle_time=int(_RETRY_BASE_SECS * 1000),
+            message_ids=[p["message_id"] for p in due],
+        )
+        retry: list[QueuedTurn] = []
+        for message_id, fields in claimed:
+            if not fields:
+                continue  # trimmed away
+            if message_id in exhausted:
+                await self.r.xadd(DEAD_LETTER_KEY, fields, maxlen=_DEAD_LETTER_MAXLEN, approximate=True)
+                await self.r.xack(STREAM_KEY, GROUP, message_id)
+                MEMORY_QUEUE_TURNS.labels(result="dead").inc()
+                logger.error("[MemoryQueue] %s dead-lettered after %d attempts", message_id, _MAX_ATTEMPTS)
+            else:
+                retry.append(QueuedTurn.from_entry(message_id, fields))
+        if retry:
+            await self.process(retry)
+        return len(retry)
+
+    async def refresh_stats(self) -> None:
+        """Update depth/backlog and trim entries every consumer has acked."""
+        for group in await self.r.xinfo_groups(STREAM_KEY):
+            if group["name"] != GROUP:
+                continue
+            self._backlog = int(group.get("lag") or 0) + int(group["pending"])
+            MEMORY_QUEUE_DEPTH.set(self._backlog)
+
+            summary = await self.r.xpending(STREAM_KEY, GROUP)
+            oldest_needed = summary["min"] if summary["pending"] else group["last-delivered-id"]
+            if oldest_needed and oldest_needed != "0-0":
+                await self.r.xtrim(STREAM_KEY, minid=oldest_needed, approximate=True)
+
+
+# ── Process-wide instance (started from the FastAPI lifespan) ─────────────────
+
+_queue: Optional[MemoryWriteQueue] = None
+
+
+def get_write_queue() -> Optional[MemoryWriteQueue]:
+    """The running queue, or None (Redis unavailable) — callers fall back to inline tasks."""
+    return _queue
+
+
+async def start_write_queue(*, consume: bool = True) -> Optional[MemoryWriteQueue]:
+    global _queue
+    r = aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        decode_responses=True,
+        socket_connect_timeout=2,
+    )
+    try:
+        await r.ping()
+        queue = MemoryWriteQueue(
+            r,
+            concurrency=settings.MEMORY_WRITE_QUEUE_CONCURRENCY,
+            max_backlog=settings.MEMORY_WRITE_QUEUE_MAX_BACKLOG,
+        )
+        await queue.start(consume=consume)
+    except Exception as e:
+        logger.warning("[MemoryQueue] Disabled — Redis unavailable: %r", e)
+        await r.aclose()
+        return None
+    _queue = queue
+    return _queue
+
+
+async def stop_write_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
@@ -5,18 +5,41 @@ Jobs:
   Sun 19:00 IST  job_memory_insights()       ← Goal-Activity Gap → WhatsApp nudges
   Sun 20:00 IST  job_weekly_snapshots()      ← Career digest → WhatsApp
   Daily 00:05    job_deadline_alerts()       ← Opportunity deadlines → WhatsApp
-  Weekly Mon     job_enrich_digital_twin()   ← Gemini memory summary → profiles
+  Weekly Mon     job_enrich_digital_twin()   ← Gemini memory summary → profiles (changed students only)
   Weekly Mon     job_prune_memories()        ← TTL + 150-fact cap cleanup
+
+The scheduler runs in worker processes (`python -m worker`, or the API with
+PROCESS_ROLE=all). Triggers fire on the instance holding the scheduler lease,
+once per trigger (services/leader.py), and are enqueued on the shared task
+queue (services/task_queue.py) so whichever worker has a free slot runs the
+job; without Redis the job runs inline. Per-student work fans out through
+services/job_runner.py (bounded concurrency, per-item timeout/retries,
+progress + ETA logs); sync Supabase and Gemini calls run in threads. Each
+job exports Prometheus metrics and records its runs in job_runs
+(services/job_metrics.py; GET /admin/jobs/runs).
 """
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 
+import redis.asyncio as aioredis
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from core.config import settings
+from core.metrics import DEADLINE_ALERTS_PLANNED
+from db.keyset import count_rows, iter_pages
 from db.supabase_client import get_supabase
-from services.whatsapp_service import send_weekly_snapshot, send_deadline_alert
+from services.alert_planner import AlertPlanner
+from services.job_prompts import NUDGE_PROMPT, REPORT_PROMPT, nudge_payload, report_payload
+from services.job_ledger import run_resumable
+from services.job_metrics import instrument_job
+from services.job_runner import run_per_item
+from services.leader import LeaderElector, current_fence
+from services.llm_batch import LLMBatcher
+from services.task_queue import get_task_queue
+from services.whatsapp_bulk import OutboundMessage
+from services.whatsapp_service import format_deadline_digest, format_weekly_snapshot, send_messages_bulk
 from core.retention import check_user_retention
 
 logger = logging.getLogger(__name__)
@@ -30,155 +53,148 @@ async def job_memory_insights():
     Runs Sunday 02:00 IST — prepares nudges for the entire day.
 
     For each WhatsApp-enabled user:
-      1. Loads all career memories
+      1. Loads the newest GOALS / BLOCKERS facts (filtered in SQL, first page only)
       2. Identifies Goal-Activity Gaps (goals in memory not reflected in DB activities)
       3. Surfaces unresolved BLOCKERS older than 30 days
       4. Generates 1–3 personalised nudges via Gemini
       5. Stores nudges in `profiles.pending_nudges` for the hourly snapshot jobs to send
+
+    Checkpointed per ISO week in job_runs (services/job_ledger.py); students
+    already nudged this week (profiles.pending_nudges_at) are skipped.
     """
     logger.info("[Scheduler] Starting job_memory_insights...")
-    from memory import get_all_memories, enrich_twin_summary
-    import google.generativeai as genai
+    from memory import iter_memories
 
     supabase = get_supabase()
-    result = (
-        supabase.table("profiles")
-        .select("user_id, full_name, whatsapp_enabled, whatsapp_snapshots")
-        .eq("whatsapp_enabled", True)
-        .eq("whatsapp_snapshots", True)
-        .execute()
-    )
-    users = result.data or []
-    logger.info("[Scheduler] Generating memory insights for %d users", len(users))
+    opted_in = (("eq", "whatsapp_enabled", True), ("eq", "whatsapp_snapshots", True))
+    total = await count_rows("profiles", filters=opted_in)
+    logger.info("[Scheduler] Generating memory insights for %d users", total)
+    now = datetime.now(IST)
+    week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    batcher = LLMBatcher(NUDGE_PROMPT, batch_size=settings.JOB_NUDGE_BATCH_SIZE,
+                         max_wait_secs=settings.JOB_LLM_BATCH_WAIT_SECS)
 
-    for user in users:
+    async def _nudge(user: dict) -> str:
         user_id = user["user_id"]
-        try:
-            # 1. Load memories
-            memories = await get_all_memories(user_id=user_id)
-            if not memories:
-                continue
-
-            # 2. Fetch recent activities from DB to compare against goals
-            activities_result = (
-                supabase.table("activities")
-                .select("title, type")
-                .eq("user_id", user_id)
-                .order("created_at", desc=True)
-                .limit(10)
-                .execute()
-            )
-            recent_activities = [a["title"] for a in activities_result.data or []]
 
-            # 3. Process goals and blockers
-            goal_facts = [
-                m.get("memory", "") for m in memories
-                if "GOALS:" in m.get("memory", "").upper()
-            ]
-            blocker_facts = [
-                m.get("memory", "") for m in memories
-                if "BLOCKERS:" in m.get("memory", "").upper()
-            ]
-
-            if not goal_facts and not blocker_facts:
-                continue
-
-            # 4. Generate nudges via Gemini
-            facts_block = "\n".join(f"- {f}" for f in goal_facts[:3])
-            act_block = "\n".join(f"- {a}" for a in recent_activities[:3])
-            blocker_block = "\n".join(f"- {b}" for b in blocker_facts[:3])
-
-            prompt = (
-                f"You are generating a weekly career nudge for an Indian student.\n"
-                f"GOALS (from memory):\n{facts_block}\n"
-                f"RECENT ACTIVITIES (from DB):\n{act_block}\n"
-                f" blockers:\n{blocker_block}\n\n"
-                f"Task: Based on the GAP between goals and activities, OR any urgent blockers, "
-                f"write ONE short (max 15 words) actionable, encouraging nudge. "
-                f"Use Indian student context (exams, internships, projects). No generic fluff.\n\nNudge:"
-            )
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            response = model.generate_content(prompt)
-            nudge = response.text.strip().replace('"', '')
-
-            # 5. Store nudge in profile
-            supabase.table("profiles").update(
-                {"pending_nudges": nudge}
+        # 1. Load the newest goals and blockers (3 of each)
+        goal_facts, blocker_facts = [], []
+        async for m in iter_memories(user_id=user_id, page_size=20, categories=("GOALS", "BLOCKERS")):
+            facts = goal_facts if m["category"] == "GOALS" else blocker_facts
+            if len(facts) < 3:
+                facts.append(m["memory"])
+            if len(goal_facts) == 3 and len(blocker_facts) == 3:
+                break
+        if not goal_facts and not blocker_facts:
+            return "no_facts"
+
+        # 2. Fetch recent activities from DB to compare against goals
+        activities_result = await asyncio.to_thread(
+            lambda: supabase.table("activities")
+            .select("title, type")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(10)
+            .execute()
+        )
+        recent_activities = [a["title"] for a in activities_result.data or []]
+
+        # 3. Generate the nudge — batched with other students' (services/llm_batch.py)
+        nudge = await batcher.generate(user_id, nudge_payload(goal_facts, recent_activities, blocker_facts))
+
+        # 4. Store nudge in profile
+        await asyncio.to_thread(
+            lambda: supabase.table("profiles").update(
+                {"pending_nudges": nudge, "pending_nudges_at": datetime.now(timezone.utc).isoformat()}
             ).eq("user_id", user_id).execute()
-
-            logger.info("[Scheduler] Generated nudge for user %s…: %s", user_id[:8], nudge)
-
-        except Exception:
-            logger.exception("[Scheduler] Memory insights failed for user %s…", user_id[:8])
-
+        )
+
+        logger.info("[Scheduler] Generated nudge for user %s…: %s", user_id[:8], nudge)
+        return "nudged"
+
+    async def _not_nudged_this_week(page: list[dict]) -> list[dict]:
+        return [u for u in page if not u.get("pending_nudges_at")
+                or datetime.fromisoformat(u["pending_nudges_at"]) < week_start]
+
+    await run_resumable(
+        "memory_insights", now.strftime("%G-W%V"),
+        lambda after: iter_pages("profiles", columns="user_id, full_name, pending_nudges_at",
+                                 filters=opted_in, after=after),
+        _nudge, pending=_not_nudged_this_week, total=total,
+        # Enough workers in flight for batches to fill
+        concurrency=max(settings.JOB_CONCURRENCY, 2 * batcher.batch_size),
+    )
     logger.info("[Scheduler] job_memory_insights complete.")
 
 
 # ── 2. Weekly Snapshots Job ───────────────────────────────────────────────────
 
-async def job_weekly_snapshots():
+async def job_weekly_snapshots(hour: int | None = None):
     """
     Runs EVERY HOUR on Sunday.
-    Sends WhatsApp-enabled users their career digest + pending nudges,
-    ONLY if the current hour matches their persona's `nudge_hour_ist`.
+    Sends WhatsApp-enabled users their career digest + pending nudges, reading
+    only the students whose `nudge_hour_ist` is the trigger hour (`hour`,
+    default now) — profiles.nudge_hour_ist + partial index, migration 027.
     """
     logger.info("[Scheduler] Running weekly snapshot job...")
     supabase = get_supabase()
 
-    current_hour = datetime.now(IST).hour
-
-    # 1. Fetch all users opted-in to snapshots
-    result = (
-        supabase.table("profiles")
-        .select("user_id, full_name, whatsapp_phone, whatsapp_snapshots, pending_nudges")
-        .eq("whatsapp_enabled", True)
-        .eq("whatsapp_snapshots", True)
-        .execute()
-    )
-    users = result.data or []
-
-    if not users:
-        return
+    current_hour = datetime.now(IST).hour if hour is None else hour
 
-    # 2. Fetch their personas to check preferred nudge hours
-    user_ids = [u["user_id"] for u in users]
-    personas_res = (
-        supabase.table("user_persona_profiles")
-        .select("user_id, nudge_hour_ist")
-        .in_("user_id", user_ids)
-        .execute()
+    due_this_hour = (
+        ("eq", "nudge_hour_ist", current_hour),
+        ("eq", "whatsapp_enabled", True),
+        ("eq", "whatsapp_snapshots", True),
     )
-    nudge_hours = {p["user_id"]: p.get("nudge_hour_ist", 19) for p in (personas_res.data or [])}
-
-    # 3. Filter users who should receive it THIS hour
-    due_users = [u for u in users if nudge_hours.get(u["user_id"], 19) == current_hour]
-    
-    logger.info("[Scheduler] Hour %d: Sending snapshots to %d users (out of %d total)", current_hour, len(due_users), len(users))
-
-    for user in due_users:
-        try:
-            # Note: real readiness and opportunity queries would happen here
-            # For now using defaults/placeholders as requested for Phase 10.3
-            enriched = {
-                **user,
-                "readiness_pct": 72,
-                "top_opportunity": "Google Summer of Code 2026",
-                "top_match_pct": 84,
-                "deadline_days": 5,
-                "mentor_tip": user.get("pending_nudges"),
-            }
-            send_weekly_snapshot(enriched)
-
-            # Clear pending nudges after sending
-            supabase.table("profiles").update(
-                {"pending_nudges": None}
-            ).eq("user_id", user["user_id"]).execute()
-
-        except Exception:
-            logger.exception(
-                "[Scheduler] Snapshot failed for user %s…", user["user_id"][:8]
-            )
+    total_due, total_sent, total_skipped = 0, 0, 0
+
+    # 1. Page through this hour's opted-in students only
+    async for users in iter_pages(
+        "profiles",
+        columns="user_id, full_name, whatsapp_phone, pending_nudges",
+        filters=due_this_hour,
+    ):
+        users = [u for u in users if u.get("whatsapp_phone")]
+        total_due += len(users)
+
+        # 2. Send the page through the rate-limited bulk sender
+        # Note: real readiness and opportunity queries would happen here
+        # For now using defaults/placeholders as requested for Phase 10.3
+        messages = []
+        for user in users:
+            try:
+                body = format_weekly_snapshot({
+                    **user,
+                    "readiness_pct": 72,
+                    "top_opportunity": "Google Summer of Code 2026",
+                    "top_match_pct": 84,
+                    "deadline_days": 5,
+                    "mentor_tip": user.get("pending_nudges"),
+                })
+            except Exception:
+                # One bad profile must not abort the page (or the hour) for everyone else
+                total_skipped += 1
+                logger.exception("[Scheduler] Could not build snapshot for %s; skipping", user["user_id"][:8])
+                continue
+            messages.append(OutboundMessage(
+                user_id=user["user_id"], phone=user["whatsapp_phone"], body=body, message_type="snapshot",
+            ))
+        report = await send_messages_bulk(messages)
+        total_sent += len(report.sent)
+
+        # 3. Clear delivered nudges with one update for the page
+        delivered = report.sent_user_ids
+        if delivered:
+            try:
+                await asyncio.to_thread(
+                    lambda: supabase.table("profiles").update({"pending_nudges": None})
+                    .in_("user_id", delivered).execute()
+                )
+            except Exception:
+                logger.exception("[Scheduler] Failed to clear pending nudges for %d users", len(delivered))
 
+    logger.info("[Scheduler] Hour %d: Sent snapshots to %d of %d due users (%d skipped)",
+                current_hour, total_sent, total_due, total_skipped)
     logger.info("[Scheduler] Weekly snapshot job complete.")
 
 
@@ -187,7 +203,9 @@ async def job_weekly_snapshots():
 async def job_deadline_alerts():
     """
     Runs daily at 00:05 IST.
-    Alerts matched users about opportunities closing in exactly 3 days.
+    Alerts students about opportunities closing in exactly 3 days that fit
+    them (services/alert_planner.py): top ALERT_TOP_N per student, merged
+    into one message, sent through the rate-limited bulk sender.
     """
     logger.info("[Scheduler] Running deadline alerts job...")
     supabase = get_supabase()
@@ -195,10 +213,11 @@ async def job_deadline_alerts():
     now = datetime.now(IST)
     target_date = (now + timedelta(days=3)).date().isoformat()
 
-    opps_result = (
-        supabase.table("opportunities")
-        .select("id, title, org, deadline")
+    opps_result = await asyncio.to_thread(
+        lambda: supabase.table("opportunities")
+        .select("id, title, organization, domain_id, tags, segments, deadline")
         .eq("deadline", target_date)
+        .eq("is_active", True)
         .execute()
     )
     opportunities = opps_result.data or []
@@ -206,27 +225,66 @@ async def job_deadline_alerts():
         logger.info("[Scheduler] No opportunities closing in 3 days.")
         return
 
-    users_result = (
-        supabase.table("profiles")
-        .select("user_id, full_name, whatsapp_phone")
-        .eq("whatsapp_enabled", True)
-        .eq("whatsapp_alerts", True)
-        .execute()
-    )
-    users = users_result.data or []
-
-    for opp in opportunities:
-        for user in users:
+    planner = AlertPlanner(opportunities, top_n=settings.ALERT_TOP_N, min_score=settings.ALERT_MIN_SCORE)
+    total_users, alerted_users, sent, failed, skipped = 0, 0, 0, 0, 0
+    async for users in iter_pages(
+        "profiles",
+        columns="user_id, full_name, whatsapp_phone, domain_id",
+        filters=(("eq", "whatsapp_enabled", True), ("eq", "whatsapp_alerts", True)),
+    ):
+        users = [u for u in users if u.get("whatsapp_phone")]
+        total_users += len(users)
+        if not users:
+            continue
+        user_ids = [u["user_id"] for u in users]
+
+        # Persona segments + tracked opportunities (with their tags) for this page
+        personas_res, tracked_res = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: supabase.table("user_persona_profiles")
+                .select("user_id, segment").in_("user_id", user_ids).execute()
+            ),
+            asyncio.to_thread(
+                lambda: supabase.table("opportunity_applications")
+                .select("user_id, opportunity_id, opportunities(tags)").in_("user_id", user_ids).execute()
+            ),
+        )
+        segments = {p["user_id"]: p.get("segment") for p in personas_res.data or []}
+        tracked: dict[str, set[str]] = {}
+        interests: dict[str, set[str]] = {}
+        for app in tracked_res.data or []:
+            tracked.setdefault(app["user_id"], set()).add(str(app["opportunity_id"]))
+            interests.setdefault(app["user_id"], set()).update((app.get("opportunities") or {}).get("tags") or ())
+
+        plans = planner.plan(users, segments=segments, interests=interests, tracked=tracked)
+        messages = []
+        for plan in plans:
+            for alert in plan.alerts:
+                DEADLINE_ALERTS_PLANNED.labels(kind="tracked" if alert.tracked else "matched").inc()
+            digest = [
+                {**a.opportunity, "match_pct": a.match_pct, "days_left": 3, "tracked": a.tracked}
+                for a in plan.alerts
+            ]
             try:
-                send_deadline_alert(user, {**opp, "match_pct": 84, "days_left": 3})
+                body = format_deadline_digest(plan.user, digest)
             except Exception:
-                logger.exception(
-                    "[Scheduler] Alert failed for user %s…", user["user_id"][:8]
-                )
+                # One bad profile must not abort the run for everyone else
+                skipped += 1
+                logger.exception("[Scheduler] Could not build deadline alert for %s; skipping",
+                                 plan.user["user_id"][:8])
+                continue
+            messages.append(OutboundMessage(
+                user_id=plan.user["user_id"], phone=plan.user["whatsapp_phone"],
+                body=body, message_type="alert",
+            ))
+        alerted_users += len(plans)
+        report = await send_messages_bulk(messages)
+        sent, failed = sent + len(report.sent), failed + len(report.failed)
 
     logger.info(
-        "[Scheduler] Sent alerts for %d opportunities to %d users.",
-        len(opportunities), len(users),
+        "[Scheduler] Deadline alerts for %d opportunities: %d of %d students matched, "
+        "%d sent, %d failed, %d skipped.",
+        len(opportunities), alerted_users, total_users, sent, failed, skipped,
     )
 
 
@@ -235,35 +293,49 @@ async def job_deadline_alerts():
 async def job_enrich_digital_twin():
     """
     Runs every Monday at 01:00 IST.
-    Generates a Gemini narrative summary of each student's full memory store
-    and writes it to profiles.memory_summary for fast context injection.
+    Updates profiles.memory_summary only for students whose memory facts
+    changed since profiles.memory_enriched_at (migration 019): the changed
+    facts are folded into the existing summary, with a periodic full rebuild
+    (see memory.refresh_twin_summary). Gemini calls scale with active students.
     """
     logger.info("[Scheduler] Starting job_enrich_digital_twin...")
-    from memory import get_all_memories, enrich_twin_summary
+    from memory import refresh_twin_summary, twin_enrichment_candidates
 
     supabase = get_supabase()
-    result = supabase.table("profiles").select("user_id").execute()
-    users = result.data or []
-    logger.info("[Scheduler] Enriching Digital Twin for %d users", len(users))
 
-    for user in users:
-        user_id = user["user_id"]
-        try:
-            memories = await get_all_memories(user_id=user_id)
-            if not memories:
-                continue
-            summary = await enrich_twin_summary(user_id=user_id, memories=memories)
-            if summary:
-                supabase.table("profiles").update({
+    async def _candidates():
+        after_user = None
+        while True:
+            candidates = await twin_enrichment_candidates(after_user=after_user)
+            if not candidates:
+                return
+            after_user = candidates[-1]["user_id"]
+            for candidate in candidates:
+                yield candidate
+
+    async def _enrich(candidate: dict) -> str:
+        user_id = candidate["user_id"]
+        # Facts written while this student is summarised are picked up next week
+        started_at = datetime.now(timezone.utc)
+        summary, mode = await refresh_twin_summary(
+            user_id=user_id,
+            previous_summary=candidate.get("memory_summary"),
+            enriched_at=candidate.get("memory_enriched_at"),
+            now=started_at,
+        )
+        if summary:
+            await asyncio.to_thread(
+                lambda: supabase.table("profiles").update({
                     "memory_summary": summary,
-                    "memory_enriched_at": datetime.now(timezone.utc).isoformat(),
+                    "memory_enriched_at": started_at.isoformat(),
                 }).eq("user_id", user_id).execute()
-        except Exception:
-            logger.exception(
-                "[Scheduler] Twin enrichment failed for user %s…", user_id[:8]
             )
+        elif mode != "unchanged":
+            mode = "empty"  # Gemini failure or no usable facts; retried next week
+        return mode
 
-    logger.info("[Scheduler] job_enrich_digital_twin complete.")
+    report = await run_per_item("enrich_digital_twin", _candidates(), _enrich, key=lambda c: c["user_id"][:8])
+    logger.info("[Scheduler] job_enrich_digital_twin complete: %s", report.outcomes or "no changed students")
 
 
 # ── 5. Memory Pruning Job ─────────────────────────────────────────────────────
@@ -271,22 +343,19 @@ async def job_enrich_digital_twin():
 async def job_prune_memories():
     """
     Runs every Monday at 02:00 IST (after enrichment).
-    Deletes TTL-expired facts + enforces 150-fact cap per user.
+    Deletes TTL-expired facts + enforces 150-fact cap for all users in one
+    set-based SQL call (see db/migrations/017_memory_pruning.sql).
     """
     logger.info("[Scheduler] Starting job_prune_memories...")
-    from memory import prune_stale_memories
-
-    supabase = get_supabase()
-    result = supabase.table("profiles").select("user_id").execute()
-    users = result.data or []
+    from memory import prune_all_memories
 
-    total_pruned = 0
-    for user in users:
-        user_id = user["user_id"]
-        pruned = await prune_stale_memories(user_id=user_id)
-        total_pruned += pruned
+    report = await prune_all_memories()
+    for reason, by_category in report.items():
+        for category, deleted in sorted(by_category.items()):
+            logger.info("[Scheduler] Pruned %d %s facts (%s).", deleted, category, reason)
 
-    logger.info("[Scheduler] Pruned %d stale facts across %d users.", total_pruned, len(users) if users else 0)
+    total_pruned = sum(sum(by_category.values()) for by_category in report.values())
+    logger.info("[Scheduler] Pruned %d stale facts across all users.", total_pruned)
 
 
 # ── 6. Monthly Progress Reports Job ───────────────────────────────────────────
@@ -295,66 +364,59 @@ async def job_monthly_progress_reports():
     """
     Runs on the 1st of every month at 03:00 IST.
     Synthesizes the last 30 days of career activity into a narrative report.
+
+    Checkpointed per report month in job_runs (services/job_ledger.py); students
+    who already have the month's report are skipped, and saving is an upsert.
     """
     logger.info("[Scheduler] Starting job_monthly_progress_reports...")
-    import google.generativeai as genai
-    from datetime import date
-
     supabase = get_supabase()
     report_month = (datetime.now(IST).replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
-    
-    # 1. Fetch all users
-    res = supabase.table("profiles").select("user_id, full_name, domain_id, domains(name)").execute()
-    users = res.data or []
-    
-    logger.info("[Scheduler] Generating reports for %d users for %s", len(users), report_month)
-
-    for user in users:
-        user_id = user["user_id"]
-        try:
-            # 2. Aggregating Metrics (last 30 days)
-            thirty_days_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-            
-            # Activities
-            act_res = supabase.table("activities").select("title, category").eq("user_id", user_id).gte("created_at", thirty_days_ago).execute()
-            activities = act_res.data or []
-            
-            # Readiness Change
-            readiness_res = supabase.table("readiness_snapshots").select("readiness_pct, created_at").eq("user_id", user_id).gte("created_at", thirty_days_ago).order("created_at").execute()
-            readiness_data = readiness_res.data or []
-            
-            start_score = readiness_data[0]["readiness_pct"] if readiness_data else 0
-            end_score = readiness_data[-1]["readiness_pct"] if readiness_data else 0
-            readiness_gain = end_score - start_score
-
-            # Parent Nudges (consumed)
-            nudge_res = supabase.table("parent_nudges").select("content").eq("student_id", user_id).gte("created_at", thirty_days_ago).execute()
-            nudges = [n["content"] for n in (nudge_res.data or [])]
-
-            # 3. Generate Narrative via Gemini
-            metrics_summary = (
-                f"Full Name: {user['full_name']}\n"
-                f"Domain: {user.get('domains', {}).get('name', 'Unspecified')}\n"
-                f"Activities completed: {len(activities)}\n"
-                f"Readiness Score: {end_score}% (Change: {readiness_gain:+d}%)\n"
-                f"Parental Guidance provided: {len(nudges)} nudges\n"
-            )
+    thirty_days_ago = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    batcher = LLMBatcher(REPORT_PROMPT, batch_size=settings.JOB_REPORT_BATCH_SIZE,
+                         max_wait_secs=settings.JOB_LLM_BATCH_WAIT_SECS)
 
-            prompt = (
-                f"You are the Chief Mentor at SARGVISION AI. Write a 'Monthly Progress Narrative' for a student.\n"
-                f"STUDENT DATA:\n{metrics_summary}\n\n"
-                f"TASK: Write a 3-paragraph encouraging summary in a professional yet warm tone. "
-                f"Paragraph 1: Celebrate their specific wins (even if few). "
-                f"Paragraph 2: Interpret the readiness score change. "
-                f"Paragraph 3: Give 2 clear 'Focus Areas' for next month based on their domain.\n"
-                f"Style: Indian English context. No generic jargon.\n\nReport:"
-            )
+    # 1. Count users (for the ETA); they are streamed page by page below
+    total = await count_rows("profiles")
 
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            narrative = model.generate_content(prompt).text.strip()
+    logger.info("[Scheduler] Generating reports for %d users for %s", total, report_month)
+
+    async def _report(user: dict) -> None:
+        user_id = user["user_id"]
 
-            # 4. Save Report
-            supabase.table("monthly_reports").insert({
+        # 2. Aggregating Metrics (last 30 days) — activities, readiness change, parent nudges
+        act_res, readiness_res, nudge_res = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: supabase.table("activities").select("title, category").eq("user_id", user_id).gte("created_at", thirty_days_ago).execute()
+            ),
+            asyncio.to_thread(
+                lambda: supabase.table("readiness_snapshots").select("readiness_pct, created_at").eq("user_id", user_id).gte("created_at", thirty_days_ago).order("created_at").execute()
+            ),
+            asyncio.to_thread(
+                lambda: supabase.table("parent_nudges").select("content").eq("student_id", user_id).gte("created_at", thirty_days_ago).execute()
+            ),
+        )
+        activities = act_res.data or []
+        readiness_data = readiness_res.data or []
+
+        start_score = readiness_data[0]["readiness_pct"] if readiness_data else 0
+        end_score = readiness_data[-1]["readiness_pct"] if readiness_data else 0
+        readiness_gain = end_score - start_score
+
+        nudges = [n["content"] for n in (nudge_res.data or [])]
+
+        # 3. Generate Narrative via Gemini — batched with other students' (services/llm_batch.py)
+        narrative = await batcher.generate(user_id, report_payload(
+            full_name=user["full_name"],
+            domain=(user.get("domains") or {}).get("name", "Unspecified"),
+            activities=len(activities),
+            readiness=end_score,
+            readiness_change=readiness_gain,
+            parent_nudges=len(nudges),
+        ))
+
+        # 4. Save Report
+        await asyncio.to_thread(
+            lambda: supabase.table("monthly_reports").upsert({
                 "user_id": user_id,
                 "report_month": report_month,
                 "narrative_summary": narrative,
@@ -364,13 +426,26 @@ async def job_monthly_progress_reports():
                     "current_readiness": end_score,
                     "parent_nudge_count": len(nudges)
                 }
-            }).execute()
-
-            logger.info("[Scheduler] Generated monthly report for %s", user_id[:8])
-
-        except Exception as e:
-            logger.exception("[Scheduler] Monthly report failed for user %s…", user_id[:8])
-
+            }, on_conflict="user_id,report_month").execute()
+        )
+
+        logger.info("[Scheduler] Generated monthly report for %s", user_id[:8])
+
+    async def _without_report(page: list[dict]) -> list[dict]:
+        user_ids = [u["user_id"] for u in page]
+        res = await asyncio.to_thread(
+            lambda: supabase.table("monthly_reports").select("user_id")
+            .eq("report_month", report_month).in_("user_id", user_ids).execute()
+        )
+        done = {r["user_id"] for r in res.data or []}
+        return [u for u in page if u["user_id"] not in done]
+
+    await run_resumable(
+        "monthly_reports", report_month,
+        lambda after: iter_pages("profiles", columns="user_id, full_name, domain_id, domains(name)", after=after),
+        _report, pending=_without_report, total=total,
+        concurrency=max(settings.JOB_CONCURRENCY, 2 * batcher.batch_size),
+    )
     logger.info("[Scheduler] job_monthly_progress_reports complete.")
 
 
@@ -389,58 +464,119 @@ async def job_check_retention():
 # ── Scheduler Setup ───────────────────────────────────────────────────────────
 
 _scheduler: AsyncIOScheduler | None = None
-
-
-def start_scheduler() -> None:
-    """Call during FastAPI startup lifespan."""
-    global _scheduler
+_elector: LeaderElector | None = None
+
+
+# Task-queue handlers (task name = job id); registered by worker.py / main.py.
+# Instrumented with per-job metrics + job_runs history (services/job_metrics.py);
+# the resumable jobs keep their own (job, period) row in job_runs.
+JOBS = {
+    "memory_insights": instrument_job("memory_insights", job_memory_insights, history=False),
+    "weekly_snapshots": instrument_job("weekly_snapshots", job_weekly_snapshots),
+    "deadline_alerts": instrument_job("deadline_alerts", job_deadline_alerts),
+    "enrich_digital_twin": instrument_job("enrich_digital_twin", job_enrich_digital_twin),
+    "prune_memories": instrument_job("prune_memories", job_prune_memories),
+    "monthly_reports": instrument_job("monthly_reports", job_monthly_progress_reports, history=False),
+    "check_retention": instrument_job("check_retention", job_check_retention),
+}
+
+# These jobs restart from the first student and would re-send WhatsApp messages
+# to everyone already reached, so a failed or orphaned run is dead-lettered
+# instead of retried; the others are idempotent or resume from job_runs.
+JOB_MAX_ATTEMPTS = {
+    "weekly_snapshots": 1,
+    "deadline_alerts": 1,
+    "check_retention": 1,
+}
+
+
+def _guarded(job_id: str, args=None):
+    """
+    Cron entry point: on the leader, once per trigger minute, hand the job to a
+    worker. `args(trigger_time)` pins kwargs that must not drift if the task
+    starts late or is retried.
+    """
+    fn = JOBS[job_id]
+
+    async def _run() -> None:
+        now = datetime.now(IST)
+        kwargs = args(now) if args else {}
+
+        async def _dispatch() -> None:
+            queue = get_task_queue()
+            if queue is None:
+                await fn(**kwargs)
+                return
+            await queue.enqueue(job_id, kwargs, fence=current_fence())
+
+        await _elector.run_job(job_id, now.strftime("%Y-%m-%dT%H:%M"), _dispatch)
+
+    _run.__name__ = fn.__name__
+    return _run
+
+
+async def start_scheduler() -> None:
+    """Call during worker (or PROCESS_ROLE=all API) startup, after start_task_queue()."""
+    global _scheduler, _elector
+    r = None
+    if settings.SCHEDULER_LEADER_ELECTION:
+        r = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True,
+            socket_connect_timeout=2,
+        )
+    _elector = LeaderElector(
+        r, lease_secs=settings.SCHEDULER_LEASE_SECS, renew_secs=settings.SCHEDULER_LEASE_RENEW_SECS,
+    )
+    await _elector.start()
     _scheduler = AsyncIOScheduler(timezone="Asia/Kolkata")
 
     # Sunday 02:00 IST — bulk memory insights + nudge generation
     _scheduler.add_job(
-        job_memory_insights,
+        _guarded("memory_insights"),
         trigger=CronTrigger(day_of_week="sun", hour=2, minute=0, timezone="Asia/Kolkata"),
         id="memory_insights", replace_existing=True,
     )
 
     # Sunday Hourly (0-23) — send snapshots matching user's persona `nudge_hour_ist`
     _scheduler.add_job(
-        job_weekly_snapshots,
+        _guarded("weekly_snapshots", args=lambda now: {"hour": now.hour}),
         trigger=CronTrigger(day_of_week="sun", minute=0, timezone="Asia/Kolkata"),
         id="weekly_snapshots", replace_existing=True,
     )
 
     # Daily 00:05 IST — deadline alerts
     _scheduler.add_job(
-        job_deadline_alerts,
+        _guarded("deadline_alerts"),
         trigger=CronTrigger(hour=0, minute=5, timezone="Asia/Kolkata"),
         id="deadline_alerts", replace_existing=True,
     )
 
     # Monday 01:00 IST — Gemini summary enrichment
     _scheduler.add_job(
-        job_enrich_digital_twin,
+        _guarded("enrich_digital_twin"),
         trigger=CronTrigger(day_of_week="mon", hour=1, minute=0, timezone="Asia/Kolkata"),
         id="enrich_digital_twin", replace_existing=True,
     )
 
     # Monday 02:00 IST — TTL pruning (after enrichment)
     _scheduler.add_job(
-        job_prune_memories,
+        _guarded("prune_memories"),
         trigger=CronTrigger(day_of_week="mon", hour=2, minute=0, timezone="Asia/Kolkata"),
         id="prune_memories", replace_existing=True,
     )
 
     # 1st of every month 03:00 IST — Monthly Progress Reports
     _scheduler.add_job(
-        job_monthly_progress_reports,
+        _guarded("monthly_reports"),
         trigger=CronTrigger(day=1, hour=3, minute=0, timezone="Asia/Kolkata"),
         id="monthly_reports", replace_existing=True,
     )
 
     # Daily 04:00 IST — retention nudges
     _scheduler.add_job(
-        job_check_retention,
+        _guarded("check_retention"),
         trigger=CronTrigger(hour=4, minute=0, timezone="Asia/Kolkata"),
         id="check_retention", replace_existing=True,
     )
@@ -454,9 +590,22 @@ def start_scheduler() -> None:
     )
 
 
-def stop_scheduler() -> None:
-    """Call during FastAPI shutdown lifespan."""
-    global _scheduler
+def scheduler_status() -> dict:
+    """For worker /health: whether the scheduler runs here and holds the lease."""
+    return {
+        "running": bool(_scheduler and _scheduler.running),
+        "leader": bool(_elector and _elector.is_leader),
+    }
+
+
+async def stop_scheduler() -> None:
+    """Call during worker (or PROCESS_ROLE=all API) shutdown."""
+    global _scheduler, _elector
     if _scheduler:
         _scheduler.shutdown()
         logger.info("[Scheduler] Stopped.")
+    if _elector:
+        await _elector.stop()
+        if _elector.r is not None:
+            await _elector.r.aclose()
+        _elector = None
@@ -0,0 +1,43 @@
+"""
+One-off backfill of category + valid_until on existing student_memories rows.
+
+Usage (from backend/, after applying db/migrations/018_memory_ttl_stamping.sql):
+    python -m scripts.backfill_memory_ttl [--batch-size 5000]
+
+Facts written before add_turns() started stamping TTLs have no valid_until, so
+they never expire from search or pruning. Each batch is one UPDATE in SQL
+(backfill_memory_ttl): category from the fact's "CATEGORY:" prefix and
+valid_until = created_at + that category's TTL. Safe to re-run; it stops when
+no unstamped rows are left.
+"""
+import argparse
+import time
+
+from db.supabase_client import get_supabase
+from memory import _CATEGORY_TTL_DAYS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    supabase = get_supabase()
+    total = 0
+    started = time.monotonic()
+    while True:
+        res = supabase.rpc(
+            "backfill_memory_ttl",
+            {"category_ttl_days": _CATEGORY_TTL_DAYS, "batch_size": args.batch_size},
+        ).execute()
+        stamped = int(res.data or 0)
+        if not stamped:
+            break
+        total += stamped
+        print(f"  stamped {total} facts ({time.monotonic() - started:.0f}s)")
+
+    print(f"✅ Backfilled category/valid_until on {total} facts")
+
+
+if __name__ == "__main__":
+    main()
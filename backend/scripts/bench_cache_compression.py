@@ -0,0 +1,84 @@
+"""
+Benchmark compression ratio and decode cost for cached responses.
+
+Usage (from backend/):
+    python -m scripts.bench_cache_compression [--samples 2000] [--corpus DIR]
+
+Samples come from Redis by default; `--corpus` reads *.md files instead so the
+benchmark can run without a populated cache. Half of the samples train the
+dictionary and the other half are measured, so the dict ratio is not inflated
+by testing on training data.
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import redis
+
+from core.config import settings
+from services.cache_codec import ResponseCodec, sample_cached_responses, train_dictionary
+
+
+def _load_corpus(corpus_dir: str, limit: int) -> list[str]:
+    paths = sorted(Path(corpus_dir).rglob("*.md"))[:limit]
+    samples = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            samples.append(f.read())
+    return samples
+
+
+def _measure(label: str, codec: ResponseCodec, samples: list[str]) -> None:
+    raw_bytes = sum(len(s.encode("utf-8")) for s in samples)
+    blobs = [codec.encode(s) for s in samples]
+    stored_bytes = sum(len(b) for b in blobs)
+
+    encode_us, decode_us = [], []
+    for text, blob in zip(samples, blobs):
+        start = time.perf_counter()
+        codec.encode(text)
+        encode_us.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        codec.decode(blob)
+        decode_us.append((time.perf_counter() - start) * 1e6)
+
+    print(
+        f"{label:<18} ratio {raw_bytes / stored_bytes:5.2f}x  "
+        f"avg {stored_bytes / len(samples):8.0f} B/entry  "
+        f"encode p50 {statistics.median(encode_us):7.1f}µs  "
+        f"decode p50 {statistics.median(decode_us):6.1f}µs  "
+        f"decode p99 {statistics.quantiles(decode_us, n=100)[98]:6.1f}µs"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2_000)
+    parser.add_argument("--corpus", help="Directory of markdown files to use instead of Redis")
+    args = parser.parse_args()
+
+    if args.corpus:
+        samples = _load_corpus(args.corpus, args.samples)
+    else:
+        r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False)
+        samples = sample_cached_responses(r, limit=args.samples)
+    if len(samples) < 200:
+        raise SystemExit(f"Need at least 200 samples, found {len(samples)}")
+
+    train, test = samples[::2], samples[1::2]
+    dictionary = train_dictionary(train)
+    print(f"{len(test)} responses, avg {sum(len(s) for s in test) / len(test):.0f} chars\n")
+
+    print(f"{'uncompressed':<18} ratio  1.00x  avg {sum(len(s.encode('utf-8')) for s in test) / len(test):8.0f} B/entry")
+    for level in (3, 9, 19):
+        _measure(f"zstd-{level}", ResponseCodec(level=level), test)
+        _measure(
+            f"zstd-{level}+dict",
+            ResponseCodec({dictionary.dict_id(): dictionary.as_bytes()}, active_dict_id=dictionary.dict_id(), level=level),
+            test,
+        )
+
+
+if __name__ == "__main__":
+    main()
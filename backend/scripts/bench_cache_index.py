@@ -0,0 +1,169 @@
+"""
+Recall-vs-latency benchmark for semantic cache index configurations.
+
+Usage (from backend/, against a disposable Redis Stack / Redis 8 instance):
+    python -m scripts.bench_cache_index --sizes 10000,100000,1000000 [--queries 500]
+
+For each size it loads the same synthetic 384-dim corpus into one temporary
+index per configuration and reports:
+  - recall@1 against exact brute-force cosine (numpy, FLOAT32)
+  - query latency p50 / p99 (single client, KNN + rescoring where applicable)
+  - index memory from FT.INFO and hash memory per entry
+
+Configurations compared: the current setup (HNSW FLOAT32, RediSearch defaults),
+FLOAT16, INT8 + FLOAT16 rescoring, a higher-recall HNSW tuning and FLAT.
+
+The corpus is clustered (many paraphrase-like neighbours per topic) rather than
+uniform noise, because that is what cache queries look like and it is the hard
+case for HNSW recall. Queries are perturbed copies of stored vectors.
+All benchmark keys live under `bench:` and are removed afterwards.
+"""
+import argparse
+import statistics
+import time
+from dataclasses import replace
+
+import numpy as np
+import redis
+from redis.commands.search.field import VectorField
+from redis.commands.search.index_definition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+
+from core.config import settings
+from services.cache_vectors import (
+    RESCORE_FIELD,
+    VectorIndexConfig,
+    decode_rescore_vector,
+    encode_rescore_vector,
+    encode_vector,
+)
+
+DIM = 384
+_LOAD_BATCH = 5_000
+
+CONFIGS: dict[str, VectorIndexConfig] = {
+    "hnsw-f32 (current)": VectorIndexConfig(),
+    "hnsw-f16": VectorIndexConfig(vector_type="FLOAT16"),
+    "hnsw-int8+rescore": VectorIndexConfig(vector_type="INT8"),
+    "hnsw-f16 M32/ef64": VectorIndexConfig(vector_type="FLOAT16", m=32, ef_runtime=64),
+    "flat-f32": VectorIndexConfig(algorithm="FLAT"),
+}
+
+
+def _normalise(x: np.ndarray) -> np.ndarray:
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = _normalise(rng.standard_normal((max(n // 50, 1), DIM)).astype(np.float32))
+    assignment = rng.integers(0, len(centres), size=n)
+    noise = rng.standard_normal((n, DIM)).astype(np.float32) * 0.35 / np.sqrt(DIM) * 4
+    return _normalise(centres[assignment] + noise).astype(np.float32)
+
+
+def exact_top1(corpus: np.ndarray, queries: np.ndarray, chunk: int = 100_000) -> np.ndarray:
+    best_idx = np.zeros(len(queries), dtype=np.int64)
+    best_sim = np.full(len(queries), -np.inf, dtype=np.float32)
+    for start in range(0, len(corpus), chunk):
+        sims = queries @ corpus[start:start + chunk].T
+        idx = sims.argmax(axis=1)
+        val = sims[np.arange(len(queries)), idx]
+        better = val > best_sim
+        best_sim[better] = val[better]
+        best_idx[better] = idx[better] + start
+    return best_idx
+
+
+def _wait_indexed(r: redis.Redis, index: str) -> None:
+    while True:
+        info = r.ft(index).info()
+        if str(info.get("indexing", "0")) in ("0", "0.0") and float(info.get("percent_indexed", 1)) >= 1:
+            return
+        time.sleep(0.5)
+
+
+def _load(r: redis.Redis, prefix: str, corpus: np.ndarray, cfg: VectorIndexConfig) -> None:
+    for start in range(0, len(corpus), _LOAD_BATCH):
+        pipe = r.pipeline(transaction=False)
+        for i in range(start, min(start + _LOAD_BATCH, len(corpus))):
+            mapping = {"embedding": encode_vector(corpus[i], cfg.vector_type)}
+            if cfg.rescoring:
+                mapping[RESCORE_FIELD] = encode_rescore_vector(corpus[i])
+            pipe.hset(f"{prefix}{i}", mapping=mapping)
+        pipe.execute()
+
+
+def _search(r: redis.Redis, index: str, cfg: VectorIndexConfig, query: np.ndarray) -> int:
+    q = Query(f"*=>[{cfg.knn_clause()}]").sort_by("score").paging(0, cfg.knn_k).dialect(2)
+    q = q.return_field("score")
+    if cfg.rescoring:
+        q = q.return_field(RESCORE_FIELD, decode_field=False)
+    docs = r.ft(index).search(q, {"vec": encode_vector(query, cfg.vector_type)}).docs
+    if not docs:
+        return -1
+    if cfg.rescoring:
+        docs = sorted(docs, key=lambda d: -float(np.dot(query, decode_rescore_vector(getattr(d, RESCORE_FIELD)))))
+    return int(docs[0].id.rsplit(":", 1)[1])
+
+
+def bench(r: redis.Redis, name: str, cfg: VectorIndexConfig, corpus: np.ndarray,
+          queries: np.ndarray, truth: np.ndarray) -> None:
+    slug = name.split(" ")[0].replace("/", "-")
+    index, prefix = f"bench:idx:{slug}", f"bench:{slug}:"
+    r.ft(index).create_index(
+        [VectorField("embedding", cfg.algorithm, {**cfg.field_attributes(), "INITIAL_CAP": len(corpus)})],
+        definition=IndexDefinition(prefix=[prefix], index_type=IndexType.HASH),
+    )
+    try:
+        mem_before = r.info("memory")["used_memory"]
+        load_started = time.perf_counter()
+        _load(r, prefix, corpus, cfg)
+        _wait_indexed(r, index)
+        load_secs = time.perf_counter() - load_started
+        mem_per_entry = (r.info("memory")["used_memory"] - mem_before) / len(corpus)
+        index_mb = float(r.ft(index).info().get("vector_index_sz_mb", 0))
+
+        latencies_ms, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = _search(r, index, cfg, query)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+            hits += int(found == expected)
+
+        print(
+            f"  {name:<20} recall@1 {hits / len(queries):6.3f}  "
+            f"p50 {statistics.median(latencies_ms):6.2f}ms  "
+            f"p99 {statistics.quantiles(latencies_ms, n=100)[98]:6.2f}ms  "
+            f"index {index_mb:8.1f}MB  total {mem_per_entry:7.0f}B/entry  load {load_secs:6.1f}s"
+        )
+    finally:
+        r.ft(index).dropindex(delete_documents=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="Comma-separated subset of config names")
+    parser.add_argument("--ef-runtime", type=int, default=None, help="Override EF_RUNTIME for every HNSW config")
+    args = parser.parse_args()
+
+    r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False)
+    selected = {name: CONFIGS[name] for name in args.configs.split(",")}
+    if args.ef_runtime:
+        selected = {name: replace(cfg, ef_runtime=args.ef_runtime) for name, cfg in selected.items()}
+
+    rng = np.random.default_rng(11)
+    for size in (int(s) for s in args.sizes.split(",")):
+        corpus = synthetic_corpus(size)
+        picks = rng.integers(0, size, size=args.queries)
+        queries = _normalise(corpus[picks] + rng.standard_normal((args.queries, DIM)).astype(np.float32) * 0.01)
+        truth = exact_top1(corpus, queries)
+        print(f"\n{size:,} entries, {args.queries} queries")
+        for name, cfg in selected.items():
+            bench(r, name, cfg, corpus, queries, truth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Latency comparison of the memory embedders: Google text-embedding-004 vs local fastembed.
+
+Usage (from backend/; the Google rows need GOOGLE_API_KEY, else they are skipped):
+    python -m scripts.bench_memory_embedders [--requests 200] [--concurrency 1,8,32]
+
+Reports, per embedder:
+  - search path: p50 / p95 / p99 of one embed() per chat turn at each
+    concurrency level (threads, like AsyncMemory's asyncio.to_thread calls),
+    and the resulting embeds/s
+  - add path: one embed_batch() of 64 facts
+
+The local rows go through memory.embedder.LocalEmbedding, so concurrent calls
+are micro-batched exactly as in production (MEMORY_EMBED_BATCH_SIZE /
+MEMORY_EMBED_BATCH_WAIT_MS). Texts are the pre-filter's category examples.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.config import settings
+from memory.prefilter import CATEGORY_EXAMPLES
+
+TEXTS = [e for examples in CATEGORY_EXAMPLES.values() for e in examples]
+_ADD_BATCH = 64
+
+
+class _GoogleEmbedder:
+    def __init__(self):
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self._genai = genai
+
+    def embed(self, text, memory_action=None):
+        task = "retrieval_query" if memory_action == "search" else "retrieval_document"
+        return self._genai.embed_content(model="models/text-embedding-004", content=text, task_type=task)["embedding"]
+
+    def embed_batch(self, texts, memory_action="add"):
+        return self._genai.embed_content(
+            model="models/text-embedding-004", content=texts, task_type="retrieval_document"
+        )["embedding"]
+
+
+def _local_embedder():
+    from mem0.configs.embeddings.base import BaseEmbedderConfig
+    from memory.embedder import LocalEmbedding
+
+    return LocalEmbedding(BaseEmbedderConfig(model=settings.MEMORY_LOCAL_EMBEDDING_MODEL, embedding_dims=768))
+
+
+def bench_search(name: str, embedder, requests: int, concurrency: int) -> None:
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        embedder.embed(TEXTS[i % len(TEXTS)], "search")
+        return (time.perf_counter() - start) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies_ms = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    q = statistics.quantiles(latencies_ms, n=100)
+    print(
+        f"  {name:<8} search  c={concurrency:<3} p50 {q[49]:7.1f}ms  p95 {q[94]:7.1f}ms  "
+        f"p99 {q[98]:7.1f}ms  {requests / elapsed:8.1f} embeds/s"
+    )
+
+
+def bench_add(name: str, embedder) -> None:
+    texts = [TEXTS[i % len(TEXTS)] for i in range(_ADD_BATCH)]
+    start = time.perf_counter()
+    embedder.embed_batch(texts, "add")
+    ms = (time.perf_counter() - start) * 1000
+    print(f"  {name:<8} add     batch={_ADD_BATCH:<3} {ms:7.1f}ms  ({ms / _ADD_BATCH:.2f}ms/fact)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8,32")
+    args = parser.parse_args()
+
+    embedders = {}
+    if settings.GOOGLE_API_KEY:
+        embedders["google"] = _GoogleEmbedder()
+    else:
+        print("GOOGLE_API_KEY not set — skipping the remote embedder")
+    started = time.perf_counter()
+    embedders["local"] = _local_embedder()
+    print(f"local model {settings.MEMORY_LOCAL_EMBEDDING_MODEL} loaded in {time.perf_counter() - started:.1f}s\n")
+
+    for name, embedder in embedders.items():
+        embedder.embed(TEXTS[0], "search")  # warm-up (connection / ONNX session)
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            bench_search(name, embedder, args.requests, concurrency)
+        bench_add(name, embedder)
+
+
+if __name__ == "__main__":
+    main()
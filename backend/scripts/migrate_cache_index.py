@@ -0,0 +1,46 @@
+"""
+Online migration of the semantic cache index to the current schema version.
+
+Usage (from backend/):
+    python -m scripts.migrate_cache_index [--keep-previous] [--timeout 600]
+
+Builds the new index next to the one serving reads, waits for it to finish
+indexing, switches the `idx:semantic_cache:active` alias and drops the old
+index without deleting cached entries. Running it before a deploy means new
+instances find the alias ready and skip the migration on start-up.
+"""
+import argparse
+import logging
+
+import redis
+
+from core.config import settings
+from services.cache_index import INDEX_ALIAS, active_index, index_name_for, migrate_index
+from services.cache_vectors import VectorIndexConfig
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-previous", action="store_true", help="Leave the old index in place after switching")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for the new index to build")
+    args = parser.parse_args()
+
+    config = VectorIndexConfig.from_settings(settings)
+    r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False)
+    current = active_index(r)
+    if current == index_name_for(config):
+        print(f"{INDEX_ALIAS} already serves {current}; nothing to do")
+        return
+
+    report = migrate_index(
+        r,
+        config,
+        drop_previous=not args.keep_previous,
+        timeout_secs=args.timeout,
+    )
+    print(f"✅ {report!r}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
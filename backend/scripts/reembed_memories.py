@@ -0,0 +1,111 @@
+"""
+Resumable re-embedding for a new embedding model (memories or semantic cache).
+
+Usage (from backend/):
+    # student_memories (after db/migrations/021_memory_reembed_runs.sql)
+    python -m scripts.reembed_memories memories --run-id bge-base-1 \
+        [--embedder local|google] [--model BAAI/bge-base-en-v1.5] [--dims 768] \
+        [--batch-size 1000] [--switch] [--drop-previous]
+
+    # semantic cache hashes in Redis
+    python -m scripts.reembed_memories cache --field embedding_bge_base \
+        --model BAAI/bge-base-en-v1.5 [--switch] [--only-missing]
+
+memories: fills the shadow column page by page (see memory/reembed.py); stop
+it any time and re-run the same command to continue from the checkpoint.
+--switch also builds the HNSW index and swaps the columns in one transaction;
+pause the memory write queue and deploy MEMORY_EMBEDDER / MEMORY_EMBEDDING_DIMS
+right after it. --drop-previous removes the old vectors once you are happy.
+
+cache: writes the new model's vectors to --field on every entry (see
+services/cache_reembed.py); --switch then moves the index alias to an index over
+that field. Deploy SEMANTIC_CACHE_EMBEDDING_MODEL / _DIM / _VECTOR_FIELD and
+re-run with --only-missing to pick up entries written in between.
+"""
+import argparse
+import time
+from dataclasses import replace
+
+import numpy as np
+import redis
+
+from core.config import settings
+
+
+def _memories(args) -> None:
+    from memory.reembed import MemoryReembedder, connect, embed_fn
+
+    model = args.model or (settings.MEMORY_LOCAL_EMBEDDING_MODEL if args.embedder == "local"
+                           else "models/text-embedding-004")
+    reembedder = MemoryReembedder(
+        connect(), embed_fn(args.embedder, model),
+        run_id=args.run_id, model=model, dims=args.dims, batch_size=args.batch_size,
+    )
+    if args.drop_previous:
+        reembedder.drop_previous()
+        print("✅ Dropped embedding_prev")
+        return
+
+    print(f"  {reembedder.prepare()!r}")
+    started = time.monotonic()
+    checkpoint = reembedder.fill(
+        progress=lambda cp: print(f"  {cp.rows_done} facts, last id {cp.last_id} "
+                                  f"({time.monotonic() - started:.0f}s)")
+    )
+    print(f"  filled: {checkpoint!r}")
+    if args.switch:
+        reembedder.build_index()
+        caught = reembedder.switch()
+        print(f"✅ Switched student_memories to {model} ({caught} rows caught up under lock)")
+
+
+def _cache(args) -> None:
+    from core.embeddings import get_text_embedding
+    from services.cache_reembed import fill_field, switch_index
+    from services.cache_vectors import VectorIndexConfig
+
+    encoder = get_text_embedding(args.model)
+    dim = len(next(iter(encoder.embed(["dimension probe"]))))
+    config = replace(VectorIndexConfig.from_settings(settings), dim=dim, field=args.field)
+    r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False)
+
+    report = fill_field(
+        r,
+        lambda texts: [v.astype(np.float32) for v in encoder.embed(list(texts))],
+        config,
+        only_missing=args.only_missing,
+        progress=lambda scanned, embedded: print(f"  scanned {scanned}, embedded {embedded}"),
+    )
+    print(f"  {report!r}")
+    if args.switch:
+        print(f"✅ {switch_index(r, config)!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    targets = parser.add_subparsers(dest="target", required=True)
+
+    memories = targets.add_parser("memories")
+    memories.add_argument("--run-id", required=True)
+    memories.add_argument("--embedder", choices=("local", "google"), default=settings.MEMORY_EMBEDDER)
+    memories.add_argument("--model", default="")
+    memories.add_argument("--dims", type=int, default=settings.MEMORY_EMBEDDING_DIMS)
+    memories.add_argument("--batch-size", type=int, default=1000)
+    memories.add_argument("--switch", action="store_true")
+    memories.add_argument("--drop-previous", action="store_true")
+
+    cache = targets.add_parser("cache")
+    cache.add_argument("--field", required=True, help="hash field for the new vectors, e.g. embedding_bge_base")
+    cache.add_argument("--model", default=settings.SEMANTIC_CACHE_EMBEDDING_MODEL)
+    cache.add_argument("--only-missing", action="store_true")
+    cache.add_argument("--switch", action="store_true")
+
+    args = parser.parse_args()
+    if args.target == "memories":
+        _memories(args)
+    else:
+        _cache(args)
+
+
+if __name__ == "__main__":
+    main()
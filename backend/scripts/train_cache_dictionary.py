@@ -0,0 +1,58 @@
+"""
+Train a zstd dictionary on cached responses and activate it for new writes.
+
+Usage (from backend/):
+    python -m scripts.train_cache_dictionary [--samples 2000] [--dry-run]
+
+Existing blobs stay readable: every dictionary ever trained is kept in Redis
+and the dictionary id is recorded in each zstd frame header.
+"""
+import argparse
+import logging
+import sys
+
+import redis
+
+from core.config import settings
+from services.cache_codec import (
+    ResponseCodec,
+    sample_cached_responses,
+    store_dictionary,
+    train_dictionary,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2_000, help="Max cached responses to train on")
+    parser.add_argument("--dry-run", action="store_true", help="Report the ratio without storing the dictionary")
+    args = parser.parse_args()
+
+    r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=False)
+    samples = sample_cached_responses(r, limit=args.samples)
+    if len(samples) < 100:
+        print(f"Only {len(samples)} cached responses found — need at least 100 to train a useful dictionary.")
+        sys.exit(1)
+
+    dictionary = train_dictionary(samples)
+    raw_bytes = sum(len(s.encode("utf-8")) for s in samples)
+    plain = ResponseCodec()
+    trained = ResponseCodec({dictionary.dict_id(): dictionary.as_bytes()}, active_dict_id=dictionary.dict_id())
+    plain_bytes = sum(len(plain.encode(s)) for s in samples)
+    dict_bytes = sum(len(trained.encode(s)) for s in samples)
+
+    print(f"Trained dictionary {dictionary.dict_id()} on {len(samples)} responses ({raw_bytes:,} bytes)")
+    print(f"  zstd (no dict):   {plain_bytes:,} bytes  ratio {raw_bytes / plain_bytes:.2f}x")
+    print(f"  zstd (with dict): {dict_bytes:,} bytes  ratio {raw_bytes / dict_bytes:.2f}x")
+
+    if args.dry_run:
+        return
+    dict_id = store_dictionary(r, dictionary)
+    print(f"✅ Dictionary {dict_id} stored and activated. Restart or call cache.reload_codec() to use it.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
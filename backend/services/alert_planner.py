@@ -0,0 +1,149 @@
+"""
+Deadline alert planning: which students hear about which closing opportunities.
+
+job_deadline_alerts used to send every closing opportunity to every
+WhatsApp-enabled student (one Twilio call per pair, all "84% match"). The
+planner scores a page of students against the day's closing opportunities in
+one shot with numpy and keeps, per student, the top ALERT_TOP_N:
+
+    fit = 0.4·domain + 0.3·segment + 0.3·tags          (0..1)
+
+  domain   the student's profile domain equals the opportunity's
+  segment  the persona segment (IT, GOVT, RESEARCH, ...) is one of the
+           opportunity's `segments`; an opportunity without segments, or a
+           student without a persona, gets half credit
+  tags     share of the opportunity's tags the student has shown interest in
+           (tags of the opportunities they track in opportunity_applications)
+
+Opportunities the student already tracks are always alerted and ranked first;
+others need fit ≥ ALERT_MIN_SCORE. The alerts for one student become one
+merged WhatsApp message (services/whatsapp_service.format_deadline_digest).
+"""
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+_W_DOMAIN: float = 0.4
+_W_SEGMENT: float = 0.3
+_W_TAGS: float = 0.3
+_NEUTRAL: float = 0.5    # segment credit when either side has none
+
+
+@dataclass(frozen=True)
+class PlannedAlert:
+    opportunity: dict
+    match_pct: int
+    tracked: bool
+
+
+@dataclass(frozen=True)
+class AlertPlan:
+    user: dict
+    alerts: tuple[PlannedAlert, ...]
+
+    def __repr__(self) -> str:
+        return f"AlertPlan(user={self.user['user_id'][:8]}…, {len(self.alerts)} alerts)"
+
+
+def _index(values: Iterable[str]) -> dict[str, int]:
+    return {v: i for i, v in enumerate(sorted(set(values)))}
+
+
+def _norm(tags: Iterable[str] | None) -> set[str]:
+    return {t.strip().lower() for t in tags or () if t and t.strip()}
+
+
+class AlertPlanner:
+    """Built once per run from the closing opportunities; plan() is called per page of students."""
+
+    def __init__(self, opportunities: Sequence[dict], *, top_n: int, min_score: float):
+        self.opportunities = list(opportunities)
+        self.top_n = top_n
+        self.min_score = min_score
+        self._opp_ids = {str(o["id"]): j for j, o in enumerate(self.opportunities)}
+
+        opp_tags = [_norm(o.get("tags")) for o in self.opportunities]
+        opp_segments = [{s.upper() for s in o.get("segments") or ()} for o in self.opportunities]
+        self._tags = _index(t for tags in opp_tags for t in tags)
+        self._segments = _index(s for segs in opp_segments for s in segs)
+        self._domains = _index(str(o["domain_id"]) for o in self.opportunities if o.get("domain_id"))
+
+        n = len(self.opportunities)
+        self._opp_tags = np.zeros((n, len(self._tags)), dtype=np.float32)
+        self._opp_segments = np.zeros((n, len(self._segments)), dtype=np.float32)
+        for j, (tags, segs) in enumerate(zip(opp_tags, opp_segments)):
+            self._opp_tags[j, [self._tags[t] for t in tags]] = 1
+            self._opp_segments[j, [self._segments[s] for s in segs]] = 1
+        self._opp_tag_counts = np.maximum(self._opp_tags.sum(axis=1), 1)
+        self._opp_has_segment = self._opp_segments.any(axis=1)
+        self._opp_domains = np.array(
+            [self._domains.get(str(o.get("domain_id")), -1) for o in self.opportunities], dtype=np.int64,
+        )
+
+    def scores(
+        self,
+        users: Sequence[dict],
+        segments: Mapping[str, str],
+        interests: Mapping[str, set[str]],
+        tracked: Mapping[str, set[str]],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(fit, tracked) matrices of shape (students, opportunities)."""
+        n_users, n_opps = len(users), len(self.opportunities)
+        user_tags = np.zeros((n_users, len(self._tags)), dtype=np.float32)
+        user_segments = np.zeros((n_users, len(self._segments)), dtype=np.float32)
+        user_has_segment = np.zeros(n_users, dtype=bool)
+        user_domains = np.full(n_users, -2, dtype=np.int64)   # never equals an opportunity's -1
+        is_tracked = np.zeros((n_users, n_opps), dtype=bool)
+
+        for i, user in enumerate(users):
+            uid = user["user_id"]
+            user_tags[i, [self._tags[t] for t in _norm(interests.get(uid)) if t in self._tags]] = 1
+            segment = (segments.get(uid) or "").upper()
+            if segment:
+                user_has_segment[i] = True
+                if segment in self._segments:
+                    user_segments[i, self._segments[segment]] = 1
+            if user.get("domain_id"):
+                user_domains[i] = self._domains.get(str(user["domain_id"]), -2)
+            is_tracked[i, [self._opp_ids[o] for o in tracked.get(uid, ()) if o in self._opp_ids]] = True
+
+        domain = user_domains[:, None] == self._opp_domains[None, :]
+        segment = np.where(
+            user_has_segment[:, None] & self._opp_has_segment[None, :],
+            (user_segments @ self._opp_segments.T) > 0,
+            _NEUTRAL,
+        )
+        tags = (user_tags @ self._opp_tags.T) / self._opp_tag_counts[None, :]
+        fit = _W_DOMAIN * domain + _W_SEGMENT * segment + _W_TAGS * tags
+        return fit, is_tracked
+
+    def plan(
+        self,
+        users: Sequence[dict],
+        *,
+        segments: Mapping[str, str],
+        interests: Mapping[str, set[str]],
+        tracked: Mapping[str, set[str]],
+    ) -> list[AlertPlan]:
+        """One plan per student with at least one alert, best first."""
+        if not users or not self.opportunities:
+            return []
+        fit, is_tracked = self.scores(users, segments, interests, tracked)
+        rank = np.where(is_tracked, fit + 1.0, fit)
+        rank[~(is_tracked | (fit >= self.min_score))] = -np.inf
+        top = np.argsort(-rank, axis=1, kind="stable")[:, :self.top_n]
+
+        plans = []
+        for i, user in enumerate(users):
+            alerts = tuple(
+                PlannedAlert(
+                    opportunity=self.opportunities[j],
+                    match_pct=int(np.clip(round(fit[i, j] * 100), 10, 99)),
+                    tracked=bool(is_tracked[i, j]),
+                )
+                for j in top[i] if np.isfinite(rank[i, j])
+            )
+            if alerts:
+                plans.append(AlertPlan(user=user, alerts=alerts))
+        return plans
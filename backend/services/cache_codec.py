@@ -0,0 +1,166 @@
+"""
+Compression codec for cached AI responses (simplifications, notes, roadmaps).
+
+Responses are stored once per content hash in `cache:blob:{sha256}` and
+compressed with zstd. A dictionary trained on our own markdown output
+(headings, "Key Concepts", analogies, bullet lists) lets short responses
+compress well — without it zstd has too little context to find repeats.
+
+Blob layout:  1-byte codec tag + payload
+  0x00  raw UTF-8 (tiny responses, or compression did not help)
+  0x01  zstd frame, no dictionary
+  0x02  zstd frame compressed with a trained dictionary (dict id in frame header)
+
+Trained dictionaries are kept in Redis (`cache:zstd:dicts`, keyed by dict id)
+so every instance can decode blobs written with any past dictionary.
+"""
+import hashlib
+import logging
+from collections.abc import Iterable, Mapping
+from typing import Optional
+
+import zstandard as zstd
+
+logger = logging.getLogger(__name__)
+
+CODEC_RAW = b"\x00"
+CODEC_ZSTD = b"\x01"
+CODEC_ZSTD_DICT = b"\x02"
+
+# Below this size the zstd frame header outweighs any saving
+_MIN_COMPRESS_BYTES: int = 64
+
+_ZSTD_LEVEL: int = 9
+_DICT_SIZE_BYTES: int = 112_640   # 110 KiB — zstd's recommended default
+
+DICTS_KEY = "cache:zstd:dicts"          # hash: dict_id → dictionary bytes
+ACTIVE_DICT_KEY = "cache:zstd:active"   # string: dict_id used for new writes
+
+
+def content_hash(text: str) -> str:
+    """Content address for a response blob."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCodec:
+    """
+    zstd encoder/decoder with optional trained dictionaries.
+
+    `dictionaries` maps dict_id → raw dictionary bytes. The active dictionary
+    (if any) is used for new writes; all known ones are used for reads.
+    """
+
+    def __init__(
+        self,
+        dictionaries: Optional[Mapping[int, bytes]] = None,
+        active_dict_id: Optional[int] = None,
+        level: int = _ZSTD_LEVEL,
+    ):
+        self.level = level
+        self._dict_by_id: dict[int, zstd.ZstdCompressionDict] = {
+            int(dict_id): zstd.ZstdCompressionDict(data)
+            for dict_id, data in (dictionaries or {}).items()
+        }
+        self.active_dict_id = active_dict_id if active_dict_id in self._dict_by_id else None
+        self._plain_compressor = zstd.ZstdCompressor(level=level)
+        self._plain_decompressor = zstd.ZstdDecompressor()
+        self._dict_compressor = (
+            zstd.ZstdCompressor(level=level, dict_data=self._dict_by_id[self.active_dict_id])
+            if self.active_dict_id is not None
+            else None
+        )
+        self._dict_decompressors: dict[int, zstd.ZstdDecompressor] = {
+            dict_id: zstd.ZstdDecompressor(dict_data=d)
+            for dict_id, d in self._dict_by_id.items()
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"ResponseCodec(level={self.level}, active_dict={self.active_dict_id}, "
+            f"known_dicts={sorted(self._dict_by_id)})"
+        )
+
+    def encode(self, text: str) -> bytes:
+        raw = text.encode("utf-8")
+        if len(raw) < _MIN_COMPRESS_BYTES:
+            return CODEC_RAW + raw
+        if self._dict_compressor is not None:
+            tag, payload = CODEC_ZSTD_DICT, self._dict_compressor.compress(raw)
+        else:
+            tag, payload = CODEC_ZSTD, self._plain_compressor.compress(raw)
+        if len(payload) >= len(raw):
+            return CODEC_RAW + raw
+        return tag + payload
+
+    def decode(self, blob: bytes) -> str:
+        tag, payload = blob[:1], blob[1:]
+        if tag == CODEC_RAW:
+            return payload.decode("utf-8")
+        if tag == CODEC_ZSTD:
+            return self._plain_decompressor.decompress(payload).decode("utf-8")
+        if tag == CODEC_ZSTD_DICT:
+            dict_id = zstd.get_frame_parameters(payload).dict_id
+            decompressor = self._dict_decompressors.get(dict_id)
+            if decompressor is None:
+                raise KeyError(f"zstd dictionary {dict_id!r} not loaded (known: {sorted(self._dict_by_id)})")
+            return decompressor.decompress(payload).decode("utf-8")
+        raise ValueError(f"Unknown cache blob codec tag {tag!r}")
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = _DICT_SIZE_BYTES) -> zstd.ZstdCompressionDict:
+    """
+    Train a zstd dictionary on sample responses.
+    Needs a few hundred samples to be useful; zstd raises on too little data.
+    """
+    encoded = [s.encode("utf-8") for s in samples if s]
+    return zstd.train_dictionary(dict_size, encoded)
+
+
+def load_codec(r) -> ResponseCodec:
+    """Build a codec from the dictionaries stored in Redis (falls back to plain zstd)."""
+    try:
+        stored = r.hgetall(DICTS_KEY) or {}
+        active = r.get(ACTIVE_DICT_KEY)
+    except Exception as e:
+        logger.warning("Could not load zstd dictionaries from Redis: %r", e)
+        return ResponseCodec()
+    dictionaries = {int(k): v for k, v in stored.items()}
+    active_id = int(active) if active else None
+    codec = ResponseCodec(dictionaries, active_dict_id=active_id)
+    logger.info("Loaded cache codec: %r", codec)
+    return codec
+
+
+def store_dictionary(r, dictionary: zstd.ZstdCompressionDict, *, activate: bool = True) -> int:
+    """Persist a trained dictionary in Redis and optionally make it the write dictionary."""
+    dict_id = dictionary.dict_id()
+    r.hset(DICTS_KEY, str(dict_id), dictionary.as_bytes())
+    if activate:
+        r.set(ACTIVE_DICT_KEY, str(dict_id))
+    return dict_id
+
+
+def sample_cached_responses(r, limit: int = 2_000) -> list[str]:
+    """
+    Collect up to `limit` cached responses from Redis for dictionary training
+    and benchmarking. Reads blobs first, then legacy inline `response` fields.
+    """
+    codec = load_codec(r)
+    samples: list[str] = []
+    for key in r.scan_iter(match="cache:blob:*", count=500):
+        blob = r.get(key)
+        if blob is None:
+            continue
+        try:
+            samples.append(codec.decode(blob))
+        except (KeyError, ValueError, zstd.ZstdError):
+            continue
+        if len(samples) >= limit:
+            return samples
+    for key in r.scan_iter(match="cache:exact:*", count=500):
+        legacy = r.hget(key, "response")
+        if legacy:
+            samples.append(legacy.decode("utf-8"))
+        if len(samples) >= limit:
+            break
+    return samples
@@ -0,0 +1,87 @@
+"""
+Derive a missing language/level variant from a cached sibling.
+
+When /simplify/text misses for (text, level, language) but the same normalized
+content is cached in another level or language, rewriting the cached
+explanation is far cheaper than a full SimplificationExpert run: one short
+Gemini Flash call whose input is the cached answer, not the whole agent prompt.
+The derived variant is written back to the cache so the next request is an
+exact hit.
+
+Lookups served this way are counted as result="derived" in
+semantic_cache_lookups_total, separately from exact / semantic hits and misses.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from core.config import settings
+from core.metrics import SEMANTIC_CACHE_LOOKUPS, record_gemini_usage
+from services.simplify_prompts import build_derivation_prompt
+
+logger = logging.getLogger(__name__)
+
+DERIVE_MODEL = "gemini-2.0-flash"
+
+
+async def derive_variant(
+    cached_text: str,
+    *,
+    from_level: str,
+    from_language: str,
+    to_level: str,
+    to_language: str,
+) -> Optional[str]:
+    """Translate / re-level `cached_text`; None if Gemini is unavailable or fails."""
+    if not settings.GOOGLE_API_KEY:
+        return None
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    model = genai.GenerativeModel(DERIVE_MODEL)
+    prompt = build_derivation_prompt(cached_text, from_level, from_language, to_level, to_language)
+    try:
+        response = await model.generate_content_async(prompt)
+        text = response.text.strip()
+    except Exception:
+        logger.exception("[Cache] Derivation %s/%s → %s/%s failed", from_level, from_language, to_level, to_language)
+        return None
+    usage = response.usage_metadata
+    record_gemini_usage(DERIVE_MODEL, usage.prompt_token_count, usage.candidates_token_count)
+    return text or None
+
+
+async def get_or_derive(
+    cache,
+    query_text: str,
+    level: str,
+    language: str,
+    *,
+    namespace: Optional[str] = None,
+) -> tuple[Optional[str], str]:
+    """
+    Cache lookup with sibling derivation as a fallback tier.
+    Returns (response, tier) with tier in exact / semantic / derived / miss.
+    Only requests that end as a miss feed the warmer's miss log.
+    """
+    response, tier = await asyncio.to_thread(cache.lookup, query_text, level, language, namespace=namespace)
+    if response is None:
+        sibling = await asyncio.to_thread(cache.find_sibling, query_text, level, language, namespace)
+        if sibling is not None:
+            from_level, from_language, cached_text = sibling
+            derived = await derive_variant(
+                cached_text,
+                from_level=from_level,
+                from_language=from_language,
+                to_level=level,
+                to_language=language,
+            )
+            if derived:
+                await asyncio.to_thread(cache.update_cache, query_text, derived, level, language, namespace)
+                logger.info("[Cache] Derived %s/%s from cached %s/%s", level, language, from_level, from_language)
+                response, tier = derived, "derived"
+        if response is None:
+            await asyncio.to_thread(cache.log_miss, query_text, level, language)
+
+    SEMANTIC_CACHE_LOOKUPS.labels(result=tier).inc()
+    return response, tier
@@ -0,0 +1,308 @@
+"""
+Versioned RediSearch index for the semantic cache tier, with online migration.
+
+Reads and KNN searches go through the alias `INDEX_ALIAS`, never a concrete
+index name, so a new schema can be built next to the old one and swapped in
+atomically with FT.ALIASUPDATE:
+
+  v1  `idx:semantic_cache`     — TEXT level/language, no key prefix (legacy)
+  v2  `idx:semantic_cache:v2`  — TAG level/language/namespace, PREFIX cache:semantic:
+
+Migration (`migrate_index`, also run from scripts/migrate_cache_index.py):
+  1. backfill the `namespace` field on existing entries from their query prefix
+  2. re-encode stored vectors whose precision differs from the configured
+     SEMANTIC_CACHE_VECTOR_TYPE (until the alias switches, the old index
+     misses the re-encoded entries — lookups fall back to the LLM)
+  3. FT.CREATE the new version over the same keys and wait for the background scan
+  4. point the alias at it (ALIASADD / ALIASUPDATE — one atomic switch)
+  5. FT.DROPINDEX the previous index *without* DD, so cached documents survive
+
+Bump SCHEMA_VERSION whenever build_schema() changes. The index name also
+carries everything else the index is built from (index_name_for()):
+
+  idx:semantic_cache:v<N>[:<field>][:<type>-<algorithm>]
+
+with the field omitted for `embedding` and the suffix omitted for
+FLOAT32/HNSW, so changing the vector field (a new embedding model, see
+services/cache_reembed.py), SEMANTIC_CACHE_VECTOR_TYPE or
+SEMANTIC_CACHE_INDEX_ALGORITHM builds a new index instead of writing
+mismatched vectors into the old one. The vector is exposed to queries as
+`@embedding` either way.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import redis
+from redis.commands.search.field import TagField, TextField, VectorField
+from redis.commands.search.index_definition import IndexDefinition, IndexType
+
+from services.cache_vectors import (
+    VectorIndexConfig,
+    decode_rescore_vector,
+    decode_vector,
+    encode_rescore_vector,
+    encode_vector,
+    stored_vector_type,
+)
+from services.simplify_prompts import split_cache_key
+
+logger = logging.getLogger(__name__)
+
+INDEX_BASENAME = "idx:semantic_cache"
+INDEX_ALIAS = "idx:semantic_cache:active"
+LEGACY_INDEX = INDEX_BASENAME
+SCHEMA_VERSION = 2
+SEMANTIC_PREFIX = "cache:semantic:"
+DEFAULT_VECTOR_FIELD = "embedding"
+DEFAULT_VECTOR_TYPE = "FLOAT32"
+DEFAULT_ALGORITHM = "HNSW"
+
+MIGRATION_LOCK_KEY = "cache:index:migration"
+_MIGRATION_LOCK_SECS: int = 15 * 60
+_BACKFILL_BATCH: int = 500
+
+# Everything except word characters must be backslash-escaped inside a TAG query
+_TAG_SPECIAL_RE = re.compile(r"([^\w])")
+
+
+@dataclass(frozen=True)
+class MigrationReport:
+    previous: str | None
+    current: str
+    backfilled: int
+    num_docs: int
+    seconds: float
+
+    def __repr__(self) -> str:
+        return (
+            f"MigrationReport({self.previous} → {self.current}, docs={self.num_docs}, "
+            f"backfilled={self.backfilled}, {self.seconds:.1f}s)"
+        )
+
+
+def index_name(
+    version: int = SCHEMA_VERSION,
+    field: str = DEFAULT_VECTOR_FIELD,
+    vector_type: str = DEFAULT_VECTOR_TYPE,
+    algorithm: str = DEFAULT_ALGORITHM,
+) -> str:
+    name = f"{INDEX_BASENAME}:v{version}"
+    if field != DEFAULT_VECTOR_FIELD:
+        name = f"{name}:{field}"
+    if (vector_type, algorithm) != (DEFAULT_VECTOR_TYPE, DEFAULT_ALGORITHM):
+        name = f"{name}:{vector_type.lower()}-{algorithm.lower()}"
+    return name
+
+
+def index_name_for(config: VectorIndexConfig, version: int = SCHEMA_VERSION) -> str:
+    """Index built for `config` — a new name whenever its field, precision or algorithm changes."""
+    return index_name(version, config.field, config.vector_type, config.algorithm)
+
+
+def build_schema(config: VectorIndexConfig) -> list:
+    vector_alias = {"as_name": DEFAULT_VECTOR_FIELD} if config.field != DEFAULT_VECTOR_FIELD else {}
+    return [
+        TextField("query"),
+        TagField("level"),
+        TagField("language"),
+        TagField("namespace"),
+        VectorField(config.field, config.algorithm, config.field_attributes(), **vector_alias),
+    ]
+
+
+def namespace_for(query_text: str) -> str:
+    """Caller namespace implied by the cache key ('notes:…' → 'notes'; bare text → 'simplify')."""
+    return split_cache_key(query_text)[0]
+
+
+def escape_tag(value: str) -> str:
+    return _TAG_SPECIAL_RE.sub(r"\\\1", value)
+
+
+def tag_filter(level: str, language: str, namespace: str | None = None) -> str:
+    """KNN pre-filter: exact TAG matches instead of tokenised full-text."""
+    clauses = [f"@level:{{{escape_tag(level)}}}", f"@language:{{{escape_tag(language)}}}"]
+    if namespace:
+        clauses.append(f"@namespace:{{{escape_tag(namespace)}}}")
+    return " ".join(clauses)
+
+
+# ── Introspection ─────────────────────────────────────────────────────────────
+
+def _index_info(r: redis.Redis, name: str) -> dict | None:
+    try:
+        return r.ft(name).info()
+    except redis.ResponseError:
+        return None
+
+
+def active_index(r: redis.Redis) -> str | None:
+    """Concrete index the alias currently resolves to, or None before the first migration."""
+    info = _index_info(r, INDEX_ALIAS)
+    if info is None:
+        return None
+    name = info.get("index_name")
+    return name.decode() if isinstance(name, bytes) else name
+
+
+def wait_for_indexing(r: redis.Redis, name: str, timeout_secs: float = 600.0, poll_secs: float = 1.0) -> dict:
+    """Block until FT.CREATE's background scan over existing keys has finished."""
+    deadline = time.monotonic() + timeout_secs
+    while True:
+        info = r.ft(name).info()
+        if int(float(info.get("indexing", 0))) == 0:
+            return info
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{name} still indexing after {timeout_secs:.0f}s "
+                               f"({float(info.get('percent_indexed', 0)):.0%})")
+        time.sleep(poll_secs)
+
+
+# ── Migration ─────────────────────────────────────────────────────────────────
+
+def backfill_namespaces(r: redis.Redis, batch_size: int = _BACKFILL_BATCH) -> int:
+    """Set `namespace` on cached entries written before the field existed. Returns entries updated."""
+    updated = 0
+    keys: list[bytes] = []
+
+    def _flush() -> int:
+        read = r.pipeline(transaction=False)
+        for key in keys:
+            read.hmget(key, ["query", "namespace"])
+        write = r.pipeline(transaction=False)
+        count = 0
+        for key, (query, namespace) in zip(keys, read.execute()):
+            if query is None or namespace is not None:
+                continue
+            query_text = query.decode() if isinstance(query, bytes) else query
+            write.hset(key, "namespace", namespace_for(query_text))
+            count += 1
+        if count:
+            write.execute()
+        keys.clear()
+        return count
+
+    for key in r.scan_iter(match=f"{SEMANTIC_PREFIX}*", count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            updated += _flush()
+    if keys:
+        updated += _flush()
+    return updated
+
+
+def reencode_vectors(r: redis.Redis, config: VectorIndexConfig, batch_size: int = _BACKFILL_BATCH) -> int:
+    """
+    Rewrite `config.field` in `config.vector_type` on entries stored in another
+    precision (told apart by byte length; HSTRLEN first, so matching entries
+    are never transferred). INT8 sources decode from their FLOAT16 rescore copy
+    when present; INT8 targets get one written. Returns entries re-encoded.
+    """
+    updated = 0
+    keys: list[bytes] = []
+    expected = len(encode_vector(np.zeros(config.dim, dtype=np.float32), config.vector_type))
+
+    def _flush() -> int:
+        sizes = r.pipeline(transaction=False)
+        for key in keys:
+            sizes.hstrlen(key, config.field)
+        stale = [key for key, size in zip(keys, sizes.execute()) if size and size != expected]
+        keys.clear()
+        if not stale:
+            return 0
+        read = r.pipeline(transaction=False)
+        for key in stale:
+            read.hmget(key, [config.field, config.rescore_field])
+        write = r.pipeline(transaction=False)
+        count = 0
+        for key, (raw, rescore) in zip(stale, read.execute()):
+            stored = stored_vector_type(raw, config.dim) if raw else None
+            if stored is None:
+                continue   # another dimension: a different model's vectors, not ours to convert
+            vector = decode_rescore_vector(rescore) if stored == "INT8" and rescore else decode_vector(raw, stored)
+            mapping = {config.field: encode_vector(vector, config.vector_type)}
+            if config.rescoring:
+                mapping[config.rescore_field] = encode_rescore_vector(vector)
+            write.hset(key, mapping=mapping)
+            count += 1
+        if count:
+            write.execute()
+        return count
+
+    for key in r.scan_iter(match=f"{SEMANTIC_PREFIX}*", count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            updated += _flush()
+    if keys:
+        updated += _flush()
+    return updated
+
+
+def migrate_index(
+    r: redis.Redis,
+    config: VectorIndexConfig,
+    *,
+    drop_previous: bool = True,
+    timeout_secs: float = 600.0,
+) -> MigrationReport:
+    """
+    Build the current schema version alongside whatever serves reads now, switch
+    the alias to it and drop the old index (documents are kept). Safe to re-run.
+    """
+    started = time.monotonic()
+    target = index_name_for(config)
+    previous = active_index(r)
+    if previous is None and _index_info(r, LEGACY_INDEX) is not None:
+        previous = LEGACY_INDEX
+
+    backfilled = backfill_namespaces(r)
+    if backfilled:
+        logger.info("[CacheIndex] Backfilled namespace on %d entries", backfilled)
+    reencoded = reencode_vectors(r, config)
+    if reencoded:
+        logger.info("[CacheIndex] Re-encoded %d vectors as %s", reencoded, config.vector_type)
+
+    if _index_info(r, target) is None:
+        r.ft(target).create_index(
+            build_schema(config),
+            definition=IndexDefinition(prefix=[SEMANTIC_PREFIX], index_type=IndexType.HASH),
+        )
+        logger.info("[CacheIndex] Created %s (%s/%s), indexing existing entries…",
+                    target, config.algorithm, config.vector_type)
+    info = wait_for_indexing(r, target, timeout_secs=timeout_secs)
+
+    if active_index(r) is None:
+        r.ft(target).aliasadd(INDEX_ALIAS)
+    else:
+        r.ft(target).aliasupdate(INDEX_ALIAS)
+    logger.info("[CacheIndex] %s now serves %s", INDEX_ALIAS, target)
+
+    if drop_previous and previous and previous != target:
+        r.ft(previous).dropindex(delete_documents=False)
+        logger.info("[CacheIndex] Dropped previous index %s (documents kept)", previous)
+
+    return MigrationReport(
+        previous=previous,
+        current=target,
+        backfilled=backfilled,
+        num_docs=int(float(info.get("num_docs", 0))),
+        seconds=time.monotonic() - started,
+    )
+
+
+def ensure_index(r: redis.Redis, config: VectorIndexConfig) -> str:
+    """
+    Make sure the alias resolves to the current schema version, migrating if not.
+    Several instances may start together, so the migration runs under a Redis lock
+    and the others wait for it. Returns the name to search (the alias).
+    """
+    target = index_name_for(config)
+    if active_index(r) == target:
+        return INDEX_ALIAS
+    with r.lock(MIGRATION_LOCK_KEY, timeout=_MIGRATION_LOCK_SECS, blocking_timeout=_MIGRATION_LOCK_SECS):
+        if active_index(r) != target:
+            logger.info("[CacheIndex] Migrating %r", migrate_index(r, config))
+    return INDEX_ALIAS
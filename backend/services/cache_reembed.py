@@ -0,0 +1,117 @@
+"""
+Resumable re-embedding of the semantic cache for a new embedding model.
+
+Every cache:semantic:* hash keeps the text it was embedded from (`query`), so
+a new model's vectors can be computed without touching Gemini:
+
+  1. fill    SCAN the semantic keys in pages; embed each page in one call and
+             write the vectors to the target hash field (e.g.
+             `embedding_bge_base`), next to the live `embedding`. The SCAN
+             cursor is checkpointed in Redis after every page, so an
+             interrupted run resumes where it stopped.
+  2. switch  migrate_index() builds `idx:semantic_cache:v<N>:<field>` over the
+             new field (exposed as @embedding) and moves the alias to it —
+             the same atomic switch as a schema migration.
+  3. deploy  SEMANTIC_CACHE_EMBEDDING_MODEL / _DIM / _VECTOR_FIELD, so writers
+             fill the new field; re-run with `only_missing` afterwards to catch
+             entries written by old instances in between.
+
+Entries expire on their own TTL, so the old field needs no cleanup pass.
+Driven by scripts/reembed_memories.py (`cache` target).
+"""
+import logging
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import redis
+
+from services.cache_index import SEMANTIC_PREFIX, MigrationReport, migrate_index
+from services.cache_vectors import VectorIndexConfig, encode_rescore_vector, encode_vector
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "cache:reembed:"
+_PAGE_SIZE: int = 500
+
+EmbedFn = Callable[[Sequence[str]], list[np.ndarray]]
+
+
+@dataclass(frozen=True)
+class CacheReembedReport:
+    field: str
+    scanned: int
+    embedded: int
+    seconds: float
+
+    def __repr__(self) -> str:
+        return (f"CacheReembedReport({self.field}: embedded {self.embedded}/{self.scanned}, "
+                f"{self.seconds:.1f}s)")
+
+
+def checkpoint_key(field: str) -> str:
+    return f"{CHECKPOINT_PREFIX}{field}"
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def fill_field(
+    r: redis.Redis,
+    embed: EmbedFn,
+    config: VectorIndexConfig,
+    *,
+    page_size: int = _PAGE_SIZE,
+    only_missing: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> CacheReembedReport:
+    """
+    Write `config.field` (and its rescore copy for INT8) on every semantic entry.
+    Resumes from the checkpointed SCAN cursor; the checkpoint is cleared when
+    the scan completes. `only_missing` skips entries that already have the field.
+    """
+    started = time.monotonic()
+    key = checkpoint_key(config.field)
+    state = {_decode(k): int(v) for k, v in r.hgetall(key).items()}
+    cursor = state.get("cursor", 0)
+    scanned, embedded = state.get("scanned", 0), state.get("embedded", 0)
+
+    while True:
+        cursor, keys = r.scan(cursor=cursor, match=f"{SEMANTIC_PREFIX}*", count=page_size)
+        if keys:
+            read = r.pipeline(transaction=False)
+            for k in keys:
+                read.hmget(k, ["query", config.field])
+            todo = [
+                (k, _decode(query))
+                for k, (query, existing) in zip(keys, read.execute())
+                if query is not None and not (only_missing and existing is not None)
+            ]
+            if todo:
+                vectors = embed([query for _, query in todo])
+                write = r.pipeline(transaction=False)
+                for (k, _), vector in zip(todo, vectors):
+                    mapping = {config.field: encode_vector(vector, config.vector_type)}
+                    if config.rescoring:
+                        mapping[config.rescore_field] = encode_rescore_vector(vector)
+                    write.hset(k, mapping=mapping)
+                write.execute()
+            scanned += len(keys)
+            embedded += len(todo)
+        if cursor == 0:
+            r.delete(key)
+            break
+        r.hset(key, mapping={"cursor": cursor, "scanned": scanned, "embedded": embedded})
+        if progress:
+            progress(scanned, embedded)
+
+    report = CacheReembedReport(config.field, scanned, embedded, time.monotonic() - started)
+    logger.info("[CacheIndex] %r", report)
+    return report
+
+
+def switch_index(r: redis.Redis, config: VectorIndexConfig, *, timeout_secs: float = 600.0) -> MigrationReport:
+    """Build the index over `config.field` and move the alias to it (old index dropped, docs kept)."""
+    return migrate_index(r, config, drop_previous=True, timeout_secs=timeout_secs)
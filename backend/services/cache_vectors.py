@@ -0,0 +1,145 @@
+"""
+Vector storage settings for the semantic cache index.
+
+Precision options (per 384-dim bge-small vector, index copy only):
+  FLOAT32  1536 B  — exact, current default
+  FLOAT16   768 B  — negligible recall loss for cosine on normalised embeddings
+  INT8      384 B  — scalar-quantised; the top `rescore_candidates` KNN hits are
+                     re-ranked against a FLOAT16 copy kept in the hash (not indexed)
+
+Index algorithms:
+  HNSW  — graph index, tunable M / EF_CONSTRUCTION / EF_RUNTIME
+  FLAT  — brute force; exact and smaller, fine for namespaces under ~10k entries
+
+Changing the precision or algorithm needs a new index (and, for precision,
+re-encoded vectors): both are part of the index name, so ensure_index()
+migrates on the next start and re-encodes stored vectors first
+(services/cache_index.py) — see scripts/bench_cache_index.py for sizing numbers.
+Changing the embedding model writes vectors to a new hash `field` first
+(services/cache_reembed.py) so the old index keeps serving until the switch.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+VECTOR_TYPES: tuple[str, ...] = ("FLOAT32", "FLOAT16", "INT8")
+INDEX_ALGORITHMS: tuple[str, ...] = ("HNSW", "FLAT")
+
+# Non-indexed hash field holding the FLOAT16 vector used to rescore INT8 hits
+RESCORE_FIELD = "embedding_rescore"
+
+_NUMPY_DTYPE_BY_TYPE = {
+    "FLOAT32": np.float32,
+    "FLOAT16": np.float16,
+    "INT8": np.int8,
+}
+
+
+@dataclass(frozen=True)
+class VectorIndexConfig:
+    vector_type: str = "FLOAT32"
+    algorithm: str = "HNSW"
+    dim: int = 384
+    m: int = 16                    # RediSearch defaults
+    ef_construction: int = 200
+    ef_runtime: int = 10
+    rescore_candidates: int = 5    # INT8 only: KNN hits re-ranked at full precision
+    field: str = "embedding"       # hash field holding the vector; one per embedding model
+
+    def __post_init__(self):
+        if self.vector_type not in VECTOR_TYPES:
+            raise ValueError(f"vector_type must be one of {VECTOR_TYPES}, got {self.vector_type!r}")
+        if self.algorithm not in INDEX_ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {INDEX_ALGORITHMS}, got {self.algorithm!r}")
+
+    @classmethod
+    def from_settings(cls, settings) -> "VectorIndexConfig":
+        return cls(
+            vector_type=settings.SEMANTIC_CACHE_VECTOR_TYPE.upper(),
+            algorithm=settings.SEMANTIC_CACHE_INDEX_ALGORITHM.upper(),
+            dim=settings.SEMANTIC_CACHE_EMBEDDING_DIM,
+            m=settings.SEMANTIC_CACHE_HNSW_M,
+            ef_construction=settings.SEMANTIC_CACHE_HNSW_EF_CONSTRUCTION,
+            ef_runtime=settings.SEMANTIC_CACHE_HNSW_EF_RUNTIME,
+            rescore_candidates=settings.SEMANTIC_CACHE_RESCORE_CANDIDATES,
+            field=settings.SEMANTIC_CACHE_VECTOR_FIELD,
+        )
+
+    @property
+    def rescoring(self) -> bool:
+        return self.vector_type == "INT8"
+
+    @property
+    def rescore_field(self) -> str:
+        """RESCORE_FIELD for the default vector field, `<field>_rescore` otherwise."""
+        return f"{self.field}_rescore"
+
+    @property
+    def knn_k(self) -> int:
+        return self.rescore_candidates if self.rescoring else 1
+
+    def field_attributes(self) -> dict:
+        """Attributes for redis-py's VectorField(name, algorithm, attributes)."""
+        attributes = {
+            "TYPE": self.vector_type,
+            "DIM": self.dim,
+            "DISTANCE_METRIC": "COSINE",
+        }
+        if self.algorithm == "HNSW":
+            attributes.update({
+                "M": self.m,
+                "EF_CONSTRUCTION": self.ef_construction,
+                "EF_RUNTIME": self.ef_runtime,
+            })
+        return attributes
+
+    def knn_clause(self, field: str = "embedding") -> str:
+        """KNN part of a dialect-2 query; EF_RUNTIME is passed per query for HNSW."""
+        clause = f"KNN {self.knn_k} @{field} $vec"
+        if self.algorithm == "HNSW":
+            clause += f" EF_RUNTIME {self.ef_runtime}"
+        return clause + " AS score"
+
+
+def quantize_int8(vector: np.ndarray) -> np.ndarray:
+    """
+    Symmetric per-vector scalar quantisation to int8.
+    Cosine distance ignores the scale factor, so it does not need storing.
+    """
+    peak = float(np.max(np.abs(vector)))
+    if peak == 0.0:
+        return np.zeros(vector.shape, dtype=np.int8)
+    return np.clip(np.rint(vector / peak * 127.0), -127, 127).astype(np.int8)
+
+
+def encode_vector(vector: np.ndarray, vector_type: str) -> bytes:
+    """Serialise a float vector in the index's storage type."""
+    if vector_type == "INT8":
+        return quantize_int8(vector).tobytes()
+    return np.asarray(vector, dtype=_NUMPY_DTYPE_BY_TYPE[vector_type]).tobytes()
+
+
+def stored_vector_type(raw: bytes, dim: int) -> str | None:
+    """Storage type of an encoded `dim`-vector, told apart by byte length (4/2/1 per value)."""
+    for vector_type, dtype in _NUMPY_DTYPE_BY_TYPE.items():
+        if len(raw) == dim * np.dtype(dtype).itemsize:
+            return vector_type
+    return None
+
+
+def decode_vector(raw: bytes, vector_type: str) -> np.ndarray:
+    """Inverse of encode_vector (INT8 comes back unscaled, which cosine ignores)."""
+    return np.frombuffer(raw, dtype=_NUMPY_DTYPE_BY_TYPE[vector_type]).astype(np.float32)
+
+
+def encode_rescore_vector(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+
+def decode_rescore_vector(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype=np.float16).astype(np.float32)
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b) / denom) if denom else 0.0
@@ -0,0 +1,299 @@
+"""
+Offline semantic-cache warming for common academic queries.
+
+The semantic cache only fills as students miss, so every new term, syllabus
+change and new language starts cold. This batch job pre-generates responses
+before exam season and bulk-loads them into SemanticCache.
+
+Corpus (deduplicated, most frequent first):
+  1. Syllabus topics   — user_exams.syllabus_progress_json[*].topics
+  2. Resource titles   — resources.title (active only)
+  3. Past misses       — `cache:misses` log written by /simplify/{text,notes,roadmap}
+
+Each topic is expanded for every requested kind × level × language. Responses
+come from the live endpoint's prompt, answered by a model carrying the same
+skill instructions as the sub-agent live requests are delegated to
+(services/simplify_prompts.SKILL_BY_KIND). The run is concurrency-limited and
+resumable: items whose exact-tier key already exists are skipped, so
+re-running after a crash or budget stop only pays for what is left.
+
+Usage (from backend/, e.g. as a Cloud Run Job a week before exams):
+    python -m services.cache_warmer --levels basic,intermediate \
+        --languages English,Hinglish --kinds simplify,notes --max-cost-usd 20
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from agents.skills import load_skill_instructions
+from core.config import settings
+from core.metrics import estimate_gemini_cost, record_gemini_usage
+from services.simplify_prompts import SKILL_BY_KIND, cache_key_for, prompt_builder_by_kind, split_cache_key
+
+logger = logging.getLogger(__name__)
+
+WARM_MODEL = "gemini-2.0-flash"
+WARM_KINDS: tuple[str, ...] = ("simplify", "notes", "roadmap")
+
+_DEFAULT_CONCURRENCY: int = 8
+_DEFAULT_BATCH_SIZE: int = 32
+_DEFAULT_TTL_DAYS: int = 45   # warmed entries must outlive the exam season
+
+
+@dataclass(frozen=True)
+class WarmItem:
+    kind: str        # one of WARM_KINDS
+    text: str
+    level: str
+    language: str
+
+    @property
+    def cache_query(self) -> str:
+        return cache_key_for(self.kind, self.text)
+
+    def __repr__(self) -> str:
+        return f"WarmItem({self.kind}, {self.text[:40]!r}, {self.level}/{self.language})"
+
+
+@dataclass
+class WarmReport:
+    planned: int = 0
+    skipped_cached: int = 0
+    generated: int = 0
+    failed: int = 0
+    prompt_tokens: int = 0
+    candidate_tokens: int = 0
+    budget_exhausted: bool = False
+
+    @property
+    def cost_usd(self) -> float:
+        return estimate_gemini_cost(self.prompt_tokens, self.candidate_tokens)
+
+    @property
+    def done(self) -> int:
+        return self.skipped_cached + self.generated + self.failed
+
+
+# ── Corpus ────────────────────────────────────────────────────────────────────
+
+def collect_syllabus_topics(supabase) -> Counter:
+    """Topic → number of tracked exams that include it."""
+    res = supabase.table("user_exams").select("syllabus_progress_json").execute()
+    topic_counts: Counter = Counter()
+    for row in res.data or []:
+        for subject in row.get("syllabus_progress_json") or []:
+            if not isinstance(subject, dict):
+                continue
+            for topic in subject.get("topics") or []:
+                if isinstance(topic, str) and topic.strip():
+                    topic_counts[topic.strip()] += 1
+    return topic_counts
+
+
+def collect_resource_titles(supabase) -> Counter:
+    res = supabase.table("resources").select("title").eq("is_active", True).execute()
+    return Counter(r["title"].strip() for r in (res.data or []) if r.get("title"))
+
+
+def build_corpus(
+    topic_counts: Counter,
+    missed: Iterable[tuple[str, str, str, int]],
+    *,
+    kinds: Sequence[str],
+    levels: Sequence[str],
+    languages: Sequence[str],
+    max_topics: int,
+) -> list[WarmItem]:
+    """
+    Expand topics into WarmItems (most popular first), then append missed
+    queries exactly as they were requested. Duplicates are dropped.
+    """
+    items: list[WarmItem] = []
+    seen: set[tuple[str, str, str, str]] = set()
+
+    def _add(item: WarmItem) -> None:
+        key = (item.kind, item.text.lower(), item.level, item.language)
+        if key not in seen:
+            seen.add(key)
+            items.append(item)
+
+    for topic, _ in topic_counts.most_common(max_topics):
+        for kind in kinds:
+            for level in levels:
+                for language in languages:
+                    _add(WarmItem(kind, topic, level, language))
+
+    for query_text, level, language, _count in missed:
+        kind, text = split_cache_key(query_text)
+        _add(WarmItem(kind, text, level, language))
+
+    return items
+
+
+# ── Generation ────────────────────────────────────────────────────────────────
+
+def build_models(genai, kinds: Iterable[str]) -> dict:
+    """One model per skill, with that skill's SKILL.md as its system instruction."""
+    by_skill: dict[str, object] = {}
+    models = {}
+    for kind in kinds:
+        skill = SKILL_BY_KIND[kind]
+        if skill not in by_skill:
+            by_skill[skill] = genai.GenerativeModel(WARM_MODEL, system_instruction=load_skill_instructions(skill))
+        models[kind] = by_skill[skill]
+    return models
+
+
+async def _generate(model, item: WarmItem, sem: asyncio.Semaphore, report: WarmReport) -> str | None:
+    prompt = prompt_builder_by_kind[item.kind](item.text, item.level, item.language)
+    async with sem:
+        try:
+            response = await model.generate_content_async(prompt)
+            text = response.text.strip()
+        except Exception:
+            logger.exception("[Warm] Generation failed for %r", item)
+            report.failed += 1
+            return None
+    usage = response.usage_metadata
+    report.prompt_tokens += usage.prompt_token_count
+    report.candidate_tokens += usage.candidates_token_count
+    record_gemini_usage(WARM_MODEL, usage.prompt_token_count, usage.candidates_token_count)
+    if not text:
+        report.failed += 1
+        return None
+    report.generated += 1
+    return text
+
+
+async def warm_cache(
+    items: Sequence[WarmItem],
+    *,
+    concurrency: int = _DEFAULT_CONCURRENCY,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+    ttl_days: int = _DEFAULT_TTL_DAYS,
+    max_cost_usd: float | None = None,
+    dry_run: bool = False,
+) -> WarmReport:
+    """
+    Generate and bulk-load responses for `items`, `batch_size` at a time.
+    Stops early (resumably) once `max_cost_usd` is spent.
+    """
+    from services.semantic_cache import init_cache
+
+    cache = await asyncio.to_thread(init_cache)
+    if cache is None:
+        raise RuntimeError("Semantic cache unavailable (is Redis running?) — nothing to warm")
+
+    report = WarmReport(planned=len(items))
+    sem = asyncio.Semaphore(concurrency)
+    started = time.monotonic()
+
+    models = {}
+    if not dry_run:
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        models = build_models(genai, {item.kind for item in items})
+
+    for offset in range(0, len(items), batch_size):
+        if max_cost_usd is not None and report.cost_usd >= max_cost_usd:
+            report.budget_exhausted = True
+            logger.warning("[Warm] Budget $%.2f reached — stopping; re-run to resume.", max_cost_usd)
+            break
+
+        batch = items[offset:offset + batch_size]
+        cached_flags = await asyncio.to_thread(
+            lambda: [cache.has_exact(i.cache_query, i.level, i.language) for i in batch]
+        )
+        todo = [item for item, cached in zip(batch, cached_flags) if not cached]
+        report.skipped_cached += len(batch) - len(todo)
+
+        if todo and not dry_run:
+            responses = await asyncio.gather(*(_generate(models[item.kind], item, sem, report) for item in todo))
+            entries = [
+                (item.cache_query, text, item.level, item.language)
+                for item, text in zip(todo, responses)
+                if text
+            ]
+            await asyncio.to_thread(cache.bulk_update, entries, ttl_days * 24 * 60 * 60)
+        elif dry_run:
+            report.generated += len(todo)
+
+        elapsed = time.monotonic() - started
+        rate = report.done / elapsed if elapsed else 0.0
+        eta = (report.planned - report.done) / rate if rate else 0.0
+        logger.info(
+            "[Warm] %d/%d done (cached=%d generated=%d failed=%d) — %d tokens, $%.3f, %.1f items/s, ETA %.0fs",
+            report.done, report.planned, report.skipped_cached, report.generated, report.failed,
+            report.prompt_tokens + report.candidate_tokens, report.cost_usd, rate, eta,
+        )
+
+    return report
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=_csv, default=["basic"])
+    parser.add_argument("--languages", type=_csv, default=["English"])
+    parser.add_argument("--kinds", type=_csv, default=["simplify", "notes"])
+    parser.add_argument("--max-topics", type=int, default=500, help="Most popular syllabus/resource topics to expand")
+    parser.add_argument("--max-misses", type=int, default=500, help="Most frequent past misses to include")
+    parser.add_argument("--concurrency", type=int, default=_DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=_DEFAULT_BATCH_SIZE)
+    parser.add_argument("--ttl-days", type=int, default=_DEFAULT_TTL_DAYS)
+    parser.add_argument("--max-cost-usd", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Plan and count only; no Gemini calls")
+    args = parser.parse_args()
+
+    unknown = set(args.kinds) - set(WARM_KINDS)
+    if unknown:
+        parser.error(f"--kinds must be from {WARM_KINDS}, got {sorted(unknown)}")
+
+    from db.supabase_client import get_supabase
+    from services.semantic_cache import init_cache
+
+    cache = init_cache()
+    if cache is None:
+        print("Semantic cache unavailable (is Redis running?)")
+        sys.exit(1)
+
+    supabase = get_supabase()
+    topic_counts = collect_syllabus_topics(supabase) + collect_resource_titles(supabase)
+    items = build_corpus(
+        topic_counts,
+        cache.top_misses(args.max_misses),
+        kinds=args.kinds,
+        levels=args.levels,
+        languages=args.languages,
+        max_topics=args.max_topics,
+    )
+    print(f"Planned {len(items)} cache entries from {len(topic_counts)} topics + past misses")
+
+    report = asyncio.run(warm_cache(
+        items,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        ttl_days=args.ttl_days,
+        max_cost_usd=args.max_cost_usd,
+        dry_run=args.dry_run,
+    ))
+    print(
+        f"{'✅' if not report.budget_exhausted else '⏸️'} planned={report.planned} "
+        f"already_cached={report.skipped_cached} generated={report.generated} failed={report.failed} "
+        f"tokens={report.prompt_tokens}+{report.candidate_tokens} cost=${report.cost_usd:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,202 @@
+"""
+Checkpointed, resumable scheduler runs (job_runs ledger, migration 024).
+
+A run is identified by (job, period): 'monthly_reports:2026-09',
+'memory_insights:2026-W42'. run_resumable() walks a keyset-paged scan one
+page at a time; each page is fanned out through run_per_item(), and when the
+whole page is done its last key and the running counts are written to
+job_runs. So:
+
+  - a process restart resumes after the last checkpointed page
+  - a manual re-trigger in the same period resumes a running/failed run
+    and skips a completed one (force=True starts over)
+  - at most one page is re-processed after a crash, which is why per-student
+    work must be idempotent; `pending` lets a job drop already-done students
+    from a page before any Gemini call
+
+Two processes are kept off the same job by the scheduler's lease and job
+locks (services/leader.py). The ledger adds fencing: a run records the lease
+token it was started under (migration 025), and a checkpoint from an older
+token — an ex-leader that stalled past its lease — raises LeaseLostError.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Optional
+
+from core.metrics import SCHEDULER_JOB_ITEMS
+from db.supabase_client import get_supabase
+from services.job_runner import JobReport, run_per_item
+from services.leader import LeaseLostError, current_fence
+
+logger = logging.getLogger(__name__)
+
+TABLE = "job_runs"
+
+PageSource = Callable[[Optional[str]], AsyncIterator[list[dict]]]   # after → pages
+
+
+@dataclass(frozen=True)
+class JobRun:
+    run_id: str
+    job: str
+    period: str
+    status: str = "running"
+    cursor: Optional[str] = None
+    done: int = 0
+    failed: int = 0
+    retries: int = 0
+    outcomes: dict[str, int] = field(default_factory=dict)
+    fence: Optional[int] = None          # lease token of the run's owner (None = unguarded)
+
+    def __repr__(self) -> str:
+        return (f"JobRun({self.run_id} {self.status}: {self.done} done, {self.failed} failed, "
+                f"cursor={self.cursor!r}, {self.outcomes})")
+
+    @classmethod
+    def from_row(cls, row: dict) -> "JobRun":
+        return cls(
+            run_id=row["run_id"], job=row["job"], period=row["period"], status=row["status"],
+            cursor=row.get("cursor"), done=row.get("done") or 0, failed=row.get("failed") or 0,
+            retries=row.get("retries") or 0, outcomes=row.get("outcomes") or {}, fence=row.get("fence"),
+        )
+
+
+def run_id_for(job: str, period: str) -> str:
+    return f"{job}:{period}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobLedger:
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_supabase()
+
+    async def _execute(self, build):
+        return await asyncio.to_thread(lambda: build(self.client.table(TABLE)).execute())
+
+    async def start(self, job: str, period: str, *, force: bool = False, fence: Optional[int] = None) -> JobRun:
+        """The run to continue: a fresh one, the unfinished one, or the completed one (caller skips it)."""
+        run_id = run_id_for(job, period)
+        res = await self._execute(lambda t: t.select("*").eq("run_id", run_id).limit(1))
+        existing = JobRun.from_row(res.data[0]) if res.data else None
+        if existing is not None and existing.status == "completed" and not force:
+            return existing
+        if existing is not None and fence is not None and (existing.fence or 0) > fence:
+            raise LeaseLostError(f"{run_id} is owned by fence {existing.fence}, ours is {fence}")
+        if existing is None or force:
+            run = JobRun(run_id=run_id, job=job, period=period, fence=fence)
+            await self._execute(lambda t: t.upsert({
+                "run_id": run_id, "job": job, "period": period, "status": "running",
+                "cursor": None, "done": 0, "failed": 0, "retries": 0, "outcomes": {},
+                "last_error": None, "started_at": _now(), "updated_at": _now(), "finished_at": None,
+                "fence": fence,
+            }))
+            return run
+        await self._execute(lambda t: t.update(
+            {"status": "running", "last_error": None, "updated_at": _now(), "fence": fence}
+        ).eq("run_id", run_id))
+        return replace(existing, status="running", fence=fence)
+
+    def _owned(self, query, run: JobRun):
+        query = query.eq("run_id", run.run_id)
+        return query.eq("fence", run.fence) if run.fence is not None else query
+
+    async def checkpoint(self, run: JobRun, cursor: str, report: Optional[JobReport], *, skipped: int = 0) -> JobRun:
+        """Record a fully processed page; `skipped` rows were already done (counted as "already_done")."""
+        run = replace(_fold(run, report, skipped), cursor=cursor)
+        res = await self._execute(lambda t: self._owned(t.update({
+            "cursor": cursor, "done": run.done, "failed": run.failed, "retries": run.retries,
+            "outcomes": run.outcomes, "updated_at": _now(),
+        }), run))
+        if run.fence is not None and not res.data:
+            raise LeaseLostError(f"{run.run_id}: checkpoint rejected, fence {run.fence} superseded")
+        return run
+
+    async def finish(self, run: JobRun, status: str, *, error: Optional[str] = None,
+                     report: Optional[JobReport] = None) -> JobRun:
+        """Close the run; `report` adds counts for jobs that do not checkpoint."""
+        run = replace(_fold(run, report), status=status)
+        changes = {"status": status, "last_error": error, "updated_at": _now(), "finished_at": _now()}
+        if report is not None:
+            changes.update(done=run.done, failed=run.failed, retries=run.retries, outcomes=run.outcomes)
+        await self._execute(lambda t: self._owned(t.update(changes), run))
+        return run
+
+
+def _fold(run: JobRun, report: Optional[JobReport], skipped: int = 0) -> JobRun:
+    """`run` with the counts of `report` (and `skipped` already-done rows) added."""
+    outcomes = dict(run.outcomes)
+    if report is not None:
+        for outcome, n in report.outcomes.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + n
+    if skipped:
+        outcomes["already_done"] = outcomes.get("already_done", 0) + skipped
+    return replace(
+        run,
+        done=run.done + skipped + (report.done if report else 0),
+        failed=run.failed + (report.failed if report else 0),
+        retries=run.retries + (report.retries if report else 0),
+        outcomes=outcomes,
+    )
+
+
+async def run_resumable(
+    job: str,
+    period: str,
+    pages: PageSource,
+    work: Callable[[dict], Awaitable[Optional[str]]],
+    *,
+    key: str = "user_id",
+    pending: Optional[Callable[[list[dict]], Awaitable[list[dict]]]] = None,
+    total: Optional[int] = None,
+    force: bool = False,
+    ledger: Optional[JobLedger] = None,
+    **runner_kwargs,
+) -> JobRun:
+    """
+    Run `work` over every row from `pages(after)`, checkpointing after each page.
+    `pending(page)` returns the rows that still need work (idempotency filter).
+    Extra keyword arguments go to run_per_item (concurrency, timeout_secs, ...).
+    """
+    ledger = ledger or JobLedger()
+    run = await ledger.start(job, period, force=force, fence=current_fence())
+    if run.status == "completed":
+        logger.info("[JobRunner] %s already completed for %s — skipped (%r)", job, period, run)
+        return run
+    if run.cursor is not None:
+        logger.info("[JobRunner] %s resuming after %s (%r)", job, run.cursor, run)
+
+    started = time.monotonic()
+    processed_before = run.done + run.failed
+    try:
+        async for page in pages(run.cursor):
+            todo = await pending(page) if pending else page
+            report = None
+            if todo:
+                report = await run_per_item(job, todo, work, key=lambda row: str(row[key])[:8], **runner_kwargs)
+            if len(page) > len(todo):
+                SCHEDULER_JOB_ITEMS.labels(job=job, outcome="already_done").inc(len(page) - len(todo))
+            run = await ledger.checkpoint(run, str(page[-1][key]), report, skipped=len(page) - len(todo))
+            if total:
+                processed = run.done + run.failed - processed_before
+                rate = processed / max(time.monotonic() - started, 1e-6)
+                remaining = max(total - run.done - run.failed, 0)
+                logger.info("[JobRunner] %s: checkpoint %s — %d/%d, %.1f/s, ETA %.0fs",
+                            job, run.cursor, run.done + run.failed, total, rate,
+                            remaining / rate if rate > 0 else 0)
+    except BaseException as exc:
+        await asyncio.shield(ledger.finish(run, "failed", error=repr(exc)[:500]))
+        raise
+    run = await ledger.finish(run, "completed")
+    logger.info("[JobRunner] %r", run)
+    return run
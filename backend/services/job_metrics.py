@@ -0,0 +1,113 @@
+"""
+Per-job instrumentation for scheduled jobs: Prometheus metrics + run history.
+
+instrument_job() wraps each entry in scheduler.JOBS. While a job runs,
+core.metrics.current_job names it, so nested code attributes its metrics to
+the job without passing the name down:
+
+  scheduler_job_duration_seconds{job,status}     one observation per run
+  scheduler_job_running{job}                     1 while running
+  scheduler_job_last_success_timestamp_seconds   staleness alerts
+  scheduler_job_items_total{job,outcome}         per student (services/job_runner.py,
+  scheduler_job_item_seconds{job}                  services/job_ledger.py)
+  scheduler_job_llm_tokens_total{job,type}       core.metrics.record_gemini_usage
+
+Every run also gets a job_runs row (period = IST start minute) with the
+counts of the run_per_item() calls made inside it, so GET /admin/jobs/runs
+lists all jobs. Jobs that checkpoint through run_resumable() already own a
+(job, period) row and pass history=False.
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from core.metrics import (
+    SCHEDULER_JOB_DURATION,
+    SCHEDULER_JOB_LAST_SUCCESS,
+    SCHEDULER_JOB_RUNNING,
+    current_job,
+)
+from services.job_ledger import JobLedger, JobRun
+from services.job_runner import JobReport, collect_reports
+from services.leader import current_fence
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def merge_reports(job: str, reports: Sequence[JobReport]) -> Optional[JobReport]:
+    """One JobReport summing several run_per_item() calls (None if there were none)."""
+    if not reports:
+        return None
+    outcomes: Counter[str] = Counter()
+    for report in reports:
+        outcomes.update(report.outcomes)
+    return JobReport(
+        job=job,
+        done=sum(r.done for r in reports),
+        failed=sum(r.failed for r in reports),
+        retries=sum(r.retries for r in reports),
+        seconds=sum(r.seconds for r in reports),
+        outcomes=dict(outcomes),
+        failed_keys=tuple(k for r in reports for k in r.failed_keys),
+    )
+
+
+async def _start_history(ledger: JobLedger, job: str) -> Optional[JobRun]:
+    try:
+        return await ledger.start(job, datetime.now(IST).strftime("%Y-%m-%dT%H:%M"), fence=current_fence())
+    except Exception:
+        logger.warning("[Scheduler] %s: could not record run start", job, exc_info=True)
+        return None
+
+
+async def _finish_history(ledger: JobLedger, run: JobRun, status: str, error: Optional[str],
+                          report: Optional[JobReport]) -> None:
+    try:
+        await ledger.finish(run, status, error=error, report=report)
+    except Exception:
+        logger.warning("[Scheduler] %s: could not record run end", run.run_id, exc_info=True)
+
+
+def instrument_job(
+    job: str,
+    fn: Callable[..., Awaitable[None]],
+    *,
+    history: bool = True,
+    ledger: Optional[JobLedger] = None,
+) -> Callable[..., Awaitable[None]]:
+    """`fn` with per-job metrics and, if `history`, a job_runs row per run."""
+
+    @functools.wraps(fn)
+    async def _run(**kwargs) -> None:
+        runs = ledger or JobLedger()
+        job_reset = current_job.set(job)
+        SCHEDULER_JOB_RUNNING.labels(job=job).set(1)
+        started = time.monotonic()
+        status, error = "failed", None
+        run = await _start_history(runs, job) if history else None
+        try:
+            with collect_reports() as reports:
+                await fn(**kwargs)
+            status = "completed"
+        except BaseException as exc:
+            error = repr(exc)[:500]
+            raise
+        finally:
+            seconds = time.monotonic() - started
+            SCHEDULER_JOB_DURATION.labels(job=job, status=status).observe(seconds)
+            SCHEDULER_JOB_RUNNING.labels(job=job).set(0)
+            if status == "completed":
+                SCHEDULER_JOB_LAST_SUCCESS.labels(job=job).set_to_current_time()
+            if run is not None:
+                await asyncio.shield(_finish_history(runs, run, status, error, merge_reports(job, reports)))
+            current_job.reset(job_reset)
+            logger.info("[Scheduler] %s %s in %.1fs", job, status, seconds)
+
+    return _run
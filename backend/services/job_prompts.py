@@ -0,0 +1,104 @@
+"""
+Prompts for the scheduled Gemini jobs (weekly nudges, monthly progress reports).
+
+Each job has a PromptSpec for services/llm_batch.py: the task text used for
+multi-student batches, the original single-student prompt (fallback), and a
+validator for one student's output. Payloads are kept compact — they are
+what a batch request pays for per student.
+"""
+from typing import Optional
+
+from services.llm_batch import PromptSpec
+
+# ── Weekly nudge (job_memory_insights) ───────────────────────────────────────
+
+NUDGE_TASK = (
+    "You are generating a weekly career nudge for an Indian student. "
+    "Based on the GAP between their goals and recent activities, OR any urgent blockers, "
+    "write ONE short (max 15 words) actionable, encouraging nudge. "
+    "Use Indian student context (exams, internships, projects). No generic fluff."
+)
+_NUDGE_MAX_WORDS: int = 25   # the prompt asks for 15; reject only clear overruns
+
+
+def nudge_payload(goals: list[str], activities: list[str], blockers: list[str]) -> dict:
+    return {"goals": goals[:3], "recent_activities": activities[:3], "blockers": blockers[:3]}
+
+
+def build_nudge_prompt(payload: dict) -> str:
+    facts_block = "\n".join(f"- {f}" for f in payload["goals"])
+    act_block = "\n".join(f"- {a}" for a in payload["recent_activities"])
+    blocker_block = "\n".join(f"- {b}" for b in payload["blockers"])
+    return (
+        f"You are generating a weekly career nudge for an Indian student.\n"
+        f"GOALS (from memory):\n{facts_block}\n"
+        f"RECENT ACTIVITIES (from DB):\n{act_block}\n"
+        f" blockers:\n{blocker_block}\n\n"
+        f"Task: Based on the GAP between goals and activities, OR any urgent blockers, "
+        f"write ONE short (max 15 words) actionable, encouraging nudge. "
+        f"Use Indian student context (exams, internships, projects). No generic fluff.\n\nNudge:"
+    )
+
+
+def clean_nudge(text: str) -> Optional[str]:
+    nudge = text.strip().replace('"', '')
+    return nudge if nudge and len(nudge.split()) <= _NUDGE_MAX_WORDS else None
+
+
+NUDGE_PROMPT = PromptSpec(
+    name="weekly_nudge", task=NUDGE_TASK, single_prompt=build_nudge_prompt, validate=clean_nudge,
+)
+
+
+# ── Monthly progress narrative (job_monthly_progress_reports) ────────────────
+
+REPORT_TASK = (
+    "You are the Chief Mentor at SARGVISION AI. Write a 'Monthly Progress Narrative' for a student: "
+    "a 3-paragraph encouraging summary in a professional yet warm tone. "
+    "Paragraph 1: Celebrate their specific wins (even if few). "
+    "Paragraph 2: Interpret the readiness score change. "
+    "Paragraph 3: Give 2 clear 'Focus Areas' for next month based on their domain. "
+    "Style: Indian English context. No generic jargon. Separate paragraphs with a blank line."
+)
+_REPORT_MIN_WORDS: int = 60
+
+
+def report_payload(*, full_name: str, domain: str, activities: int, readiness: int,
+                   readiness_change: int, parent_nudges: int) -> dict:
+    return {
+        "full_name": full_name,
+        "domain": domain,
+        "activities_completed": activities,
+        "readiness_pct": readiness,
+        "readiness_change": readiness_change,
+        "parent_nudges": parent_nudges,
+    }
+
+
+def build_report_prompt(payload: dict) -> str:
+    metrics_summary = (
+        f"Full Name: {payload['full_name']}\n"
+        f"Domain: {payload['domain']}\n"
+        f"Activities completed: {payload['activities_completed']}\n"
+        f"Readiness Score: {payload['readiness_pct']}% (Change: {payload['readiness_change']:+d}%)\n"
+        f"Parental Guidance provided: {payload['parent_nudges']} nudges\n"
+    )
+    return (
+        f"You are the Chief Mentor at SARGVISION AI. Write a 'Monthly Progress Narrative' for a student.\n"
+        f"STUDENT DATA:\n{metrics_summary}\n\n"
+        f"TASK: Write a 3-paragraph encouraging summary in a professional yet warm tone. "
+        f"Paragraph 1: Celebrate their specific wins (even if few). "
+        f"Paragraph 2: Interpret the readiness score change. "
+        f"Paragraph 3: Give 2 clear 'Focus Areas' for next month based on their domain.\n"
+        f"Style: Indian English context. No generic jargon.\n\nReport:"
+    )
+
+
+def clean_report(text: str) -> Optional[str]:
+    narrative = text.strip()
+    return narrative if len(narrative.split()) >= _REPORT_MIN_WORDS else None
+
+
+REPORT_PROMPT = PromptSpec(
+    name="monthly_report", task=REPORT_TASK, single_prompt=build_report_prompt, validate=clean_report,
+)
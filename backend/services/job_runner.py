@@ -0,0 +1,197 @@
+"""
+Bounded-concurrency fan-out for the scheduler's per-user jobs.
+
+The weekly and monthly jobs used to walk every student one at a time, making
+sync Supabase and Gemini calls directly on the API's event loop. run_per_item()
+streams items to `concurrency` workers instead:
+
+  - items may be a list or an async iterator (a keyset-paged table scan);
+    at most 2 × concurrency are buffered ahead of the workers
+  - each item gets its own timeout and retries with jittered exponential
+    backoff; an item that still fails is counted and logged, never fatal
+  - `work` returns an optional outcome label ("delta", "skipped", ...) that
+    is tallied in the JobReport
+  - progress (done/total, items/s, ETA, failures) is logged every
+    `progress_every_secs`; per-item latency and outcomes are exported as
+    scheduler_job_item_seconds / scheduler_job_items_total
+
+`work` must keep blocking calls off the loop (asyncio.to_thread). A timed-out
+item's thread cannot be cancelled: its call finishes in the background and
+the result is discarded, so work should be safe to repeat.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, TypeVar, Union
+
+from core.config import settings
+from core.metrics import SCHEDULER_JOB_ITEM_SECONDS, SCHEDULER_JOB_ITEMS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_STOP = object()
+_MAX_FAILED_KEYS: int = 20
+
+
+@dataclass(frozen=True)
+class JobReport:
+    job: str
+    done: int
+    failed: int
+    retries: int
+    seconds: float
+    outcomes: dict[str, int] = field(default_factory=dict)
+    failed_keys: tuple[str, ...] = ()      # first few, for the log / admin view
+
+    @property
+    def per_sec(self) -> float:
+        return (self.done + self.failed) / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"JobReport({self.job}: {self.done} done, {self.failed} failed, {self.retries} retries, "
+                f"{self.seconds:.1f}s, {self.per_sec:.1f}/s, {self.outcomes})")
+
+
+_collected: ContextVar[Optional[list[JobReport]]] = ContextVar("job_reports", default=None)
+
+
+@contextmanager
+def collect_reports() -> Iterator[list[JobReport]]:
+    """Collect the report of every run_per_item() call made inside the block."""
+    reports: list[JobReport] = []
+    reset = _collected.set(reports)
+    try:
+        yield reports
+    finally:
+        _collected.reset(reset)
+
+
+class _Tally:
+    def __init__(self, total: Optional[int], progress_every_secs: float):
+        self.total = total
+        self.started = time.monotonic()
+        self.progress_every_secs = progress_every_secs
+        self.next_progress = self.started + progress_every_secs
+        self.done = 0
+        self.failed = 0
+        self.retries = 0
+        self.outcomes: Counter[str] = Counter()
+        self.failed_keys: list[str] = []
+
+    def progress(self, job: str) -> None:
+        now = time.monotonic()
+        if now < self.next_progress:
+            return
+        self.next_progress = now + self.progress_every_secs
+        processed = self.done + self.failed
+        rate = processed / (now - self.started)
+        if self.total and rate > 0:
+            eta = f"ETA {max(self.total - processed, 0) / rate:.0f}s"
+            of_total = f"/{self.total}"
+        else:
+            eta, of_total = "ETA ?", ""
+        logger.info("[JobRunner] %s: %d%s processed, %d failed, %.1f/s, %s",
+                    job, processed, of_total, self.failed, rate, eta)
+
+    def report(self, job: str) -> JobReport:
+        return JobReport(
+            job=job, done=self.done, failed=self.failed, retries=self.retries,
+            seconds=time.monotonic() - self.started, outcomes=dict(self.outcomes),
+            failed_keys=tuple(self.failed_keys),
+        )
+
+
+async def _aiter(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def run_per_item(
+    job: str,
+    items: Union[Iterable[T], AsyncIterable[T]],
+    work: Callable[[T], Awaitable[Optional[str]]],
+    *,
+    key: Callable[[T], str] = str,
+    total: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout_secs: Optional[float] = None,
+    retries: Optional[int] = None,
+    backoff_secs: float = 1.0,
+    progress_every_secs: float = 30.0,
+) -> JobReport:
+    """
+    Run `work(item)` for every item with at most `concurrency` in flight.
+    Defaults come from JOB_CONCURRENCY / JOB_ITEM_TIMEOUT_SECS / JOB_ITEM_RETRIES.
+    `key` names an item in logs; `total`, when known, enables the ETA.
+    An exception from `items` itself stops the run and propagates.
+    """
+    concurrency = concurrency or settings.JOB_CONCURRENCY
+    timeout_secs = timeout_secs or settings.JOB_ITEM_TIMEOUT_SECS
+    retries = settings.JOB_ITEM_RETRIES if retries is None else retries
+    tally = _Tally(total, progress_every_secs)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def _attempt(item: T) -> Optional[str]:
+        for attempt in range(retries + 1):
+            try:
+                return await asyncio.wait_for(work(item), timeout=timeout_secs)
+            except Exception as exc:
+                if attempt == retries:
+                    raise
+                tally.retries += 1
+                delay = backoff_secs * 2 ** attempt * (0.5 + random.random())
+                logger.warning("[JobRunner] %s: %s failed (%s), retry %d/%d in %.1fs",
+                               job, key(item), type(exc).__name__, attempt + 1, retries, delay)
+                await asyncio.sleep(delay)
+        return None
+
+    async def _worker() -> None:
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            started = time.monotonic()
+            try:
+                outcome = await _attempt(item)
+                tally.done += 1
+                tally.outcomes[outcome or "ok"] += 1
+                SCHEDULER_JOB_ITEMS.labels(job=job, outcome=outcome or "ok").inc()
+            except Exception:
+                tally.failed += 1
+                if len(tally.failed_keys) < _MAX_FAILED_KEYS:
+                    tally.failed_keys.append(key(item))
+                SCHEDULER_JOB_ITEMS.labels(job=job, outcome="failed").inc()
+                logger.exception("[JobRunner] %s: %s failed after %d attempts", job, key(item), retries + 1)
+            SCHEDULER_JOB_ITEM_SECONDS.labels(job=job).observe(time.monotonic() - started)
+            tally.progress(job)
+
+    workers = [asyncio.create_task(_worker()) for _ in range(concurrency)]
+    try:
+        async for item in _aiter(items):
+            await queue.put(item)
+    except BaseException:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    for _ in workers:
+        await queue.put(_STOP)
+    await asyncio.gather(*workers)
+
+    report = tally.report(job)
+    logger.info("[JobRunner] %r", report)
+    if (collected := _collected.get()) is not None:
+        collected.append(report)
+    return report
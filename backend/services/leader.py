@@ -0,0 +1,172 @@
+"""
+Leader election for the scheduler across API replicas (Redis lease + fencing token).
+
+Every process starts the scheduler, so without coordination each uvicorn
+worker / Cloud Run instance fired every cron job: N nudges, N alerts, N
+Gemini bills. Now:
+
+  lease      `scheduler:leader` = "<instance>:<token>", SET NX with a TTL of
+             SCHEDULER_LEASE_SECS, renewed every SCHEDULER_LEASE_RENEW_SECS by
+             compare-and-pexpire. Only the holder runs jobs; if it dies the
+             lease expires and another instance takes over.
+  fencing    each acquisition INCRs `scheduler:leader:fence` (in the same Lua
+             call), so tokens only grow. The token is exposed to the running
+             job (current_fence()); the job ledger stores it and refuses
+             checkpoints from a smaller one, so a paused ex-leader that wakes
+             up mid-job cannot overwrite its successor's progress.
+  job locks  `scheduler:job:<id>:<trigger minute>` SET NX: one run per cron
+             trigger even if leadership changes hands around the fire time.
+
+With SCHEDULER_LEADER_ELECTION=false (single process, local dev) this
+instance is always the leader and jobs run unguarded.
+
+Metrics: scheduler_is_leader, scheduler_leader_fence,
+scheduler_leader_transitions_total, scheduler_job_triggers_total.
+"""
+import asyncio
+import logging
+import os
+import socket
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from core.metrics import (
+    SCHEDULER_IS_LEADER,
+    SCHEDULER_JOB_TRIGGERS,
+    SCHEDULER_LEADER_FENCE,
+    SCHEDULER_LEADER_TRANSITIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "scheduler:leader"
+FENCE_KEY = "scheduler:leader:fence"
+JOB_LOCK_PREFIX = "scheduler:job:"
+_JOB_LOCK_TTL_SECS: int = 24 * 3600   # a trigger key is never reused sooner
+
+# KEYS[1] lease, KEYS[2] fence counter; ARGV[1] instance id, ARGV[2] ttl ms → token or 0
+_ACQUIRE_LUA = """
+if redis.call('exists', KEYS[1]) == 1 then return 0 end
+local token = redis.call('incr', KEYS[2])
+redis.call('set', KEYS[1], ARGV[1] .. ':' .. token, 'PX', ARGV[2])
+return token
+"""
+_RENEW_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end
+return 0
+"""
+_RELEASE_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end
+return 0
+"""
+
+_fence: ContextVar[Optional[int]] = ContextVar("scheduler_fence", default=None)
+
+
+class LeaseLostError(RuntimeError):
+    """A job tried to write under a fencing token that has been superseded."""
+
+
+def current_fence() -> Optional[int]:
+    """Fencing token of the lease the current job was started under (None when unguarded)."""
+    return _fence.get()
+
+
+@contextmanager
+def fenced(token: Optional[int]) -> Iterator[None]:
+    """Run the block under `token` (e.g. a queued job carrying its leader's fence)."""
+    reset = _fence.set(token)
+    try:
+        yield
+    finally:
+        _fence.reset(reset)
+
+
+class LeaderElector:
+    def __init__(self, r, *, lease_secs: float, renew_secs: float, instance_id: Optional[str] = None):
+        self.r = r   # redis.asyncio.Redis(decode_responses=True), or None = always leader
+        self.lease_secs = lease_secs
+        self.renew_secs = renew_secs
+        self.instance_id = instance_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.token: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.r is None or self.token is not None
+
+    @property
+    def _value(self) -> str:
+        return f"{self.instance_id}:{self.token}"
+
+    async def start(self) -> None:
+        if self.r is None:
+            SCHEDULER_IS_LEADER.set(1)
+            return
+        await self.tick()
+        self._task = asyncio.create_task(self._run(), name="scheduler-leader")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.r is not None and self.token is not None:
+            try:
+                await self.r.eval(_RELEASE_LUA, 1, LEADER_KEY, self._value)
+            except RedisError:
+                pass   # the lease expires on its own
+            self._set_token(None, "released")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_secs)
+            await self.tick()
+
+    async def tick(self) -> None:
+        """Renew the lease if held, otherwise try to take it."""
+        ttl_ms = int(self.lease_secs * 1000)
+        try:
+            if self.token is not None:
+                if not await self.r.eval(_RENEW_LUA, 1, LEADER_KEY, self._value, ttl_ms):
+                    self._set_token(None, "lost")
+                return
+            token = await self.r.eval(_ACQUIRE_LUA, 2, LEADER_KEY, FENCE_KEY, self.instance_id, ttl_ms)
+            if token:
+                self._set_token(int(token), "acquired")
+        except (RedisError, OSError) as e:
+            if self.token is not None:
+                logger.warning("[Scheduler] Lease renewal failed (%r) — stepping down", e)
+                self._set_token(None, "lost")
+
+    def _set_token(self, token: Optional[int], event: str) -> None:
+        self.token = token
+        SCHEDULER_IS_LEADER.set(1 if token is not None else 0)
+        if token is not None:
+            SCHEDULER_LEADER_FENCE.set(token)
+        SCHEDULER_LEADER_TRANSITIONS.labels(event=event).inc()
+        logger.info("[Scheduler] Leadership %s by %s (fence %s)", event, self.instance_id, token)
+
+    async def run_job(self, job_id: str, trigger_key: str, fn: Callable[[], Awaitable[None]]) -> bool:
+        """Run `fn` if this instance leads and no one has run this trigger yet. Returns whether it ran."""
+        if not self.is_leader:
+            SCHEDULER_JOB_TRIGGERS.labels(job=job_id, result="not_leader").inc()
+            return False
+        if self.r is not None:
+            lock_key = f"{JOB_LOCK_PREFIX}{job_id}:{trigger_key}"
+            try:
+                locked = await self.r.set(lock_key, self._value, nx=True, ex=_JOB_LOCK_TTL_SECS)
+            except (RedisError, OSError):
+                logger.warning("[Scheduler] %s skipped — job lock unavailable", job_id)
+                locked = False
+            if not locked:
+                SCHEDULER_JOB_TRIGGERS.labels(job=job_id, result="locked").inc()
+                return False
+        SCHEDULER_JOB_TRIGGERS.labels(job=job_id, result="run").inc()
+        with fenced(self.token):
+            await fn()
+        return True
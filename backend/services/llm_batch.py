@@ -0,0 +1,163 @@
+"""
+Multi-student batched Gemini prompts for the scheduled jobs.
+
+A weekly nudge is at most 15 words, yet each one cost a full request: prompt
+overhead, a round trip and a slot in the per-minute quota. LLMBatcher packs
+many students' compact inputs into one JSON-mode request and hands every
+caller its own entry back:
+
+  await batcher.generate(user_id, payload) → str
+
+Concurrent callers (the job runner's workers) are coalesced into batches of
+up to `batch_size`, waiting at most `max_wait_secs` for a batch to fill. The
+response must be a JSON array of {"user_id", "text"}; each entry goes through
+the spec's validator, and a student whose entry is missing or invalid falls
+back to a single-student request with the original prompt. If the batch
+request itself fails, every caller in it gets the exception (and the job
+runner retries them).
+"""
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Optional
+
+from core.metrics import LLM_BATCH_ENTRIES, LLM_BATCH_REQUESTS, record_gemini_usage
+
+logger = logging.getLogger(__name__)
+
+BATCH_MODEL = "gemini-2.0-flash"
+
+
+@dataclass(frozen=True)
+class PromptSpec:
+    name: str                                     # metrics / log label, e.g. "weekly_nudge"
+    task: str                                     # instructions applied to each student
+    single_prompt: Callable[[dict], str]          # full prompt for one student (fallback)
+    validate: Callable[[str], Optional[str]]      # cleaned text, or None if unusable
+
+
+def build_batch_prompt(task: str, entries: list[dict]) -> str:
+    return (
+        f"{task}\n\n"
+        f"Do this separately for EACH student in the JSON array below; never mix students' data.\n"
+        f'Return ONLY a JSON array with exactly one object per student: '
+        f'[{{"user_id": "<user_id from the input>", "text": "<result for that student>"}}]\n\n'
+        f"STUDENTS:\n{json.dumps(entries, ensure_ascii=False)}"
+    )
+
+
+def parse_batch_response(raw: str, user_ids: set[str], validate: Callable[[str], Optional[str]]) -> dict[str, str]:
+    """user_id → validated text for every usable entry; malformed JSON yields {}."""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+    if isinstance(data, dict):   # {"results": [...]} and similar wrappers
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    if not isinstance(data, list):
+        return {}
+    results: dict[str, str] = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        user_id, text = entry.get("user_id"), entry.get("text")
+        if user_id in user_ids and user_id not in results and isinstance(text, str):
+            cleaned = validate(text)
+            if cleaned:
+                results[user_id] = cleaned
+    return results
+
+
+class LLMBatcher:
+    def __init__(self, spec: PromptSpec, *, batch_size: int, max_wait_secs: float, model=None):
+        self.spec = spec
+        self.batch_size = batch_size
+        self.max_wait_secs = max_wait_secs
+        self._model = model
+        self._pending: list[tuple[str, dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            self._model = genai.GenerativeModel(BATCH_MODEL)
+        return self._model
+
+    async def generate(self, user_id: str, payload: dict) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_id, payload, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_secs, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, dict, asyncio.Future]]) -> None:
+        try:
+            texts = await self._generate_batch(batch) if len(batch) > 1 else {}
+        except Exception as exc:
+            logger.warning("[LLMBatch] %s: batch of %d failed (%s)", self.spec.name, len(batch), type(exc).__name__)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        fallbacks = []
+        for user_id, payload, future in batch:
+            if user_id in texts:
+                LLM_BATCH_ENTRIES.labels(prompt=self.spec.name, result="batched").inc()
+                if not future.done():
+                    future.set_result(texts[user_id])
+            else:
+                LLM_BATCH_ENTRIES.labels(prompt=self.spec.name, result="fallback").inc()
+                fallbacks.append(self._resolve_single(payload, future))
+        if len(batch) > 1 and fallbacks:
+            logger.info("[LLMBatch] %s: %d/%d entries fell back to single requests",
+                        self.spec.name, len(fallbacks), len(batch))
+        await asyncio.gather(*fallbacks)
+
+    async def _generate_batch(self, batch: list[tuple[str, dict, asyncio.Future]]) -> dict[str, str]:
+        prompt = build_batch_prompt(self.spec.task, [{"user_id": uid, **payload} for uid, payload, _ in batch])
+        response = await self.model.generate_content_async(
+            prompt, generation_config={"response_mime_type": "application/json"},
+        )
+        LLM_BATCH_REQUESTS.labels(prompt=self.spec.name, kind="batch").inc()
+        self._record_usage(response)
+        return parse_batch_response(response.text, {uid for uid, _, _ in batch}, self.spec.validate)
+
+    async def _resolve_single(self, payload: dict, future: asyncio.Future) -> None:
+        try:
+            response = await self.model.generate_content_async(self.spec.single_prompt(payload))
+            LLM_BATCH_REQUESTS.labels(prompt=self.spec.name, kind="single").inc()
+            self._record_usage(response)
+            raw = response.text
+            text = self.spec.validate(raw) or raw.strip()
+            if not text:
+                raise ValueError(f"{self.spec.name}: empty response")
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+            return
+        if not future.done():
+            future.set_result(text)
+
+    @staticmethod
+    def _record_usage(response) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record_gemini_usage(BATCH_MODEL, usage.prompt_token_count, usage.candidates_token_count)
@@ -1,48 +1,75 @@
+"""
+Two-tier (exact + semantic) Redis cache for AI responses.
+
+The cache is built lazily: constructing it loads the fastembed ONNX model
+(possibly downloading it) and talks to Redis, so it must never happen at
+import time. `start_cache_warmup()` builds it in the background from the
+FastAPI lifespan hook; until it is ready `get_cache()` returns None and
+callers skip caching.
+"""
 import numpy as np
-from fastembed import TextEmbedding
 import redis
-from redis.commands.search.field import VectorField, TextField
 from redis.commands.search.query import Query
+import asyncio
 import logging
 import hashlib
+import json
+import threading
+from collections.abc import Sequence
+from typing import Optional
 from core.config import settings
+from core.embeddings import get_text_embedding, load_seconds
+from core.metrics import SEMANTIC_CACHE_LOOKUPS, SEMANTIC_CACHE_MODEL_LOAD_SECONDS, SEMANTIC_CACHE_READY
+from services.cache_codec import content_hash, load_codec
+from services.cache_index import SEMANTIC_PREFIX, ensure_index, namespace_for, tag_filter
+from services.cache_vectors import (
+    VectorIndexConfig,
+    cosine_similarity,
+    decode_rescore_vector,
+    encode_rescore_vector,
+    encode_vector,
+)
 
 logger = logging.getLogger(__name__)
 
+BLOB_PREFIX = "cache:blob:"
+# (level|language) → blob hash for every cached variant of the same normalized content
+VARIANTS_PREFIX = "cache:variants:"
+CACHE_TTL_SECS = 60 * 60 * 24 * 7  # 7 Day TTL
+
+# Miss log feeding the offline cache warmer
+MISS_LOG_KEY = "cache:misses"
+MISS_LOG_MAX_ENTRIES = 10_000
+MISS_LOG_MAX_QUERY_CHARS = 2_000
+# Uploaded documents are keyed by file hash and cannot be regenerated offline
+UNWARMABLE_PREFIXES = ("document:", "notes:document:", "roadmap:document:")
+
 class SemanticCache:
     def __init__(self):
         self.host = settings.REDIS_HOST
         self.port = settings.REDIS_PORT
         # Note: decode_responses=False because we store binary vectors
         self.r = redis.Redis(host=self.host, port=self.port, decode_responses=False)
-        self.encoder = TextEmbedding() # Defaults to BAAI/bge-small-en-v1.5
-        self.index_name = "idx:semantic_cache"
-        self.vector_dim = 384 # Dimension for bge-small-en-v1.5
+        self.r.ping()  # fail fast so the background warm-up can retry
+
+        # BAAI/bge-small-en-v1.5 by default, shared with the memory pre-filter
+        self.encoder = get_text_embedding(settings.SEMANTIC_CACHE_EMBEDDING_MODEL)
+        SEMANTIC_CACHE_MODEL_LOAD_SECONDS.set(load_seconds(settings.SEMANTIC_CACHE_EMBEDDING_MODEL))
+        self.index_name = None  # alias resolved by _create_index
+        self.index_config = VectorIndexConfig.from_settings(settings)
+        self.vector_dim = self.index_config.dim
         self.threshold = 0.90 # High similarity for cache hits
+        self.codec = load_codec(self.r)
         
         self._create_index()
 
     def _create_index(self):
+        """Point reads at the versioned index alias, migrating online if the schema is behind."""
         try:
-            self.r.ft(self.index_name).info()
-            logger.info(f"Redis index {self.index_name} already exists.")
-        except Exception:
-            try:
-                schema = [
-                    TextField("query"),
-                    TextField("response"),
-                    TextField("level"),
-                    TextField("language"),
-                    VectorField("embedding", "HNSW", {
-                        "TYPE": "FLOAT32",
-                        "DIM": self.vector_dim,
-                        "DISTANCE_METRIC": "COSINE"
-                    })
-                ]
-                self.r.ft(self.index_name).create_index(schema)
-                logger.info(f"Created Redis semantic cache index: {self.index_name}")
-            except Exception as e:
-                logger.warning(f"Could not create Redis index (maybe RediSearch is missing?): {e}")
+            self.index_name = ensure_index(self.r, self.index_config)
+            logger.info("Redis semantic cache index ready: %s", self.index_name)
+        except Exception as e:
+            logger.warning(f"Could not create Redis index (maybe RediSearch is missing?): {e}")
 
     def _normalize_query(self, query: str) -> str:
         """Standardize the query to improve cache hit rates."""
@@ -61,75 +88,346 @@ class SemanticCache:
         q = re.sub(r'[^\w\s]', '', q)
         return q.strip()
 
-    def get_cached_response(self, query_text: str, level: str = "basic", language: str = "English"):
+    def _embed(self, texts: Sequence[str]) -> list[np.ndarray]:
+        return [v.astype(np.float32) for v in self.encoder.embed(list(texts))]
+
+    def _best_match(self, docs, query_vector: np.ndarray):
+        """
+        Pick the closest KNN hit. For INT8 indexes the candidates are re-ranked
+        with the FLOAT16 copy of each vector; otherwise the index score is exact enough.
+        Returns (doc, similarity) or (None, 0.0).
+        """
+        if not docs:
+            return None, 0.0
+        if not self.index_config.rescoring:
+            return docs[0], 1 - float(docs[0].score)
+        rescore_field = self.index_config.rescore_field
+        scored = [
+            (doc, cosine_similarity(query_vector, decode_rescore_vector(getattr(doc, rescore_field))))
+            for doc in docs
+            if getattr(doc, rescore_field, None)
+        ]
+        if not scored:
+            return docs[0], 1 - float(docs[0].score)
+        return max(scored, key=lambda pair: pair[1])
+
+    def reload_codec(self):
+        """Pick up a newly trained zstd dictionary (see scripts/train_cache_dictionary.py)."""
+        self.codec = load_codec(self.r)
+
+    def _store_blob(self, response_text: str, pipe, ttl_secs: int = CACHE_TTL_SECS) -> str:
+        """Write the response once under its content hash; returns the hash."""
+        blob_hash = content_hash(response_text)
+        pipe.set(f"{BLOB_PREFIX}{blob_hash}", self.codec.encode(response_text), ex=ttl_secs)
+        return blob_hash
+
+    def _load_response(self, blob_hash, legacy_response=None):
+        """Resolve an entry's blob pointer; entries written before blob storage carry `response` inline."""
+        if blob_hash:
+            if isinstance(blob_hash, bytes):
+                blob_hash = blob_hash.decode()
+            blob = self.r.get(f"{BLOB_PREFIX}{blob_hash}")
+            if blob is not None:
+                return self.codec.decode(blob)
+        if legacy_response:
+            return legacy_response.decode('utf-8') if isinstance(legacy_response, bytes) else legacy_response
+        return None
+
+    def _exact_key(self, query_text: str, level: str, language: str, namespace: Optional[str] = None) -> str:
+        """
+        Exact-tier key. The caller namespace is part of it, so a /mentor/chat reply
+        and a /simplify answer for the same text never overwrite or serve each other.
+        """
+        ns = namespace or namespace_for(query_text)
+        normalized_q = self._normalize_query(query_text)
+        h = hashlib.md5(f"{ns}:{normalized_q}:{level}:{language}".encode()).hexdigest()
+        return f"cache:exact:{h}"
+
+    def _legacy_exact_keys(self, query_text: str, level: str, language: str, namespace: Optional[str]) -> list[str]:
+        """Pre-namespace exact key, still read for the query's default namespace until it expires."""
+        if namespace and namespace != namespace_for(query_text):
+            return []
+        normalized_q = self._normalize_query(query_text)
+        return [f"cache:exact:{hashlib.md5(f'{normalized_q}:{level}:{language}'.encode()).hexdigest()}"]
+
+    def _read_exact(self, query_text: str, level: str, language: str, namespace: Optional[str] = None):
+        for key in [self._exact_key(query_text, level, language, namespace),
+                    *self._legacy_exact_keys(query_text, level, language, namespace)]:
+            blob_hash, legacy_res = self.r.hmget(key, ["blob", "response"])
+            response = self._load_response(blob_hash, legacy_res)
+            if response:
+                return response
+        return None
+
+    @staticmethod
+    def _scoped(text: str, query_text: str, namespace: Optional[str]) -> str:
+        """`text` prefixed with a non-default namespace (default-namespace keys are unchanged)."""
+        if namespace and namespace != namespace_for(query_text):
+            return f"{namespace}:{text}"
+        return text
+
+    def _semantic_key(self, query_text: str, namespace: Optional[str] = None) -> str:
+        h = hashlib.md5(self._scoped(query_text, query_text, namespace).encode()).hexdigest()
+        return f"{SEMANTIC_PREFIX}{h}"
+
+    def _variants_key(self, query_text: str, namespace: Optional[str] = None) -> str:
+        normalized_q = self._scoped(self._normalize_query(query_text), query_text, namespace)
+        h = hashlib.md5(normalized_q.encode()).hexdigest()
+        return f"{VARIANTS_PREFIX}{h}"
+
+    def find_sibling(
+        self, query_text: str, level: str, language: str, namespace: Optional[str] = None,
+    ) -> Optional[tuple[str, str, str]]:
+        """
+        Cached (level, language, response) of the same content in another level or
+        language, for cheap derivation (services/cache_derivation.py). Prefers variants
+        that differ in only one of the two, then English sources. None on Redis errors,
+        like lookup(), so a cache outage is a miss rather than a failed request.
+        """
+        try:
+            candidates = []
+            for field, blob_hash in self.r.hgetall(self._variants_key(query_text, namespace)).items():
+                v_level, _, v_language = field.decode().partition("|")
+                if (v_level, v_language) == (level, language):
+                    continue
+                distance = (v_level != level) + (v_language != language)
+                candidates.append((distance, v_language != "English", v_level, v_language, blob_hash))
+            for _, _, v_level, v_language, blob_hash in sorted(candidates):
+                response = self._load_response(blob_hash)
+                if response:
+                    return v_level, v_language, response
+        except Exception as e:
+            logger.error(f"Error reading cache variants: {e}")
+        return None
+
+    def _record_miss(self, query_text: str, level: str, language: str):
+        """Count misses so the offline warmer (services/cache_warmer.py) can pre-fill popular queries."""
+        if len(query_text) > MISS_LOG_MAX_QUERY_CHARS or query_text.startswith(UNWARMABLE_PREFIXES):
+            return
+        member = json.dumps([query_text, level, language], ensure_ascii=False)
+        pipe = self.r.pipeline(transaction=False)
+        pipe.zincrby(MISS_LOG_KEY, 1, member)
+        pipe.zremrangebyrank(MISS_LOG_KEY, 0, -(MISS_LOG_MAX_ENTRIES + 1))
+        pipe.execute()
+
+    def log_miss(self, query_text: str, level: str, language: str):
+        """_record_miss for callers outside lookup() (e.g. after a failed derivation); never raises."""
+        try:
+            self._record_miss(query_text, level, language)
+        except Exception as e:
+            logger.error(f"Error recording cache miss: {e}")
+
+    def top_misses(self, limit: int = 500) -> list[tuple[str, str, str, int]]:
+        """Most frequently missed (query, level, language, count), highest first."""
+        rows = self.r.zrevrange(MISS_LOG_KEY, 0, limit - 1, withscores=True)
+        return [(*json.loads(member), int(count)) for member, count in rows]
+
+    def has_exact(
+        self, query_text: str, level: str = "basic", language: str = "English", namespace: Optional[str] = None,
+    ) -> bool:
+        keys = [self._exact_key(query_text, level, language, namespace),
+                *self._legacy_exact_keys(query_text, level, language, namespace)]
+        return bool(self.r.exists(*keys))
+
+    def get_cached_response(
+        self,
+        query_text: str,
+        level: str = "basic",
+        language: str = "English",
+        record_miss: bool = False,
+        namespace: Optional[str] = None,
+    ):
+        response, tier = self.lookup(query_text, level, language, record_miss=record_miss, namespace=namespace)
+        SEMANTIC_CACHE_LOOKUPS.labels(result=tier).inc()
+        return response
+
+    def lookup(
+        self,
+        query_text: str,
+        level: str = "basic",
+        language: str = "English",
+        record_miss: bool = False,
+        namespace: Optional[str] = None,
+    ) -> tuple[Optional[str], str]:
+        """(response, tier) where tier is "exact", "semantic" or "miss". Not counted in metrics."""
         try:
             normalized_q = self._normalize_query(query_text)
             
-            # Tier 1: Exact Match (Fast MD5 lookup)
-            h = hashlib.md5(f"{normalized_q}:{level}:{language}".encode()).hexdigest()
-            exact_key = f"cache:exact:{h}"
-            exact_res = self.r.hget(exact_key, "response")
+            # Tier 1: Exact Match (Fast MD5 lookup, per namespace)
+            exact_res = self._read_exact(query_text, level, language, namespace)
             if exact_res:
-                logger.info(f"Exact Cache HIT for: {normalized_q}")
-                return exact_res.decode('utf-8')
+                logger.info("Exact Cache HIT for: %s", normalized_q)
+                return exact_res, "exact"
 
             # Tier 2: Semantic Match (Vector Search)
-            embedding = list(self.encoder.embed([query_text]))[0].astype(np.float32).tobytes()
+            query_vector = self._embed([query_text])[0]
+            embedding = encode_vector(query_vector, self.index_config.vector_type)
             
-            # Filter by level and language using RediSearch dialect
-            filter_query = f"@level:{level} @language:{language}"
-            q = Query(f"({filter_query})=>[KNN 1 @embedding $vec AS score]") \
+            # Exact TAG pre-filter on level, language and caller namespace
+            filter_query = tag_filter(level, language, namespace or namespace_for(query_text))
+            q = Query(f"({filter_query})=>[{self.index_config.knn_clause()}]") \
                 .sort_by("score") \
-                .return_fields("query", "response", "score") \
+                .return_fields("query", "blob", "response", "score") \
+                .paging(0, self.index_config.knn_k) \
                 .dialect(2)
+            if self.index_config.rescoring:
+                q = q.return_field(self.index_config.rescore_field, decode_field=False)
             
             params = {"vec": embedding}
             results = self.r.ft(self.index_name).search(q, params)
             
-            if results.docs:
-                doc = results.docs[0]
-                score = float(doc.score)
-                similarity = 1 - score
-                
+            doc, similarity = self._best_match(results.docs, query_vector)
+            if doc is not None:
                 if similarity >= self.threshold:
-                    logger.info(f"Semantic Cache HIT (sim={similarity:.4f}) for: {query_text}")
-                    return doc.response.decode('utf-8')
+                    response = self._load_response(
+                        getattr(doc, "blob", None), getattr(doc, "response", None)
+                    )
+                    if response:
+                        logger.info("Semantic Cache HIT (sim=%.4f) for: %s", similarity, query_text)
+                        return response, "semantic"
             
             logger.info(f"Semantic Cache MISS for: {query_text}")
-            return None
+            if record_miss:
+                self._record_miss(query_text, level, language)
+            return None, "miss"
         except Exception as e:
             logger.error(f"Error reading from semantic cache: {e}")
-            return None
+            return None, "miss"
+
+    def _queue_entry(
+        self,
+        pipe,
+        query_text: str,
+        response_text: str,
+        vector: np.ndarray,
+        level: str,
+        language: str,
+        ttl_secs: int = CACHE_TTL_SECS,
+        namespace: Optional[str] = None,
+    ):
+        """Add the blob + semantic + exact writes for one entry to `pipe`."""
+        semantic_key = self._semantic_key(query_text, namespace)
+        exact_key = self._exact_key(query_text, level, language, namespace)
+
+        # Response body is stored once (compressed); both tiers point to it
+        blob_hash = self._store_blob(response_text, pipe, ttl_secs)
+
+        mapping = {
+            "query": query_text,
+            "blob": blob_hash,
+            self.index_config.field: encode_vector(vector, self.index_config.vector_type),
+            "level": level,
+            "language": language,
+            "namespace": namespace or namespace_for(query_text),
+        }
+        if self.index_config.rescoring:
+            mapping[self.index_config.rescore_field] = encode_rescore_vector(vector)
+        pipe.hset(semantic_key, mapping=mapping)
+        pipe.hdel(semantic_key, "response")
+        pipe.expire(semantic_key, ttl_secs)
+
+        # Save to exact match tier
+        pipe.hset(exact_key, "blob", blob_hash)
+        pipe.hdel(exact_key, "response")
+        pipe.expire(exact_key, ttl_secs)
 
-    def update_cache(self, query_text: str, response_text: str, level: str = "basic", language: str = "English"):
+        variants_key = self._variants_key(query_text, namespace)
+        pipe.hset(variants_key, f"{level}|{language}", blob_hash)
+        pipe.expire(variants_key, ttl_secs)
+
+    def update_cache(
+        self,
+        query_text: str,
+        response_text: str,
+        level: str = "basic",
+        language: str = "English",
+        namespace: Optional[str] = None,
+    ):
         try:
-            normalized_q = self._normalize_query(query_text)
-            embedding = list(self.encoder.embed([query_text]))[0].astype(np.float32).tobytes()
-            
-            # Save to semantic index
-            h = hashlib.md5(query_text.encode()).hexdigest()
-            semantic_key = f"cache:semantic:{h}"
-            
-            mapping = {
-                "query": query_text,
-                "response": response_text,
-                "embedding": embedding,
-                "level": level,
-                "language": language
-            }
-            
-            self.r.hset(semantic_key, mapping=mapping)
-            self.r.expire(semantic_key, 60*60*24*7) # 7 Day TTL
-            
-            # Save to exact match tier
-            exact_h = hashlib.md5(f"{normalized_q}:{level}:{language}".encode()).hexdigest()
-            exact_key = f"cache:exact:{exact_h}"
-            self.r.hset(exact_key, "response", response_text)
-            self.r.expire(exact_key, 60*60*24*7)
+            vector = self._embed([query_text])[0]
+            pipe = self.r.pipeline(transaction=False)
+            self._queue_entry(pipe, query_text, response_text, vector, level, language, namespace=namespace)
+            pipe.execute()
             
             logger.info(f"Cached tiered response for: {query_text} ({level}/{language})")
         except Exception as e:
             logger.error(f"Error updating semantic cache: {e}")
 
-# Global instance for easy import
-cache = SemanticCache()
+    def bulk_update(
+        self,
+        entries: Sequence[tuple[str, str, str, str]],
+        ttl_secs: int = CACHE_TTL_SECS,
+        namespace: Optional[str] = None,
+    ) -> int:
+        """
+        Load many (query, response, level, language) entries at once, all in `namespace`
+        (default: each query's own, as for update_cache).
+        Embeds in a single batch and writes through one pipeline; used by the cache warmer,
+        which passes a longer TTL so warmed entries outlive the exam season.
+        Returns the number of entries written.
+        """
+        if not entries:
+            return 0
+        vectors = self._embed([query for query, _, _, _ in entries])
+        pipe = self.r.pipeline(transaction=False)
+        for (query_text, response_text, level, language), vector in zip(entries, vectors):
+            self._queue_entry(pipe, query_text, response_text, vector, level, language, ttl_secs, namespace)
+        pipe.execute()
+        logger.info("Bulk-loaded %d cache entries", len(entries))
+        return len(entries)
+
+# ── Lazy singleton ────────────────────────────────────────────────────────────
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+# Background warm-up retries while Redis is unreachable
+_WARMUP_RETRY_SECS: float = 30.0
+_WARMUP_MAX_ATTEMPTS: int = 20
+
+
+def get_cache() -> Optional[SemanticCache]:
+    """
+    Return the cache if it has finished initialising, else None.
+    Never blocks — request handlers call this and bypass caching on None.
+    """
+    return _cache
+
+
+def init_cache() -> Optional[SemanticCache]:
+    """
+    Build the cache synchronously (model load + Redis connect + index check).
+    Idempotent and thread-safe; for scripts and the background warm-up.
+    Returns None if Redis or the embedding model is unavailable.
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = SemanticCache()
+            except Exception as e:
+                logger.warning("Semantic cache unavailable: %r", e)
+                return None
+            SEMANTIC_CACHE_READY.set(1)
+            logger.info("Semantic cache ready")
+    return _cache
+
+
+async def warm_up_cache(
+    retry_secs: float = _WARMUP_RETRY_SECS,
+    max_attempts: int = _WARMUP_MAX_ATTEMPTS,
+) -> None:
+    """Initialise the cache off the event loop, retrying while Redis is down."""
+    for attempt in range(1, max_attempts + 1):
+        if await asyncio.to_thread(init_cache) is not None:
+            return
+        logger.info("Semantic cache warm-up attempt %d/%d failed; retrying in %.0fs", attempt, max_attempts, retry_secs)
+        await asyncio.sleep(retry_secs)
+    logger.error("Semantic cache disabled after %d warm-up attempts", max_attempts)
+
+
+def start_cache_warmup() -> asyncio.Task:
+    """Call during FastAPI startup lifespan; returns the task so shutdown can cancel it."""
+    return asyncio.create_task(warm_up_cache(), name="semantic-cache-warmup")
@@ -0,0 +1,92 @@
+"""
+Prompt builders for the Simplification endpoints (/simplify/text, /notes, /roadmap).
+
+Shared by api/simplify.py and the offline cache warmer. Live requests go
+through the Lead Mentor orchestrator, which delegates each kind to the
+sub-agent in SKILL_BY_KIND; the warmer sends the same prompt to a Gemini model
+whose system instruction is that sub-agent's SKILL.md. What it cannot
+reproduce is the orchestrator's per-student context (persona, memory) and
+the sub-agent's web search, so warmed entries are the student-neutral answer.
+"""
+
+# Cache-key prefix per content kind — matches the keys used by api/simplify.py
+KIND_PREFIXES: dict[str, str] = {
+    "simplify": "",
+    "notes": "notes:",
+    "roadmap": "roadmap:",
+}
+
+
+def build_simplify_prompt(text: str, level: str, language: str) -> str:
+    return (
+        f"I need you to simplify the following text at a '{level}' level "
+        f"and provide the output primarily in {language}. "
+        f"Please extract key concepts and give an intuitive analogy.\n\n"
+        f"TEXT TO SIMPLIFY:\n{text}"
+    )
+
+
+def build_notes_prompt(text: str, level: str, language: str) -> str:
+    return (
+        f"Please generate structured study notes for the following text. "
+        f"I need the output in {language} at a '{level}' level. "
+        f"Follow the 'Structured Notes Generation' format from your skill definition.\n\n"
+        f"TEXT FOR NOTES:\n{text}"
+    )
+
+
+def build_roadmap_prompt(text: str, level: str, language: str) -> str:
+    return (
+        f"Please generate a Career Roadmap for the following topic: '{text}'. "
+        f"Show how this academic concept connects to real-world roles in {language}. "
+        f"Incorporate industry-specific skills and growth trajectories."
+    )
+
+
+def build_derivation_prompt(
+    cached_text: str,
+    from_level: str,
+    from_language: str,
+    to_level: str,
+    to_language: str,
+) -> str:
+    """Rewrite an already-simplified explanation for another level and/or language."""
+    changes = []
+    if to_level != from_level:
+        changes.append(f"re-pitch it from a '{from_level}' to a '{to_level}' level")
+    if to_language != from_language:
+        changes.append(f"translate it from {from_language} into {to_language}")
+    return (
+        f"Below is a simplified explanation. Please {' and '.join(changes)}. "
+        f"Keep the same structure, key concepts and analogy, keep markdown formatting, "
+        f"and do not add an introduction.\n\n"
+        f"EXPLANATION:\n{cached_text}"
+    )
+
+
+# Skill (skills/<name>/SKILL.md) of the sub-agent the orchestrator delegates each kind to
+SKILL_BY_KIND: dict[str, str] = {
+    "simplify": "simplification_expert",
+    "notes": "simplification_expert",
+    "roadmap": "career_path_expert",
+}
+
+
+prompt_builder_by_kind = {
+    "simplify": build_simplify_prompt,
+    "notes": build_notes_prompt,
+    "roadmap": build_roadmap_prompt,
+}
+
+
+def cache_key_for(kind: str, text: str) -> str:
+    """Cache query text used by api/simplify.py for this kind of request."""
+    return f"{KIND_PREFIXES[kind]}{text}"
+
+
+def split_cache_key(query_text: str) -> tuple[str, str]:
+    """Inverse of cache_key_for: 'notes:Ohm's law' → ('notes', "Ohm's law")."""
+    for kind, prefix in KIND_PREFIXES.items():
+        if prefix and query_text.startswith(prefix):
+            return kind, query_text[len(prefix):]
+    return "simplify", query_text
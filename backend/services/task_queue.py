@@ -0,0 +1,339 @@
+"""
+Shared task queue between the web tier and workers (Redis stream + consumer group).
+
+Scheduled jobs used to run inside the API process: a monthly-report run and
+the memory queue workers shared the event loop with /mentor/chat, so every
+heavy job showed up as API latency. Work is now described as a task
+(`name` + JSON args) appended to `jobs:tasks`; `python -m worker` processes
+consume it, and PROCESS_ROLE=web processes only enqueue:
+
+  • Concurrency — each worker runs at most WORKER_CONCURRENCY tasks at once
+    and reads a new task only when a slot is free, so load spreads across
+    worker replicas instead of piling onto the first reader.
+  • Heartbeat — a running task's entry is re-claimed by its own consumer
+    every `_HEARTBEAT_SECS` (XCLAIM JUSTID resets its idle time without
+    counting a delivery), so long jobs are never stolen mid-run.
+  • Retry — a failed task stays pending; any worker re-claims it once idle
+    ≥ retry_delay(attempt) and it goes to `jobs:tasks:dead` after the
+    handler's max_attempts (default `_MAX_ATTEMPTS`). A worker that dies or
+    is stopped mid-task stops heart-beating, so its task is picked up
+    elsewhere. Only jobs that checkpoint in job_runs (services/job_ledger.py)
+    resume where they stopped; handlers that would start over and re-send
+    (WhatsApp jobs) register with max_attempts=1 and are dead-lettered on
+    failure instead of re-run.
+  • Fencing — a task enqueued by the scheduler leader carries its fencing
+    token and runs under it (services/leader.py).
+
+Metrics: worker_tasks_total, worker_task_seconds, worker_tasks_in_flight and
+worker_task_queue_depth (see core/metrics.py).
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from core.config import settings
+from core.metrics import WORKER_TASK_QUEUE_DEPTH, WORKER_TASK_SECONDS, WORKER_TASKS, WORKER_TASKS_IN_FLIGHT
+from services.leader import fenced
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "jobs:tasks"
+DEAD_LETTER_KEY = "jobs:tasks:dead"
+GROUP = "job-workers"
+
+_READ_BLOCK_MS: int = 2_000
+_HEARTBEAT_SECS: float = 15.0
+_RETRY_BASE_SECS: float = 60.0       # must stay well above _HEARTBEAT_SECS
+_RETRY_MAX_SECS: float = 30 * 60.0
+_MAX_ATTEMPTS: int = 3
+_RECLAIM_INTERVAL_SECS: float = 15.0
+_STREAM_MAXLEN: int = 10_000
+_DEAD_LETTER_MAXLEN: int = 1_000
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Task:
+    message_id: str
+    name: str
+    args: dict
+    fence: Optional[int] = None
+
+    @property
+    def enqueued_at(self) -> float:
+        return int(self.message_id.split("-", 1)[0]) / 1000
+
+    @classmethod
+    def from_entry(cls, message_id: str, fields: dict) -> "Task":
+        fence = fields.get("fence")
+        return cls(
+            message_id=message_id,
+            name=fields["name"],
+            args=json.loads(fields.get("args") or "{}"),
+            fence=int(fence) if fence else None,
+        )
+
+    def __repr__(self) -> str:
+        return f"Task({self.message_id} {self.name})"
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds a task delivered `attempt` times stays idle before it is re-claimed."""
+    return min(_RETRY_BASE_SECS * 2 ** (attempt - 1), _RETRY_MAX_SECS)
+
+
+class TaskQueue:
+    def __init__(self, r: aioredis.Redis, *, concurrency: int, consumer: Optional[str] = None):
+        self.r = r
+        self.concurrency = concurrency
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.consuming = False
+        self._handlers: dict[str, Handler] = {}
+        self._max_attempts: dict[str, int] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: dict[str, asyncio.Task] = {}   # message id → task runner
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def register(self, name: str, handler: Handler, *, max_attempts: int = _MAX_ATTEMPTS) -> None:
+        """`max_attempts`=1: never re-run `name` — a failed or orphaned task is dead-lettered."""
+        self._handlers[name] = handler
+        self._max_attempts[name] = max_attempts
+
+    def max_attempts(self, name: str) -> int:
+        return self._max_attempts.get(name, _MAX_ATTEMPTS)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    @property
+    def healthy(self) -> bool:
+        """Consumer loops still alive (always True for a producer-only queue)."""
+        return not self.consuming or all(not t.done() for t in self._tasks)
+
+    # ── Producer ──────────────────────────────────────────────────────────────
+
+    async def enqueue(self, name: str, args: Optional[dict] = None, *, fence: Optional[int] = None) -> str:
+        """Append a task; returns its message id. Raises RedisError if Redis is down."""
+        fields = {"name": name, "args": json.dumps(args or {})}
+        if fence is not None:
+            fields["fence"] = str(fence)
+        message_id = await self.r.xadd(STREAM_KEY, fields, maxlen=_STREAM_MAXLEN, approximate=True)
+        WORKER_TASKS.labels(task=name, result="enqueued").inc()
+        logger.info("[TaskQueue] Enqueued %s (%s)", name, message_id)
+        return message_id
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    async def start(self, *, consume: bool) -> None:
+        try:
+            await self.r.xgroup_create(STREAM_KEY, GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self.consuming = consume
+        if consume:
+            self._tasks = [
+                asyncio.create_task(self._read_loop(), name="task-queue-reader"),
+                asyncio.create_task(self._heartbeat_loop(), name="task-queue-heartbeat"),
+                asyncio.create_task(self._reclaim_loop(), name="task-queue-reclaimer"),
+            ]
+        logger.info("[TaskQueue] Started %s %s (handlers: %s)", "consumer" if consume else "producer",
+                    self.consumer, ", ".join(sorted(self._handlers)) or "-")
+
+    async def stop(self, timeout_secs: float = 10.0) -> None:
+        """Stop reading and wait briefly for running tasks; unfinished ones are retried elsewhere."""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._running:
+            _, pending = await asyncio.wait(list(self._running.values()), timeout=timeout_secs)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.r.aclose()
+        logger.info("[TaskQueue] Stopped %s", self.consumer)
+
+    # ── Consumer ──────────────────────────────────────────────────────────────
+
+    async def _read_loop(self) -> None:
+        while not self._stopping.is_set():
+            await self._slots.acquire()
+            try:
+                response = await self.r.xreadgroup(
+                    GROUP, self.consumer, {STREAM_KEY: ">"}, count=1, block=_READ_BLOCK_MS,
+                )
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception:
+                self._slots.release()
+                logger.exception("[TaskQueue] read failed; backing off")
+                await asyncio.sleep(_RECLAIM_INTERVAL_SECS)
+                continue
+            entries = [(mid, fields) for _, batch in response or [] for mid, fields in batch]
+            if not entries:
+                self._slots.release()
+                continue
+            self._spawn(Task.from_entry(*entries[0]))
+
+    def _spawn(self, task: Task) -> None:
+        """Run `task` in the slot the caller has acquired."""
+        runner = asyncio.create_task(self.process(task), name=f"task:{task.name}")
+        self._running[task.message_id] = runner
+
+        def _done(_):
+            self._running.pop(task.message_id, None)
+            WORKER_TASKS_IN_FLIGHT.set(len(self._running))
+            self._slots.release()
+
+        runner.add_done_callback(_done)
+        WORKER_TASKS_IN_FLIGHT.set(len(self._running))
+
+    async def process(self, task: Task) -> bool:
+        """Run one task; ack on success, leave it pending for retry on failure (or dead-letter)."""
+        handler = self._handlers.get(task.name)
+        if handler is None:
+            logger.error("[TaskQueue] No handler for %r — dead-lettering", task)
+            await self._dead_letter(task)
+            return False
+        started = time.monotonic()
+        try:
+            with fenced(task.fence):
+                await handler(**task.args)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            WORKER_TASKS.labels(task=task.name, result="failed").inc()
+            if self.max_attempts(task.name) <= 1:
+                logger.exception("[TaskQueue] %r failed; not retryable — dead-lettering", task)
+                await self._dead_letter(task)
+            else:
+                logger.exception("[TaskQueue] %r failed; will retry", task)
+            return False
+        finally:
+            WORKER_TASK_SECONDS.labels(task=task.name).observe(time.monotonic() - started)
+        await self.r.xack(STREAM_KEY, GROUP, task.message_id)
+        WORKER_TASKS.labels(task=task.name, result="done").inc()
+        logger.info("[TaskQueue] %r done in %.1fs", task, time.monotonic() - started)
+        return True
+
+    async def _heartbeat_loop(self) -> None:
+        while not self._stopping.is_set():
+            await asyncio.sleep(_HEARTBEAT_SECS)
+            if not self._running:
+                continue
+            try:
+                await self.r.xclaim(STREAM_KEY, GROUP, self.consumer, min_idle_time=0,
+                                    message_ids=list(self._running), justid=True)
+            except RedisError:
+                logger.warning("[TaskQueue] heartbeat failed", exc_info=True)
+
+    async def _reclaim_loop(self) -> None:
+        while not self._stopping.is_set():
+            await asyncio.sleep(_RECLAIM_INTERVAL_SECS)
+            try:
+                await self.reclaim()
+                await self.refresh_stats()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("[TaskQueue] reclaim failed")
+
+    async def reclaim(self) -> int:
+        """Re-claim failed or orphaned tasks whose backoff has elapsed, if a slot is free."""
+        pending = await self.r.xpending_range(
+            STREAM_KEY, GROUP, min="-", max="+", count=self.concurrency,
+            idle=int(_RETRY_BASE_SECS * 1000),
+        )
+        due = [p for p in pending
+               if p["message_id"] not in self._running
+               and p["time_since_delivered"] >= retry_delay(p["times_delivered"]) * 1000]
+        started = 0
+        for p in due:
+            if self._slots.locked():
+                break
+            claimed = await self.r.xclaim(
+                STREAM_KEY, GROUP, self.consumer,
+                min_idle_time=int(_RETRY_BASE_SECS * 1000), message_ids=[p["message_id"]],
+            )
+            if not claimed or not claimed[0][1]:
+                continue   # taken by another worker, or trimmed away
+            task = Task.from_entry(*claimed[0])
+            if p["times_delivered"] >= self.max_attempts(task.name):
+                logger.error("[TaskQueue] %r dead-lettered after %d attempts", task, p["times_delivered"])
+                await self._dead_letter(task)
+                continue
+            await self._slots.acquire()
+            WORKER_TASKS.labels(task=task.name, result="retried").inc()
+            self._spawn(task)
+            started += 1
+        return started
+
+    async def _dead_letter(self, task: Task) -> None:
+        fields = {"name": task.name, "args": json.dumps(task.args), "message_id": task.message_id}
+        await self.r.xadd(DEAD_LETTER_KEY, fields, maxlen=_DEAD_LETTER_MAXLEN, approximate=True)
+        await self.r.xack(STREAM_KEY, GROUP, task.message_id)
+        WORKER_TASKS.labels(task=task.name, result="dead").inc()
+
+    async def refresh_stats(self) -> None:
+        for group in await self.r.xinfo_groups(STREAM_KEY):
+            if group["name"] == GROUP:
+                WORKER_TASK_QUEUE_DEPTH.set(int(group.get("lag") or 0) + int(group["pending"]))
+
+
+# ── Process-wide instance (started from the API lifespan or worker.py) ────────
+
+_queue: Optional[TaskQueue] = None
+
+
+def get_task_queue() -> Optional[TaskQueue]:
+    """The running queue, or None (Redis unavailable) — the scheduler then runs jobs inline."""
+    return _queue
+
+
+async def start_task_queue(
+    handlers: dict[str, Handler],
+    *,
+    consume: bool,
+    max_attempts: Optional[dict[str, int]] = None,
+) -> Optional[TaskQueue]:
+    """`max_attempts` overrides the retry policy per handler name (default `_MAX_ATTEMPTS`)."""
+    global _queue
+    r = aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        decode_responses=True,
+        socket_connect_timeout=2,
+    )
+    try:
+        await r.ping()
+        queue = TaskQueue(r, concurrency=settings.WORKER_CONCURRENCY)
+        for name, handler in handlers.items():
+            queue.register(name, handler, max_attempts=(max_attempts or {}).get(name, _MAX_ATTEMPTS))
+        await queue.start(consume=consume)
+    except Exception as e:
+        logger.warning("[TaskQueue] Disabled — Redis unavailable: %r", e)
+        await r.aclose()
+        return None
+    _queue = queue
+    return _queue
+
+
+async def stop_task_queue() -> None:
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
@@ -0,0 +1,134 @@
+"""
+Rate-limited bulk WhatsApp sending for scheduled jobs.
+
+send_message() builds a Twilio client, sends, and inserts a whatsapp_messages
+row — fine for one reply, slow for a job sending thousands. send_bulk():
+
+  • reuses one Twilio client (connection pool) for the whole batch
+  • paces requests with a token bucket at WHATSAPP_SEND_RATE_PER_SEC, with
+    up to WHATSAPP_SEND_CONCURRENCY requests in flight (Twilio calls are
+    sync, so each runs in a thread)
+  • backs off and retries on HTTP 429 instead of dropping the message
+  • logs all sent messages with one whatsapp_messages insert per chunk
+
+Twilio is only touched through the client passed in, so the module stays
+importable without it.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from core.metrics import WHATSAPP_SENDS
+
+logger = logging.getLogger(__name__)
+
+_RATE_LIMIT_RETRIES: int = 3
+_RATE_LIMIT_BACKOFF_SECS: float = 2.0
+_LOG_CHUNK: int = 500
+
+
+@dataclass(frozen=True)
+class OutboundMessage:
+    user_id: str
+    phone: str
+    body: str
+    message_type: str   # snapshot, alert, nudge
+
+    def __repr__(self) -> str:
+        return f"OutboundMessage({self.message_type} → user {self.user_id[:8]}…)"
+
+
+@dataclass(frozen=True)
+class BulkSendReport:
+    sent: tuple[OutboundMessage, ...] = ()
+    failed: tuple[OutboundMessage, ...] = ()
+
+    @property
+    def sent_user_ids(self) -> list[str]:
+        return [m.user_id for m in self.sent]
+
+    def __repr__(self) -> str:
+        return f"BulkSendReport({len(self.sent)} sent, {len(self.failed)} failed)"
+
+
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per second, bursting to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    return getattr(exc, "status", None) == 429
+
+
+async def send_bulk(
+    messages: Sequence[OutboundMessage],
+    *,
+    client,
+    from_number: str,
+    rate_per_sec: float,
+    concurrency: int,
+    supabase=None,
+) -> BulkSendReport:
+    """Send `messages` through `client` (twilio.rest.Client); returns which were sent."""
+    limiter = RateLimiter(rate_per_sec)
+    sem = asyncio.Semaphore(concurrency)
+    sent: list[tuple[OutboundMessage, str]] = []
+    failed: list[OutboundMessage] = []
+
+    async def _send(msg: OutboundMessage) -> None:
+        to_wa = msg.phone if msg.phone.startswith("whatsapp:") else f"whatsapp:{msg.phone}"
+        async with sem:
+            for attempt in range(_RATE_LIMIT_RETRIES + 1):
+                await limiter.acquire()
+                try:
+                    result = await asyncio.to_thread(
+                        client.messages.create, body=msg.body, from_=from_number, to=to_wa,
+                    )
+                except Exception as e:
+                    if _is_rate_limited(e) and attempt < _RATE_LIMIT_RETRIES:
+                        WHATSAPP_SENDS.labels(type=msg.message_type, result="rate_limited").inc()
+                        await asyncio.sleep(_RATE_LIMIT_BACKOFF_SECS * 2 ** attempt)
+                        continue
+                    WHATSAPP_SENDS.labels(type=msg.message_type, result="failed").inc()
+                    failed.append(msg)
+                    logger.warning("[WhatsApp] %r failed: %s", msg, e)
+                    return
+                WHATSAPP_SENDS.labels(type=msg.message_type, result="sent").inc()
+                sent.append((msg, result.sid))
+                return
+
+    await asyncio.gather(*(_send(m) for m in messages))
+
+    if supabase is not None and sent:
+        rows = [
+            {"user_id": m.user_id, "phone": m.phone, "message_type": m.message_type,
+             "body": m.body, "twilio_sid": sid}
+            for m, sid in sent
+        ]
+        for i in range(0, len(rows), _LOG_CHUNK):
+            chunk = rows[i:i + _LOG_CHUNK]
+            try:
+                await asyncio.to_thread(lambda: supabase.table("whatsapp_messages").insert(chunk).execute())
+            except Exception:
+                logger.exception("[WhatsApp] Failed to log %d sent messages", len(chunk))
+    return BulkSendReport(sent=tuple(m for m, _ in sent), failed=tuple(failed))
@@ -2,8 +2,11 @@
 WhatsApp Service — wraps Twilio API for sending WhatsApp messages.
 Usage:
     from services.whatsapp_service import send_message, send_weekly_snapshot, send_deadline_alert
+    from services.whatsapp_service import send_messages_bulk   # scheduled jobs (services/whatsapp_bulk.py)
 """
 import logging
+from collections.abc import Sequence
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
@@ -12,11 +15,14 @@ from twilio.base.exceptions import TwilioRestException
 
 from core.config import settings
 from db.supabase_client import get_supabase
+from services.whatsapp_bulk import BulkSendReport, OutboundMessage, send_bulk
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def _get_twilio_client() -> Client:
+    """One client per process: Twilio's HTTP session (and its connection pool) is reused."""
     return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
 
 
@@ -61,7 +67,7 @@ def format_weekly_snapshot(user: dict) -> str:
     Formats a personalized weekly career snapshot message.
     user: dict with keys full_name, readiness_pct, top_opportunity, deadline_days, mentor_tip
     """
-    name = user.get("full_name", "there").split()[0]
+    name = (user.get("full_name") or "there").split()[0]
     readiness = user.get("readiness_pct", 72)
     top_opp = user.get("top_opportunity", "Google Summer of Code 2026")
     top_match = user.get("top_match_pct", 84)
@@ -91,7 +97,7 @@ def format_deadline_alert(user: dict, opportunity: dict) -> str:
     """
     Formats a high-urgency deadline alert for a matched opportunity.
     """
-    name = user.get("full_name", "there").split()[0]
+    name = (user.get("full_name") or "there").split()[0]
     title = opportunity.get("title", "Opportunity")
     org = opportunity.get("organization", opportunity.get("org", ""))
     match_pct = opportunity.get("match_pct", 75)
@@ -110,6 +116,51 @@ Learn more & apply:
 👉 http://localhost:3000/opportunities"""
 
 
+def format_deadline_digest(user: dict, opportunities: Sequence[dict]) -> str:
+    """
+    One message for all of a student's closing opportunities (dicts with
+    title, organization, match_pct, days_left, tracked), best match first.
+    """
+    if len(opportunities) == 1:
+        return format_deadline_alert(user, opportunities[0])
+    name = (user.get("full_name") or "there").split()[0]
+    lines = []
+    for opp in opportunities:
+        org = opp.get("organization", opp.get("org", ""))
+        badge = "📌 " if opp.get("tracked") else ""
+        lines.append(
+            f"{badge}*{opp.get('title', 'Opportunity')}*{f' at {org}' if org else ''} — "
+            f"{opp.get('match_pct', 75)}% match, closes in {opp.get('days_left', 3)} days"
+        )
+    items = "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+
+    return f"""⚡ *Deadlines Closing Soon* ⚡
+
+Hi {name}, {len(opportunities)} opportunities that fit you are about to close:
+
+{items}
+
+Don't miss out! 🚀
+
+Learn more & apply:
+👉 http://localhost:3000/opportunities"""
+
+
+async def send_messages_bulk(messages: Sequence[OutboundMessage]) -> BulkSendReport:
+    """Rate-limited bulk send for scheduled jobs."""
+    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+        logger.warning("Twilio credentials not configured — skipping %d WhatsApp sends.", len(messages))
+        return BulkSendReport(failed=tuple(messages))
+    return await send_bulk(
+        messages,
+        client=_get_twilio_client(),
+        from_number=settings.TWILIO_WHATSAPP_NUMBER,
+        rate_per_sec=settings.WHATSAPP_SEND_RATE_PER_SEC,
+        concurrency=settings.WHATSAPP_SEND_CONCURRENCY,
+        supabase=get_supabase(),
+    )
+
+
 def send_weekly_snapshot(user: dict) -> Optional[str]:
     """Send a weekly career snapshot to a user."""
     phone = user.get("whatsapp_phone")
@@ -7,10 +7,12 @@ from redis.commands.search.query import Query
 # Add current directory to path (assuming run from backend root)
 sys.path.append(os.getcwd())
 
-from services.semantic_cache import cache
+from services.semantic_cache import init_cache
 from core.config import settings
 
 def test_advanced_cache():
+    cache = init_cache()
+    assert cache is not None, "Redis not reachable"
     print(f"Testing Advanced Semantic Cache at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
     
     q_orig = "Explain Photosynthesis?"
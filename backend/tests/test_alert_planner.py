@@ -0,0 +1,83 @@
+"""
+Tests for deadline alert planning and bulk WhatsApp sending
+(services/alert_planner.py, services/whatsapp_bulk.py).
+
+Covers:
+  - domain / segment / tag scoring and the min-score cut
+  - tracked opportunities always alerted and ranked first; top-N per student
+  - send_bulk(): one client for all messages, 429 retried, one log insert;
+    the report lists which students were actually sent to
+"""
+import asyncio
+from unittest import mock
+
+import pytest
+
+from services.alert_planner import AlertPlanner
+from services.whatsapp_bulk import OutboundMessage, send_bulk
+
+OPPS = [
+    {"id": "gsoc", "title": "GSoC", "domain_id": "cs", "tags": ["Open Source", "Remote"], "segments": ["IT"]},
+    {"id": "upsc", "title": "UPSC Prelims", "domain_id": "gov", "tags": ["Exam"], "segments": ["GOVT"]},
+    {"id": "kvpy", "title": "KVPY", "domain_id": "sci", "tags": ["Stipend"], "segments": []},
+]
+ASHA = {"user_id": "u-asha", "full_name": "Asha", "domain_id": "cs"}
+RAVI = {"user_id": "u-ravi", "full_name": "Ravi", "domain_id": None}
+
+
+def _planner(top_n: int = 3) -> AlertPlanner:
+    return AlertPlanner(OPPS, top_n=top_n, min_score=0.35)
+
+
+def test_scores_domain_segment_and_tags() -> None:
+    fit, tracked = _planner().scores(
+        [ASHA, RAVI], segments={"u-asha": "IT"}, interests={"u-asha": {"remote"}}, tracked={},
+    )
+    # Asha: same domain + IT segment + 1 of 2 tags
+    assert fit[0] == pytest.approx([0.4 + 0.3 + 0.15, 0.0, 0.15])   # KVPY: no segments → half credit
+    # Ravi has no persona: half segment credit everywhere, nothing else
+    assert fit[1] == pytest.approx([0.15, 0.15, 0.15])
+    assert not tracked.any()
+
+
+def test_plan_keeps_tracked_first_and_top_n() -> None:
+    plans = _planner(top_n=1).plan(
+        [ASHA, RAVI], segments={"u-asha": "IT"}, interests={}, tracked={"u-asha": {"kvpy"}},
+    )
+    assert len(plans) == 1                       # Ravi matches nothing above 0.35
+    (alert,) = plans[0].alerts
+    assert alert.opportunity["id"] == "kvpy" and alert.tracked
+
+    plans = _planner().plan([ASHA], segments={"u-asha": "IT"}, interests={}, tracked={"u-asha": {"kvpy"}})
+    assert [a.opportunity["id"] for a in plans[0].alerts] == ["kvpy", "gsoc"]
+    assert plans[0].alerts[1].match_pct == 70
+
+
+def test_send_bulk_reuses_client_retries_429_and_logs_once() -> None:
+    client = mock.Mock()
+    throttled = Exception("Too Many Requests")
+    throttled.status = 429
+    client.messages.create.side_effect = [throttled, mock.Mock(sid="SM1"), mock.Mock(sid="SM2")]
+    supabase = mock.Mock()
+    messages = [OutboundMessage(f"user-{i}", f"+9190000000{i}", "hi", "alert") for i in range(2)]
+
+    with mock.patch("services.whatsapp_bulk._RATE_LIMIT_BACKOFF_SECS", 0):
+        report = asyncio.run(send_bulk(
+            messages, client=client, from_number="whatsapp:+1415", rate_per_sec=1000, concurrency=1,
+            supabase=supabase,
+        ))
+    assert report.sent_user_ids == ["user-0", "user-1"] and not report.failed
+    assert client.messages.create.call_count == 3
+    assert client.messages.create.call_args.kwargs["to"].startswith("whatsapp:+91")
+    rows = supabase.table.return_value.insert.call_args.args[0]
+    assert [r["twilio_sid"] for r in rows] == ["SM1", "SM2"]
+
+
+def test_send_bulk_reports_failures() -> None:
+    client = mock.Mock()
+    client.messages.create.side_effect = [mock.Mock(sid="SM1"), RuntimeError("invalid number")]
+    messages = [OutboundMessage(f"user-{i}", "+919000000000", "hi", "snapshot") for i in range(2)]
+    report = asyncio.run(send_bulk(messages, client=client, from_number="whatsapp:+1415",
+                                   rate_per_sec=1000, concurrency=1))
+    assert report.sent_user_ids == ["user-0"]      # only delivered students get pending_nudges cleared
+    assert [m.user_id for m in report.failed] == ["user-1"]
@@ -0,0 +1,89 @@
+"""
+Tests for the compressed response blob codec used by the semantic cache.
+
+Covers:
+  - Round-trip for raw, plain zstd and dictionary-compressed blobs
+  - Tiny responses stay uncompressed
+  - A trained dictionary beats plain zstd on our markdown style
+  - Unknown dictionary ids fail loudly instead of returning garbage
+  - Content hash is stable so exact + semantic entries share one blob
+"""
+import pytest
+
+from services.cache_codec import (
+    CODEC_RAW,
+    CODEC_ZSTD,
+    CODEC_ZSTD_DICT,
+    ResponseCodec,
+    content_hash,
+    train_dictionary,
+)
+
+TOPICS = (
+    "Photosynthesis", "Newton's Laws", "Ohm's Law", "Supply and Demand", "Mitosis",
+    "Binary Search", "Indian Constitution", "Thermodynamics", "Recursion", "Inflation",
+)
+
+
+def _markdown_response(topic: str, i: int) -> str:
+    return (
+        f"## Summary\n{topic} explained simply for a level-{i % 3} student.\n\n"
+        f"### Key Concepts\n- **Definition**: what {topic} means (variant {i})\n"
+        f"- **Why it matters**: exams, internships and real projects\n\n"
+        f"### Intuitive Analogy\nThink of {topic} like a cricket team's batting order #{i}.\n\n"
+        "### Practice Questions\n1. Explain in your own words.\n2. Give one real-world example.\n"
+    )
+
+
+@pytest.fixture(scope="module")
+def corpus() -> list[str]:
+    return [_markdown_response(TOPICS[i % len(TOPICS)], i) for i in range(400)]
+
+
+@pytest.fixture(scope="module")
+def dict_codec(corpus: list[str]) -> ResponseCodec:
+    dictionary = train_dictionary(corpus[::2], dict_size=16_384)
+    return ResponseCodec({dictionary.dict_id(): dictionary.as_bytes()}, active_dict_id=dictionary.dict_id())
+
+
+def test_tiny_response_stored_raw() -> None:
+    blob = ResponseCodec().encode("Short answer.")
+    assert blob.startswith(CODEC_RAW)
+    assert ResponseCodec().decode(blob) == "Short answer."
+
+
+def test_plain_zstd_round_trip(corpus: list[str]) -> None:
+    codec = ResponseCodec()
+    blob = codec.encode(corpus[1])
+    assert blob.startswith(CODEC_ZSTD)
+    assert codec.decode(blob) == corpus[1]
+
+
+def test_dict_round_trip_preserves_unicode(dict_codec: ResponseCodec) -> None:
+    text = _markdown_response("प्रकाश संश्लेषण (Photosynthesis) — Hinglish mein", 7)
+    blob = dict_codec.encode(text)
+    assert blob.startswith(CODEC_ZSTD_DICT)
+    assert dict_codec.decode(blob) == text
+
+
+def test_dict_compresses_better_than_plain(corpus: list[str], dict_codec: ResponseCodec) -> None:
+    held_out = corpus[1::2]
+    plain_bytes = sum(len(ResponseCodec().encode(s)) for s in held_out)
+    dict_bytes = sum(len(dict_codec.encode(s)) for s in held_out)
+    assert dict_bytes < plain_bytes
+
+
+def test_plain_codec_cannot_decode_dict_blob(corpus: list[str], dict_codec: ResponseCodec) -> None:
+    blob = dict_codec.encode(corpus[3])
+    with pytest.raises(KeyError):
+        ResponseCodec().decode(blob)
+
+
+def test_unknown_codec_tag_rejected() -> None:
+    with pytest.raises(ValueError):
+        ResponseCodec().decode(b"\x7fgarbage")
+
+
+def test_content_hash_is_stable() -> None:
+    assert content_hash("same response") == content_hash("same response")
+    assert content_hash("same response") != content_hash("other response")
@@ -0,0 +1,108 @@
+"""
+Tests for deriving language/level variants from cached siblings.
+
+Covers:
+  - find_sibling: skips the requested variant, prefers one-dimension changes,
+    Redis errors are a miss
+  - get_or_derive: cache hit short-circuits, sibling → derived + stored, no sibling → miss;
+    only final misses are logged for the warmer
+  - Derivation prompt mentions only the dimensions that change
+"""
+import asyncio
+from unittest import mock
+
+import pytest
+
+import services.cache_derivation as cd
+from services.semantic_cache import SemanticCache
+from services.simplify_prompts import build_derivation_prompt
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _cache_with_variants(variants: dict[bytes, bytes]) -> SemanticCache:
+    cache = SemanticCache.__new__(SemanticCache)
+    cache.r = mock.Mock()
+    cache.r.hgetall.return_value = variants
+    cache._load_response = lambda blob_hash, legacy=None: f"text-{blob_hash.decode()}"
+    return cache
+
+
+@pytest.mark.parametrize("level,language,expected", [
+    ("basic", "Hinglish", ("basic", "English", "text-b1")),           # translate only
+    ("intermediate", "English", ("advanced", "English", "text-b3")),  # re-level only (ties by name)
+    ("advanced", "Hinglish", ("advanced", "English", "text-b3")),     # same level wins
+])
+def test_find_sibling_prefers_closest_variant(level, language, expected) -> None:
+    cache = _cache_with_variants({
+        b"basic|English": b"b1",
+        b"intermediate|Hindi": b"b2",
+        b"advanced|English": b"b3",
+    })
+    assert cache.find_sibling("Ohm's law", level, language) == expected
+
+
+def test_find_sibling_ignores_requested_variant() -> None:
+    cache = _cache_with_variants({b"basic|English": b"b1"})
+    assert cache.find_sibling("Ohm's law", "basic", "English") is None
+
+
+def test_find_sibling_treats_redis_errors_as_miss() -> None:
+    cache = _cache_with_variants({})
+    cache.r.hgetall.side_effect = ConnectionError("Redis down")
+    assert cache.find_sibling("Ohm's law", "basic", "Hinglish") is None
+
+
+@pytest.fixture
+def fake_cache():
+    cache = mock.Mock(name="SemanticCache")
+    cache.lookup.return_value = (None, "miss")
+    cache.find_sibling.return_value = None
+    return cache
+
+
+def test_get_or_derive_returns_cache_hit(fake_cache) -> None:
+    fake_cache.lookup.return_value = ("cached", "semantic")
+    with mock.patch.object(cd, "derive_variant") as derive:
+        assert run(cd.get_or_derive(fake_cache, "Ohm's law", "basic", "English")) == ("cached", "semantic")
+    derive.assert_not_called()
+    fake_cache.find_sibling.assert_not_called()
+
+
+def test_get_or_derive_derives_and_stores(fake_cache) -> None:
+    fake_cache.find_sibling.return_value = ("basic", "English", "English text")
+    derive = mock.AsyncMock(return_value="Hinglish text")
+    with mock.patch.object(cd, "derive_variant", derive):
+        result = run(cd.get_or_derive(fake_cache, "Ohm's law", "basic", "Hinglish"))
+    assert result == ("Hinglish text", "derived")
+    fake_cache.log_miss.assert_not_called()
+    derive.assert_awaited_once_with(
+        "English text", from_level="basic", from_language="English", to_level="basic", to_language="Hinglish",
+    )
+    fake_cache.update_cache.assert_called_once_with("Ohm's law", "Hinglish text", "basic", "Hinglish", None)
+
+
+def test_get_or_derive_misses_without_sibling(fake_cache) -> None:
+    assert run(cd.get_or_derive(fake_cache, "Ohm's law", "basic", "Hinglish")) == (None, "miss")
+    fake_cache.update_cache.assert_not_called()
+    assert "record_miss" not in fake_cache.lookup.call_args.kwargs
+    fake_cache.log_miss.assert_called_once_with("Ohm's law", "basic", "Hinglish")
+
+
+def test_get_or_derive_misses_when_derivation_fails(fake_cache) -> None:
+    fake_cache.find_sibling.return_value = ("basic", "English", "English text")
+    with mock.patch.object(cd, "derive_variant", mock.AsyncMock(return_value=None)):
+        assert run(cd.get_or_derive(fake_cache, "Ohm's law", "basic", "Hinglish")) == (None, "miss")
+    fake_cache.update_cache.assert_not_called()
+
+
+def test_derivation_prompt_only_mentions_changes() -> None:
+    prompt = build_derivation_prompt("text", "basic", "English", "basic", "Hinglish")
+    assert "translate it from English into Hinglish" in prompt
+    assert "re-pitch" not in prompt
@@ -0,0 +1,156 @@
+"""
+Tests for the versioned semantic cache index and its online migration.
+
+Covers:
+  - TAG pre-filter building / escaping and namespace derivation
+  - namespace backfill only touches entries missing the field
+  - migrate_index: creates next to the old index, switches the alias,
+    drops the old index without deleting documents
+  - index names carry precision/algorithm, so changing either migrates and
+    re-encodes stored vectors
+"""
+from unittest import mock
+
+import numpy as np
+import pytest
+import redis
+
+import services.cache_index as ci
+from services.cache_vectors import VectorIndexConfig, decode_rescore_vector, encode_vector
+
+
+@pytest.mark.parametrize("query,namespace", [
+    ("Ohm's law", "simplify"),
+    ("notes:Mitosis", "notes"),
+    ("roadmap:Data science", "roadmap"),
+    ("document:abc123", "simplify"),
+])
+def test_namespace_for(query: str, namespace: str) -> None:
+    assert ci.namespace_for(query) == namespace
+
+
+def test_tag_filter_escapes_values() -> None:
+    assert ci.tag_filter("basic", "English") == "@level:{basic} @language:{English}"
+    assert ci.tag_filter("class-10", "Hindi (Roman)", "notes") == (
+        r"@level:{class\-10} @language:{Hindi\ \(Roman\)} @namespace:{notes}"
+    )
+
+
+def test_schema_uses_tag_fields() -> None:
+    fields = {f.name: type(f).__name__ for f in ci.build_schema(VectorIndexConfig())}
+    assert fields == {
+        "query": "TextField", "level": "TagField", "language": "TagField",
+        "namespace": "TagField", "embedding": "VectorField",
+    }
+
+
+def test_backfill_namespaces_skips_tagged_entries() -> None:
+    r = mock.Mock()
+    r.scan_iter.return_value = [b"cache:semantic:1", b"cache:semantic:2", b"cache:semantic:3"]
+    read, write = mock.Mock(), mock.Mock()
+    read.execute.return_value = [
+        [b"notes:Mitosis", None],
+        [b"Ohm's law", b"simplify"],
+        [None, None],
+    ]
+    r.pipeline.side_effect = [read, write]
+    assert ci.backfill_namespaces(r, batch_size=10) == 1
+    write.hset.assert_called_once_with(b"cache:semantic:1", "namespace", "notes")
+
+
+def _fake_redis(indexes: dict[str, dict]):
+    """Redis double whose ft(name) serves FT.INFO from `indexes`."""
+    r = mock.Mock()
+    r.scan_iter.return_value = []
+    handles: dict[str, mock.Mock] = {}
+
+    def ft(name: str):
+        if name not in handles:
+            handle = mock.Mock(name=f"ft({name})")
+
+            def info(name=name):
+                if name not in indexes:
+                    raise redis.ResponseError("Unknown index name")
+                return indexes[name]
+
+            handle.info.side_effect = info
+            handles[name] = handle
+        return handles[name]
+
+    r.ft.side_effect = ft
+    return r, handles
+
+
+def test_migrate_from_legacy_index() -> None:
+    target = ci.index_name()
+    indexes = {ci.LEGACY_INDEX: {"index_name": ci.LEGACY_INDEX, "num_docs": "12", "indexing": "0"}}
+    r, handles = _fake_redis(indexes)
+    handles_target = r.ft(target)
+    handles_target.create_index.side_effect = lambda *a, **k: indexes.setdefault(
+        target, {"index_name": target, "num_docs": "12", "indexing": "0"}
+    )
+
+    report = ci.migrate_index(r, VectorIndexConfig())
+
+    handles_target.create_index.assert_called_once()
+    handles_target.aliasadd.assert_called_once_with(ci.INDEX_ALIAS)
+    handles[ci.LEGACY_INDEX].dropindex.assert_called_once_with(delete_documents=False)
+    assert (report.previous, report.current, report.num_docs) == (ci.LEGACY_INDEX, target, 12)
+
+
+def test_migrate_switches_existing_alias() -> None:
+    old = ci.index_name(1)
+    target = ci.index_name()
+    indexes = {
+        ci.INDEX_ALIAS: {"index_name": old, "indexing": "0"},
+        old: {"index_name": old, "indexing": "0"},
+        target: {"index_name": target, "num_docs": "3", "indexing": "0"},
+    }
+    r, handles = _fake_redis(indexes)
+
+    ci.migrate_index(r, VectorIndexConfig(), drop_previous=False)
+
+    handles[target].create_index.assert_not_called()
+    handles[target].aliasupdate.assert_called_once_with(ci.INDEX_ALIAS)
+    r.ft(old).dropindex.assert_not_called()
+
+
+def test_ensure_index_is_noop_when_current() -> None:
+    target = ci.index_name()
+    r, _ = _fake_redis({ci.INDEX_ALIAS: {"index_name": target}})
+    assert ci.ensure_index(r, VectorIndexConfig()) == ci.INDEX_ALIAS
+    r.lock.assert_not_called()
+
+
+def test_vector_type_change_needs_a_new_index() -> None:
+    old = ci.index_name()
+    int8 = VectorIndexConfig(vector_type="INT8")
+    assert ci.index_name_for(VectorIndexConfig()) == old == "idx:semantic_cache:v2"
+    assert ci.index_name_for(int8) == "idx:semantic_cache:v2:int8-hnsw"
+    assert ci.index_name_for(VectorIndexConfig(algorithm="FLAT", field="embedding_bge_base")) == (
+        "idx:semantic_cache:v2:embedding_bge_base:float32-flat"
+    )
+
+    r, _ = _fake_redis({ci.INDEX_ALIAS: {"index_name": old}})
+    r.lock.side_effect = RuntimeError("migration started")
+    with pytest.raises(RuntimeError, match="migration started"):
+        ci.ensure_index(r, int8)
+
+
+def test_reencode_vectors_converts_only_other_precisions() -> None:
+    config = VectorIndexConfig(vector_type="INT8", dim=4)
+    vector = np.array([0.5, -1.0, 0.25, 0.0], dtype=np.float32)
+    r = mock.Mock()
+    r.scan_iter.return_value = [b"cache:semantic:1", b"cache:semantic:2", b"cache:semantic:3"]
+    sizes, read, write = mock.Mock(), mock.Mock(), mock.Mock()
+    sizes.execute.return_value = [16, 4, 0]     # FLOAT32, already INT8, no vector
+    read.execute.return_value = [[encode_vector(vector, "FLOAT32"), None]]
+    r.pipeline.side_effect = [sizes, read, write]
+
+    assert ci.reencode_vectors(r, config) == 1
+    read.hmget.assert_called_once_with(b"cache:semantic:1", ["embedding", "embedding_rescore"])
+    key, = write.hset.call_args.args
+    mapping = write.hset.call_args.kwargs["mapping"]
+    assert key == b"cache:semantic:1"
+    assert mapping["embedding"] == encode_vector(vector, "INT8")
+    assert np.allclose(decode_rescore_vector(mapping["embedding_rescore"]), vector)
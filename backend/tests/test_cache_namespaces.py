@@ -0,0 +1,96 @@
+"""
+Tests for caller namespaces in the semantic cache's exact tier.
+
+Covers:
+  - /mentor/chat and /simplify entries for the same text do not overwrite or
+    serve each other (exact, semantic and variant keys are per namespace)
+  - entries written before namespaced keys are still read for the default namespace
+  - bulk_update and has_exact honour the namespace
+"""
+import hashlib
+from unittest import mock
+
+import numpy as np
+
+from services.cache_vectors import VectorIndexConfig
+from services.semantic_cache import SemanticCache
+
+
+class _FakeRedis:
+    """Dict-backed hashes/strings; enough for the cache's write pipeline and exact reads."""
+
+    def __init__(self):
+        self.data: dict[str, object] = {}
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        return []
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        entry = self.data.setdefault(key, {})
+        entry.update(mapping or {field: value})
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.data.get(key, {}).pop(field, None)
+
+    def hmget(self, key, fields):
+        entry = self.data.get(key, {})
+        return [entry.get(f) for f in fields]
+
+    def hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.data.get(key, {}).items()}
+
+    def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def expire(self, key, ttl):
+        pass
+
+
+def _cache() -> SemanticCache:
+    cache = SemanticCache.__new__(SemanticCache)
+    cache.r = _FakeRedis()
+    cache.codec = mock.Mock(encode=lambda text: text, decode=lambda blob: blob)
+    cache.index_config = VectorIndexConfig(dim=2)
+    cache.encoder = mock.Mock()
+    cache.encoder.embed.side_effect = lambda texts: [np.ones(2, dtype=np.float32) for _ in texts]
+    return cache
+
+
+def test_mentor_and_simplify_entries_do_not_collide() -> None:
+    cache = _cache()
+    cache.update_cache("Ohm's law", "simplified explanation", "basic", "English")
+    cache.update_cache("Ohm's law", "mentor reply", "basic", "English", namespace="mentor")
+
+    assert cache._read_exact("Ohm's law", "basic", "English") == "simplified explanation"
+    assert cache._read_exact("Ohm's law", "basic", "English", namespace="mentor") == "mentor reply"
+    assert cache._semantic_key("Ohm's law") != cache._semantic_key("Ohm's law", "mentor")
+    assert cache.find_sibling("Ohm's law", "basic", "Hinglish") == ("basic", "English", "simplified explanation")
+    assert cache.find_sibling("Ohm's law", "basic", "Hinglish", "mentor") == ("basic", "English", "mentor reply")
+
+
+def test_legacy_exact_entries_serve_only_the_default_namespace() -> None:
+    cache = _cache()
+    legacy_key = f"cache:exact:{hashlib.md5(b'ohms law:basic:English').hexdigest()}"
+    cache.r.hset(legacy_key, "response", "cached before namespaces")
+
+    assert cache._read_exact("Ohm's law", "basic", "English") == "cached before namespaces"
+    assert cache.has_exact("Ohm's law", "basic", "English")
+    assert cache._read_exact("Ohm's law", "basic", "English", namespace="mentor") is None
+    assert not cache.has_exact("Ohm's law", "basic", "English", namespace="mentor")
+
+
+def test_bulk_update_writes_into_namespace() -> None:
+    cache = _cache()
+    assert cache.bulk_update([("Mitosis", "warm reply", "basic", "English")], namespace="mentor") == 1
+    assert cache.has_exact("Mitosis", "basic", "English", namespace="mentor")
+    assert not cache.has_exact("Mitosis", "basic", "English")
@@ -0,0 +1,115 @@
+"""
+Tests for semantic cache vector storage options.
+
+Covers:
+  - INT8 quantisation / FLOAT16 encoding keep cosine ranking intact
+  - VectorIndexConfig validation, field attributes and KNN clause
+  - SemanticCache._best_match rescoring of INT8 candidates
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.cache_vectors import (
+    RESCORE_FIELD,
+    VectorIndexConfig,
+    cosine_similarity,
+    decode_rescore_vector,
+    encode_rescore_vector,
+    encode_vector,
+    quantize_int8,
+)
+
+
+def _unit(rng, dim: int = 384) -> np.ndarray:
+    v = rng.standard_normal(dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+# ── Encoding ─────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("vector_type,nbytes", [("FLOAT32", 1536), ("FLOAT16", 768), ("INT8", 384)])
+def test_encode_vector_size(vector_type: str, nbytes: int) -> None:
+    assert len(encode_vector(np.ones(384, dtype=np.float32), vector_type)) == nbytes
+
+
+def test_int8_quantisation_preserves_cosine() -> None:
+    rng = np.random.default_rng(0)
+    a, b = _unit(rng), _unit(rng)
+    qa, qb = quantize_int8(a).astype(np.float32), quantize_int8(b).astype(np.float32)
+    assert abs(cosine_similarity(qa, qb) - cosine_similarity(a, b)) < 0.01
+    assert cosine_similarity(qa, a) > 0.999
+
+
+def test_int8_quantisation_zero_vector() -> None:
+    assert not quantize_int8(np.zeros(4, dtype=np.float32)).any()
+
+
+def test_rescore_vector_round_trip() -> None:
+    v = _unit(np.random.default_rng(1))
+    restored = decode_rescore_vector(encode_rescore_vector(v))
+    assert restored.dtype == np.float32
+    assert np.allclose(restored, v, atol=1e-3)
+
+
+# ── VectorIndexConfig ────────────────────────────────────────────────────────
+
+def test_default_config_matches_previous_schema() -> None:
+    cfg = VectorIndexConfig()
+    assert cfg.field_attributes() == {
+        "TYPE": "FLOAT32", "DIM": 384, "DISTANCE_METRIC": "COSINE",
+        "M": 16, "EF_CONSTRUCTION": 200, "EF_RUNTIME": 10,
+    }
+    assert not cfg.rescoring
+    assert cfg.knn_clause() == "KNN 1 @embedding $vec EF_RUNTIME 10 AS score"
+
+
+def test_flat_config_omits_hnsw_params() -> None:
+    cfg = VectorIndexConfig(vector_type="FLOAT16", algorithm="FLAT")
+    assert "M" not in cfg.field_attributes()
+    assert cfg.knn_clause() == "KNN 1 @embedding $vec AS score"
+
+
+def test_int8_config_fetches_rescore_candidates() -> None:
+    cfg = VectorIndexConfig(vector_type="INT8", rescore_candidates=8)
+    assert cfg.rescoring
+    assert cfg.knn_clause().startswith("KNN 8 ")
+
+
+@pytest.mark.parametrize("kwargs", [{"vector_type": "BFLOAT16"}, {"algorithm": "SVS"}])
+def test_config_rejects_unknown_options(kwargs: dict) -> None:
+    with pytest.raises(ValueError):
+        VectorIndexConfig(**kwargs)
+
+
+def test_from_settings_normalises_case() -> None:
+    fake = SimpleNamespace(
+        SEMANTIC_CACHE_VECTOR_TYPE="int8", SEMANTIC_CACHE_INDEX_ALGORITHM="hnsw",
+        SEMANTIC_CACHE_HNSW_M=32, SEMANTIC_CACHE_HNSW_EF_CONSTRUCTION=400,
+        SEMANTIC_CACHE_HNSW_EF_RUNTIME=64, SEMANTIC_CACHE_RESCORE_CANDIDATES=4,
+        SEMANTIC_CACHE_EMBEDDING_DIM=384, SEMANTIC_CACHE_VECTOR_FIELD="embedding",
+    )
+    cfg = VectorIndexConfig.from_settings(fake)
+    assert (cfg.vector_type, cfg.algorithm, cfg.m, cfg.ef_runtime, cfg.knn_k) == ("INT8", "HNSW", 32, 64, 4)
+
+
+# ── Rescoring ────────────────────────────────────────────────────────────────
+
+def test_best_match_rescores_int8_candidates() -> None:
+    from services.semantic_cache import SemanticCache
+
+    rng = np.random.default_rng(2)
+    query = _unit(rng)
+    close = query + 0.05 * _unit(rng)
+    far = _unit(rng)
+    # Index order (approximate INT8 distance) puts the worse match first
+    docs = [
+        SimpleNamespace(id="far", score="0.10", **{RESCORE_FIELD: encode_rescore_vector(far)}),
+        SimpleNamespace(id="close", score="0.12", **{RESCORE_FIELD: encode_rescore_vector(close)}),
+    ]
+    cache = SemanticCache.__new__(SemanticCache)
+    cache.index_config = VectorIndexConfig(vector_type="INT8")
+    doc, similarity = cache._best_match(docs, query)
+    assert doc.id == "close"
+    assert similarity == pytest.approx(cosine_similarity(query, close), abs=1e-3)
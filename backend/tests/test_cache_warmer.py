@@ -0,0 +1,145 @@
+"""
+Tests for the offline semantic-cache warming pipeline.
+
+Covers:
+  - Syllabus topic extraction from user_exams.syllabus_progress_json
+  - Corpus expansion (kind × level × language), dedupe, missed-query parsing
+  - warm_cache: skips already-cached items (resume), bulk-loads generated ones,
+    counts failures, stops at the cost budget
+  - models carry the live sub-agent's skill instructions
+"""
+import asyncio
+import sys
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from agents.skills import load_skill_instructions
+from services.cache_warmer import WarmItem, build_corpus, collect_syllabus_topics, warm_cache
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _fake_response(text: str, prompt_tokens: int = 100, candidate_tokens: int = 400):
+    return SimpleNamespace(
+        text=text,
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=prompt_tokens, candidates_token_count=candidate_tokens,
+        ),
+    )
+
+
+@pytest.fixture
+def fake_cache():
+    cache = mock.Mock(name="SemanticCache")
+    cache.has_exact.return_value = False
+    cache.bulk_update.side_effect = lambda entries, ttl: len(entries)
+    return cache
+
+
+@pytest.fixture
+def fake_model():
+    model = mock.Mock(name="GenerativeModel")
+    model.generate_content_async = mock.AsyncMock(side_effect=lambda prompt: _fake_response("## Notes"))
+    return model
+
+
+def _run_warm(items, fake_cache, fake_model, fake_genai=None, **kwargs):
+    fake_module = SimpleNamespace(init_cache=lambda: fake_cache)
+    fake_genai = fake_genai or mock.Mock()
+    fake_genai.GenerativeModel.return_value = fake_model
+    with mock.patch.dict(sys.modules, {"services.semantic_cache": fake_module, "google.generativeai": fake_genai}):
+        return run(warm_cache(items, **kwargs))
+
+
+# ── Corpus ───────────────────────────────────────────────────────────────────
+
+def test_collect_syllabus_topics_counts_across_exams() -> None:
+    supabase = mock.Mock()
+    supabase.table.return_value.select.return_value.execute.return_value.data = [
+        {"syllabus_progress_json": [{"subject": "Polity", "topics": ["Fundamental Rights", "DPSP"]}]},
+        {"syllabus_progress_json": [{"subject": "Polity", "topics": ["Fundamental Rights "]}]},
+        {"syllabus_progress_json": None},
+    ]
+    counts = collect_syllabus_topics(supabase)
+    assert counts["Fundamental Rights"] == 2
+    assert counts["DPSP"] == 1
+
+
+def test_build_corpus_expands_and_dedupes() -> None:
+    items = build_corpus(
+        Counter({"Ohm's Law": 5, "ohm's law": 1, "Mitosis": 2}),
+        [("notes:Mitosis", "basic", "English", 9), ("Recursion", "advanced", "Hinglish", 3)],
+        kinds=["simplify", "notes"],
+        levels=["basic"],
+        languages=["English", "Hinglish"],
+        max_topics=10,
+    )
+    keys = {(i.kind, i.text.lower(), i.level, i.language) for i in items}
+    assert len(keys) == len(items), "Corpus must not contain duplicates"
+    assert ("notes", "mitosis", "basic", "English") in keys
+    assert ("simplify", "recursion", "advanced", "Hinglish") in keys
+    # Most popular topic is expanded first
+    assert items[0].text == "Ohm's Law"
+
+
+def test_warm_item_cache_query_matches_simplify_keys() -> None:
+    assert WarmItem("notes", "Mitosis", "basic", "English").cache_query == "notes:Mitosis"
+    assert WarmItem("simplify", "Mitosis", "basic", "English").cache_query == "Mitosis"
+
+
+# ── warm_cache ───────────────────────────────────────────────────────────────
+
+def test_warm_skips_cached_and_bulk_loads_rest(fake_cache, fake_model) -> None:
+    items = [WarmItem("simplify", f"Topic {i}", "basic", "English") for i in range(5)]
+    fake_cache.has_exact.side_effect = lambda q, level, lang: q == "Topic 0"
+    report = _run_warm(items, fake_cache, fake_model, batch_size=10)
+    assert report.skipped_cached == 1
+    assert report.generated == 4
+    assert fake_model.generate_content_async.await_count == 4
+    entries = fake_cache.bulk_update.call_args[0][0]
+    assert {e[0] for e in entries} == {"Topic 1", "Topic 2", "Topic 3", "Topic 4"}
+    assert report.cost_usd > 0
+
+
+def test_warm_counts_failures_without_loading_them(fake_cache, fake_model) -> None:
+    fake_model.generate_content_async.side_effect = RuntimeError("quota")
+    items = [WarmItem("notes", "Topic", "basic", "English")]
+    report = _run_warm(items, fake_cache, fake_model)
+    assert report.failed == 1
+    assert fake_cache.bulk_update.call_args[0][0] == []
+
+
+def test_warm_stops_at_budget(fake_cache, fake_model) -> None:
+    items = [WarmItem("simplify", f"Topic {i}", "basic", "English") for i in range(20)]
+    report = _run_warm(items, fake_cache, fake_model, batch_size=5, max_cost_usd=1e-9)
+    assert report.budget_exhausted
+    assert report.generated == 5, "Only the first batch runs before the budget check trips"
+
+
+def test_warm_dry_run_makes_no_calls(fake_cache, fake_model) -> None:
+    items = [WarmItem("simplify", "Topic", "basic", "English")]
+    report = _run_warm(items, fake_cache, fake_model, dry_run=True)
+    fake_model.generate_content_async.assert_not_called()
+    fake_cache.bulk_update.assert_not_called()
+    assert report.planned == 1
+
+
+def test_warm_models_use_live_skill_instructions(fake_cache, fake_model) -> None:
+    items = [WarmItem(kind, "Topic", "basic", "English") for kind in ("simplify", "notes", "roadmap")]
+    fake_genai = mock.Mock()
+    _run_warm(items, fake_cache, fake_model, fake_genai=fake_genai)
+    instructions = {
+        c.kwargs["system_instruction"] for c in fake_genai.GenerativeModel.call_args_list
+    }
+    assert instructions == {
+        load_skill_instructions("simplification_expert"), load_skill_instructions("career_path_expert"),
+    }, "simplify + notes share one SimplificationExpert model; roadmap uses CareerPathExpert"
@@ -0,0 +1,126 @@
+"""
+Tests for checkpointed scheduler runs (services/job_ledger.py).
+
+Covers:
+  - resume from the checkpointed cursor, one checkpoint per page
+  - completed run for the period is skipped; pending() filter counted as already_done
+  - failing page source marks the run failed
+  - JobLedger.start resumes an unfinished row
+  - fencing: a superseded lease token cannot start or checkpoint a run
+"""
+import asyncio
+from unittest import mock
+
+import pytest
+
+from services.job_ledger import JobLedger, JobRun, run_resumable
+from services.leader import LeaseLostError
+
+
+class _MemoryLedger:
+    def __init__(self, run: JobRun):
+        self.run = run
+        self.checkpoints = []
+        self.finished = None
+
+    async def start(self, job, period, *, force=False, fence=None):
+        return self.run
+
+    async def checkpoint(self, run, cursor, report, *, skipped=0):
+        self.checkpoints.append((cursor, report.done if report else 0, skipped))
+        return await JobLedger.checkpoint(mock.Mock(_execute=mock.AsyncMock()), run, cursor, report, skipped=skipped)
+
+    async def finish(self, run, status, *, error=None):
+        self.finished = (status, error)
+        return run
+
+
+def _pages(rows, page_size=2):
+    def _source(after):
+        async def _gen():
+            todo = [r for r in rows if after is None or r["user_id"] > after]
+            for i in range(0, len(todo), page_size):
+                yield todo[i:i + page_size]
+        return _gen()
+    return _source
+
+
+USERS = [{"user_id": f"u{i}"} for i in range(1, 6)]
+
+
+def test_resumes_after_checkpoint_and_checkpoints_each_page() -> None:
+    ledger = _MemoryLedger(JobRun("j:p", "j", "p", cursor="u2", done=2))
+    seen = []
+
+    async def _work(row):
+        seen.append(row["user_id"])
+
+    run = asyncio.run(run_resumable("j", "p", _pages(USERS), _work, ledger=ledger, concurrency=2))
+    assert sorted(seen) == ["u3", "u4", "u5"]
+    assert [c[0] for c in ledger.checkpoints] == ["u4", "u5"]
+    assert run.done == 5 and ledger.finished == ("completed", None)
+
+
+def test_completed_run_is_skipped() -> None:
+    ledger = _MemoryLedger(JobRun("j:p", "j", "p", status="completed"))
+    work = mock.AsyncMock()
+    asyncio.run(run_resumable("j", "p", _pages(USERS), work, ledger=ledger))
+    work.assert_not_awaited()
+    assert ledger.finished is None
+
+
+def test_pending_filter_counts_already_done() -> None:
+    ledger = _MemoryLedger(JobRun("j:p", "j", "p"))
+    work = mock.AsyncMock(return_value="generated")
+
+    async def _pending(page):
+        return [r for r in page if r["user_id"] != "u1"]
+
+    run = asyncio.run(run_resumable("j", "p", _pages(USERS), work, pending=_pending, ledger=ledger))
+    assert work.await_count == 4
+    assert run.outcomes == {"generated": 4, "already_done": 1}
+
+
+def test_page_source_failure_marks_run_failed() -> None:
+    ledger = _MemoryLedger(JobRun("j:p", "j", "p"))
+
+    def _broken(after):
+        async def _gen():
+            yield USERS[:2]
+            raise ConnectionError("PostgREST down")
+        return _gen()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(run_resumable("j", "p", _broken, mock.AsyncMock(), ledger=ledger))
+    assert ledger.finished[0] == "failed" and "PostgREST down" in ledger.finished[1]
+    assert [c[0] for c in ledger.checkpoints] == ["u2"]
+
+
+def test_ledger_start_resumes_unfinished_run() -> None:
+    client = mock.Mock()
+    table = client.table.return_value
+    table.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = [{
+        "run_id": "monthly_reports:2026-09", "job": "monthly_reports", "period": "2026-09",
+        "status": "failed", "cursor": "u7", "done": 7, "failed": 0, "retries": 1, "outcomes": {"ok": 7},
+    }]
+    run = asyncio.run(JobLedger(client).start("monthly_reports", "2026-09"))
+    assert (run.status, run.cursor, run.done) == ("running", "u7", 7)
+    assert table.update.call_args.args[0]["status"] == "running"
+    table.upsert.assert_not_called()
+
+
+def test_ledger_rejects_superseded_fence() -> None:
+    client = mock.Mock()
+    table = client.table.return_value
+    table.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = [{
+        "run_id": "j:p", "job": "j", "period": "p", "status": "running", "cursor": "u2", "fence": 8,
+    }]
+    with pytest.raises(LeaseLostError):
+        asyncio.run(JobLedger(client).start("j", "p", fence=7))
+    table.update.assert_not_called()
+
+    # a newer leader took the row over after we started: our checkpoint matches no row
+    table.update.return_value.eq.return_value.eq.return_value.execute.return_value.data = []
+    with pytest.raises(LeaseLostError):
+        asyncio.run(JobLedger(client).checkpoint(JobRun("j:p", "j", "p", fence=7), "u4", None, skipped=2))
+    table.update.return_value.eq.return_value.eq.assert_called_with("fence", 7)
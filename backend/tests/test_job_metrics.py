@@ -0,0 +1,116 @@
+"""
+Tests for scheduled-job instrumentation and the run-history admin API
+(services/job_metrics.py, api/admin.py).
+
+Covers:
+  - a run records duration, last success, per-student outcomes and LLM
+    tokens under the job's label, and a job_runs row with merged counts
+  - a failing run is recorded as failed and re-raised
+  - /admin/jobs/runs needs the admin token, lists runs and flags stalled ones
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from api import admin
+from core.metrics import record_gemini_usage
+from services.job_ledger import JobRun
+from services.job_metrics import instrument_job
+from services.job_runner import run_per_item
+
+
+def _metric(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _ledger() -> mock.Mock:
+    ledger = mock.Mock()
+    ledger.start = mock.AsyncMock(side_effect=lambda job, period, **kw: JobRun(f"{job}:{period}", job, period))
+    ledger.finish = mock.AsyncMock()
+    return ledger
+
+
+def test_instrumented_run_records_metrics_and_history() -> None:
+    ledger = _ledger()
+
+    async def _job():
+        async def _work(user):
+            record_gemini_usage("gemini-test", 100, 20)
+            if user == "u3":
+                raise ValueError("bad row")
+            return "nudged"
+
+        await run_per_item("metrics_job", ["u1", "u2", "u3"], _work, retries=0)
+
+    before = _metric("scheduler_job_llm_tokens_total", job="metrics_job", type="prompt")
+    asyncio.run(instrument_job("metrics_job", _job, ledger=ledger)())
+
+    assert _metric("scheduler_job_duration_seconds_count", job="metrics_job", status="completed") == 1
+    assert _metric("scheduler_job_last_success_timestamp_seconds", job="metrics_job") > 0
+    assert _metric("scheduler_job_running", job="metrics_job") == 0
+    assert _metric("scheduler_job_items_total", job="metrics_job", outcome="nudged") == 2
+    assert _metric("scheduler_job_items_total", job="metrics_job", outcome="failed") == 1
+    assert _metric("scheduler_job_item_seconds_count", job="metrics_job") == 3
+    assert _metric("scheduler_job_llm_tokens_total", job="metrics_job", type="prompt") - before == 300
+
+    run, status = ledger.finish.call_args.args
+    assert run.job == "metrics_job" and status == "completed"
+    report = ledger.finish.call_args.kwargs["report"]
+    assert (report.done, report.failed, report.outcomes) == (2, 1, {"nudged": 2})
+
+
+def test_failed_run_is_recorded_and_raised() -> None:
+    ledger = _ledger()
+    job = instrument_job("broken_job", mock.AsyncMock(side_effect=RuntimeError("PostgREST down")), ledger=ledger)
+    with pytest.raises(RuntimeError):
+        asyncio.run(job())
+    assert ledger.finish.call_args.args[1] == "failed"
+    assert "PostgREST down" in ledger.finish.call_args.kwargs["error"]
+    assert _metric("scheduler_job_duration_seconds_count", job="broken_job", status="failed") == 1
+    assert _metric("scheduler_job_last_success_timestamp_seconds", job="broken_job") == 0
+
+    unrecorded = _ledger()
+    asyncio.run(instrument_job("resumable_job", mock.AsyncMock(), history=False, ledger=unrecorded)())
+    unrecorded.start.assert_not_awaited()
+
+
+def test_admin_job_runs_lists_and_flags_stalled() -> None:
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    client = TestClient(app)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"run_id": "monthly_reports:2026-09", "job": "monthly_reports", "status": "running",
+         "started_at": (now - timedelta(hours=3)).isoformat(), "updated_at": (now - timedelta(hours=2)).isoformat(),
+         "finished_at": None},
+        {"run_id": "deadline_alerts:2026-10-19T00:05", "job": "deadline_alerts", "status": "completed",
+         "started_at": (now - timedelta(minutes=10)).isoformat(),
+         "updated_at": (now - timedelta(minutes=8)).isoformat(),
+         "finished_at": (now - timedelta(minutes=8)).isoformat()},
+    ]
+    supabase = mock.Mock()
+    query = supabase.table.return_value.select.return_value
+    query.eq.return_value = query
+    query.order.return_value.limit.return_value.execute.return_value.data = rows
+
+    with mock.patch.object(admin.settings, "ADMIN_API_TOKEN", "s3cret"), \
+            mock.patch.object(admin, "get_supabase", return_value=supabase):
+        assert client.get("/admin/jobs/runs").status_code == 401
+        res = client.get("/admin/jobs/runs", params={"job": "monthly_reports", "limit": 10},
+                         headers={"X-Admin-Token": "s3cret"})
+
+    assert res.status_code == 200
+    runs = res.json()["runs"]
+    assert [r["stalled"] for r in runs] == [True, False]
+    assert runs[1]["seconds"] == pytest.approx(120, abs=1)
+    query.eq.assert_called_with("job", "monthly_reports")
+    query.order.assert_called_with("started_at", desc=True)
+    query.order.return_value.limit.assert_called_with(10)
+
+    with mock.patch.object(admin.settings, "ADMIN_API_TOKEN", ""):
+        assert client.get("/admin/jobs/runs", headers={"X-Admin-Token": "x"}).status_code == 503
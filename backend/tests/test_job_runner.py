@@ -0,0 +1,86 @@
+"""
+Tests for the scheduler fan-out runner (services/job_runner.py).
+
+Covers:
+  - concurrency limit, outcome tally
+  - async-iterator sources
+  - retry then success; timeout exhausting retries is counted, not raised
+  - a failing source stops the run and propagates
+"""
+import asyncio
+
+import pytest
+
+from services.job_runner import run_per_item
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_runs_every_item_within_concurrency_limit() -> None:
+    in_flight, peak = 0, 0
+
+    async def _work(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "even" if item % 2 == 0 else None
+
+    report = run(run_per_item("t", range(20), _work, concurrency=4, total=20))
+    assert peak == 4
+    assert (report.done, report.failed) == (20, 0)
+    assert report.outcomes == {"even": 10, "ok": 10}
+
+
+def test_consumes_async_iterator() -> None:
+    async def _items():
+        for i in range(5):
+            yield i
+
+    seen = []
+
+    async def _work(item):
+        seen.append(item)
+
+    run(run_per_item("t", _items(), _work, concurrency=2))
+    assert sorted(seen) == [0, 1, 2, 3, 4]
+
+
+def test_retries_then_succeeds() -> None:
+    attempts = {"a": 0}
+
+    async def _work(item):
+        attempts[item] += 1
+        if attempts[item] < 3:
+            raise RuntimeError("flaky")
+        return "done"
+
+    report = run(run_per_item("t", ["a"], _work, retries=2, backoff_secs=0.001))
+    assert attempts["a"] == 3
+    assert (report.done, report.retries, report.outcomes) == (1, 2, {"done": 1})
+
+
+def test_timeout_after_retries_counts_failure() -> None:
+    async def _work(item):
+        if item == "slow":
+            await asyncio.sleep(1)
+
+    report = run(run_per_item("t", ["fast", "slow"], _work, key=str, timeout_secs=0.02,
+                              retries=1, backoff_secs=0.001))
+    assert (report.done, report.failed, report.retries) == (1, 1, 1)
+    assert report.failed_keys == ("slow",)
+
+
+def test_source_failure_propagates() -> None:
+    async def _items():
+        yield 1
+        raise ConnectionError("page fetch failed")
+
+    async def _work(item):
+        await asyncio.sleep(0)
+
+    with pytest.raises(ConnectionError):
+        run(run_per_item("t", _items(), _work, concurrency=2))
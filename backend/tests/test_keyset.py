@@ -0,0 +1,86 @@
+"""
+Tests for keyset-paginated table scans (db/keyset.py).
+
+Covers:
+  - pages by user_id > last, ordered, limited; filters + projection pushed down
+  - a short page (PostgREST max-rows) does not end the scan, an empty page does
+  - key column added to the projection; count_rows
+"""
+import asyncio
+
+from db.keyset import count_rows, iter_pages, iter_rows
+
+
+class _FakeQuery:
+    """Chainable stand-in for a postgrest request builder over an in-memory table."""
+
+    def __init__(self, client, columns, count=None):
+        self.client = client
+        self.calls = [("select", columns, count)]
+
+    def __getattr__(self, method):
+        def _call(*args):
+            self.calls.append((method, *args))
+            return self
+        return _call
+
+    def execute(self):
+        self.client.queries.append(self.calls)
+        rows = [r for r in self.client.rows if all(
+            r[col] == val for m, col, val in (c for c in self.calls if c[0] == "eq"))]
+        for c in self.calls:
+            if c[0] == "gt":
+                rows = [r for r in rows if r[c[1]] > c[2]]
+        limit = next((c[1] for c in self.calls if c[0] == "limit"), len(rows))
+        limit = min(limit, self.client.max_rows)
+        return type("Res", (), {"data": rows[:limit], "count": len(rows)})()
+
+
+class _FakeClient:
+    def __init__(self, rows, max_rows=1000):
+        self.rows = sorted(rows, key=lambda r: r["user_id"])
+        self.max_rows = max_rows
+        self.queries = []
+
+    def table(self, name):
+        client = self
+
+        class _Table:
+            def select(self, columns, count=None):
+                return _FakeQuery(client, columns, count)
+        return _Table()
+
+
+def _users(n):
+    return [{"user_id": f"u{i:03d}", "full_name": f"S{i}", "whatsapp_enabled": i % 2 == 0} for i in range(n)]
+
+
+def _collect(agen):
+    async def _run():
+        return [item async for item in agen]
+    return asyncio.run(_run())
+
+
+def test_iter_rows_pages_by_keyset_with_filters() -> None:
+    client = _FakeClient(_users(10))
+    rows = _collect(iter_rows("profiles", columns="full_name", filters=(("eq", "whatsapp_enabled", True),),
+                              page_size=2, client=client))
+    assert [r["user_id"] for r in rows] == ["u000", "u002", "u004", "u006", "u008"]
+    first, second = client.queries[0], client.queries[1]
+    assert first[0] == ("select", "full_name, user_id", None)
+    assert ("eq", "whatsapp_enabled", True) in first
+    assert ("order", "user_id") in first and ("limit", 2) in first
+    assert ("gt", "user_id", "u002") in second
+    assert len(client.queries) == 4   # 3 pages + the empty page that ends the scan
+
+
+def test_short_pages_from_max_rows_do_not_truncate_scan() -> None:
+    client = _FakeClient(_users(7), max_rows=3)
+    pages = _collect(iter_pages("profiles", columns="user_id", page_size=1000, client=client))
+    assert [len(p) for p in pages] == [3, 3, 1]
+
+
+def test_count_rows_requests_exact_count() -> None:
+    client = _FakeClient(_users(10))
+    assert asyncio.run(count_rows("profiles", filters=(("eq", "whatsapp_enabled", False),), client=client)) == 5
+    assert client.queries[0][0] == ("select", "user_id", "exact")
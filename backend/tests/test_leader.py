@@ -0,0 +1,90 @@
+"""
+Tests for scheduler leader election (services/leader.py).
+
+Redis is an AsyncMock: eval() stands in for the Lua scripts (acquire returns
+a fence token or 0, renew returns 1/0) and set() for the job lock.
+
+Covers:
+  - acquiring the lease sets the token, fence and is_leader gauge
+  - a failed renewal (or Redis error) steps down
+  - a non-leader and an already-locked trigger skip the job
+  - the fencing token is visible to the job via current_fence()
+  - r=None is always leader and runs unguarded
+"""
+import asyncio
+from unittest import mock
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from core.metrics import SCHEDULER_IS_LEADER, SCHEDULER_LEADER_FENCE
+from services.leader import LeaderElector, current_fence
+
+
+def _elector(eval_result=0, set_result=True) -> LeaderElector:
+    r = mock.Mock()
+    r.eval = mock.AsyncMock(return_value=eval_result)
+    r.set = mock.AsyncMock(return_value=set_result)
+    return LeaderElector(r, lease_secs=30, renew_secs=10, instance_id="pod-a")
+
+
+def test_acquire_sets_token_and_metrics() -> None:
+    elector = _elector(eval_result=42)
+    asyncio.run(elector.tick())
+    assert elector.is_leader and elector.token == 42
+    assert SCHEDULER_IS_LEADER._value.get() == 1
+    assert SCHEDULER_LEADER_FENCE._value.get() == 42
+    assert elector.r.eval.call_args.args[-2:] == ("pod-a", 30_000)
+
+
+def test_failed_renewal_steps_down() -> None:
+    elector = _elector(eval_result=5)
+    asyncio.run(elector.tick())
+    elector.r.eval.return_value = 0                # lease expired and was taken over
+    asyncio.run(elector.tick())
+    assert not elector.is_leader
+    assert SCHEDULER_IS_LEADER._value.get() == 0
+
+    asyncio.run(elector.tick())                    # follower retries acquisition
+    elector.r.eval.return_value = 6
+    asyncio.run(elector.tick())
+    elector.r.eval.side_effect = RedisConnectionError("down")
+    asyncio.run(elector.tick())
+    assert elector.token is None
+
+
+def test_follower_and_locked_trigger_skip_job() -> None:
+    job = mock.AsyncMock()
+    follower = _elector(eval_result=0)
+    asyncio.run(follower.tick())
+    assert asyncio.run(follower.run_job("alerts", "2026-10-19T09:00", job)) is False
+
+    leader = _elector(eval_result=3, set_result=None)   # SET NX lost: another replica ran this trigger
+    asyncio.run(leader.tick())
+    assert asyncio.run(leader.run_job("alerts", "2026-10-19T09:00", job)) is False
+    job.assert_not_awaited()
+    assert leader.r.set.call_args.args[0] == "scheduler:job:alerts:2026-10-19T09:00"
+
+
+def test_job_sees_fence_token() -> None:
+    elector = _elector(eval_result=9)
+    seen = []
+
+    async def _job():
+        seen.append(current_fence())
+
+    async def _main():
+        await elector.tick()
+        ran = await elector.run_job("reports", "2026-10-01T06:00", _job)
+        return ran, current_fence()
+
+    assert asyncio.run(_main()) == (True, None)
+    assert seen == [9]
+
+
+def test_without_redis_always_leader() -> None:
+    elector = LeaderElector(None, lease_secs=30, renew_secs=10)
+    job = mock.AsyncMock()
+    asyncio.run(elector.start())
+    assert elector.is_leader
+    assert asyncio.run(elector.run_job("alerts", "t", job)) is True
+    job.assert_awaited_once()
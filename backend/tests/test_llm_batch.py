@@ -0,0 +1,98 @@
+"""
+Tests for batched multi-student job prompts (services/llm_batch.py, services/job_prompts.py).
+
+Covers:
+  - concurrent callers coalesced into one JSON-mode request, results keyed by user_id
+  - missing / invalid entries fall back to single-student prompts
+  - malformed JSON falls back for everyone; a failed batch request raises for everyone
+  - nudge validator
+"""
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+
+from services.job_prompts import NUDGE_PROMPT, clean_nudge, nudge_payload
+from services.llm_batch import LLMBatcher
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _response(text):
+    return mock.Mock(text=text, usage_metadata=mock.Mock(prompt_token_count=10, candidates_token_count=5))
+
+
+def _payload(goal):
+    return nudge_payload([goal], ["DSA sheet"], [])
+
+
+async def _generate_all(batcher, user_ids):
+    return await asyncio.gather(
+        *(batcher.generate(uid, _payload(f"goal {uid}")) for uid in user_ids), return_exceptions=True
+    )
+
+
+def test_concurrent_callers_share_one_request() -> None:
+    model = mock.Mock()
+    model.generate_content_async = mock.AsyncMock(return_value=_response(json.dumps([
+        {"user_id": "u2", "text": "Apply to two internships this week"},
+        {"user_id": "u1", "text": "Solve 5 GATE PYQs daily"},
+    ])))
+    batcher = LLMBatcher(NUDGE_PROMPT, batch_size=2, max_wait_secs=1.0, model=model)
+
+    results = run(_generate_all(batcher, ["u1", "u2"]))
+
+    assert results == ["Solve 5 GATE PYQs daily", "Apply to two internships this week"]
+    model.generate_content_async.assert_awaited_once()
+    prompt = model.generate_content_async.call_args.args[0]
+    assert '"user_id": "u1"' in prompt and "goal u2" in prompt
+    assert model.generate_content_async.call_args.kwargs["generation_config"] == {"response_mime_type": "application/json"}
+
+
+def test_invalid_entry_falls_back_to_single_prompt() -> None:
+    model = mock.Mock()
+    model.generate_content_async = mock.AsyncMock(side_effect=[
+        _response(json.dumps([{"user_id": "u1", "text": "word " * 40}, {"user_id": "u2", "text": "Revise OS"}])),
+        _response('"Finish one mock test"'),
+        _response("Start a mini project"),
+    ])
+    batcher = LLMBatcher(NUDGE_PROMPT, batch_size=3, max_wait_secs=0.01, model=model)
+
+    results = run(_generate_all(batcher, ["u1", "u2", "u3"]))
+
+    assert results[1] == "Revise OS"
+    assert results[0] == "Finish one mock test"
+    assert results[2] == "Start a mini project"     # u3 missing from the batch response
+    single_prompt = model.generate_content_async.call_args_list[1].args[0]
+    assert single_prompt.endswith("Nudge:")
+
+
+def test_malformed_json_falls_back_for_everyone() -> None:
+    model = mock.Mock()
+    model.generate_content_async = mock.AsyncMock(side_effect=[
+        _response("not json"), _response("Nudge A"), _response("Nudge B"),
+    ])
+    batcher = LLMBatcher(NUDGE_PROMPT, batch_size=2, max_wait_secs=1.0, model=model)
+    assert sorted(run(_generate_all(batcher, ["u1", "u2"]))) == ["Nudge A", "Nudge B"]
+    assert model.generate_content_async.await_count == 3
+
+
+def test_failed_batch_request_raises_for_every_caller() -> None:
+    model = mock.Mock()
+    model.generate_content_async = mock.AsyncMock(side_effect=RuntimeError("quota"))
+    batcher = LLMBatcher(NUDGE_PROMPT, batch_size=2, max_wait_secs=1.0, model=model)
+    results = run(_generate_all(batcher, ["u1", "u2"]))
+    assert all(isinstance(r, RuntimeError) for r in results)
+    model.generate_content_async.assert_awaited_once()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('  "Book your GATE mock test slot today"  ', "Book your GATE mock test slot today"),
+    ("", None),
+    ("too long " * 20, None),
+])
+def test_clean_nudge(text, expected) -> None:
+    assert clean_nudge(text) == expected
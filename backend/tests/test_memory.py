@@ -5,12 +5,22 @@ Covers:
   - Module imports + exported constants
   - Config structure (Google embedder, supabase vector store, Gemini LLM)
   - Extraction prompt: all 7 categories, few-shot examples, JSON schema
-  - TTL: all categories mapped, BLOCKERS < ACADEMIC < SKILLS < GOALS
-  - search_memories: results, empty, no-client, timeout, error
+  - TTL: all categories mapped, BLOCKERS < ACADEMIC < SKILLS < GOALS, fixed format
+  - Post-extraction stamping of category + valid_until on added/updated facts
+  - search_memories: results, empty, no-client, timeout, error,
+    ranked match_vectors params, custom ranking bypasses the context cache
+  - Context cache: reuse for similar queries, invalidation on add_turn, race guard, TTL
   - add_turn: correct message structure, no-client, error
+  - add_turns: coalesced turns in one Mem0 call, errors propagate for retry,
+    pre-filtered turns dropped and Mem0 skipped when nothing is left
   - get_all_memories: returns list, no-client
+  - list_memories / iter_memories: SQL filters, keyset cursor, malformed cursor,
+    /mentor/memories pages + NDJSON stream
   - delete_memories: delegates to client, no-client
   - prune_stale_memories: TTL expiry logic, cap logic
+  - prune_all_memories: set-based RPC, per-category report (unknown reasons included), TTL-ordered priority
+  - Digital Twin: delta update from changed facts, full rebuild when missing/stale,
+    Gemini awaited (refreshes overlap) with token usage recorded
   - Memory context injection in LeadMentor instruction
 """
 import asyncio
@@ -75,6 +85,30 @@ def async_client():
     return client
 
 
+@pytest.fixture(autouse=True)
+def reset_context_cache():
+    """search_memories results are cached per process; isolate tests from each other."""
+    import memory
+    memory._context_cache.clear()
+    yield
+    memory._context_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def extract_every_turn():
+    """Storage tests use placeholder turns ("q", "a"); the pre-filter has its own tests."""
+    from memory.prefilter import PrefilterDecision
+    with mock.patch("memory.prefilter.should_extract", return_value=PrefilterDecision(True, "test")):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def cosine_search():
+    """Search tests mock Mem0's search(); the ranked match_vectors path has its own tests."""
+    with mock.patch("memory.settings.MEMORY_SEARCH_RANKING_ENABLED", False):
+        yield
+
+
 # ── Import & Constants ────────────────────────────────────────────────────────
 
 def test_memory_module_imports() -> None:
@@ -177,6 +211,39 @@ def test_fact_valid_until_blockers_shorter_than_goals() -> None:
     assert blocker_expiry < goal_expiry
 
 
+def test_fact_valid_until_has_fixed_second_precision_format() -> None:
+    from memory import _fact_valid_until
+    result = _fact_valid_until("SKILLS: Python")
+    assert len(result) == len("2026-08-22T00:00:00+00:00")
+    assert result.endswith("+00:00")
+
+
+def test_add_turns_stamps_category_and_ttl_on_new_facts(async_client) -> None:
+    import memory
+    async_client.add.return_value = {"results": [
+        {"id": "f1", "memory": "BLOCKERS: Failed Amazon interview", "event": "ADD"},
+        {"id": "f2", "memory": "GOALS: MS in US", "event": "UPDATE"},
+        {"id": "f3", "memory": "SKILLS: Java", "event": "DELETE"},
+    ]}
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = 2
+    with patch_client(async_client), mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        run(memory.add_turns(user_id=DEMO_USER, turns=[("q", "a")]))
+    name, params = supabase.rpc.call_args[0]
+    assert name == "stamp_memory_ttl"
+    assert [(f["id"], f["category"]) for f in params["facts"]] == [("f1", "BLOCKERS"), ("f2", "GOALS")]
+    assert params["facts"][0]["valid_until"] < params["facts"][1]["valid_until"]
+
+
+def test_add_turns_survives_stamping_failure(async_client) -> None:
+    import memory
+    async_client.add.return_value = {"results": [{"id": "f1", "memory": "GOALS: MS", "event": "ADD"}]}
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.side_effect = RuntimeError("DB down")
+    with patch_client(async_client), mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        assert run(memory.add_turns(user_id=DEMO_USER, turns=[("q", "a")])) == 1
+
+
 # ── search_memories ───────────────────────────────────────────────────────────
 
 def test_search_returns_context_block(async_client) -> None:
@@ -224,6 +291,119 @@ def test_search_error_degrades_gracefully(async_client) -> None:
     assert result == ""
 
 
+def _ranked_rows(*facts):
+    return [{"id": f"m{i}", "similarity": 0.8, "score": 0.9 - i / 10, "metadata": {"data": f}}
+            for i, f in enumerate(facts)]
+
+
+def test_search_ranks_inside_match_vectors(async_client) -> None:
+    import memory
+    async_client.embedding_model = mock.Mock()
+    async_client.embedding_model.embed.return_value = [0.1, 0.2]
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = _ranked_rows("GOALS: Crack GATE 2026")
+    with patch_client(async_client), \
+         mock.patch("memory.settings.MEMORY_SEARCH_RANKING_ENABLED", True), \
+         mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        result = run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY, top_k=5))
+    assert "Crack GATE 2026" in result
+    async_client.search.assert_not_called()
+    async_client.embedding_model.embed.assert_called_once_with(DEMO_QUERY, "search")
+    name, params = supabase.rpc.call_args[0]
+    assert name == "match_vectors"
+    assert params["filter"] == {"user_id": DEMO_USER}
+    assert params["match_count"] == 5 and params["candidate_count"] == 20
+    assert params["category_weights"]["BLOCKERS"] < params["category_weights"]["GOALS"]
+    assert params["dedup_threshold"] == memory.DEFAULT_RANKING.dedup_threshold
+
+
+def test_custom_ranking_is_passed_through_and_not_cached(async_client) -> None:
+    import memory
+    async_client.embedding_model = mock.Mock()
+    async_client.embedding_model.embed.return_value = [0.1, 0.2]
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = _ranked_rows("SKILLS: Python")
+    ranking = memory.SearchRanking(recency_half_life_days=30.0)
+    with patch_client(async_client), mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY, ranking=ranking))
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY, ranking=ranking))
+    assert supabase.rpc.call_count == 2
+    params = supabase.rpc.call_args[0][1]
+    assert params["recency_half_life_days"] == 30.0
+    assert params["category_weights"] is None and params["dedup_threshold"] is None
+
+
+# ── search context cache ─────────────────────────────────────────────────────
+
+def test_search_reuses_context_for_similar_query(async_client) -> None:
+    import memory
+    with patch_client(async_client):
+        first = run(memory.search_memories(user_id=DEMO_USER, query="How do I prepare for GATE CS?"))
+        second = run(memory.search_memories(user_id=DEMO_USER, query="gate cs prepare"))
+    assert first == second
+    assert async_client.search.await_count == 1
+
+
+def test_add_turn_invalidates_cached_context(async_client) -> None:
+    import memory
+    with patch_client(async_client):
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+        run(memory.add_turn(user_id=DEMO_USER, user_message="I got into IIT", assistant_message="Congrats"))
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+    assert async_client.search.await_count == 2
+
+
+def test_search_failure_is_not_cached(async_client) -> None:
+    import memory
+    async_client.search.side_effect = [RuntimeError("DB down"), async_client.search.return_value]
+    with patch_client(async_client):
+        assert run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY)) == ""
+        assert "STUDENT MEMORY" in run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+
+
+def test_context_cache_drops_result_of_search_raced_by_write() -> None:
+    from memory.context_cache import MemoryContextCache
+    cache = MemoryContextCache()
+    generation = cache.generation(DEMO_USER)
+    cache.invalidate(DEMO_USER)  # add_turn lands while the search is in flight
+    cache.put(DEMO_USER, DEMO_QUERY, "stale", generation=generation, search_secs=0.4)
+    assert cache.get(DEMO_USER, DEMO_QUERY) is None
+
+
+def test_context_cache_expires_entries() -> None:
+    from memory.context_cache import MemoryContextCache
+    cache = MemoryContextCache(ttl_secs=-1)
+    cache.put(DEMO_USER, DEMO_QUERY, "ctx", generation=cache.generation(DEMO_USER), search_secs=0.4)
+    assert cache.get(DEMO_USER, DEMO_QUERY) is None
+
+
+def test_context_cache_drops_entries_invalidated_in_another_process() -> None:
+    from memory.context_cache import MemoryContextCache
+    cache = MemoryContextCache()
+    cache.put(DEMO_USER, DEMO_QUERY, "ctx", generation=cache.generation(DEMO_USER), search_secs=0.4, shared=(0, 3))
+    assert cache.get(DEMO_USER, DEMO_QUERY, shared=(0, 3)) == ("ctx", 0.4)
+    assert cache.get(DEMO_USER, DEMO_QUERY, shared=None) == ("ctx", 0.4), "Redis down: TTL bound only"
+    assert cache.get(DEMO_USER, DEMO_QUERY, shared=(0, 4)) is None   # a worker stored new facts
+
+
+def test_add_turn_invalidates_context_in_other_processes(async_client) -> None:
+    import memory
+    from memory.context_cache import SharedGenerations
+    r = mock.AsyncMock(name="redis.asyncio.Redis")
+    r.mget.return_value = [None, "2"]
+    with patch_client(async_client), \
+         mock.patch("memory.write_queue.get_write_queue", return_value=mock.Mock(r=r)):
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+        assert async_client.search.await_count == 1
+        r.mget.return_value = [None, "3"]     # add_turns ran in a worker
+        run(memory.search_memories(user_id=DEMO_USER, query=DEMO_QUERY))
+        assert async_client.search.await_count == 2
+
+        run(memory.add_turn(user_id=DEMO_USER, user_message="I got into IIT", assistant_message="Congrats"))
+    r.incr.assert_awaited_once_with(f"{SharedGenerations.USER_KEY_PREFIX}{DEMO_USER}")
+
+
 # ── add_turn ─────────────────────────────────────────────────────────────────
 
 def test_add_turn_calls_client(async_client) -> None:
@@ -240,6 +420,45 @@ def test_add_turn_calls_client(async_client) -> None:
     assert messages[1]["role"] == "assistant"
 
 
+def test_add_turns_stores_coalesced_turns_in_one_call(async_client) -> None:
+    import memory
+    with patch_client(async_client):
+        run(memory.add_turns(user_id=DEMO_USER, turns=[("q1", "a1"), ("q2", "a2")]))
+    async_client.add.assert_awaited_once()
+    messages = async_client.add.call_args[0][0]
+    assert [m["content"] for m in messages] == ["q1", "a1", "q2", "a2"]
+
+
+def test_add_turns_propagates_errors(async_client) -> None:
+    import memory
+    async_client.add.side_effect = RuntimeError("Mem0 down")
+    with patch_client(async_client):
+        with pytest.raises(RuntimeError):
+            run(memory.add_turns(user_id=DEMO_USER, turns=[("q", "a")]))
+
+
+def test_add_turns_drops_prefiltered_turns(async_client) -> None:
+    import memory
+    from memory.prefilter import PrefilterDecision
+
+    def _decide(user_message):
+        return PrefilterDecision(user_message != "thanks", "test")
+
+    with patch_client(async_client), mock.patch("memory.prefilter.should_extract", _decide):
+        run(memory.add_turns(user_id=DEMO_USER, turns=[("thanks", "a1"), ("I got into IIT", "a2")]))
+    messages = async_client.add.call_args[0][0]
+    assert [m["content"] for m in messages] == ["I got into IIT", "a2"]
+
+
+def test_add_turns_skips_extraction_when_all_turns_filtered(async_client) -> None:
+    import memory
+    from memory.prefilter import PrefilterDecision
+    skip = PrefilterDecision(False, "smalltalk")
+    with patch_client(async_client), mock.patch("memory.prefilter.should_extract", return_value=skip):
+        assert run(memory.add_turns(user_id=DEMO_USER, turns=[("ok", "a")])) == 0
+    async_client.add.assert_not_awaited()
+
+
 def test_add_turn_no_client() -> None:
     import memory
     with patch_client(None):
@@ -307,6 +526,244 @@ def test_prune_no_client() -> None:
     assert count == 0
 
 
+def test_prune_priority_orders_by_ttl() -> None:
+    from memory import _CATEGORY_TTL_DAYS, _PRUNE_PRIORITY
+    assert _PRUNE_PRIORITY[0] == "BLOCKERS"
+    ttls = [_CATEGORY_TTL_DAYS[c] for c in _PRUNE_PRIORITY]
+    assert ttls == sorted(ttls)
+
+
+def test_prune_all_memories_reports_per_category() -> None:
+    import memory
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = [
+        {"category": "BLOCKERS", "reason": "expired", "deleted": 12},
+        {"category": "ACADEMIC", "reason": "cap", "deleted": 3},
+    ]
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        report = run(memory.prune_all_memories())
+    assert report == {"expired": {"BLOCKERS": 12}, "cap": {"ACADEMIC": 3}}
+    name, params = supabase.rpc.call_args[0]
+    assert name == "prune_student_memories"
+    assert params["max_facts_per_user"] == 150
+    assert params["category_priority"][0] == "BLOCKERS"
+
+
+def test_prune_all_memories_reports_unknown_reasons() -> None:
+    import memory
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = [
+        {"category": "GOALS", "reason": "duplicate", "deleted": 2},
+        {"category": "GOALS", "reason": "duplicate", "deleted": 1},
+    ]
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        report = run(memory.prune_all_memories())
+    assert report == {"expired": {}, "cap": {}, "duplicate": {"GOALS": 3}}
+
+
+def test_prune_all_memories_failure_returns_empty() -> None:
+    import memory
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.side_effect = RuntimeError("DB down")
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        assert run(memory.prune_all_memories()) == {}
+
+
+# ── list_memories / iter_memories ────────────────────────────────────────────
+
+def _rows(*ids):
+    return [{"id": i, "memory": f"GOALS: {i}", "created_at": f"2026-10-0{n + 1}T00:00:00+00:00"}
+            for n, i in enumerate(ids)]
+
+
+def test_list_memories_pushes_filters_and_returns_cursor() -> None:
+    import memory
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.return_value.data = _rows("m1", "m2")
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        page = run(memory.list_memories(
+            user_id=DEMO_USER, limit=2, categories=["goals"],
+            created_after=datetime(2026, 9, 1, tzinfo=timezone.utc),
+        ))
+    name, params = supabase.rpc.call_args[0]
+    assert name == "list_student_memories"
+    assert params["p_categories"] == ["GOALS"]
+    assert params["p_created_after"].startswith("2026-09-01")
+    assert params["p_cursor_id"] is None
+    assert [m["id"] for m in page.memories] == ["m1", "m2"]
+    assert memory.decode_cursor(page.next_cursor) == ("2026-10-02T00:00:00+00:00", "m2")
+
+
+def test_list_memories_rejects_malformed_cursor() -> None:
+    import memory
+    with pytest.raises(ValueError):
+        run(memory.list_memories(user_id=DEMO_USER, cursor="not-a-cursor"))
+
+
+def test_iter_memories_follows_cursor_until_short_page() -> None:
+    import memory
+    supabase = mock.Mock()
+    supabase.rpc.return_value.execute.side_effect = [
+        mock.Mock(data=_rows("m1", "m2")), mock.Mock(data=_rows("m3")),
+    ]
+
+    async def _collect():
+        return [m["id"] async for m in memory.iter_memories(user_id=DEMO_USER, page_size=2)]
+
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        assert run(_collect()) == ["m1", "m2", "m3"]
+    second = supabase.rpc.call_args_list[1][0][1]
+    assert second["p_cursor_id"] == "m2"
+
+
+def test_memories_endpoint_pages_and_streams_ndjson() -> None:
+    import json
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import memory
+    from api import mentor
+    from api.auth import get_current_user
+
+    app = FastAPI()
+    app.include_router(mentor.router, prefix="/mentor")
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": DEMO_USER}
+    client = TestClient(app)
+    rows = [{**r, "category": "GOALS", "valid_until": None, "updated_at": None} for r in _rows("m1", "m2")]
+
+    page = memory.MemoryPage(memories=rows, next_cursor="abc")
+    with mock.patch("api.mentor.list_memories", mock.AsyncMock(return_value=page)) as list_mock:
+        body = client.get("/mentor/memories?category=GOALS&limit=2").json()
+    assert list_mock.call_args.kwargs["categories"] == ["GOALS"]
+    assert body["next_cursor"] == "abc" and body["count"] == 2
+    assert body["memories"][0]["metadata"]["category"] == "GOALS"
+
+    async def _iter(**_):
+        for row in rows:
+            yield row
+
+    with mock.patch("api.mentor.iter_memories", _iter):
+        res = client.get("/mentor/memories", headers={"Accept": "application/x-ndjson"})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in res.text.splitlines()] == ["m1", "m2"]
+
+    assert client.get("/mentor/memories?cursor=%%%").status_code == 400
+
+
+# ── Digital Twin enrichment ──────────────────────────────────────────────────
+
+_NOW = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)
+
+
+def test_refresh_twin_summary_folds_delta_into_existing_summary() -> None:
+    import memory
+    changed = [{"id": "m1", "memory": "SKILLS: Learning Rust", "updated_at": "2026-10-15T10:00:00+00:00"}]
+    with mock.patch("memory.get_memories_changed_since", mock.AsyncMock(return_value=changed)) as delta, \
+         mock.patch("memory.list_memories", mock.AsyncMock()) as list_all, \
+         mock.patch("memory.enrich_twin_summary", mock.AsyncMock(return_value="new summary")) as enrich:
+        summary, mode = run(memory.refresh_twin_summary(
+            user_id=DEMO_USER, previous_summary="old summary",
+            enriched_at="2026-10-12T01:00:00+00:00", now=_NOW,
+        ))
+    assert (summary, mode) == ("new summary", "delta")
+    assert delta.await_args.kwargs["since"] == datetime(2026, 10, 12, 1, 0, tzinfo=timezone.utc)
+    assert enrich.await_args.kwargs == {"user_id": DEMO_USER, "memories": changed, "previous_summary": "old summary"}
+    list_all.assert_not_awaited()
+
+
+def test_refresh_twin_summary_rebuilds_when_missing_or_stale() -> None:
+    import memory
+    stale = (_NOW - timedelta(days=memory._TWIN_FULL_REBUILD_DAYS + 1)).isoformat()
+    for previous, enriched_at in ((None, None), ("old summary", stale)):
+        page = memory.MemoryPage(memories=[{"memory": "GOALS: GATE"}], next_cursor=None)
+        with mock.patch("memory.list_memories", mock.AsyncMock(return_value=page)), \
+             mock.patch("memory.enrich_twin_summary", mock.AsyncMock(return_value="full summary")) as enrich:
+            summary, mode = run(memory.refresh_twin_summary(
+                user_id=DEMO_USER, previous_summary=previous, enriched_at=enriched_at, now=_NOW,
+            ))
+        assert (summary, mode) == ("full summary", "full")
+        assert "previous_summary" not in enrich.await_args.kwargs
+
+
+def test_refresh_twin_summary_without_changes_skips_gemini() -> None:
+    import memory
+    with mock.patch("memory.get_memories_changed_since", mock.AsyncMock(return_value=[])), \
+         mock.patch("memory.enrich_twin_summary", mock.AsyncMock()) as enrich:
+        result = run(memory.refresh_twin_summary(
+            user_id=DEMO_USER, previous_summary="old", enriched_at="2026-10-12T01:00:00+00:00", now=_NOW,
+        ))
+    assert result == ("", "unchanged")
+    enrich.assert_not_awaited()
+
+
+def _fake_genai(generate) -> mock.Mock:
+    genai = mock.Mock(name="google.generativeai")
+    genai.GenerativeModel.return_value.generate_content_async = generate
+    genai.GenerativeModel.return_value.generate_content.side_effect = AssertionError("blocks the event loop")
+    return genai
+
+
+def _summary_response(text: str = "summary") -> mock.Mock:
+    return mock.Mock(text=text, usage_metadata=mock.Mock(prompt_token_count=120, candidates_token_count=80))
+
+
+def test_enrich_twin_summary_awaits_gemini_and_records_usage() -> None:
+    import sys
+    import memory
+    generate = mock.AsyncMock(return_value=_summary_response("  Aspiring GATE candidate.  "))
+    with mock.patch.dict(sys.modules, {"google.generativeai": _fake_genai(generate)}), \
+         mock.patch("memory.record_gemini_usage") as usage:
+        summary = run(memory.enrich_twin_summary(user_id=DEMO_USER, memories=[{"memory": "GOALS: GATE"}]))
+    assert summary == "Aspiring GATE candidate."
+    generate.assert_awaited_once()
+    usage.assert_called_once_with(memory._TWIN_MODEL, 120, 80)
+
+
+def test_twin_refreshes_run_gemini_calls_concurrently() -> None:
+    import sys
+    import memory
+    in_flight, peak = 0, 0
+
+    async def _generate(prompt):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return _summary_response()
+
+    changed = [{"id": "m1", "memory": "SKILLS: Learning Rust", "updated_at": "2026-10-15T10:00:00+00:00"}]
+
+    async def _refresh_two():
+        return await asyncio.gather(*(
+            memory.refresh_twin_summary(
+                user_id=user_id, previous_summary="old summary",
+                enriched_at="2026-10-12T01:00:00+00:00", now=_NOW,
+            )
+            for user_id in (DEMO_USER, "other-user")
+        ))
+
+    with mock.patch.dict(sys.modules, {"google.generativeai": _fake_genai(_generate)}), \
+         mock.patch("memory.get_memories_changed_since", mock.AsyncMock(return_value=changed)):
+        results = run(_refresh_two())
+    assert results == [("summary", "delta"), ("summary", "delta")]
+    assert peak == 2, "delta refreshes must overlap, not serialise on a blocking call"
+
+
+def test_get_memories_changed_since_maps_rows() -> None:
+    import memory
+    supabase = mock.Mock()
+    query = supabase.table.return_value.select.return_value.eq.return_value.gt.return_value
+    query.order.return_value.limit.return_value.execute.return_value.data = [
+        {"id": "m1", "metadata": {"data": "GOALS: MS in US", "user_id": DEMO_USER}, "updated_at": "2026-10-15"},
+    ]
+    with mock.patch("db.supabase_client.get_supabase", return_value=supabase):
+        facts = run(memory.get_memories_changed_since(user_id=DEMO_USER, since=_NOW))
+    assert facts == [{"id": "m1", "memory": "GOALS: MS in US", "updated_at": "2026-10-15"}]
+    supabase.table.return_value.select.return_value.eq.assert_called_once_with("metadata->>user_id", DEMO_USER)
+
+
 # ── Memory context in LeadMentor ──────────────────────────────────────────────
 
 def test_memory_context_in_instruction() -> None:
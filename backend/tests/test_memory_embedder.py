@@ -0,0 +1,92 @@
+"""
+Tests for the local memory embedder (memory/embedder.py).
+
+Covers:
+  - Concurrent embed() calls are coalesced into batched encoder runs
+  - Searches use query_embed, adds use passage embed
+  - Dimension mismatch with student_memories is rejected
+  - Mem0 config / factory registration for MEMORY_EMBEDDER=local
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pytest
+from mem0.configs.embeddings.base import BaseEmbedderConfig
+
+import memory.embedder as embedder_mod
+from memory.embedder import LocalEmbedding, _MicroBatcher
+
+
+class _FakeEncoder:
+    """Records batch sizes; vector[0] marks query (1.0) vs passage (0.0) embeddings."""
+
+    def __init__(self, dims: int = 768):
+        self.dims = dims
+        self.batches: list[int] = []
+        self._lock = threading.Lock()
+
+    def _vectors(self, texts, flag):
+        with self._lock:
+            self.batches.append(len(texts))
+        for _ in texts:
+            v = np.zeros(self.dims, dtype=np.float32)
+            v[0] = flag
+            yield v
+
+    def embed(self, texts, batch_size=256):
+        return self._vectors(list(texts), 0.0)
+
+    def query_embed(self, texts):
+        return self._vectors(list(texts), 1.0)
+
+
+def test_batcher_coalesces_concurrent_calls() -> None:
+    encoder = _FakeEncoder(dims=4)
+    batcher = _MicroBatcher(encoder, max_batch=16, max_wait_secs=0.05)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        vectors = list(pool.map(lambda i: batcher.embed(f"fact {i}"), range(16)))
+    assert len(vectors) == 16 and all(len(v) == 4 for v in vectors)
+    assert len(encoder.batches) < 16
+    assert sum(encoder.batches) == 16
+
+
+def test_batcher_propagates_encoder_errors() -> None:
+    encoder = _FakeEncoder(dims=4)
+    encoder.embed = mock.Mock(side_effect=RuntimeError("onnx failed"))
+    batcher = _MicroBatcher(encoder, max_batch=4, max_wait_secs=0.0)
+    with pytest.raises(RuntimeError):
+        batcher.embed("fact")
+
+
+def test_local_embedding_routes_search_to_query_embed() -> None:
+    with mock.patch.object(embedder_mod, "get_text_embedding", return_value=_FakeEncoder()):
+        emb = LocalEmbedding(BaseEmbedderConfig(model="test-model", embedding_dims=768))
+    assert emb.embed("GATE prep", "search")[0] == 1.0
+    assert emb.embed("GOALS: crack GATE", "add")[0] == 0.0
+    assert [v[0] for v in emb.embed_batch(["a", "b"], "add")] == [0.0, 0.0]
+
+
+def test_local_embedding_rejects_dimension_mismatch() -> None:
+    with mock.patch.object(embedder_mod, "get_text_embedding", return_value=_FakeEncoder(dims=384)):
+        with pytest.raises(ValueError, match="384"):
+            LocalEmbedding(BaseEmbedderConfig(model="bge-small", embedding_dims=768))
+
+
+def test_config_uses_local_embedder_when_selected() -> None:
+    from mem0.utils.factory import EmbedderFactory
+
+    from memory import _build_config
+
+    with mock.patch("memory.settings.MEMORY_EMBEDDER", "local"):
+        cfg = _build_config()
+    assert cfg["embedder"]["provider"] == embedder_mod.MEM0_PROVIDER
+    assert cfg["embedder"]["config"]["embedding_dims"] == 768
+
+    original = EmbedderFactory.provider_to_class[embedder_mod.MEM0_PROVIDER]
+    try:
+        embedder_mod.register()
+        assert EmbedderFactory.provider_to_class[embedder_mod.MEM0_PROVIDER] == "memory.embedder.LocalEmbedding"
+    finally:
+        EmbedderFactory.provider_to_class[embedder_mod.MEM0_PROVIDER] = original
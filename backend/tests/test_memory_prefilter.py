@@ -0,0 +1,68 @@
+"""
+Tests for the memory extraction pre-filter (memory/prefilter.py).
+
+Covers:
+  - Rules: acknowledgements, very short messages, generic questions are skipped
+  - First-person questions go on to the classifier
+  - Classifier threshold, with a fake encoder (no model download)
+  - Fail-open when the encoder cannot be loaded
+"""
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import memory.prefilter as prefilter
+from memory.prefilter import CategoryClassifier, should_extract
+
+
+class _KeywordEncoder:
+    """Fake fastembed encoder: category examples and career words share a direction."""
+
+    _EXAMPLES = {e for examples in prefilter.CATEGORY_EXAMPLES.values() for e in examples}
+    _CAREER = ("internship", "gate", "cgpa", "python", "b.tech")
+
+    def embed(self, texts):
+        for text in texts:
+            career = text in self._EXAMPLES or any(word in text.lower() for word in self._CAREER)
+            yield np.array([1.0, 0.1] if career else [0.1, 1.0], dtype=np.float32)
+
+
+@pytest.fixture
+def classifier():
+    clf = CategoryClassifier(_KeywordEncoder())
+    with mock.patch.object(prefilter, "get_classifier", return_value=clf):
+        yield clf
+
+
+@pytest.mark.parametrize("message", ["ok", "Thanks!!", "ok thank you", "haan ji", "  "])
+def test_smalltalk_is_skipped(message) -> None:
+    assert should_extract(message).reason == "smalltalk"
+
+
+def test_short_message_is_skipped() -> None:
+    decision = should_extract("sounds fine")
+    assert not decision.extract and decision.reason == "too_short"
+
+
+def test_generic_question_is_skipped() -> None:
+    decision = should_extract("What is dynamic programming?")
+    assert not decision.extract and decision.reason == "question"
+
+
+def test_first_person_question_reaches_classifier(classifier) -> None:
+    decision = should_extract("Should I take the GATE exam after my B.Tech?")
+    assert decision.extract and decision.reason == "classifier_match"
+
+
+def test_classifier_skips_off_topic_statement(classifier) -> None:
+    decision = should_extract("the weather is really hot in Chennai today")
+    assert not decision.extract
+    assert decision.reason == "classifier_miss"
+    assert decision.score < prefilter._CLASSIFIER_THRESHOLD
+
+
+def test_fails_open_without_classifier() -> None:
+    with mock.patch.object(prefilter, "get_classifier", return_value=None):
+        decision = should_extract("I have an internship offer from Zoho")
+    assert decision.extract and decision.reason == "classifier_unavailable"
@@ -0,0 +1,127 @@
+"""
+Tests for the durable memory write-behind queue.
+
+Covers:
+  - Per-user coalescing (one add_turns call per student, conversation order kept)
+  - Backpressure: turns are shed once the backlog limit is reached
+  - process(): stored turns are acked; failed turns stay pending for retry
+  - reclaim(): exponential backoff on re-claims, dead-lettering after max attempts
+  - producer-only start (PROCESS_ROLE=web) reads nothing
+"""
+import asyncio
+from unittest import mock
+
+import pytest
+
+import memory.write_queue as wq
+from memory.write_queue import MemoryWriteQueue, QueuedTurn, coalesce, retry_delay
+
+USER_A = "550e8400-e29b-41d4-a716-446655440000"
+USER_B = "660e8400-e29b-41d4-a716-446655440000"
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _turn(ms: int, user_id: str = USER_A, text: str = "msg") -> QueuedTurn:
+    return QueuedTurn(f"{ms}-0", user_id, text, f"reply to {text}", "mentor")
+
+
+def _fields(user_id: str = USER_A) -> dict:
+    return {"user_id": user_id, "user_message": "hi", "assistant_message": "hello", "cache_namespace": ""}
+
+
+@pytest.fixture
+def fake_redis():
+    return mock.AsyncMock(name="redis.asyncio.Redis")
+
+
+@pytest.fixture
+def queue(fake_redis):
+    return MemoryWriteQueue(fake_redis, concurrency=2, max_backlog=3, consumer="test")
+
+
+def test_coalesce_groups_by_user_in_order() -> None:
+    turns = [_turn(3, USER_A, "c"), _turn(1, USER_A, "a"), _turn(2, USER_B, "b")]
+    groups = coalesce(turns)
+    assert [t.user_message for t in groups[USER_A]] == ["a", "c"]
+    assert [t.user_message for t in groups[USER_B]] == ["b"]
+
+
+def test_retry_delay_backs_off_and_caps() -> None:
+    assert retry_delay(1) < retry_delay(2) < retry_delay(3)
+    assert retry_delay(50) == wq._RETRY_MAX_SECS
+
+
+def test_enqueue_sheds_when_backlog_full(queue, fake_redis) -> None:
+    results = [
+        run(queue.enqueue(user_id=USER_A, user_message="m", assistant_message="r"))
+        for _ in range(4)
+    ]
+    assert results == ["queued", "queued", "queued", "shed"]
+    assert fake_redis.xadd.await_count == 3
+
+
+def test_process_coalesces_and_acks_stored(queue, fake_redis) -> None:
+    turns = [_turn(1, USER_A, "a"), _turn(2, USER_B, "b"), _turn(3, USER_A, "c")]
+    add_turns = mock.AsyncMock(return_value=2)
+    with mock.patch("memory.add_turns", add_turns), \
+         mock.patch.object(queue, "_update_semantic_cache", mock.AsyncMock()):
+        run(queue.process(turns))
+    assert add_turns.await_count == 2
+    calls = {c.kwargs["user_id"]: c.kwargs["turns"] for c in add_turns.await_args_list}
+    assert calls[USER_A] == [("a", "reply to a"), ("c", "reply to c")]
+    acked = fake_redis.xack.await_args.args[2:]
+    assert sorted(acked) == ["1-0", "2-0", "3-0"]
+
+
+def test_process_leaves_failed_user_pending(queue, fake_redis) -> None:
+    async def _add_turns(*, user_id, turns):
+        if user_id == USER_B:
+            raise RuntimeError("Mem0 down")
+        return 1
+
+    with mock.patch("memory.add_turns", _add_turns), \
+         mock.patch.object(queue, "_update_semantic_cache", mock.AsyncMock()) as update_cache:
+        run(queue.process([_turn(1, USER_A), _turn(2, USER_B)]))
+    assert fake_redis.xack.await_args.args[2:] == ("1-0",)
+    update_cache.assert_awaited_once()
+
+
+def test_reclaim_respects_backoff_and_dead_letters(queue, fake_redis) -> None:
+    base_ms = int(wq._RETRY_BASE_SECS * 1000)
+    fake_redis.xpending_range.return_value = [
+        {"message_id": "1-0", "times_delivered": 1, "time_since_delivered": base_ms},          # due
+        {"message_id": "2-0", "times_delivered": 3, "time_since_delivered": base_ms},          # backing off
+        {"message_id": "3-0", "times_delivered": wq._MAX_ATTEMPTS, "time_since_delivered": 10**9},  # exhausted
+    ]
+    fake_redis.xclaim.return_value = [("1-0", _fields()), ("3-0", _fields())]
+    with mock.patch.object(queue, "process", mock.AsyncMock()) as process:
+        retried = run(queue.reclaim())
+
+    assert retried == 1
+    assert fake_redis.xclaim.await_args.kwargs["message_ids"] == ["1-0", "3-0"]
+    assert [t.message_id for t in process.await_args.args[0]] == ["1-0"]
+    fake_redis.xadd.assert_awaited_once()
+    assert fake_redis.xadd.await_args.args[0] == wq.DEAD_LETTER_KEY
+    fake_redis.xack.assert_awaited_once_with(wq.STREAM_KEY, wq.GROUP, "3-0")
+
+
+def test_producer_only_start_does_not_consume(fake_redis) -> None:
+    async def _main():
+        queue = MemoryWriteQueue(fake_redis, concurrency=2, max_backlog=3, consumer="web")
+        fake_redis.xinfo_groups.return_value = []
+        await queue.start(consume=False)
+        await asyncio.sleep(0)
+        names = [t.get_name() for t in queue._tasks]
+        for t in queue._tasks:
+            t.cancel()
+        return names
+
+    assert run(_main()) == ["memory-queue-reclaimer"]
+    fake_redis.xreadgroup.assert_not_called()
@@ -0,0 +1,170 @@
+"""
+Tests for resumable re-embedding (memory/reembed.py, services/cache_reembed.py).
+
+Covers:
+  - student_memories: keyset pages, page + checkpoint committed together,
+    resume from the stored last_id, catch-up and column swap inside switch();
+    Google embedder splits a page into requests of at most 100 inputs
+  - semantic cache: SCAN pages written to the target field, cursor checkpoint
+    and resume, only_missing, index name/schema for a non-default field
+"""
+import json
+from unittest import mock
+
+import numpy as np
+
+import memory.reembed as reembed
+from memory.reembed import MemoryReembedder
+from services.cache_index import build_schema, index_name
+from services.cache_reembed import checkpoint_key, fill_field
+from services.cache_vectors import VectorIndexConfig, decode_rescore_vector
+
+
+# ── student_memories ─────────────────────────────────────────────────────────
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.conn.statements.append((sql, params))
+        if sql.startswith("select model, dims, last_id"):
+            self._result = [self.conn.run] if self.conn.run else []
+        elif sql.startswith("select id, metadata->>'data'"):
+            after, limit = params
+            null_only = "is null" in sql
+            rows = [(i, t) for i, t in self.conn.rows if i > after and (not null_only or i in self.conn.stragglers)]
+            self._result = rows[:limit]
+        elif sql.startswith("update memory_reembed_runs set last_id"):
+            last_id, done, _ = params
+            self.conn.pending_run = (self.conn.run[0], self.conn.run[1], last_id, done, self.conn.run[4])
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+
+class _FakeConn:
+    def __init__(self, rows, run=None, stragglers=()):
+        self.rows = rows
+        self.run = run
+        self.stragglers = set(stragglers)
+        self.pending_run = None
+        self.statements = []
+        self.commits = 0
+        self.autocommit = False
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        if self.pending_run:
+            self.run, self.pending_run = self.pending_run, None
+
+
+def _embed(texts):
+    return [[float(len(t)), 0.5] for t in texts]
+
+
+def _reembedder(conn, batch_size=2):
+    return MemoryReembedder(conn, _embed, run_id="r1", model="m", dims=2, batch_size=batch_size)
+
+
+def test_fill_commits_each_page_with_its_checkpoint() -> None:
+    rows = [(f"id{i}", f"fact {i}") for i in range(5)]
+    conn = _FakeConn(rows, run=("m", 2, "", 0, "filling"))
+    checkpoint = _reembedder(conn).fill()
+    assert (checkpoint.last_id, checkpoint.rows_done) == ("id4", 5)
+    assert conn.commits == 3   # pages of 2, 2, 1
+    writes = [p for s, p in conn.statements if s.startswith("update student_memories m set embedding_next")]
+    assert [len(json.loads(p[0])) for p in writes] == [2, 2, 1]
+    assert json.loads(writes[0][0])[0] == {"id": "id0", "embedding": "[6,0.5]"}
+
+
+def test_fill_resumes_after_checkpoint() -> None:
+    rows = [(f"id{i}", f"fact {i}") for i in range(5)]
+    conn = _FakeConn(rows, run=("m", 2, "id2", 3, "filling"))
+    checkpoint = _reembedder(conn, batch_size=10).fill()
+    assert checkpoint.rows_done == 5
+    selects = [p for s, p in conn.statements if s.startswith("select id, metadata->>'data'")]
+    assert selects[0] == ("id2", 10)
+
+
+def test_switch_catches_up_and_swaps_columns_in_one_transaction() -> None:
+    rows = [(f"id{i}", f"fact {i}") for i in range(3)]
+    conn = _FakeConn(rows, run=("m", 2, "id2", 3, "indexed"), stragglers={"id1"})
+    assert _reembedder(conn).switch() == 1
+    sql = [s for s, _ in conn.statements]
+    assert sql[0].startswith("lock table student_memories")
+    assert "alter table student_memories rename column embedding to embedding_prev" in sql
+    assert "alter table student_memories rename column embedding_next to embedding" in sql
+    assert any("query_embedding vector(2)" in s for s in sql)
+    assert conn.commits == 1
+
+
+# ── Semantic cache ───────────────────────────────────────────────────────────
+
+def test_google_embed_fn_chunks_pages_to_api_limit() -> None:
+    import sys
+    genai = mock.Mock(name="google.generativeai")
+    genai.embed_content.side_effect = lambda model, content, task_type: {
+        "embedding": [[float(len(content))] for _ in content]
+    }
+    with mock.patch.dict(sys.modules, {"google.generativeai": genai}):
+        embed = reembed.embed_fn("google", "models/text-embedding-004")
+        vectors = embed([f"fact {i}" for i in range(250)])
+    sizes = [len(c.kwargs["content"]) for c in genai.embed_content.call_args_list]
+    assert sizes == [100, 100, 50]
+    assert len(vectors) == 250 and vectors[-1] == [50.0]
+
+
+def test_cache_fill_writes_target_field_and_checkpoints() -> None:
+    config = VectorIndexConfig(dim=2, field="embedding_v2", vector_type="INT8")
+    entries = {b"cache:semantic:a": [b"what is gate", None], b"cache:semantic:b": [b"ncert", b"old"]}
+    r = mock.Mock(name="redis.Redis")
+    r.hgetall.return_value = {}
+    r.scan.side_effect = [(7, [b"cache:semantic:a"]), (0, [b"cache:semantic:b"])]
+    read, write = mock.Mock(name="read"), mock.Mock(name="write")
+    r.pipeline.side_effect = [read, write, read, write]
+    read.execute.side_effect = [[entries[b"cache:semantic:a"]], [entries[b"cache:semantic:b"]]]
+    embed = mock.Mock(side_effect=lambda texts: [np.array([1.0, 0.0], dtype=np.float32) for _ in texts])
+
+    report = fill_field(r, embed, config, only_missing=True)
+
+    assert (report.scanned, report.embedded) == (2, 1)           # b already has the field
+    embed.assert_called_once_with(["what is gate"])
+    key, kwargs = write.hset.call_args.args[0], write.hset.call_args.kwargs
+    assert key == b"cache:semantic:a"
+    assert set(kwargs["mapping"]) == {"embedding_v2", "embedding_v2_rescore"}
+    assert decode_rescore_vector(kwargs["mapping"]["embedding_v2_rescore"]).tolist() == [1.0, 0.0]
+    r.hset.assert_called_once_with(checkpoint_key("embedding_v2"), mapping={"cursor": 7, "scanned": 1, "embedded": 1})
+    r.delete.assert_called_once_with(checkpoint_key("embedding_v2"))
+
+
+def test_cache_fill_resumes_from_checkpoint_cursor() -> None:
+    config = VectorIndexConfig(dim=2, field="embedding_v2")
+    r = mock.Mock(name="redis.Redis")
+    r.hgetall.return_value = {b"cursor": b"42", b"scanned": b"10", b"embedded": b"9"}
+    r.scan.return_value = (0, [])
+    report = fill_field(r, mock.Mock(), config)
+    assert r.scan.call_args.kwargs["cursor"] == 42
+    assert (report.scanned, report.embedded) == (10, 9)
+
+
+def test_index_for_new_field_is_separate_and_aliased() -> None:
+    config = VectorIndexConfig(dim=768, field="embedding_bge_base")
+    assert index_name() == "idx:semantic_cache:v2"
+    assert index_name(field="embedding_bge_base") == "idx:semantic_cache:v2:embedding_bge_base"
+    vector = build_schema(config)[-1].redis_args()
+    assert vector[:3] == ["embedding_bge_base", "AS", "embedding"]
@@ -7,10 +7,12 @@ from redis.commands.search.query import Query
 # Add backend to path
 sys.path.append(os.path.join(os.getcwd(), 'backend'))
 
-from services.semantic_cache import cache
+from services.semantic_cache import init_cache
 from core.config import settings
 
 def test_cache():
+    cache = init_cache()
+    assert cache is not None, "Redis not reachable"
     print(f"Testing Semantic Cache using Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
     
     q1 = "how to become a software engineer in India"
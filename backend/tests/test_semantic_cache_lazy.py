@@ -0,0 +1,62 @@
+"""
+Tests for lazy, background-initialised SemanticCache.
+
+Covers:
+  - Importing the module does not build the cache (no model load / Redis I/O)
+  - init_cache: idempotent, returns None when construction fails
+  - warm_up_cache: retries until Redis comes back, gives up after max_attempts
+"""
+import asyncio
+from unittest import mock
+
+import pytest
+
+import services.semantic_cache as sc
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_singleton():
+    sc._cache = None
+    yield
+    sc._cache = None
+
+
+def test_import_does_not_build_cache() -> None:
+    assert sc.get_cache() is None
+
+
+def test_init_cache_is_idempotent() -> None:
+    with mock.patch.object(sc, "SemanticCache") as cls:
+        first = sc.init_cache()
+        second = sc.init_cache()
+    assert first is second
+    cls.assert_called_once_with()
+    assert sc.get_cache() is first
+
+
+def test_init_cache_returns_none_when_redis_down() -> None:
+    with mock.patch.object(sc, "SemanticCache", side_effect=ConnectionError("redis down")):
+        assert sc.init_cache() is None
+    assert sc.get_cache() is None
+
+
+def test_warm_up_retries_until_ready() -> None:
+    ready = mock.Mock(name="SemanticCache()")
+    with mock.patch.object(sc, "SemanticCache", side_effect=[ConnectionError("down"), ready]):
+        run(sc.warm_up_cache(retry_secs=0, max_attempts=3))
+    assert sc.get_cache() is ready
+
+
+def test_warm_up_gives_up_after_max_attempts() -> None:
+    with mock.patch.object(sc, "SemanticCache", side_effect=ConnectionError("down")) as cls:
+        run(sc.warm_up_cache(retry_secs=0, max_attempts=2))
+    assert cls.call_count == 2
+    assert sc.get_cache() is None
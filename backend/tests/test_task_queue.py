@@ -0,0 +1,114 @@
+"""
+Tests for the shared web → worker task queue (services/task_queue.py).
+
+Covers:
+  - enqueue(): name, JSON args and fencing token on the stream entry
+  - process(): handler runs under the task's fence; acked on success,
+    left pending on failure; unknown tasks are dead-lettered
+  - reclaim(): due tasks are retried only into free slots; dead-lettered
+    after max attempts
+  - max_attempts=1 handlers are dead-lettered on failure or orphaning, never re-run
+  - producer-only start runs no consumer loops
+"""
+import asyncio
+import json
+from unittest import mock
+
+import services.task_queue as tq
+from services.leader import current_fence
+from services.task_queue import Task, TaskQueue, retry_delay
+
+
+def _queue(concurrency: int = 2) -> TaskQueue:
+    return TaskQueue(mock.AsyncMock(name="redis.asyncio.Redis"), concurrency=concurrency, consumer="w1")
+
+
+def _fields(name: str = "monthly_reports", **args) -> dict:
+    return {"name": name, "args": json.dumps(args), "fence": "7"}
+
+
+def test_enqueue_writes_name_args_and_fence() -> None:
+    queue = _queue()
+    queue.r.xadd.return_value = "1-0"
+    assert asyncio.run(queue.enqueue("weekly_snapshots", {"hour": 19}, fence=4)) == "1-0"
+    stream, fields = queue.r.xadd.call_args.args
+    assert stream == tq.STREAM_KEY
+    assert fields == {"name": "weekly_snapshots", "args": '{"hour": 19}', "fence": "4"}
+    assert Task.from_entry("1-0", fields) == Task("1-0", "weekly_snapshots", {"hour": 19}, 4)
+
+
+def test_process_runs_handler_under_fence_and_acks() -> None:
+    queue = _queue()
+    seen = []
+
+    async def _job(hour):
+        seen.append((hour, current_fence()))
+
+    queue.register("weekly_snapshots", _job)
+    assert asyncio.run(queue.process(Task("5-0", "weekly_snapshots", {"hour": 19}, fence=7)))
+    assert seen == [(19, 7)]
+    queue.r.xack.assert_awaited_once_with(tq.STREAM_KEY, tq.GROUP, "5-0")
+
+
+def test_failed_task_stays_pending_and_unknown_is_dead_lettered() -> None:
+    queue = _queue()
+    queue.register("monthly_reports", mock.AsyncMock(side_effect=RuntimeError("Gemini down")))
+    assert not asyncio.run(queue.process(Task("5-0", "monthly_reports", {})))
+    queue.r.xack.assert_not_awaited()
+
+    assert not asyncio.run(queue.process(Task("6-0", "no_such_job", {})))
+    assert queue.r.xadd.call_args.args[0] == tq.DEAD_LETTER_KEY
+    queue.r.xack.assert_awaited_once_with(tq.STREAM_KEY, tq.GROUP, "6-0")
+
+
+def test_reclaim_retries_into_free_slots_and_dead_letters_exhausted() -> None:
+    async def _main():
+        queue = _queue(concurrency=1)
+        job = mock.AsyncMock()
+        queue.register("monthly_reports", job)
+        due_ms = retry_delay(tq._MAX_ATTEMPTS) * 1000
+        queue.r.xpending_range.return_value = [
+            {"message_id": "1-0", "times_delivered": tq._MAX_ATTEMPTS, "time_since_delivered": due_ms},
+            {"message_id": "2-0", "times_delivered": 1, "time_since_delivered": due_ms},
+            {"message_id": "3-0", "times_delivered": 1, "time_since_delivered": due_ms},
+        ]
+        queue.r.xclaim.side_effect = lambda *a, message_ids, **kw: [(message_ids[0], _fields())]
+        started = await queue.reclaim()
+        await asyncio.sleep(0)
+        return queue, job, started
+
+    queue, job, started = asyncio.run(_main())
+    assert started == 1                      # one slot: 3-0 waits for the next pass
+    job.assert_awaited_once()
+    assert queue.r.xadd.call_args.args[0] == tq.DEAD_LETTER_KEY
+    assert [c.kwargs["message_ids"] for c in queue.r.xclaim.call_args_list] == [["1-0"], ["2-0"]]
+
+
+def test_non_retryable_task_is_dead_lettered_not_rerun() -> None:
+    queue = _queue()
+    job = mock.AsyncMock(side_effect=RuntimeError("Twilio down"))
+    queue.register("weekly_snapshots", job, max_attempts=1)
+    assert not asyncio.run(queue.process(Task("5-0", "weekly_snapshots", {"hour": 19})))
+    assert queue.r.xadd.call_args.args[0] == tq.DEAD_LETTER_KEY
+    queue.r.xack.assert_awaited_once_with(tq.STREAM_KEY, tq.GROUP, "5-0")
+
+    # Orphaned by a dead or stopped worker: first delivery already counts as the only attempt
+    queue.r.reset_mock()
+    queue.r.xpending_range.return_value = [
+        {"message_id": "6-0", "times_delivered": 1, "time_since_delivered": retry_delay(1) * 1000},
+    ]
+    queue.r.xclaim.return_value = [("6-0", _fields("weekly_snapshots", hour=19))]
+    assert asyncio.run(queue.reclaim()) == 0
+    assert job.await_count == 1
+    assert queue.r.xadd.call_args.args[0] == tq.DEAD_LETTER_KEY
+
+
+def test_producer_only_start_runs_no_consumer() -> None:
+    async def _main():
+        queue = _queue()
+        await queue.start(consume=False)
+        return queue
+
+    queue = asyncio.run(_main())
+    assert not queue.consuming and queue.healthy
+    queue.r.xreadgroup.assert_not_called()
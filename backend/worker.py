@@ -0,0 +1,71 @@
+"""
+SARGVISION AI — background worker
+Entry point: python -m worker
+
+Runs everything that is not request handling, so heavy jobs no longer share
+an event loop with the API:
+  - APScheduler cron triggers (leader-elected across workers, scheduler.py)
+  - the shared task queue consumer that runs the triggered jobs
+    (WORKER_CONCURRENCY at once, services/task_queue.py)
+  - the memory write-behind queue consumer (memory/write_queue.py)
+
+API instances with PROCESS_ROLE=web only enqueue; workers and API replicas
+scale independently. GET /health (503 when the task consumer is down) and
+GET /metrics are served on WORKER_PORT.
+"""
+import logging
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from prometheus_fastapi_instrumentator import Instrumentator
+
+from core.config import settings
+from memory.write_queue import get_write_queue, start_write_queue, stop_write_queue
+from scheduler import JOB_MAX_ATTEMPTS, JOBS, scheduler_status, start_scheduler, stop_scheduler
+from services.semantic_cache import start_cache_warmup
+from services.task_queue import get_task_queue, start_task_queue, stop_task_queue
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("🛠️ SARGVISION worker starting in %s mode (concurrency %d)",
+                settings.ENV.upper(), settings.WORKER_CONCURRENCY)
+    await start_task_queue(JOBS, consume=True, max_attempts=JOB_MAX_ATTEMPTS)
+    await start_scheduler()
+    # The memory queue writes mentor answers to the semantic cache
+    cache_warmup = start_cache_warmup()
+    await start_write_queue(consume=True)
+    yield
+    await stop_scheduler()
+    await stop_write_queue()
+    await stop_task_queue()
+    cache_warmup.cancel()
+
+
+app = FastAPI(title="SARGVISION AI Worker", docs_url=None, redoc_url=None, lifespan=lifespan)
+Instrumentator().instrument(app).expose(app)
+
+
+@app.get("/health")
+async def health():
+    tasks = get_task_queue()
+    healthy = tasks is not None and tasks.healthy
+    body = {
+        "status": "ok" if healthy else "degraded",
+        "service": "sargvision-worker",
+        "consumer": tasks.consumer if tasks else None,
+        "tasks_in_flight": tasks.in_flight if tasks else 0,
+        "concurrency": settings.WORKER_CONCURRENCY,
+        "scheduler": scheduler_status(),
+        "memory_queue": get_write_queue() is not None,
+    }
+    return JSONResponse(body, status_code=200 if healthy else 503)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    uvicorn.run(app, host="0.0.0.0", port=settings.WORKER_PORT)